@@ -0,0 +1,106 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from vision.clip_recorder import POST_ROLL, PRE_ROLL, ClipRecorder
+
+# Configuration
+VIDEO_PATH = "data/videos/surveillance.mp4"
+OUTPUT_DIR = "results/bench_clips"
+OUTPUT_PATH = "results/logs/bench_clip_recorder.json"
+DURATION = 600.0        # Secondes de "surveillance" simulées (la vidéo est rejouée en boucle)
+ALERTS_PER_HOUR = 30    # Intrusions simulées
+ALERT_SECONDS = 8.0     # Durée moyenne d'une alerte
+
+# Même flux de frames et même planning d'alertes pour les deux modes : enregistrement complet
+# (comportement actuel, un cv2.VideoWriter sur tout) et clips déclenchés par alerte.
+# On mesure le CPU total de l'étape d'écriture (copie dans le tampon comprise) et le disque.
+
+def alert_schedule(n_frames, fps, seed=0):
+    rng = np.random.default_rng(seed)
+    alert = np.zeros(n_frames, dtype=bool)
+    n_alerts = max(1, int(n_frames / fps / 3600 * ALERTS_PER_HOUR))
+    for start in rng.integers(0, n_frames, n_alerts):
+        alert[start:start + int(rng.exponential(ALERT_SECONDS) * fps) + 1] = True
+    return alert
+
+def load_frames(path):
+    cap = cv2.VideoCapture(path)
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    frames = []
+    while True:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    return frames, fps
+
+def dir_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path) if name.endswith(".mp4"))
+
+def main():
+    parser = argparse.ArgumentParser(description="Enregistrement complet vs clips déclenchés par alerte")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--pre-roll", type=float, default=PRE_ROLL)
+    parser.add_argument("--post-roll", type=float, default=POST_ROLL)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    frames, fps = load_frames(args.video)
+    height, width = frames[0].shape[:2]
+    n_frames = int(args.duration * fps)
+    alert = alert_schedule(n_frames, fps)
+    shutil.rmtree(OUTPUT_DIR, ignore_errors=True)
+    os.makedirs(OUTPUT_DIR)
+
+    # 1. Enregistrement complet
+    full_path = os.path.join(OUTPUT_DIR, "full.mp4")
+    out = cv2.VideoWriter(full_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    start = time.process_time()
+    for i in range(n_frames):
+        out.write(frames[i % len(frames)])
+    out.release()
+    full_cpu = time.process_time() - start
+    full_bytes = os.path.getsize(full_path)
+
+    # 2. Clips : pré-roll + alerte + post-roll
+    clips_path = os.path.join(OUTPUT_DIR, "clips")
+    recorder = ClipRecorder(clips_path, fps, (width, height), args.pre_roll, args.post_roll)
+    start = time.process_time()
+    for i in range(n_frames):
+        recorder.push(frames[i % len(frames)], alert[i], i)
+    recorder.close()
+    clips_cpu = time.process_time() - start
+    clips_bytes = dir_size(clips_path)
+    stats = recorder.stats()
+
+    report = {
+        'frames': n_frames, 'fps': fps, 'resolution': [width, height], 'alert_ratio': float(alert.mean()),
+        'pre_roll_s': args.pre_roll, 'post_roll_s': args.post_roll,
+        'full': {'cpu_s': full_cpu, 'bytes': full_bytes},
+        'clips': {'cpu_s': clips_cpu, 'bytes': clips_bytes, 'clips': stats['clips'],
+                  'frames_written': stats['frames_written'], 'ring_mb': stats['ring_mb']},
+        'cpu_saved_ratio': 1 - clips_cpu / full_cpu,
+        'disk_saved_ratio': 1 - clips_bytes / full_bytes,
+    }
+    print(f"   {n_frames} frames {width}x{height}, alerte {alert.mean():.1%} du temps")
+    print(f"   Complet : {full_cpu:6.1f} s CPU | {full_bytes / 1e6:7.1f} Mo")
+    print(f"   Clips   : {clips_cpu:6.1f} s CPU | {clips_bytes / 1e6:7.1f} Mo | {stats['clips']} clips, "
+          f"{stats['frames_written']} frames | tampon {stats['ring_mb']:.0f} Mo")
+    print(f"   Économie : CPU {report['cpu_saved_ratio']:.0%} | disque {report['disk_saved_ratio']:.0%}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_roi import iou_matrix, matched
+from fusion.decision_system import VIDEO_PATH
+from vision.detectors import DEFAULT_WEIGHTS, load_detector
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_detectors.json"
+CANDIDATES = [
+    "torch:" + DEFAULT_WEIGHTS['torch'],
+    "onnx:" + DEFAULT_WEIGHTS['onnx'],
+    "onnx:models/yolov8n_int8.onnx",
+    "openvino:" + DEFAULT_WEIGHTS['openvino'],
+    "openvino:models/yolov8n_int8_openvino_model",
+]
+WARMUP = 3
+
+# Référence : le chemin historique (PyTorch via ultralytics). Chaque backend est mesuré sur
+# les mêmes frames : latence par frame (p50/p95) et accord des cadres avec la référence.
+
+def run_backend(detector, frames, conf):
+    for frame in frames[:WARMUP]:
+        detector(frame, conf=conf, classes=0)
+    boxes, scores, latencies = [], [], []
+    for frame in frames:
+        start = time.perf_counter()
+        result = detector(frame, conf=conf, classes=0)[0]
+        latencies.append(time.perf_counter() - start)
+        boxes.append(result.boxes.xyxy.cpu().numpy())
+        scores.append(result.boxes.conf.cpu().numpy())
+    return boxes, scores, np.array(latencies)
+
+def mean_best_iou(reference, boxes):
+    # IoU moyen entre chaque cadre de référence et son meilleur correspondant
+    values = [iou_matrix(r, b).max(axis=1) for r, b in zip(reference, boxes) if len(r) and len(b)]
+    return float(np.concatenate(values).mean()) if values else None
+
+def main():
+    parser = argparse.ArgumentParser(description="Précision vs latence des backends du détecteur")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--max-frames", type=int, default=200)
+    parser.add_argument("--conf", type=float, default=0.5)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--models", nargs="+", default=CANDIDATES, help="Liste backend:chemin")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"❌ Vidéo introuvable : {args.video}")
+    frames = []
+    while len(frames) < args.max_frames:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame)
+    cap.release()
+    print(f"🎥 {len(frames)} frames de {args.video}")
+
+    report = {'video': args.video, 'frames': len(frames), 'conf': args.conf, 'threads': args.threads, 'backends': []}
+    reference = None
+    for spec in args.models:
+        backend, weights = spec.split(":", 1)
+        if backend != "torch" and not os.path.exists(weights):
+            print(f"   ⏭️  {spec} absent, ignoré (voir src/vision/export_detector.py)")
+            continue
+        try:
+            detector = load_detector(backend, weights, args.threads)
+        except ImportError as e:
+            print(f"   ⏭️  {spec} : {e}")
+            continue
+        boxes, scores, latency = run_backend(detector, frames, args.conf)
+        if reference is None:
+            reference = boxes
+        n_ref = sum(len(b) for b in reference)
+        n_boxes = sum(len(b) for b in boxes)
+        found = sum(matched(r, b) for r, b in zip(reference, boxes))
+        entry = {
+            'backend': backend,
+            'weights': weights,
+            'size_mb': (os.path.getsize(weights) if os.path.isfile(weights) else
+                        sum(os.path.getsize(os.path.join(weights, f)) for f in os.listdir(weights))) / 1e6,
+            'latency_ms_p50': float(np.percentile(latency, 50) * 1000),
+            'latency_ms_p95': float(np.percentile(latency, 95) * 1000),
+            'fps': float(len(latency) / latency.sum()),
+            'boxes': n_boxes,
+            'box_recall': found / n_ref if n_ref else 1.0,
+            'box_precision': found / n_boxes if n_boxes else 1.0,
+            'mean_iou': mean_best_iou(reference, boxes),
+        }
+        report['backends'].append(entry)
+        print(f"   {backend:<8} {os.path.basename(weights.rstrip('/')):<32} p50 {entry['latency_ms_p50']:6.1f} ms | "
+              f"p95 {entry['latency_ms_p95']:6.1f} ms | {entry['fps']:5.1f} FPS | "
+              f"rappel {entry['box_recall']:.3f} | précision {entry['box_precision']:.3f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import argparse
+import datetime
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from fusion.event_store import EventStore, apply_retention, connect, last_night, query
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_event_store.json"
+DB_PATH = "results/logs/bench_events.db"
+JSONL_PATH = "results/logs/bench_events.jsonl"
+EVENTS = 2_000_000
+DAYS = 30
+CAMERAS = [f"cam{i}" for i in range(8)]
+ZONES = ["zone_bas", "porte", "parking", "quai"]
+QUERY_REPEATS = 20
+
+# Journal synthétique de DAYS jours (détections, lectures IoT, alertes début/fin) sur plusieurs
+# caméras : débit d'insertion par lots, puis "toutes les alertes de la zone X la nuit dernière"
+# via les index, comparé au balayage d'un journal .jsonl équivalent.
+
+def synthetic_rows(n, end, seed=0):
+    rng = np.random.default_rng(seed)
+    ts = np.sort(rng.uniform(end - DAYS * 86400, end, n))
+    kinds = rng.choice(['detection', 'iot', 'alert'], n, p=[0.8, 0.19, 0.01])
+    cameras = rng.integers(0, len(CAMERAS), n)
+    zones = rng.integers(0, len(ZONES), n)
+    scores = rng.random(n).round(3)
+    for i in range(n):
+        kind = kinds[i]
+        zone = None if kind == 'iot' else ZONES[zones[i]]
+        data = {'count': 1} if kind == 'detection' else {'state': "start" if scores[i] > 0.5 else "end"}
+        yield kind, float(ts[i]), CAMERAS[cameras[i]], zone, i, float(scores[i]), data
+
+def timed(fn, repeats):
+    times = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        result = fn()
+        times.append((time.perf_counter() - start) * 1000)
+    return result, float(np.median(times))
+
+def main():
+    parser = argparse.ArgumentParser(description="Journal d'événements SQLite : insertion et requêtes indexées")
+    parser.add_argument("--events", type=int, default=EVENTS)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    for path in (DB_PATH, DB_PATH + "-wal", DB_PATH + "-shm", JSONL_PATH):
+        if os.path.exists(path):
+            os.remove(path)
+    now = datetime.datetime.now()
+    start_night, end_night = last_night(now)
+
+    # 1. Insertion : la boucle appelante ne fait qu'empiler, le thread d'écriture regroupe
+    store = EventStore(DB_PATH)
+    start = time.perf_counter()
+    with open(JSONL_PATH, "w") as jsonl:
+        for kind, ts, camera, zone, frame, score, data in synthetic_rows(args.events, now.timestamp()):
+            store.add(kind, ts, camera, zone, frame, score, data)
+            jsonl.write(json.dumps({'kind': kind, 'ts': ts, 'camera': camera, 'zone': zone, 'frame': frame,
+                                    'score': score, 'data': data}) + "\n")
+    enqueue_s = time.perf_counter() - start
+    store.close()
+    insert_s = time.perf_counter() - start
+    print(f"   Insertion : {args.events / insert_s:,.0f} événements/s "
+          f"({args.events:,} en {insert_s:.1f} s, dont {enqueue_s:.1f} s côté appelant, JSONL compris)")
+
+    # 2. "Toutes les alertes de la zone X la nuit dernière"
+    conn = connect(DB_PATH)
+    rows, indexed_ms = timed(lambda: query(conn, 'alert', zone="zone_bas", start=start_night, end=end_night),
+                             QUERY_REPEATS)
+    plan = " | ".join(r[-1] for r in conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM events WHERE zone = ? AND kind = ? AND ts >= ? AND ts < ? ORDER BY ts",
+        ("zone_bas", 2, start_night, end_night)))
+    _, camera_ms = timed(lambda: query(conn, 'detection', camera="cam3", start=end_night - 3600, end=end_night),
+                         QUERY_REPEATS)
+
+    def scan():
+        found = 0
+        with open(JSONL_PATH) as f:
+            for line in f:
+                e = json.loads(line)
+                found += e['kind'] == 'alert' and e['zone'] == "zone_bas" and start_night <= e['ts'] < end_night
+        return found
+    scanned, scan_ms = timed(scan, 1)
+    print(f"   Alertes zone_bas la nuit dernière : {len(rows)} (scan : {scanned}) | index {indexed_ms:.2f} ms "
+          f"vs scan JSONL {scan_ms:,.0f} ms")
+    print(f"   Détections cam3, dernière heure : {camera_ms:.2f} ms | plan : {plan}")
+
+    # 3. Rétention (détections > 7 j, IoT > 30 j) puis compaction
+    size_before = os.path.getsize(DB_PATH)
+    start = time.perf_counter()
+    deleted = apply_retention(conn, {'detection': 7, 'iot': 30, 'alert': 365})
+    retention_s = time.perf_counter() - start
+    size_after = os.path.getsize(DB_PATH)
+    print(f"   Rétention : {sum(deleted.values()):,} supprimés en {retention_s:.1f} s | "
+          f"{size_before / 1e6:.0f} Mo -> {size_after / 1e6:.0f} Mo")
+    conn.close()
+
+    report = {
+        'events': args.events, 'days': DAYS,
+        'insert_per_s': args.events / insert_s, 'enqueue_s': enqueue_s, 'insert_s': insert_s,
+        'zone_night_alerts': len(rows), 'zone_night_query_ms': indexed_ms, 'jsonl_scan_ms': scan_ms,
+        'camera_hour_query_ms': camera_ms, 'query_plan': plan,
+        'retention': {'deleted': deleted, 'seconds': retention_s, 'size_mb_before': size_before / 1e6,
+                      'size_mb_after': size_after / 1e6},
+    }
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
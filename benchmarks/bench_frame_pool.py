@@ -0,0 +1,164 @@
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+import torch
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_storage import peak_rss_mb
+from vision.frame_pool import FramePool, draw_detections
+from vision.zones import ALERT_COLOR, ZoneSet
+
+# Configuration
+VIDEO_PATH = "data/videos/surveillance.mp4"
+WORK_DIR = "results/bench_frame_pool"
+OUTPUT_PATH = "results/logs/bench_frame_pool.json"
+FRAMES = 300
+RESOLUTIONS = {'360p': None, '1080p': (1920, 1080)}  # None = résolution d'origine
+BOXES = 3               # Personnes dessinées par frame (mêmes cadres dans les deux modes)
+
+# Chemin capture + annotation, avant / après la réserve de tampons :
+# - avant : cap.read() alloue une frame, results[0].plot() la recopie (deepcopy) pour dessiner,
+#   et le remplissage semi-transparent des zones passe par overlay = frame.copy() ;
+# - après : cap.read(image=tampon) dans une FramePool, cadres dessinés en place
+#   (draw_detections), mélange limité au rectangle de chaque zone (ZoneSet.draw).
+# Octets alloués par frame : pic tracemalloc pendant la frame moins l'état avant la frame
+# (numpy et OpenCV allouent les images via numpy, donc visibles). Débit mesuré sans tracemalloc.
+
+def make_video(path, size, frames):
+    # Vidéo d'essai à la résolution voulue (décodage réel, pas des frames déjà en mémoire)
+    cap = cv2.VideoCapture(VIDEO_PATH)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"❌ Vidéo introuvable : {VIDEO_PATH}")
+    fps = cap.get(cv2.CAP_PROP_FPS) or 25
+    out = None
+    for _ in range(frames):
+        ok, frame = cap.read()
+        if not ok:
+            cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+            ok, frame = cap.read()
+        if size is not None:
+            frame = cv2.resize(frame, size)
+        if out is None:
+            out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), fps, frame.shape[1::-1])
+        out.write(frame)
+    out.release()
+    cap.release()
+
+def synthetic_boxes(width, height):
+    rng = np.random.default_rng(0)
+    x = rng.uniform(0, width * 0.8, BOXES)
+    y = rng.uniform(height * 0.3, height * 0.6, BOXES)
+    boxes = np.column_stack([x, y, x + width * 0.1, y + height * 0.35]).astype(np.float32)
+    return boxes, np.full(BOXES, 0.87, dtype=np.float32)
+
+def legacy_path(path):
+    # Chemin historique : allocation au décodage + copie pour plot() + copie pour le calque des zones
+    from ultralytics.engine.results import Results
+    cap = cv2.VideoCapture(path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    zones = ZoneSet.from_config(width, height)
+    boxes, scores = synthetic_boxes(width, height)
+    data = torch.from_numpy(np.column_stack([boxes, scores, np.zeros(BOXES, dtype=np.float32)]))
+    hits = zones.hits(boxes)
+
+    def step():
+        ok, frame = cap.read()
+        if not ok:
+            return False
+        frame = Results(frame, path="", names={0: "person"}, boxes=data).plot(img=frame)
+        overlay = frame.copy()
+        for i in np.flatnonzero(hits.any(axis=0)):
+            cv2.fillPoly(overlay, [zones.polygons[i]], ALERT_COLOR)
+        cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+        return True
+    return step, cap, None
+
+def pooled_path(path):
+    cap = cv2.VideoCapture(path)
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    zones = ZoneSet.from_config(width, height)
+    boxes, scores = synthetic_boxes(width, height)
+    hits = zones.hits(boxes)
+    pool = FramePool.for_capture(cap, 2)
+
+    def step():
+        ok, frame, slot = pool.read(cap)
+        if not ok:
+            return False
+        draw_detections(frame, boxes, scores)
+        zones.draw(frame, hits, alpha=0.3)
+        pool.release(slot)
+        return True
+    return step, cap, pool
+
+def measure(factory, path, frames):
+    # 1. Débit (sans tracemalloc)
+    step, cap, _ = factory(path)
+    step()  # Échauffement (premier décodage, caches de calques)
+    start, done = time.perf_counter(), 0
+    while done < frames and step():
+        done += 1
+    fps = done / (time.perf_counter() - start)
+    cap.release()
+
+    # 2. Octets alloués par frame
+    step, cap, pool = factory(path)
+    step()
+    tracemalloc.start()
+    per_frame = []
+    for _ in range(frames):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        if not step():
+            break
+        per_frame.append(tracemalloc.get_traced_memory()[1] - before)
+    tracemalloc.stop()
+    cap.release()
+    per_frame = np.array(per_frame)
+    return {'fps': fps, 'frames': done, 'alloc_kb_per_frame': float(per_frame.mean() / 1024),
+            'alloc_kb_p95': float(np.percentile(per_frame, 95) / 1024),
+            'alloc_mb_per_s': float(per_frame.mean() * fps / 1e6),
+            'pool_misses': None if pool is None else pool.misses}
+
+def main():
+    parser = argparse.ArgumentParser(description="Capture + annotation : allocation par frame vs réserve de tampons")
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--only", choices=list(RESOLUTIONS), default=None)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+    os.makedirs(WORK_DIR)
+    report = {'frames': args.frames, 'boxes': BOXES, 'resolutions': {}}
+    for name, size in RESOLUTIONS.items():
+        if args.only and name != args.only:
+            continue
+        path = os.path.join(WORK_DIR, f"{name}.mp4")
+        make_video(path, size, args.frames + 1)
+        legacy = measure(legacy_path, path, args.frames)
+        pooled = measure(pooled_path, path, args.frames)
+        report['resolutions'][name] = {
+            'legacy': legacy, 'pooled': pooled,
+            'alloc_saved_ratio': 1 - pooled['alloc_kb_per_frame'] / legacy['alloc_kb_per_frame'],
+            'speedup': pooled['fps'] / legacy['fps'],
+        }
+        print(f"   {name:<6} avant : {legacy['fps']:6.1f} FPS | {legacy['alloc_kb_per_frame']:8.0f} Ko/frame "
+              f"({legacy['alloc_mb_per_s']:6.0f} Mo/s)")
+        print(f"   {name:<6} après : {pooled['fps']:6.1f} FPS | {pooled['alloc_kb_per_frame']:8.0f} Ko/frame "
+              f"({pooled['alloc_mb_per_s']:6.0f} Mo/s) | x{report['resolutions'][name]['speedup']:.2f}")
+    report['peak_rss_mb'] = peak_rss_mb()
+    shutil.rmtree(WORK_DIR, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from core.registry import get_iot_model
+from iot.ingestion import RATE_HZ, UDP_HOST, UDP_PORT, IngestionService, ReplayTransport, UdpTransport
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_ingestion.json"
+SENSOR_COUNTS = [1000, 2000, 5000]
+DURATION = 8.0   # Secondes mesurées par configuration
+
+# Capacité du service sur un coeur : pour chaque nombre de capteurs (10 Hz chacun), lectures
+# scorées par seconde, retard émission -> état publié (p50/p95) et part du CPU consommée.
+# UDP : le publieur tourne dans un autre processus (python src/iot/ingestion.py publish).
+
+def run(service, duration, launch=None):
+    # launch() : démarre le publieur externe une fois le port ouvert, renvoie le processus
+    service.start()
+    cpu_start, wall_start = time.process_time(), time.perf_counter()
+    try:
+        if launch is not None:
+            launch().wait()
+        else:
+            time.sleep(duration)
+        time.sleep(0.2)  # Derniers datagrammes en vol
+    finally:
+        service.stop()
+    stats = service.stats()
+    stats['cpu_ratio'] = (time.process_time() - cpu_start) / (time.perf_counter() - wall_start)
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Capacité du service d'ingestion IoT (rejeu et UDP)")
+    parser.add_argument("--sensors", type=int, nargs="+", default=SENSOR_COUNTS)
+    parser.add_argument("--rate", type=float, default=RATE_HZ)
+    parser.add_argument("--duration", type=float, default=DURATION)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    model = get_iot_model()
+    report = {'rate_hz': args.rate, 'duration_s': args.duration, 'runs': []}
+    script = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "iot", "ingestion.py")
+    for n_sensors in args.sensors:
+        for source in ("replay", "udp"):
+            if source == "replay":
+                stats = run(IngestionService(model, ReplayTransport(n_sensors, args.rate)), args.duration)
+            else:
+                cmd = [sys.executable, script, "publish", "--sensors", str(n_sensors), "--rate", str(args.rate),
+                       "--duration", str(args.duration), "--port", str(UDP_PORT)]
+                stats = run(IngestionService(model, UdpTransport(UDP_HOST, UDP_PORT)), args.duration,
+                            lambda: subprocess.Popen(cmd, stdout=subprocess.DEVNULL))
+            expected = n_sensors * args.rate
+            entry = {'source': source, 'sensors': n_sensors, 'expected_per_s': expected,
+                     'delivered_ratio': stats['scored'] / (expected * args.duration), **stats}
+            report['runs'].append(entry)
+            print(f"   {source:<6} {n_sensors:5d} capteurs : {stats['readings_per_s']:8,.0f} lectures/s "
+                  f"(attendu {expected:,.0f}, reçu {entry['delivered_ratio']:.1%}) | "
+                  f"retard p95 {stats['lag_ms_p95']:6.1f} ms | "
+                  f"CPU {stats['cpu_ratio']:.0%}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
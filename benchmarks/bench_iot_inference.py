@@ -0,0 +1,97 @@
+import argparse
+import json
+import os
+import sys
+import time
+import joblib
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from iot.fast_inference import MODEL_PATH, SCALER_PATH, compile_model
+from iot.generate_data import generate_iot_data
+from iot.storage import FEATURES
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_iot_inference.json"
+N_CALLS = 2000       # Appels "un échantillon" chronométrés
+BATCH_ROWS = 100_000  # Taille du lot pour le mode batch
+
+def load_or_train():
+    # On réutilise les artefacts de la Partie A s'ils existent, sinon petit modèle de démonstration
+    if os.path.exists(MODEL_PATH) and os.path.exists(SCALER_PATH):
+        return joblib.load(MODEL_PATH), joblib.load(SCALER_PATH)
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.preprocessing import StandardScaler
+    df = generate_iot_data(20_000)
+    scaler = StandardScaler().fit(df[FEATURES])
+    model = RandomForestClassifier(n_estimators=100, random_state=42).fit(scaler.transform(df[FEATURES]), df['label'])
+    return model, scaler
+
+def time_calls(fn, rows):
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        fn(row)
+        latencies[i] = time.perf_counter() - start
+    return {
+        'mean_us': float(latencies.mean() * 1e6),
+        'p50_us': float(np.percentile(latencies, 50) * 1e6),
+        'p99_us': float(np.percentile(latencies, 99) * 1e6),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence IoT : chemin sklearn vs moteur compilé")
+    parser.add_argument("--calls", type=int, default=N_CALLS)
+    parser.add_argument("--batch-rows", type=int, default=BATCH_ROWS)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    model, scaler = load_or_train()
+    compiled = compile_model(model, scaler)
+
+    sample = generate_iot_data(max(args.calls, args.batch_rows), seed=7)[FEATURES]
+    rows = sample.head(args.calls).values.tolist()
+
+    # 1. Chemin actuel de la fusion : DataFrame 1 ligne + transform + predict
+    def sklearn_one(row):
+        return model.predict(scaler.transform(pd.DataFrame([row], columns=FEATURES)))[0]
+
+    report = {
+        'single': {
+            'sklearn': time_calls(sklearn_one, rows),
+            'compiled': time_calls(compiled.predict_one, rows),
+        },
+        'batch': {},
+    }
+
+    # 2. Mode batch
+    X = sample.to_numpy(np.float32)[:args.batch_rows]
+    start = time.perf_counter()
+    ref = model.predict(scaler.transform(pd.DataFrame(X.astype(np.float64), columns=FEATURES)))
+    report['batch']['sklearn_rows_per_s'] = len(X) / (time.perf_counter() - start)
+    start = time.perf_counter()
+    pred = compiled.predict(X)
+    report['batch']['compiled_rows_per_s'] = len(X) / (time.perf_counter() - start)
+
+    # 3. Vérification : mêmes prédictions
+    single_ref = np.array([sklearn_one(r) for r in rows[:500]])
+    single_pred = np.array([compiled.predict_one(r) for r in rows[:500]])
+    report['agreement'] = {
+        'batch': float((ref == pred).mean()),
+        'single': float((single_ref == single_pred).mean()),
+    }
+
+    for path, stats in report['single'].items():
+        print(f"⏱️  {path:<9} un échantillon : {stats['mean_us']:8.1f} µs (p50 {stats['p50_us']:.1f}, p99 {stats['p99_us']:.1f})")
+    print(f"📦 Batch sklearn  : {report['batch']['sklearn_rows_per_s']:,.0f} lignes/s")
+    print(f"📦 Batch compilé  : {report['batch']['compiled_rows_per_s']:,.0f} lignes/s")
+    print(f"✅ Accord des prédictions : batch {report['agreement']['batch']:.4f} | unitaire {report['agreement']['single']:.4f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
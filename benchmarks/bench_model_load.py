@@ -0,0 +1,112 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+# Les benchmarks se lancent depuis la racine du projet : python benchmarks/bench_model_load.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_storage import peak_rss_mb
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_model_load.json"
+N_SAMPLES = 10_000       # Vecteurs de test pour vérifier que les deux chemins prédisent pareil
+REPEATS = 5              # Démarrages à froid mesurés par mode (médiane)
+
+# Chaque mode est mesuré dans un processus neuf (démarrage à froid, pic RSS propre)
+MODES = {
+    "joblib": "Pickle joblib + compilation (chemin historique)",
+    "forest_mmap": "Export à plat, np.load memory-mappé",
+    "forest_copy": "Export à plat, chargé en mémoire (sans mmap)",
+}
+
+def run_worker(mode, model_path, scaler_path, forest_path, samples_path):
+    import joblib
+    from iot.fast_inference import compile_model, load_forest
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "joblib":
+        model = compile_model(joblib.load(model_path), joblib.load(scaler_path))
+    elif mode == "forest_mmap":
+        model = load_forest(forest_path, mmap=True)
+    elif mode == "forest_copy":
+        model = load_forest(forest_path, mmap=False)
+    else:
+        raise ValueError(f"Mode inconnu : {mode}")
+    loaded = time.perf_counter()
+    model.predict_one([0, 40, 0, 20.5, 14])
+    first = time.perf_counter()
+    proba = model.predict_proba(np.load(samples_path))
+    np.save(samples_path.replace(".npy", f"_{mode}.npy"), proba)
+
+    print(json.dumps({'load_ms': (loaded - start) * 1000, 'first_prediction_ms': (first - loaded) * 1000,
+                      'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': baseline}))
+
+def measure(mode, *paths):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", mode, *paths]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def dir_size_mb(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(path, f)) for f in os.listdir(path)) / 1e6
+
+def main():
+    from iot.fast_inference import MODEL_PATH, SCALER_PATH, export_forest
+    import joblib
+
+    parser = argparse.ArgumentParser(description="Démarrage à froid : pickle joblib vs forêt memory-mappée")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    if not os.path.exists(args.model) or not os.path.exists(args.scaler):
+        raise FileNotFoundError("❌ Modèles IoT manquants. Lancez d'abord src/iot/train_classifier.py")
+
+    rng = np.random.default_rng(0)
+    samples = np.column_stack([rng.integers(0, 2, N_SAMPLES), rng.uniform(20, 100, N_SAMPLES),
+                               rng.integers(0, 2, N_SAMPLES), rng.uniform(15, 30, N_SAMPLES),
+                               rng.integers(0, 24, N_SAMPLES)]).astype(np.float64)
+
+    report = {'model': args.model, 'repeats': args.repeats, 'modes': {}}
+    with tempfile.TemporaryDirectory() as workdir:
+        forest_path = os.path.join(workdir, "forest")
+        header = export_forest(joblib.load(args.model), joblib.load(args.scaler), forest_path)
+        if header is None:
+            raise SystemExit("❌ Le modèle n'est pas une forêt : rien à comparer.")
+        samples_path = os.path.join(workdir, "samples.npy")
+        np.save(samples_path, samples)
+        report['disk_mb'] = {'pickle': dir_size_mb(args.model), 'forest': dir_size_mb(forest_path)}
+        report['forest'] = {k: header[k] for k in ('n_trees', 'n_nodes', 'dtypes')}
+        print(f"📦 {header['n_trees']} arbres, {header['n_nodes']:,} noeuds | disque : pickle "
+              f"{report['disk_mb']['pickle']:.1f} Mo, forêt {report['disk_mb']['forest']:.1f} Mo")
+
+        for mode, label in MODES.items():
+            runs = [measure(mode, args.model, args.scaler, forest_path, samples_path) for _ in range(args.repeats)]
+            result = {key: float(np.median([r[key] for r in runs])) for key in runs[0]}
+            report['modes'][mode] = result
+            print(f"   {label:<50} chargement {result['load_ms']:8.1f} ms | 1ère prédiction "
+                  f"{result['first_prediction_ms']:6.2f} ms | pic RSS {result['peak_rss_mb']:7.1f} Mo")
+
+        reference = np.load(samples_path.replace(".npy", "_joblib.npy"))
+        report['max_abs_diff'] = {mode: float(np.abs(np.load(samples_path.replace(".npy", f"_{mode}.npy")) -
+                                                     reference).max()) for mode in MODES}
+    print(f"   Écart max des probabilités vs joblib : {report['max_abs_diff']}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 7 and sys.argv[1] == "--worker":
+        run_worker(*sys.argv[2:])
+    else:
+        main()
@@ -0,0 +1,100 @@
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from fusion.decision_system import VIDEO_PATH
+from vision.motion_gate import METHODS, MotionGate
+from vision.zones import ZoneSet
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_motion_gate.json"
+MAX_INTERVALS = [5, 15, 30, 60]
+
+# Méthode : YOLO tourne une seule fois sur TOUTES les frames (référence). Les décisions du
+# motion gate ne dépendent que des pixels, on rejoue donc chaque configuration sans relancer
+# YOLO : une frame sautée hérite du résultat de la dernière frame réellement analysée.
+
+def reference_pass(video_path):
+    model = YOLO('yolov8n.pt')
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"❌ Vidéo introuvable : {video_path}")
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    zones = ZoneSet.from_config(width, height)
+
+    intrusions, latencies = [], []
+    while True:
+        success, frame = cap.read()
+        if not success:
+            break
+        start = time.perf_counter()
+        boxes = model(frame, conf=0.5, classes=0, verbose=False)[0].boxes.xyxy.cpu().numpy()
+        latencies.append(time.perf_counter() - start)
+        intrusions.append(bool(zones.any_hits(boxes).any()))
+    cap.release()
+    return np.array(intrusions), float(np.mean(latencies)) if latencies else 0.0
+
+def gated_pass(video_path, reference, gate):
+    cap = cv2.VideoCapture(video_path)
+    flags = np.zeros(len(reference), dtype=bool)
+    gate_time = 0.0
+    current = False
+    for i in range(len(reference)):
+        success, frame = cap.read()
+        if not success:
+            break
+        start = time.perf_counter()
+        run = gate.should_detect(frame)
+        gate_time += time.perf_counter() - start
+        if run:
+            current = reference[i]
+        flags[i] = current
+    cap.release()
+    return flags, gate_time / max(len(reference), 1)
+
+def main():
+    parser = argparse.ArgumentParser(description="Inférences économisées vs rappel d'intrusion du motion gate")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--max-intervals", type=int, nargs="+", default=MAX_INTERVALS)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    print(f"🎥 Passe de référence (YOLO sur chaque frame) : {args.video}")
+    reference, yolo_latency = reference_pass(args.video)
+    positives = int(reference.sum())
+    print(f"   {len(reference)} frames, {positives} en intrusion, YOLO {yolo_latency * 1000:.1f} ms/frame")
+
+    report = {'video': args.video, 'frames': len(reference), 'intrusion_frames': positives,
+              'yolo_ms': yolo_latency * 1000, 'configs': []}
+    for method in METHODS:
+        for max_interval in args.max_intervals:
+            gate = MotionGate(method, max_interval=max_interval)
+            flags, gate_latency = gated_pass(args.video, reference, gate)
+            recall = float((flags & reference).sum() / positives) if positives else 1.0
+            false_frames = int((flags & ~reference).sum())
+            entry = {
+                'method': method,
+                'max_interval': max_interval,
+                'saved_ratio': gate.saved_ratio(),
+                'intrusion_recall': recall,
+                'false_alert_frames': false_frames,
+                'gate_ms': gate_latency * 1000,
+            }
+            report['configs'].append(entry)
+            print(f"   🎯 {method:<4} max {max_interval:3d} : {entry['saved_ratio'] * 100:5.1f}% économisées | "
+                  f"rappel {recall:.3f} | fausses frames {false_frames} | gate {entry['gate_ms']:.2f} ms")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from iot.generate_data import generate_iot_data
+from iot.online_anomaly import OnlineAnomalyScorer
+from iot.storage import FEATURES
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_online_anomaly.json"
+HISTORY_ROWS = 50_000   # Historique d'apprentissage
+STREAM_ROWS = 20_000    # Lectures "en direct" scorées une par une
+IFOREST_CALLS = 500     # IsolationForest est lent ligne à ligne : on n'en chronomètre qu'un échantillon
+
+# Même flux pour les deux approches : latence par lecture et qualité (intrusions signalées,
+# fausses alertes) par rapport aux labels générés.
+
+def quality(flagged, labels):
+    return {'intrusion_recall': float(flagged[labels].mean()), 'false_alert_rate': float(flagged[~labels].mean())}
+
+def main():
+    parser = argparse.ArgumentParser(description="Anomalies IoT : IsolationForest batch vs détecteur en ligne")
+    parser.add_argument("--history", type=int, default=HISTORY_ROWS)
+    parser.add_argument("--stream", type=int, default=STREAM_ROWS)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    from sklearn.ensemble import IsolationForest
+    from sklearn.preprocessing import StandardScaler
+
+    history = generate_iot_data(args.history, seed=1)
+    stream = generate_iot_data(args.stream, seed=2)
+    X_hist, y_hist = history[FEATURES].to_numpy(np.float64), history['label'].to_numpy()
+    X_live, labels = stream[FEATURES].to_numpy(np.float64), stream['label'].to_numpy() == 1
+    rows = X_live.tolist()
+
+    # 1. Chemin batch actuel (anomaly_detection.py) : scaler + IsolationForest(contamination=0.3)
+    start = time.perf_counter()
+    scaler = StandardScaler().fit(X_hist)
+    forest = IsolationForest(contamination=0.3, random_state=42).fit(scaler.transform(X_hist))
+    iforest_fit = time.perf_counter() - start
+    iforest_flagged = forest.predict(scaler.transform(X_live)) == -1
+    start = time.perf_counter()
+    for row in rows[:IFOREST_CALLS]:
+        forest.predict(scaler.transform([row]))
+    iforest_us = (time.perf_counter() - start) / IFOREST_CALLS * 1e6
+
+    # 2. Détecteur en ligne : profils horaires des lectures normales, puis observe() lecture par lecture
+    start = time.perf_counter()
+    scorer = OnlineAnomalyScorer().fit(X_hist, y_hist)
+    online_fit = time.perf_counter() - start
+    online_flagged = np.empty(len(rows), dtype=bool)
+    start = time.perf_counter()
+    for i, row in enumerate(rows):
+        online_flagged[i] = scorer.observe(row)[1]
+    online_us = (time.perf_counter() - start) / len(rows) * 1e6
+
+    report = {
+        'history_rows': args.history, 'stream_rows': args.stream,
+        'isolation_forest': {'fit_s': iforest_fit, 'per_reading_us': iforest_us,
+                             **quality(iforest_flagged, labels)},
+        'online': {'fit_s': online_fit, 'per_reading_us': online_us, 'state_numbers': 25 * 4 * 2 + 25,
+                   **quality(online_flagged, labels)},
+    }
+    for name, r in (("IsolationForest (batch)", report['isolation_forest']), ("Détecteur en ligne", report['online'])):
+        print(f"   {name:<24} {r['per_reading_us']:9.1f} µs/lecture | intrusions signalées "
+              f"{r['intrusion_recall']:.1%} | fausses alertes {r['false_alert_rate']:.2%}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+from ultralytics import YOLO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from fusion.decision_system import VIDEO_PATH
+from vision.roi import IMGSZ, ROI_MARGIN, RoiCropper, detect
+from vision.zones import ZONES_PATH, ZoneSet
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_roi.json"
+IMGSZ_LIST = [640, 480, 320]
+IOU_MATCH = 0.5
+WARMUP = 3
+
+# Référence : YOLO sur la frame complète à imgsz=640. Chaque configuration (ROI ou non,
+# imgsz) est comparée à cette référence : latence par frame, cadres retrouvés (IoU >= 0.5)
+# et accord sur la décision "intrusion dans une zone" frame par frame.
+
+def iou_matrix(a, b):
+    if len(a) == 0 or len(b) == 0:
+        return np.zeros((len(a), len(b)))
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / (area_a[:, None] + area_b[None, :] - inter + 1e-9)
+
+def matched(reference, boxes):
+    # Appariement glouton : nombre de cadres de référence retrouvés
+    iou = iou_matrix(reference, boxes)
+    found = 0
+    while iou.size and iou.max() >= IOU_MATCH:
+        i, j = np.unravel_index(iou.argmax(), iou.shape)
+        iou[i, :] = 0
+        iou[:, j] = 0
+        found += 1
+    return found
+
+def run_config(model, frames, zones, roi, imgsz):
+    for frame in frames[:WARMUP]:
+        detect(model, frame, roi, imgsz, conf=0.5, classes=0)
+    boxes, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        results = detect(model, frame, roi, imgsz, conf=0.5, classes=0)
+        latencies.append(time.perf_counter() - start)
+        boxes.append(results[0].boxes.xyxy.cpu().numpy())
+    intrusions = np.array([bool(zones.any_hits(b).any()) for b in boxes])
+    return boxes, np.array(latencies), intrusions
+
+def main():
+    parser = argparse.ArgumentParser(description="Latence et accord : inférence plein cadre vs ROI des zones")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--zones", default=ZONES_PATH)
+    parser.add_argument("--max-frames", type=int, default=300)
+    parser.add_argument("--imgsz", type=int, nargs="+", default=IMGSZ_LIST)
+    parser.add_argument("--roi-margin", type=int, default=ROI_MARGIN)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    cap = cv2.VideoCapture(args.video)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"❌ Vidéo introuvable : {args.video}")
+    frames = []
+    while len(frames) < args.max_frames:
+        success, frame = cap.read()
+        if not success:
+            break
+        frames.append(frame)
+    cap.release()
+    height, width = frames[0].shape[:2]
+
+    model = YOLO('yolov8n.pt')
+    zones = ZoneSet.from_config(width, height, args.zones)
+    cropper = RoiCropper(zones, args.roi_margin)
+    print(f"🎥 {len(frames)} frames {width}x{height} | {cropper.summary()}")
+
+    ref_boxes, ref_latency, ref_intrusions = run_config(model, frames, zones, None, IMGSZ)
+    n_ref = sum(len(b) for b in ref_boxes)
+
+    report = {'video': args.video, 'frames': len(frames), 'resolution': [width, height],
+              'roi': [cropper.x0, cropper.y0, cropper.x1, cropper.y1], 'reference_boxes': n_ref, 'configs': []}
+    for use_roi in (False, True):
+        for imgsz in args.imgsz:
+            if not use_roi and imgsz == IMGSZ:
+                boxes, latency, intrusions = ref_boxes, ref_latency, ref_intrusions
+            else:
+                boxes, latency, intrusions = run_config(model, frames, zones, cropper if use_roi else None, imgsz)
+            found = sum(matched(r, b) for r, b in zip(ref_boxes, boxes))
+            n_boxes = sum(len(b) for b in boxes)
+            entry = {
+                'roi': use_roi,
+                'imgsz': imgsz,
+                'latency_ms_p50': float(np.percentile(latency, 50) * 1000),
+                'latency_ms_p95': float(np.percentile(latency, 95) * 1000),
+                'box_recall': found / n_ref if n_ref else 1.0,
+                'box_precision': found / n_boxes if n_boxes else 1.0,
+                'intrusion_agreement': float((intrusions == ref_intrusions).mean()),
+            }
+            report['configs'].append(entry)
+            print(f"   {'ROI ' if use_roi else 'FULL'} imgsz {imgsz:4d} : p50 {entry['latency_ms_p50']:6.1f} ms | "
+                  f"p95 {entry['latency_ms_p95']:6.1f} ms | rappel {entry['box_recall']:.3f} | "
+                  f"précision {entry['box_precision']:.3f} | accord intrusion {entry['intrusion_agreement']:.3f}")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
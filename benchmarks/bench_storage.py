@@ -0,0 +1,114 @@
+import argparse
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+# Les benchmarks se lancent depuis la racine du projet : python benchmarks/bench_storage.py
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+# Configuration
+SIZES = [1_000_000, 10_000_000]
+OUTPUT_PATH = "results/logs/bench_storage.json"
+
+# Chaque mode de lecture est mesuré dans un processus séparé pour que le pic RSS soit propre
+MODES = {
+    "csv_pandas": "CSV lu par pandas (chemin actuel, types inférés)",
+    "csv_schema": "CSV lu avec le schéma compact",
+    "npy_full": "Columnar .npy, toutes les colonnes",
+    "npy_projection": "Columnar .npy, 2 colonnes (sound_level, label)",
+    "npy_mmap_scan": "Columnar .npy memory-mapped, somme d'une colonne par bloc",
+}
+
+def peak_rss_mb():
+    # VmHWM est remis à zéro à l'exec (contrairement à ru_maxrss hérité du parent)
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss est en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def run_worker(mode, csv_path, npy_path):
+    import pandas as pd
+    from iot.storage import iter_iot_chunks, load_iot_data
+
+    baseline = peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "csv_pandas":
+        rows = len(pd.read_csv(csv_path))
+    elif mode == "csv_schema":
+        rows = len(load_iot_data(csv_path))
+    elif mode == "npy_full":
+        rows = len(load_iot_data(npy_path))
+    elif mode == "npy_projection":
+        rows = len(load_iot_data(npy_path, columns=['sound_level', 'label']))
+    elif mode == "npy_mmap_scan":
+        # Un bloc stocké à la fois : load_columns concaténerait (et copierait) les blocs d'un gros jeu
+        rows = 0
+        for chunk in iter_iot_chunks(npy_path, columns=['sound_level']):
+            rows += len(chunk)
+            chunk['sound_level'].to_numpy().sum(dtype='int64')
+    else:
+        raise ValueError(f"Mode inconnu : {mode}")
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({'rows': rows, 'seconds': elapsed, 'peak_rss_mb': peak_rss_mb(), 'baseline_rss_mb': baseline}))
+
+def measure(mode, csv_path, npy_path):
+    cmd = [sys.executable, os.path.abspath(__file__), "--worker", mode, csv_path, npy_path]
+    out = subprocess.run(cmd, check=True, capture_output=True, text=True).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+def prepare(n, workdir):
+    from iot.generate_data import iter_generated_chunks
+    from iot.storage import DatasetWriter
+
+    csv_path = os.path.join(workdir, f"iot_{n}.csv")
+    npy_path = os.path.join(workdir, f"iot_{n}")
+    writer = DatasetWriter(npy_path)
+    for i, chunk in enumerate(iter_generated_chunks(n, 1_000_000)):
+        chunk.to_csv(csv_path, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        writer.append(chunk)
+    writer.close()
+    return csv_path, npy_path
+
+def dir_size_mb(path):
+    if os.path.isfile(path):
+        return os.path.getsize(path) / 1e6
+    return sum(os.path.getsize(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files) / 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark CSV vs stockage columnar .npy")
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+
+    report = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in args.sizes:
+            print(f"\n📦 Préparation de {n:,} lignes...")
+            csv_path, npy_path = prepare(n, workdir)
+            report[n] = {'disk_mb': {'csv': dir_size_mb(csv_path), 'npy': dir_size_mb(npy_path)}, 'load': {}}
+            print(f"   Disque : CSV {report[n]['disk_mb']['csv']:.1f} Mo | NPY {report[n]['disk_mb']['npy']:.1f} Mo")
+            for mode, label in MODES.items():
+                result = measure(mode, csv_path, npy_path)
+                report[n]['load'][mode] = result
+                print(f"   {label:<60} {result['seconds']:8.3f} s   pic RSS {result['peak_rss_mb']:8.1f} Mo")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    if len(sys.argv) == 5 and sys.argv[1] == "--worker":
+        run_worker(*sys.argv[2:])
+    else:
+        main()
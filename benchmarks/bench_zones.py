@@ -0,0 +1,93 @@
+import argparse
+import json
+import os
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from vision.zones import ALERT_COLOR, DEFAULT_ZONES, ZoneSet
+
+# Configuration
+OUTPUT_PATH = "results/logs/bench_zones.json"
+WIDTH, HEIGHT = 1920, 1080
+DETECTIONS = [1, 10, 100]
+ZONE_COUNTS = [1, 8, 32]
+REPEATS = 200
+
+def random_zones(rng, n):
+    # Quadrilatères convexes aléatoires (coordonnées normalisées) + la zone historique
+    zones = list(DEFAULT_ZONES)
+    for i in range(n - 1):
+        cx, cy = rng.uniform(0.15, 0.85, 2)
+        rx, ry = rng.uniform(0.05, 0.15, 2)
+        angles = np.sort(rng.uniform(0, 2 * np.pi, 4))
+        points = np.stack([cx + rx * np.cos(angles), cy + ry * np.sin(angles)], axis=1)
+        zones.append({'name': f"zone_{i}", 'points': points.tolist(), 'normalized': True})
+    return zones
+
+def random_boxes(rng, n):
+    xy = rng.uniform(0, (WIDTH, HEIGHT), (n, 2))
+    wh = rng.uniform((30, 60), (150, 300), (n, 2))
+    return np.hstack([xy, np.minimum(xy + wh, (WIDTH, HEIGHT))]).astype(np.float32)
+
+def hits_loop(boxes, polygons):
+    # Ancienne méthode : un cv2.pointPolygonTest par (détection, zone)
+    hits = np.zeros((len(boxes), len(polygons)), dtype=bool)
+    for i, (x1, y1, x2, y2) in enumerate(boxes.astype(int)):
+        feet = (int((x1 + x2) / 2), int(y2))
+        for j, polygon in enumerate(polygons):
+            hits[i, j] = cv2.pointPolygonTest(polygon, feet, False) >= 0
+    return hits
+
+def draw_copy(frame, polygon, alpha=0.4):
+    # Ancienne méthode : copie complète + fillPoly + addWeighted sur toute la frame
+    overlay = frame.copy()
+    cv2.fillPoly(overlay, [polygon], ALERT_COLOR)
+    cv2.addWeighted(overlay, alpha, frame, 1 - alpha, 0, frame)
+
+def timeit(fn, repeats=REPEATS):
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    return (time.perf_counter() - start) / repeats * 1e6
+
+def main():
+    parser = argparse.ArgumentParser(description="Test d'appartenance aux zones et dessin : boucle vs masques précalculés")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    args = parser.parse_args()
+    rng = np.random.default_rng(42)
+    frame = rng.integers(0, 256, (HEIGHT, WIDTH, 3), dtype=np.uint8)
+    report = {'resolution': [WIDTH, HEIGHT], 'hits': [], 'draw': []}
+
+    print(f"🧪 Test d'appartenance ({WIDTH}x{HEIGHT})")
+    for n_zones in ZONE_COUNTS:
+        start = time.perf_counter()
+        zones = ZoneSet(random_zones(rng, n_zones), WIDTH, HEIGHT)
+        build_ms = (time.perf_counter() - start) * 1000
+        for n_boxes in DETECTIONS:
+            boxes = random_boxes(rng, n_boxes)
+            mismatches = int((hits_loop(boxes, zones.polygons) != zones.hits(boxes)).sum())
+            loop_us = timeit(lambda: hits_loop(boxes, zones.polygons))
+            vector_us = timeit(lambda: zones.hits(boxes))
+            report['hits'].append({'zones': n_zones, 'detections': n_boxes, 'build_ms': build_ms,
+                                   'loop_us': loop_us, 'vectorized_us': vector_us, 'mismatches': mismatches})
+            print(f"   {n_zones:2d} zones x {n_boxes:3d} détections : boucle {loop_us:8.1f} µs | "
+                  f"masque {vector_us:6.1f} µs | x{loop_us / vector_us:6.1f} | écarts {mismatches}")
+
+    print("🎨 Dessin d'une zone en intrusion")
+    zones = ZoneSet(random_zones(rng, 4), WIDTH, HEIGHT)
+    for index, name in enumerate(zones.names):
+        copy_us = timeit(lambda: draw_copy(frame, zones.polygons[index]), 50)
+        cached_us = timeit(lambda: zones.fill(frame, index, ALERT_COLOR), 50)
+        report['draw'].append({'zone': name, 'copy_us': copy_us, 'cached_us': cached_us})
+        print(f"   {name:<8} : copie {copy_us:8.1f} µs | calque en cache {cached_us:8.1f} µs")
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+
+if __name__ == "__main__":
+    main()
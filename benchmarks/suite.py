@@ -0,0 +1,299 @@
+import argparse
+import datetime
+import json
+import os
+import platform
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from bench_storage import peak_rss_mb
+
+# Configuration
+VIDEO_PATH = "data/videos/surveillance.mp4"
+OUTPUT_PATH = "results/logs/bench_suite.json"
+SEED = 42
+TRAIN_ROWS = 20_000      # Même ordre de grandeur que l'installation du menu, en plus stable
+BATCH_ROWS = 4096        # Taille d'un lot IoT (= BATCH_SIZE du service d'ingestion)
+REGRESSION = 0.10        # --compare : écart signalé au-delà de 10 % sur le p50 ou le débit
+
+# Suite de bout en bout, reproductible (graines fixes, même vidéo, données générées) :
+# chaque scénario tourne dans son propre processus (pic RSS propre, aucun cache partagé),
+# fait un échauffement puis N itérations chronométrées une par une. Rapport JSON stable
+# (clés triées) : débit, p50/p95/p99 et pic RSS par scénario, à comparer entre deux runs.
+
+_SCRATCH = []  # Dossiers temporaires des scénarios, supprimés à la fin du worker
+
+def _scratch_dir():
+    folder = tempfile.mkdtemp(prefix="bench_suite_")
+    _SCRATCH.append(folder)
+    return folder
+
+def _iot_frame(rows, seed=SEED):
+    from iot.generate_data import generate_iot_data
+    return generate_iot_data(rows, seed=seed)
+
+def _iot_model():
+    # Modèle entraîné ici (graine fixe) : le résultat ne dépend pas des artefacts de data/iot
+    from sklearn.ensemble import RandomForestClassifier
+    from iot.fast_inference import compile_model
+    from iot.storage import FEATURES
+    df = _iot_frame(TRAIN_ROWS)
+    model = RandomForestClassifier(n_estimators=100, random_state=SEED, n_jobs=1).fit(df[FEATURES], df['label'])
+    return compile_model(model), df[FEATURES].to_numpy(np.float64)
+
+def _frames(count):
+    import cv2
+    cap = cv2.VideoCapture(VIDEO_PATH)
+    frames = []
+    while len(frames) < count:
+        ok, frame = cap.read()
+        if not ok:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise FileNotFoundError(f"❌ Vidéo introuvable : {VIDEO_PATH}")
+    return frames
+
+# Chaque scénario renvoie (fonction appelée à chaque itération, éléments traités par appel, itérations)
+
+def scenario_generation():
+    from iot.generate_data import generate_iot_data
+    return lambda i: generate_iot_data(100_000, seed=SEED + i), 100_000, 5
+
+def scenario_preprocessing():
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from iot.storage import load_iot_data, save_iot_data
+    path = os.path.join(_scratch_dir(), "iot_data")
+    save_iot_data(_iot_frame(100_000), path)
+
+    def run(i):
+        # Même chaîne que iot/preprocess.py, sans écraser le scaler de production
+        df = load_iot_data(path)
+        X_train, X_test, _, _ = train_test_split(df.drop('label', axis=1), df['label'], test_size=0.2,
+                                                 random_state=SEED)
+        scaler = StandardScaler().fit(X_train)
+        scaler.transform(X_test)
+    return run, 100_000, 10
+
+def scenario_training():
+    from sklearn.ensemble import RandomForestClassifier
+    from iot.storage import FEATURES
+    df = _iot_frame(TRAIN_ROWS)
+    X, y = df[FEATURES], df['label']
+    return lambda i: RandomForestClassifier(n_estimators=100, random_state=SEED, n_jobs=1).fit(X, y), TRAIN_ROWS, 3
+
+def scenario_iot_single():
+    model, X = _iot_model()
+    rows = X[:5000].tolist()
+    return lambda i: model.predict_one(rows[i % len(rows)]), 1, 5000
+
+def scenario_iot_batch():
+    model, X = _iot_model()
+    batch = X[:BATCH_ROWS]
+    return lambda i: model.predict_proba(batch), BATCH_ROWS, 200
+
+def scenario_iot_replay():
+    # Rejeu d'historique (iot.replay_scoring) : forêt tabulée + règle d'alerte du moteur, par blocs de 100k
+    from iot.fast_inference import ForestTable
+    from iot.replay_scoring import AlertState, decide
+    from iot.storage import FEATURES
+    model, _ = _iot_model()
+    table = ForestTable.from_compiled(model) or model  # Table trop grande : parcours des arbres
+    X = _iot_frame(100_000, seed=SEED + 1)[FEATURES].to_numpy(np.float64)
+    state = AlertState()
+
+    def run(i):
+        ts = (i * len(X) + np.arange(len(X))) * 1.0
+        proba = table.predict_proba(X)[:, -1]
+        decide(proba, ts, state)
+    return run, len(X), 30
+
+def scenario_detection():
+    from core.registry import get_detector
+    frames = _frames(60)
+    detector = get_detector()
+    return lambda i: detector(frames[i % len(frames)], conf=0.5, classes=0, verbose=False), 1, 60
+
+def scenario_zones():
+    from vision.zones import ZoneSet
+    height, width = _frames(1)[0].shape[:2]
+    zones = ZoneSet.from_config(width, height)
+    rng = np.random.default_rng(SEED)
+    boxes = [np.sort(rng.uniform(0, [width, height, width, height], (10, 4)).reshape(10, 2, 2), axis=1).reshape(10, 4)
+             for _ in range(100)]
+    return lambda i: zones.hits(boxes[i % len(boxes)]), 10, 20_000
+
+def scenario_fusion():
+    from fusion.fusion_engine import FusionEngine
+    engine = FusionEngine(["zone_bas", "porte"])
+    rng = np.random.default_rng(SEED)
+    hits = rng.random((1000, 2)) < 0.05
+    proba = rng.random(1000)
+
+    def run(i):
+        ts = i / 30
+        engine.add_video(ts, hits[i % 1000])
+        if i % 30 == 0:
+            engine.add_iot(ts, proba[i % 1000])
+        engine.decide(ts)
+    return run, 1, 20_000
+
+def scenario_tracks():
+    from vision.track_analytics import TrackStore
+    store = TrackStore(["zone_bas", "porte"])
+    rng = np.random.default_rng(SEED)
+    # 20 personnes visibles à la fois, renouvelées en continu (IDs croissants, éviction active)
+    ids = [np.arange(i // 90, i // 90 + 20) for i in range(3000)]
+    feet = rng.uniform(0, 640, (3000, 20, 2)).astype(np.float32)
+    hits = rng.random((3000, 20, 2)) < 0.2
+    return lambda i: store.update(i / 30, ids[i % 3000] + 1000 * (i // 3000), feet[i % 3000], hits[i % 3000]), 20, 6000
+
+def scenario_encode():
+    import cv2
+    frames = _frames(30)
+    height, width = frames[0].shape[:2]
+    path = os.path.join(_scratch_dir(), "encode.mp4")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 30, (width, height))
+    return lambda i: out.write(frames[i % len(frames)]), 1, 300
+
+def scenario_profiling_hooks():
+    # Coût d'un hook laissé dans une boucle : désactivé (défaut) puis activé
+    from core import profiling
+
+    def run(i):
+        profiling.enable(i % 2 == 1)
+        for _ in range(1000):
+            with profiling.stage("bench"):
+                pass
+    return run, 1000, 400
+
+def scenario_metrics_hooks():
+    # Coût des métriques live par frame : 4 histogrammes d'étape + compteur/FPS (core.metrics)
+    from core.metrics import Metrics
+    metrics = Metrics()
+    stages = [metrics.histogram("stage_seconds", "", {'stage': name}) for name in ("decode", "infer", "fuse", "encode")]
+
+    def run(i):
+        for _ in range(1000):
+            for histogram in stages:
+                histogram.observe(0.004)
+            metrics.frame()
+    return run, 1000, 200
+
+SCENARIOS = {
+    'generation': scenario_generation,
+    'preprocessing': scenario_preprocessing,
+    'training': scenario_training,
+    'iot_single': scenario_iot_single,
+    'iot_batch': scenario_iot_batch,
+    'iot_replay': scenario_iot_replay,
+    'detection': scenario_detection,
+    'zones': scenario_zones,
+    'fusion': scenario_fusion,
+    'tracks': scenario_tracks,
+    'encode': scenario_encode,
+    'profiling_hooks': scenario_profiling_hooks,
+    'metrics_hooks': scenario_metrics_hooks,
+}
+
+def run_worker(name, scale):
+    try:
+        _run_scenario(name, scale)
+    finally:
+        for folder in _SCRATCH:
+            shutil.rmtree(folder, ignore_errors=True)
+
+def _run_scenario(name, scale):
+    setup_start = time.perf_counter()
+    fn, items, iterations = SCENARIOS[name]()
+    setup_s = time.perf_counter() - setup_start
+    iterations = max(int(iterations * scale), 2)
+    fn(0)  # Échauffement (caches, allocations, premier appel)
+    latencies = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        fn(i + 1)
+        latencies[i] = time.perf_counter() - start
+    result = summarize(latencies, items)
+    result.update({'setup_s': setup_s, 'peak_rss_mb': peak_rss_mb()})
+    if name == 'profiling_hooks':
+        # Itérations paires : hooks désactivés, impaires : activés (ns par hook)
+        result['disabled_ns'] = float(np.median(latencies[1::2]) / items * 1e9)
+        result['enabled_ns'] = float(np.median(latencies[0::2]) / items * 1e9)
+    print(json.dumps(result))
+
+def summarize(latencies, items):
+    ms = latencies * 1000
+    p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+    return {'iterations': len(latencies), 'items_per_call': items, 'total_s': float(latencies.sum()),
+            'throughput_per_s': float(len(latencies) * items / latencies.sum()),
+            'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': float(ms.max())}
+
+def environment():
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+    return {'date': datetime.datetime.now().isoformat(timespec="seconds"), 'commit': commit or None,
+            'python': platform.python_version(), 'numpy': np.__version__, 'machine': platform.machine(),
+            'cpus': os.cpu_count()}
+
+def compare(report, previous_path):
+    with open(previous_path) as f:
+        previous = json.load(f)['scenarios']
+    print(f"\n📐 Comparaison avec {previous_path} (p50 et débit) :")
+    for name, now in report['scenarios'].items():
+        before = previous.get(name)
+        if before is None:
+            continue
+        p50 = now['p50_ms'] / before['p50_ms'] - 1 if before['p50_ms'] else 0.0
+        rate = now['throughput_per_s'] / before['throughput_per_s'] - 1 if before['throughput_per_s'] else 0.0
+        flag = "⚠️ " if p50 > REGRESSION or rate < -REGRESSION else "   "
+        print(f" {flag}{name:<16} p50 {p50:+7.1%} | débit {rate:+7.1%} | RSS "
+              f"{now['peak_rss_mb'] - before['peak_rss_mb']:+7.1f} Mo")
+
+def main():
+    parser = argparse.ArgumentParser(description="Suite de benchmarks de bout en bout")
+    parser.add_argument("--only", nargs="+", choices=list(SCENARIOS), default=None)
+    parser.add_argument("--scale", type=float, default=1.0, help="Multiplie le nombre d'itérations (0.2 : run rapide)")
+    parser.add_argument("--output", default=OUTPUT_PATH)
+    parser.add_argument("--compare", default=None, help="Rapport précédent à comparer")
+    parser.add_argument("--worker", default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        run_worker(args.worker, args.scale)
+        return
+
+    report = {'environment': environment(), 'scale': args.scale, 'scenarios': {}}
+    for name in args.only or SCENARIOS:
+        cmd = [sys.executable, os.path.abspath(__file__), "--worker", name, "--scale", str(args.scale)]
+        proc = subprocess.run(cmd, capture_output=True, text=True)
+        lines = proc.stdout.strip().splitlines()
+        if proc.returncode != 0 or not lines:
+            print(f"   ❌ {name:<16} échec : {proc.stderr.strip().splitlines()[-1] if proc.stderr.strip() else '?'}")
+            continue
+        result = json.loads(lines[-1])
+        report['scenarios'][name] = result
+        extra = (f" | hook {result['disabled_ns']:.0f} ns désactivé, {result['enabled_ns']:.0f} ns actif"
+                 if name == 'profiling_hooks' else "")
+        print(f"   {name:<16} {result['throughput_per_s']:12,.0f} él./s | p50 {result['p50_ms']:9.3f} ms | "
+              f"p95 {result['p95_ms']:9.3f} ms | p99 {result['p99_ms']:9.3f} ms | RSS {result['peak_rss_mb']:7.1f} Mo"
+              f"{extra}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"💾 Rapport sauvegardé : {args.output}")
+    if args.compare:
+        compare(report, args.compare)
+
+if __name__ == "__main__":
+    main()
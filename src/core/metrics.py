@@ -0,0 +1,239 @@
+import bisect
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Configuration
+METRICS_HOST = "127.0.0.1"    # Local uniquement : pas d'exposition réseau par défaut
+METRICS_PORT = 9108
+METRICS_PATH = "results/logs/metrics.jsonl"
+DUMP_INTERVAL = 10.0          # s entre deux lignes du journal JSONL
+FPS_SMOOTHING = 0.05          # Poids de la dernière frame dans la moyenne glissante du FPS
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+# Métriques du système en cours d'exécution : compteurs, jauges et histogrammes, exposés en
+# format texte Prometheus (GET /metrics) et en JSON (GET /metrics.json, journal périodique).
+# Mise à jour sans verrou : un observe() = une bissection sur 14 bornes + deux additions,
+# protégées par le GIL ; les lectures (scrape) peuvent voir un état décalé d'une mesure,
+# jamais bloquer la boucle vidéo. Les jauges "fn" sont calculées à la lecture seulement.
+
+def _label_text(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    return "{" + ",".join(f'{k}="{v}"' for k, v in items) + "}"
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name, labels, fn=None):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self.fn = fn  # Valeur lue ailleurs (ex : frames jetées par une file du pipeline)
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def get(self):
+        return self.fn() if self.fn is not None else self.value
+
+    def samples(self):
+        yield self.name + "_total" + _label_text(self.labels), self.get()
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value):
+        self.value = value
+
+    def samples(self):
+        yield self.name + _label_text(self.labels), self.get()
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name, labels, buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.bounds = list(buckets)
+        self.counts = [0] * (len(self.bounds) + 1)  # Dernière case : au-delà de la plus grande borne
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def get(self):
+        return {'count': self.count, 'sum': self.sum,
+                'mean_ms': self.sum / self.count * 1000 if self.count else 0.0,
+                'p50_ms': self.quantile(0.5) * 1000, 'p95_ms': self.quantile(0.95) * 1000}
+
+    def quantile(self, q):
+        # Interpolation linéaire dans le bucket (comme histogram_quantile côté Prometheus)
+        counts, total = list(self.counts), sum(self.counts)
+        if not total:
+            return 0.0
+        rank, seen = q * total, 0
+        for i, n in enumerate(counts):
+            if seen + n >= rank and n:
+                lower = self.bounds[i - 1] if i > 0 else 0.0
+                upper = self.bounds[i] if i < len(self.bounds) else self.bounds[-1]
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.bounds[-1]
+
+    def samples(self):
+        counts = list(self.counts)  # Copie : le scrape ne voit pas une mise à jour à moitié
+        cumulative = 0
+        for bound, n in zip(self.bounds + ["+Inf"], counts):
+            cumulative += n
+            yield self.name + "_bucket" + _label_text(self.labels, {'le': bound}), cumulative
+        yield self.name + "_sum" + _label_text(self.labels), self.sum
+        yield self.name + "_count" + _label_text(self.labels), cumulative
+
+class Metrics:
+
+    def __init__(self, prefix="iais"):
+        self.prefix = prefix
+        self.families = {}  # nom -> (type, aide, {labels: métrique})
+        self.started = time.time()
+        self._lock = threading.Lock()  # Création des métriques uniquement, jamais sur le chemin chaud
+        self._last_frame = None
+        self.fps = self.gauge("fps", "Images par seconde (moyenne glissante)")
+        self.frames = self.counter("frames", "Frames traitées")
+        self.gauge("uptime_seconds", "Secondes depuis le démarrage", fn=lambda: time.time() - self.started)
+
+    def _get(self, cls, name, help_text, labels, **kwargs):
+        full = f"{self.prefix}_{name}"
+        key = tuple(sorted((labels or {}).items()))
+        family = self.families.get(full)
+        if family is None or key not in family[2]:
+            with self._lock:
+                family = self.families.setdefault(full, (cls.kind, help_text, {}))
+                family[2].setdefault(key, cls(full, dict(labels or {}), **kwargs))
+        return family[2][key]
+
+    def counter(self, name, help_text, labels=None, fn=None):
+        return self._get(Counter, name, help_text, labels, fn=fn)
+
+    def gauge(self, name, help_text, labels=None, fn=None):
+        return self._get(Gauge, name, help_text, labels, fn=fn)
+
+    def histogram(self, name, help_text, labels=None, buckets=LATENCY_BUCKETS):
+        return self._get(Histogram, name, help_text, labels, buckets=buckets)
+
+    def frame(self, now=None):
+        # À appeler une fois par frame sortie : compteur + FPS lissé
+        now = time.perf_counter() if now is None else now
+        self.frames.value += 1
+        if self._last_frame is not None and now > self._last_frame:
+            instant = 1.0 / (now - self._last_frame)
+            self.fps.value = instant if not self.fps.value else (
+                self.fps.value + FPS_SMOOTHING * (instant - self.fps.value))
+        self._last_frame = now
+
+    # --- Exposition ---
+
+    def prometheus(self):
+        lines = []
+        for name, (kind, help_text, metrics) in sorted(self.families.items()):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for metric in list(metrics.values()):
+                lines.extend(f"{sample} {value:.6g}" if isinstance(value, float) else f"{sample} {value}"
+                             for sample, value in metric.samples())
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        out = {'ts': round(time.time(), 3)}
+        for name, (_, _, metrics) in sorted(self.families.items()):
+            for metric in list(metrics.values()):
+                label = ",".join(f"{k}={v}" for k, v in metric.labels.items())
+                value = metric.get()
+                out[f"{name}{{{label}}}" if label else name] = round(value, 6) if isinstance(value, float) else value
+        return out
+
+class MetricsServer:
+    # GET /metrics (Prometheus) et /metrics.json, dans un thread démon ; dump JSONL périodique
+
+    def __init__(self, metrics, port=METRICS_PORT, host=METRICS_HOST, jsonl_path=None, interval=DUMP_INTERVAL):
+        self.metrics = metrics
+        self.jsonl_path = jsonl_path
+        self.interval = interval
+        self.httpd = None
+        self._stop = threading.Event()
+        self._threads = []
+        if port is not None:
+            self.httpd = ThreadingHTTPServer((host, port), self._handler())
+            self.httpd.daemon_threads = True
+            self.port = self.httpd.server_address[1]
+
+    def _handler(self):
+        metrics = self.metrics
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.startswith("/metrics.json"):
+                    body, kind = json.dumps(metrics.snapshot()).encode(), "application/json"
+                elif self.path.startswith("/metrics"):
+                    body, kind = metrics.prometheus().encode(), "text/plain; version=0.0.4; charset=utf-8"
+                else:
+                    self.send_error(404)
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", kind)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Pas une ligne de log par scrape
+
+        return Handler
+
+    def start(self):
+        if self.httpd is not None:
+            self._threads.append(threading.Thread(target=self.httpd.serve_forever, name="metrics-http", daemon=True))
+            print(f"📈 Métriques : http://{self.httpd.server_address[0]}:{self.port}/metrics")
+        if self.jsonl_path:
+            os.makedirs(os.path.dirname(self.jsonl_path) or ".", exist_ok=True)
+            self._threads.append(threading.Thread(target=self._dump_loop, name="metrics-jsonl", daemon=True))
+            print(f"📈 Métriques : {self.jsonl_path} (toutes les {self.interval:g} s)")
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def _dump(self):
+        with open(self.jsonl_path, "a") as f:
+            f.write(json.dumps(self.metrics.snapshot(), separators=(",", ":")) + "\n")
+
+    def _dump_loop(self):
+        while not self._stop.wait(self.interval):
+            self._dump()
+
+    def stop(self):
+        self._stop.set()
+        if self.httpd is not None:
+            self.httpd.shutdown()
+            self.httpd.server_close()
+        for thread in self._threads:
+            thread.join()
+        if self.jsonl_path:
+            self._dump()  # Dernier état, même pour un run plus court que l'intervalle
+
+def add_metrics_arguments(parser):
+    parser.add_argument("--metrics-port", type=int, nargs="?", const=METRICS_PORT, default=None,
+                        help=f"Expose /metrics (Prometheus) sur {METRICS_HOST} (défaut {METRICS_PORT})")
+    parser.add_argument("--metrics-jsonl", nargs="?", const=METRICS_PATH, default=None,
+                        help=f"Journal périodique des métriques (défaut {METRICS_PATH})")
+    parser.add_argument("--metrics-interval", type=float, default=DUMP_INTERVAL, help="Secondes entre deux lignes JSONL")
+
+def metrics_from_arguments(args):
+    if args.metrics_port is None and not args.metrics_jsonl:
+        return None
+    return MetricsServer(Metrics(), args.metrics_port, jsonl_path=args.metrics_jsonl, interval=args.metrics_interval)
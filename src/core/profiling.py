@@ -0,0 +1,136 @@
+import functools
+import json
+import os
+import threading
+import time
+import numpy as np
+
+# Configuration
+PROFILE_ENV = "IAIS_PROFILE"   # IAIS_PROFILE=1 : hooks actifs dès le démarrage (sinon profiling.enable())
+SAMPLES = 4096                 # Dernières durées gardées par étape (percentiles sur cette fenêtre)
+PROFILE_PATH = "results/logs/profile.json"
+
+# Hooks de chronométrage pour les boucles de production. Désactivés, ils coûtent un test de
+# booléen (record) ou le renvoi d'un objet partagé (stage) : on peut les laisser dans le code.
+# Activés, chaque mesure est deux perf_counter() et l'écriture dans un tampon circulaire de
+# taille fixe : mémoire bornée même sur des jours de flux. Les compteurs ne sont pas protégés
+# par un verrou : entre threads, une mesure peut exceptionnellement se perdre, jamais bloquer.
+
+_enabled = os.environ.get(PROFILE_ENV, "") not in ("", "0")
+_stages = {}
+_lock = threading.Lock()
+
+class StageProfile:
+    __slots__ = ("name", "count", "total", "worst", "samples", "_next")
+
+    def __init__(self, name):
+        self.name = name
+        self.count = 0
+        self.total = 0.0
+        self.worst = 0.0
+        self.samples = [0.0] * SAMPLES
+        self._next = 0
+
+    def record(self, seconds):
+        self.count += 1
+        self.total += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+        self.samples[self._next] = seconds
+        self._next = (self._next + 1) % SAMPLES
+
+    def as_dict(self):
+        window = np.array(self.samples[:min(self.count, SAMPLES)]) * 1000
+        p50, p95, p99 = np.percentile(window, [50, 95, 99]) if len(window) else (0.0, 0.0, 0.0)
+        return {'count': self.count, 'total_s': self.total,
+                'mean_ms': self.total / self.count * 1000 if self.count else 0.0,
+                'p50_ms': float(p50), 'p95_ms': float(p95), 'p99_ms': float(p99), 'max_ms': self.worst * 1000,
+                'per_s': self.count / self.total if self.total > 0 else 0.0}
+
+class _Span:
+    __slots__ = ("profile", "start")
+
+    def __init__(self, profile):
+        self.profile = profile
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.profile.record(time.perf_counter() - self.start)
+        return False
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+def enable(on=True):
+    global _enabled
+    _enabled = bool(on)
+
+def enabled():
+    return _enabled
+
+def _profile(name):
+    profile = _stages.get(name)
+    if profile is None:
+        with _lock:
+            profile = _stages.setdefault(name, StageProfile(name))
+    return profile
+
+def stage(name):
+    # with profiling.stage("fusion.decide"): ...
+    return _Span(_profile(name)) if _enabled else _NULL_SPAN
+
+def record(name, seconds):
+    # Durée déjà mesurée par l'appelant (ex : StageTimer du pipeline)
+    if _enabled:
+        _profile(name).record(seconds)
+
+def profiled(name=None):
+    # Décorateur : @profiled("iot.flush") ; l'état actif est relu à chaque appel
+    def decorator(fn):
+        label = name or f"{fn.__module__}.{fn.__qualname__}"
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _profile(label).record(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+def report():
+    return {name: profile.as_dict() for name, profile in sorted(_stages.items())}
+
+def reset():
+    with _lock:
+        _stages.clear()
+
+def print_report():
+    if not _stages:
+        return
+    print("🔬 Profil des étapes :")
+    for name, st in report().items():
+        print(f"   {name:<22} {st['count']:8d} × | p50 {st['p50_ms']:8.3f} ms | p95 {st['p95_ms']:8.3f} ms | "
+              f"p99 {st['p99_ms']:8.3f} ms | max {st['max_ms']:8.2f} ms")
+
+def dump(path=PROFILE_PATH):
+    if not _stages:
+        return None
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(report(), f, indent=2)
+    return path
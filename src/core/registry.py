@@ -0,0 +1,76 @@
+import threading
+import time
+import numpy as np
+
+# Configuration
+WARMUP_RUNS = 2                # Inférences "à vide" après chargement (allocations, JIT, caches)
+WARMUP_FRAME_SHAPE = (360, 640, 3)
+
+# Registre central des modèles : chaque artefact est chargé au PREMIER appel seulement,
+# une seule fois par processus, puis partagé entre tous les appelants (menu, fusion,
+# scripts vision...). Les imports lourds (torch, ultralytics, sklearn) sont faits ici,
+# au moment du chargement, et plus à l'import des modules.
+
+_models = {}
+_timings = {}
+_lock = threading.Lock()
+
+def get_model(key, loader, warmup=None):
+    # key : identifiant unique de l'artefact ; loader() : fonction de chargement
+    # warmup(model) : optionnel, exécuté une fois juste après le chargement
+    if key in _models:
+        return _models[key]
+    with _lock:
+        if key not in _models:  # Un autre thread a pu charger entre-temps
+            start = time.perf_counter()
+            model = loader()
+            loaded = time.perf_counter()
+            if warmup is not None:
+                warmup(model)
+            _timings[key] = {'load_ms': (loaded - start) * 1000,
+                             'warmup_ms': (time.perf_counter() - loaded) * 1000}
+            _models[key] = model
+    return _models[key]
+
+def get_detector(backend="torch", weights=None, threads=None, warmup_runs=WARMUP_RUNS,
+                 warmup_shape=WARMUP_FRAME_SHAPE):
+    from vision.detectors import DEFAULT_WEIGHTS, load_detector
+    weights = weights or DEFAULT_WEIGHTS[backend]
+
+    def warmup(detector):
+        frame = np.zeros(warmup_shape, dtype=np.uint8)
+        for _ in range(warmup_runs):
+            detector(frame, conf=0.5, classes=0)
+
+    return get_model(("detector", backend, weights, threads), lambda: load_detector(backend, weights, threads), warmup)
+
+def get_iot_model(model_path=None, scaler_path=None, warmup_runs=WARMUP_RUNS):
+    from iot.fast_inference import MODEL_PATH, SCALER_PATH, load_compiled_model
+    model_path = model_path or MODEL_PATH
+    scaler_path = scaler_path or SCALER_PATH
+
+    def warmup(model):
+        for _ in range(warmup_runs):
+            model.predict_one([0, 40, 0, 20.5, 14])
+
+    return get_model(("iot", model_path, scaler_path), lambda: load_compiled_model(model_path, scaler_path), warmup)
+
+def get_anomaly_scorer(state_path=None):
+    # Détecteur d'anomalies en ligne : état partagé (il continue d'apprendre pendant l'exécution)
+    from iot.online_anomaly import STATE_PATH, load_scorer
+    state_path = state_path or STATE_PATH
+    return get_model(("anomaly", state_path), lambda: load_scorer(state_path))
+
+def clear(kind=None):
+    # Oublie les modèles chargés (kind="iot" : après un réentraînement depuis le menu)
+    with _lock:
+        for key in [k for k in _models if kind is None or k[0] == kind]:
+            del _models[key]
+            _timings.pop(key, None)
+
+def timings():
+    return {" | ".join(str(k) for k in key): dict(value) for key, value in _timings.items()}
+
+def print_timings():
+    for name, t in timings().items():
+        print(f"   📦 {name} : chargement {t['load_ms']:7.1f} ms | warm-up {t['warmup_ms']:7.1f} ms")
@@ -0,0 +1,263 @@
+import argparse
+import concurrent.futures
+import glob
+import hashlib
+import heapq
+import json
+import os
+import random
+import sys
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core.registry import get_detector, get_iot_model
+from fusion.decision_system import MODEL_IOT_PATH, SCALER_PATH, fuse_decision, simulate_iot_reading
+from fusion.fusion_engine import FUSION_ENGINE, FUSION_OR, FusionEngine
+from iot.fast_inference import FOREST_PATH, alarm_scores
+from iot.model_server import artefact_signature
+from vision.events import boxes_to_list
+from vision.roi import detect
+from vision.zones import ZONES_PATH, ZoneSet
+
+# Configuration
+ARCHIVE_DIR = "data/videos"
+OUTPUT_DIR = "results/archive"
+VIDEO_EXTENSIONS = (".mp4", ".avi", ".mkv", ".mov")
+SHARD_SECONDS = 120.0   # Durée d'un morceau : assez long pour amortir le seek, assez court pour équilibrer
+WARMUP_SECONDS = 3.0    # Frames rejouées avant le début d'un morceau pour reconstruire l'état de la fusion
+IOT_EVERY = 30          # Une lecture IoT simulée toutes les 30 frames (comme decision_system)
+
+# Traitement d'archives vidéo en parallèle : les fichiers sont découpés en morceaux de frames
+# (seek exact via CAP_PROP_POS_FRAMES), répartis sur un pool de processus ; chaque processus
+# charge UNE fois le détecteur et le modèle IoT (initializer) et écrit un .jsonl par morceau.
+# Un morceau terminé est renommé atomiquement : relancer la commande ne refait que les
+# morceaux manquants (l'identifiant inclut la configuration : changer de zones, de fusion, de
+# détecteur ou réentraîner le modèle IoT refait tout). Les lectures IoT simulées sont tirées d'une graine (nom du fichier, tick) :
+# le résultat ne dépend ni du découpage ni du nombre de processus.
+
+def find_videos(sources):
+    videos = []
+    for source in sources:
+        if os.path.isdir(source):
+            matches = [os.path.join(source, name) for name in os.listdir(source)]
+        else:
+            matches = glob.glob(source)
+        videos.extend(path for path in matches if path.lower().endswith(VIDEO_EXTENSIONS) and os.path.isfile(path))
+    return sorted(set(os.path.abspath(path) for path in videos))
+
+def video_info(path):
+    cap = cv2.VideoCapture(path)
+    try:
+        if not cap.isOpened():
+            raise FileNotFoundError(f"❌ Vidéo illisible : {path}")
+        frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    finally:
+        cap.release()
+    stat = os.stat(path)
+    # Début d'enregistrement estimé : date de fin d'écriture moins la durée (ordre global des événements)
+    return {'path': path, 'frames': frames, 'fps': fps, 'size': stat.st_size, 'mtime': stat.st_mtime,
+            'origin': stat.st_mtime - frames / fps}
+
+def config_key(backend="torch", weights=None, zones_path=ZONES_PATH, fusion=FUSION_ENGINE, imgsz=None):
+    # Tout ce qui change le contenu d'un morceau ; le fichier de zones compte par son contenu, les
+    # artefacts IoT (modèle, scaler, export mmap, seuil de décision) par leur date de modification
+    zones = None
+    if zones_path and os.path.isfile(zones_path):
+        with open(zones_path, "rb") as f:
+            zones = hashlib.sha1(f.read()).hexdigest()
+    weights = os.path.abspath(weights) if weights else None
+    return json.dumps({'backend': backend, 'weights': weights, 'zones': [zones_path, zones], 'fusion': fusion,
+                       'imgsz': imgsz, 'iot': artefact_signature((MODEL_IOT_PATH, SCALER_PATH, FOREST_PATH))},
+                      sort_keys=True)
+
+def plan_shards(infos, shard_seconds=SHARD_SECONDS, config=""):
+    shards = []
+    for info in infos:
+        key = hashlib.sha1(f"{info['path']}:{info['size']}:{info['mtime']}:{config}".encode()).hexdigest()[:10]
+        step = max(int(shard_seconds * info['fps']), 1)
+        for start in range(0, info['frames'], step):
+            end = min(start + step, info['frames'])
+            shards.append({'id': f"{os.path.splitext(os.path.basename(info['path']))[0]}_{key}_{start:08d}",
+                           'path': info['path'], 'start': start, 'end': end, 'fps': info['fps'],
+                           'origin': info['origin']})
+    # Les plus longs d'abord : le dernier morceau distribué est court, les processus finissent ensemble
+    return sorted(shards, key=lambda s: s['start'] - s['end'])
+
+# --- Processus de travail ---
+
+_worker = {}
+
+def _init_worker(backend, weights, threads, zones_path, fusion, imgsz):
+    import torch
+    torch.set_num_threads(threads or 1)  # Un coeur par processus : pas de sur-souscription
+    _worker.update(detector=get_detector(backend, weights, threads or 1),
+                   iot_model=get_iot_model(MODEL_IOT_PATH, SCALER_PATH),
+                   zones_path=zones_path, fusion=fusion, imgsz=imgsz)
+
+def process_shard(shard, shard_dir):
+    started, cpu_started = time.perf_counter(), time.process_time()
+    detector, iot_model = _worker['detector'], _worker['iot_model']
+    cap = cv2.VideoCapture(shard['path'])
+    width, height = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    zones = ZoneSet.from_config(width, height, _worker['zones_path'])
+    engine = FusionEngine(zones.names) if _worker['fusion'] == FUSION_ENGINE else None
+    fps = shard['fps']
+
+    # Pré-roulage : quelques secondes avant le morceau alimentent la fusion sans produire d'événements
+    first = max(shard['start'] - int(WARMUP_SECONDS * fps), 0) if engine is not None else shard['start']
+    cap.set(cv2.CAP_PROP_POS_FRAMES, first)
+    iot = {'pred': 0, 'proba': 0.0, 'data': []}
+    if first >= IOT_EVERY:  # Dernière lecture avant la première frame décodée
+        _simulated_reading(shard['path'], first // IOT_EVERY * IOT_EVERY - 1, iot_model, iot)
+
+    final_path = os.path.join(shard_dir, shard['id'] + ".jsonl")
+    tmp_path = final_path + ".tmp"
+    alerts = 0
+    frame = np.empty((height, width, 3), dtype=np.uint8)  # Un seul tampon de décodage, réutilisé
+    with open(tmp_path, "w") as out:
+        for index in range(first, shard['end']):
+            ok, frame = cap.read(image=frame)
+            if not ok:
+                break
+            results = detect(detector, frame, None, _worker['imgsz'], conf=0.5, classes=0)
+            boxes = results[0].boxes.xyxy.cpu().numpy()
+            hits = zones.hits(boxes)
+            ts = index / fps
+            new_reading = (index + 1) % IOT_EVERY == 0
+            if new_reading:
+                _simulated_reading(shard['path'], index, iot_model, iot)
+            if engine is None:
+                alert = fuse_decision(bool(hits.any()), iot['pred'])
+            else:
+                engine.add_video(ts, hits.any(axis=0))
+                if new_reading:
+                    engine.add_iot(ts, iot['proba'])
+                alert, scores, alert_zones = engine.decide(ts)
+            if index < shard['start']:
+                continue
+            event = {'video': shard['path'], 'frame': index, 'ts': round(ts, 3),
+                     'time': round(shard['origin'] + ts, 3),
+                     'boxes': boxes_to_list(boxes, results[0].boxes.conf.cpu().numpy()),
+                     'zones': zones.counts(hits), 'video_intrusion': bool(hits.any()),
+                     'iot_pred': int(iot['pred']), 'iot_data': list(iot['data']), 'alert': bool(alert)}
+            if engine is not None:
+                event['fusion'] = {name: round(score, 3) for name, score in scores.items()}
+                event['alert_zones'] = alert_zones
+            alerts += event['alert']
+            out.write(json.dumps(event, separators=(",", ":")) + "\n")
+    cap.release()
+    os.replace(tmp_path, final_path)  # Le fichier final n'existe que si le morceau est complet
+    return {'id': shard['id'], 'frames': shard['end'] - shard['start'], 'alert_frames': alerts,
+            'seconds': time.perf_counter() - started, 'cpu_s': time.process_time() - cpu_started,
+            'pid': os.getpid()}
+
+def _simulated_reading(path, index, iot_model, iot):
+    # Même lecture pour un tick donné quel que soit le processus qui le traite (générateur local :
+    # l'état global de random n'est pas touché)
+    rng = random.Random(f"{os.path.basename(path)}:{index // IOT_EVERY}")
+    iot['data'] = simulate_iot_reading(rng)
+    # Probabilité recalée sur le seuil du modèle (> 0.5 = alerte), comme decision_system
+    iot['proba'] = float(alarm_scores(iot_model, [iot['data']])[0])
+    iot['pred'] = int(iot['proba'] > 0.5)
+
+# --- Orchestration ---
+
+def merge_shards(shards, shard_dir, output_path):
+    # Fusion k-voies : chaque morceau est déjà trié, on ordonne globalement par instant absolu
+    def stream(shard):
+        with open(os.path.join(shard_dir, shard['id'] + ".jsonl")) as f:
+            for line in f:
+                event = json.loads(line)
+                yield (event['time'], shard['path'], event['frame']), line
+
+    count = 0
+    tmp_path = output_path + ".tmp"
+    with open(tmp_path, "w") as out:
+        for _, line in heapq.merge(*(stream(shard) for shard in shards), key=lambda item: item[0]):
+            out.write(line)
+            count += 1
+    os.replace(tmp_path, output_path)
+    return count
+
+def process_archive(sources, output_dir=OUTPUT_DIR, workers=None, shard_seconds=SHARD_SECONDS, backend="torch",
+                    weights=None, threads=None, zones_path=ZONES_PATH, fusion=FUSION_ENGINE, imgsz=None, fresh=False):
+    videos = find_videos(sources)
+    if not videos:
+        raise FileNotFoundError(f"❌ Aucune vidéo trouvée dans : {', '.join(sources)}")
+    workers = workers or os.cpu_count() or 1
+    infos = [video_info(path) for path in videos]
+    shards = plan_shards(infos, shard_seconds, config_key(backend, weights, zones_path, fusion, imgsz))
+    shard_dir = os.path.join(output_dir, "shards")
+    os.makedirs(shard_dir, exist_ok=True)
+    if fresh:
+        for name in os.listdir(shard_dir):
+            os.remove(os.path.join(shard_dir, name))
+
+    # Reprise : un morceau dont le .jsonl final existe est déjà fait (l'identifiant inclut taille et date du
+    # fichier ainsi que la configuration de traitement)
+    todo = [s for s in shards if not os.path.exists(os.path.join(shard_dir, s['id'] + ".jsonl"))]
+    total_frames = sum(info['frames'] for info in infos)
+    print(f"🗂️  {len(videos)} vidéos, {total_frames:,} frames, {len(shards)} morceaux "
+          f"({len(shards) - len(todo)} déjà faits) sur {workers} processus")
+
+    started = time.perf_counter()
+    results = []
+    if todo:
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=workers, initializer=_init_worker,
+                initargs=(backend, weights, threads, zones_path, fusion, imgsz)) as pool:
+            futures = [pool.submit(process_shard, shard, shard_dir) for shard in todo]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                print(f"   ✅ [{done}/{len(todo)}] {result['id']} : {result['frames']} frames en "
+                      f"{result['seconds']:.1f} s ({result['frames'] / result['seconds']:.1f} FPS, pid {result['pid']})")
+    wall = time.perf_counter() - started
+
+    output_path = os.path.join(output_dir, "events_archive.jsonl")
+    events = merge_shards(sorted(shards, key=lambda s: (s['origin'], s['path'], s['start'])), shard_dir, output_path)
+    cpu = sum(r['cpu_s'] for r in results)
+    processed = sum(r['frames'] for r in results)
+    summary = {
+        'videos': videos, 'workers': workers, 'shards': len(shards), 'resumed': len(shards) - len(todo),
+        'frames': total_frames, 'processed_frames': processed, 'events': events, 'wall_s': wall,
+        'fps': processed / wall if wall > 0 and processed else 0.0,
+        # Accélération : temps CPU des morceaux (= durée en 1 processus, à 1 thread d'inférence) / durée
+        # réelle. Le temps écoulé par morceau ne convient pas : deux processus sur un coeur attendent
+        # chacun le CPU et gonflent leur durée sans rien accélérer.
+        'cpu_s': cpu,
+        'speedup': cpu / wall if todo and wall > 0 else None,
+        'parallel_efficiency': cpu / (wall * min(workers, len(todo))) if todo and wall > 0 else None,
+        'alert_frames': sum(r['alert_frames'] for r in results),
+        'output': output_path,
+    }
+    with open(os.path.join(output_dir, "summary.json"), "w") as f:
+        json.dump({**summary, 'shard_results': results}, f, indent=2)
+    return summary
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Détection + zones + fusion IoT sur des archives vidéo, en parallèle")
+    parser.add_argument("sources", nargs="*", default=[ARCHIVE_DIR], help="Dossiers, fichiers ou motifs glob")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--workers", type=int, default=None, help="Processus (défaut : nombre de coeurs)")
+    parser.add_argument("--shard-seconds", type=float, default=SHARD_SECONDS, help="Durée d'un morceau")
+    parser.add_argument("--backend", default="torch")
+    parser.add_argument("--weights", default=None)
+    parser.add_argument("--threads", type=int, default=None, help="Threads d'inférence par processus (défaut 1)")
+    parser.add_argument("--imgsz", type=int, default=None)
+    parser.add_argument("--zones", default=ZONES_PATH)
+    parser.add_argument("--fusion", choices=[FUSION_ENGINE, FUSION_OR], default=FUSION_ENGINE)
+    parser.add_argument("--fresh", action="store_true", help="Ignore les morceaux déjà traités")
+    args = parser.parse_args()
+
+    summary = process_archive(args.sources, args.output_dir, args.workers, args.shard_seconds, args.backend,
+                              args.weights, args.threads, args.zones, args.fusion, args.imgsz, args.fresh)
+    speedup, efficiency = summary['speedup'], summary['parallel_efficiency']
+    print(f"\n📊 {summary['processed_frames']:,} frames traitées en {summary['wall_s']:.1f} s "
+          f"({summary['fps']:.1f} FPS)"
+          + (f" | accélération x{speedup:.2f} (efficacité {efficiency:.0%})" if speedup else ""))
+    print(f"✅ {summary['events']:,} événements ordonnés : {summary['output']} "
+          f"(frames en alerte : {summary['alert_frames']})")
@@ -1,130 +1,326 @@
+import argparse
 import cv2
 import numpy as np
-import pandas as pd
-import joblib
 import random
-from ultralytics import YOLO
+import sys
+import time
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import profiling
+from core.metrics import add_metrics_arguments, metrics_from_arguments
+from core.registry import get_anomaly_scorer, get_detector, print_timings
+from fusion.event_store import add_store_arguments, store_from_arguments
+from fusion.fusion_engine import FUSION_ENGINE, FUSION_OR, FusionEngine
+from iot.ingestion import add_ingestion_arguments, ingestion_from_arguments
+from iot.model_server import ModelServer, add_server_arguments, server_from_arguments, site_label
+from vision.clip_recorder import POST_ROLL, PRE_ROLL, add_clip_arguments
+from vision.detectors import add_detector_arguments, detector_from_arguments
+from vision.events import (RENDER_FULL, OutputSink, add_output_arguments, boxes_to_list,
+                           resolve_output_arguments)
+from vision.frame_pool import FramePool, add_pool_arguments, pool_size
+from vision.motion_gate import add_gate_arguments, gate_from_arguments, gated_stage
+from vision.pipeline import BLOCK, DROP_OLDEST, Pipeline, print_stats, video_source
+from vision.roi import ROI_MARGIN, RoiCropper, add_roi_arguments, detect
+from vision.zones import ALERT_COLOR, SAFE_COLOR, ZONES_PATH, ZoneSet
+
 # Configuration
 VIDEO_PATH = "data/videos/surveillance.mp4"
 MODEL_IOT_PATH = "data/iot/model_iot.pkl"
 SCALER_PATH = "data/iot/scaler.pkl"
 OUTPUT_PATH = "results/videos/output_fusion_final.mp4"
+EVENTS_PATH = "results/logs/events_fusion.jsonl"
+
+def simulate_iot_reading(rng=random):
+    # Ordre des colonnes : motion, sound_level, vibration, temperature, hour
+    # rng : générateur dédié (random.Random) pour un tirage reproductible sans toucher à l'état global
+    if rng.random() < 0.2:
+        return [1, rng.randint(70, 90), 1, 20.5, 23]
+    return [0, rng.randint(30, 50), 0, 20.5, 14]
+
+def fuse_decision(video_intrusion, iot_pred, iot_anomaly=False):
+    # iot_anomaly : lecture hors du profil horaire appris (détecteur en ligne, optionnel)
+    return video_intrusion or (iot_pred == 1) or iot_anomaly
 
-def start_fusion_system():
+def draw_fusion_overlay(frame, zones, boxes, hits, FINAL_ALERT, video_intrusion, iot_pred, iot_data,
+                        anomaly_score=None):
+    # --- FUSION & AFFICHAGE OPTIMISÉ ---
+    # hits : matrice (n_détections, n_zones) renvoyée par zones.hits(boxes)
+    height, width = frame.shape[:2]
+
+    # Petit cadre rouge autour des personnes dans une zone uniquement
+    in_zone = hits.any(axis=1)
+    for x1, y1, x2, y2 in np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[in_zone].astype(int):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
+
+    status_color = (0, 0, 255) if FINAL_ALERT else (0, 255, 0) # Rouge ou Vert
+    
+    # 1. DESSIN DES ZONES (Discret)
+    # Zone occupée : rouge semi-transparent (mélange limité à son rectangle englobant)
+    # Sinon : simple contour vert pour délimiter
+    occupied = hits.any(axis=0)
+    for i in range(len(zones)):
+        if occupied[i]:
+            zones.fill(frame, i, ALERT_COLOR, alpha=0.3)
+        else:
+            zones.outline(frame, i, SAFE_COLOR, thickness=2)
+
+    # 2. BANDEAU D'INFORMATION (Plus petit)
+    # Un bandeau de 80 pixels de haut seulement
+    header_height = 80
+    cv2.rectangle(frame, (0, 0), (width, header_height), (0, 0, 0), -1)
+    
+    # Titre principal (Plus petit)
+    status_text = "ALERTE INTRUSION" if FINAL_ALERT else "SECURISE"
+    cv2.putText(frame, f"STATUS: {status_text}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
+
+    # Infos techniques (Petites et sur une ligne si possible)
+    iot_msg = "ALERTE" if iot_pred == 1 else "OK"
+    noise_val = iot_data[1] if iot_data else 0
+    
+    # Ligne 2 : Détails
+    detail_text = f"[IoT: {iot_msg} (Bruit: {noise_val}dB)]  |  [Video: {'INTRUSION' if video_intrusion else 'OK'}]"
+    if anomaly_score is not None:
+        detail_text += f"  |  [Anomalie: {anomaly_score:.1f} sigma]"
+    cv2.putText(frame, detail_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+
+def start_fusion_system(pipelined=False, drop_policy=BLOCK, headless=False, render=RENDER_FULL, events_path=None,
+                        video_path=VIDEO_PATH, output_path=OUTPUT_PATH, motion_gate=None, zones_path=ZONES_PATH,
+                        roi=False, roi_margin=ROI_MARGIN, imgsz=None, detector=None, anomaly=False,
+                        anomaly_threshold=None, ingestion=None, iot_sensor=0, fusion=FUSION_ENGINE,
+                        store=None, camera_id="cam0", pre_roll=PRE_ROLL, post_roll=POST_ROLL, metrics=None,
+                        frame_pool=True, model_server=None, site=None):
+    launched = time.perf_counter()  # Référence de la latence "première frame" (chargements compris)
+    # pipelined=True : décodage, YOLO, dessin et encodage dans des threads séparés
+    # headless=True  : aucune fenêtre ; render / events_path choisissent les sorties
+    # anomaly=True   : signal supplémentaire, écart de la lecture IoT au profil horaire appris
+    # ingestion      : service IoT asynchrone (iot.ingestion) ; None = lecture simulée toutes les 30 frames
+    # fusion         : "engine" (scores lissés, hystérésis, par zone) ou "or" (ancienne règle frame par frame)
+    # store          : journal persistant (fusion.event_store.EventStore), horodaté début du run + ts vidéo
+    # metrics        : core.metrics.MetricsServer (HTTP Prometheus et/ou JSONL périodique)
+    # frame_pool     : décodage dans des tampons alloués une fois (vision.frame_pool), rendus après l'encodage
+    # model_server   : modèles IoT par site rechargés à chaud (iot.model_server) ; site : celui de la caméra
     print("🧠 Démarrage du SYSTÈME DE FUSION (Affichage Optimisé)...")
 
     # 1. Chargement des modèles IA
     if not os.path.exists(MODEL_IOT_PATH) or not os.path.exists(SCALER_PATH):
          raise FileNotFoundError("❌ Modèles IoT manquants. Lancez d'abord la Partie A.")
 
-    iot_model = joblib.load(MODEL_IOT_PATH)
-    scaler = joblib.load(SCALER_PATH)
-    vision_model = YOLO('yolov8n.pt')
+    # Modèles IoT "compilés" (scaler replié dans les seuils), servis par site et rechargés à chaud :
+    # un réentraînement est pris en compte sans redémarrer, sans jamais bloquer la boucle vidéo
+    model_server = (model_server or ModelServer()).preload([site]).start()
+    print(f"🗂️ Modèle IoT de la caméra : {site_label(site)}")
+    vision_model = detector or get_detector()
+    scorer = get_anomaly_scorer() if anomaly else None
+    if scorer is not None and anomaly_threshold is not None:
+        scorer.z_threshold = anomaly_threshold
 
     # 2. Préparation Vidéo
-    cap = cv2.VideoCapture(VIDEO_PATH)
+    cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise FileNotFoundError("❌ Vidéo introuvable.")
         
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-    fps = int(cap.get(cv2.CAP_PROP_FPS))
-    out = cv2.VideoWriter(OUTPUT_PATH, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
-
-    # --- NOUVELLE ZONE : TOUT LE BAS DE L'ÉCRAN ---
-    mid_height = int(height / 2) # On coupe l'écran en deux
-    zone_points = np.array([
-        [0, mid_height],          # Milieu Gauche
-        [width, mid_height],      # Milieu Droit
-        [width, height],          # Bas Droit
-        [0, height]               # Bas Gauche
-    ], np.int32).reshape((-1, 1, 2))
-
-    frame_count = 0
-    current_iot_pred = 0 
-    current_iot_data = []
-
-    print("▶️ Système ACTIF. Zone interdite sur la moitié basse.")
-
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-        
-        frame_count += 1
-        
-        # --- PARTIE 1 : VISION (YOLO) ---
-        video_intrusion = False
-        results = vision_model(frame, conf=0.5, classes=0, verbose=False)
-        
-        for box in results[0].boxes:
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            feet_x, feet_y = int((x1 + x2) / 2), int(y2)
-            
-            # Test si les pieds sont dans la zone (moitié basse)
-            if cv2.pointPolygonTest(zone_points, (feet_x, feet_y), False) >= 0:
-                video_intrusion = True
-                # Petit cadre rouge autour de la personne uniquement
-                cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 0, 255), 2)
-
-        # --- PARTIE 2 : IOT (SIMULATION) ---
-        if frame_count % 30 == 0:
-            if random.random() < 0.2:
-                sim_data = [[1, random.randint(70, 90), 1, 20.5, 23]] 
-            else:
-                sim_data = [[0, random.randint(30, 50), 0, 20.5, 14]]
-            
-            cols = ['motion', 'sound_level', 'vibration', 'temperature', 'hour']
-            df_live = pd.DataFrame(sim_data, columns=cols)
-            X_live = scaler.transform(df_live)
-            current_iot_pred = iot_model.predict(X_live)[0]
-            current_iot_data = sim_data[0]
-
-        # --- PARTIE 3 : FUSION & AFFICHAGE OPTIMISÉ ---
-        
-        FINAL_ALERT = video_intrusion or (current_iot_pred == 1)
-        status_color = (0, 0, 255) if FINAL_ALERT else (0, 255, 0) # Rouge ou Vert
-        
-        # 1. DESSIN DE LA ZONE (Discret)
-        # Si intrusion vidéo : Zone rouge semi-transparente
-        # Sinon : Ligne verte simple pour délimiter
-        if video_intrusion:
-             overlay = frame.copy()
-             cv2.fillPoly(overlay, [zone_points], (0, 0, 255))
-             cv2.addWeighted(overlay, 0.3, frame, 0.7, 0, frame)
+    fps = cap.get(cv2.CAP_PROP_FPS)  # Flottant : 29.97 arrondi à 29 ferait dériver l'horloge vidéo de 3 %
+    sink = OutputSink(output_path, fps, (width, height), window="FUSION SYSTEM",
+                      headless=headless, render=render, events_path=events_path,
+                      pre_roll=pre_roll, post_roll=post_roll)
+
+    # Zones interdites (config/zones.json, par défaut tout le bas de l'écran)
+    zones = ZoneSet.from_config(width, height, zones_path)
+    # roi=True : YOLO ne reçoit que le rectangle englobant des zones (+ marge)
+    roi = RoiCropper(zones, roi_margin) if roi else None
+    iot_state = {'pred': 0, 'proba': 0.0, 'data': [], 'score': None, 'anomaly': False, 'ts': None, 'reading_ts': None}
+    # Moteur de fusion sur l'horloge de la VIDÉO (ts de frame) : les lectures IoT y sont recalées
+    engine = FusionEngine(zones.names) if fusion == FUSION_ENGINE else None
+    origin = time.time()  # Epoch de la frame 0 : ts du journal = origin + horloge vidéo
+    if ingestion is not None:
+        ingestion.start()  # Thread asyncio dédié : les capteurs vivent à leur propre rythme
+        print(f"📡 IoT : {ingestion.transport.name}, capteur {iot_sensor} associé à la caméra")
+    if metrics is not None:
+        live = metrics.metrics
+        iot_seconds = live.histogram("iot_score_seconds", "Score d'une lecture IoT (lecture simulée)")
+        fusion_seconds = live.histogram("fusion_seconds", "Décision de fusion par frame")
+        alerts = live.counter("alerts", "Alertes déclenchées (fronts montants)")
+        alert_frames = live.counter("alert_frames", "Frames en alerte")
+        alert_active = live.gauge("alert_active", "1 si l'alerte est en cours")
+        if ingestion is not None:
+            live.counter("iot_readings", "Lectures IoT scorées par le service", fn=lambda: ingestion.scored)
+
+    # --- PARTIE 1 : VISION (YOLO) ---
+    def infer(packet):
+        results = detect(vision_model, packet.frame, roi, imgsz, conf=0.5, classes=0)
+        packet.detections = results[0].boxes
+        return packet
+
+    # --- PARTIE 2 & 3 : IOT (SIMULATION) + FUSION & AFFICHAGE ---
+    def fuse(packet):
+        boxes = packet.detections.xyxy.cpu().numpy()
+        with profiling.stage("zones.hits"):
+            hits = zones.hits(boxes)
+        video_intrusion = bool(hits.any())
+
+        now = packet.index / fps if fps else float(packet.index)
+        new_reading = False
+        if ingestion is not None:
+            # Dernier état publié par le service (déjà scoré en lot) : lecture non bloquante
+            latest = ingestion.latest(iot_sensor)
+            if latest is not None and latest[2] != iot_state['ts']:
+                iot_state['data'], iot_state['proba'], iot_state['ts'] = latest
+                iot_state['pred'] = int(iot_state['proba'] > 0.5)  # Score déjà recalé sur le seuil du modèle
+                new_reading = True
+                # Âge réel de la lecture, reporté sur l'horloge vidéo
+                iot_state['reading_ts'] = now - max(time.time() - iot_state['ts'], 0.0)
+        elif (packet.index + 1) % 30 == 0:
+            iot_state['data'] = simulate_iot_reading()
+            scored = time.perf_counter()
+            # Score recalé sur le seuil de décision du modèle : le moteur de fusion reçoit une probabilité, pas 0/1
+            iot_state['proba'] = float(model_server.alarm_scores([iot_state['data']],
+                                                                 None if site is None else [site])[0])
+            if metrics is not None:
+                iot_seconds.observe(time.perf_counter() - scored)
+            iot_state['pred'] = int(iot_state['proba'] > 0.5)
+            new_reading = True
+            iot_state['reading_ts'] = now
+        if new_reading and scorer is not None:
+            iot_state['score'], iot_state['anomaly'] = scorer.observe(iot_state['data'])
+
+        decided = time.perf_counter()
+        if engine is None:
+            FINAL_ALERT = fuse_decision(video_intrusion, iot_state['pred'], iot_state['anomaly'])
         else:
-             # Juste une ligne verte au milieu pour montrer la limite
-             cv2.line(frame, (0, mid_height), (width, mid_height), (0, 255, 0), 2)
+            engine.add_video(now, hits.any(axis=0))
+            if new_reading:
+                engine.add_iot(iot_state['reading_ts'], iot_state['proba'])
+                if iot_state['score'] is not None:
+                    engine.add_anomaly(iot_state['reading_ts'], iot_state['score'])
+            with profiling.stage("fusion.decide"):
+                FINAL_ALERT, fusion_scores, alert_zones = engine.decide(now)
+        if metrics is not None:
+            fusion_seconds.observe(time.perf_counter() - decided)
+            if FINAL_ALERT:
+                alert_frames.inc()
+                if not alert_active.value:
+                    alerts.inc()
+            alert_active.set(int(FINAL_ALERT))
+        if sink.needs_drawing(FINAL_ALERT):
+            draw_fusion_overlay(packet.frame, zones, boxes, hits, FINAL_ALERT, video_intrusion,
+                                iot_state['pred'], iot_state['data'], iot_state['score'])
 
-        # 2. BANDEAU D'INFORMATION (Plus petit)
-        # Un bandeau de 80 pixels de haut seulement
-        header_height = 80
-        cv2.rectangle(frame, (0, 0), (width, header_height), (0, 0, 0), -1)
-        
-        # Titre principal (Plus petit)
-        status_text = "ALERTE INTRUSION" if FINAL_ALERT else "SECURISE"
-        cv2.putText(frame, f"STATUS: {status_text}", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, status_color, 2)
+        packet.info = {
+            'frame': packet.index,
+            'ts': round(packet.index / fps, 3) if fps else None,
+            'boxes': boxes_to_list(boxes, packet.detections.conf.cpu().numpy()),
+            'zone_hits': hits.any(axis=1).tolist(),
+            'zones': zones.counts(hits),
+            'video_intrusion': video_intrusion,
+            'iot_pred': int(iot_state['pred']),
+            'iot_data': list(iot_state['data']),
+            'iot_anomaly': None if iot_state['score'] is None else round(iot_state['score'], 2),
+            'alert': bool(FINAL_ALERT),
+        }
+        if engine is not None:
+            packet.info['fusion'] = {name: round(score, 3) for name, score in fusion_scores.items()}
+            packet.info['alert_zones'] = alert_zones
+            if iot_state['reading_ts'] is not None:
+                # Instant de mesure et probabilité : le rejeu (fusion_engine.py) reconstruit la même décision
+                packet.info['iot_ts'] = round(iot_state['reading_ts'], 3)
+                packet.info['iot_proba'] = round(iot_state['proba'], 3)
+        if store is not None:
+            if new_reading:
+                store.add('iot', origin + iot_state['reading_ts'], camera_id, None, packet.index, iot_state['proba'],
+                          {'data': packet.info['iot_data'], 'anomaly': packet.info['iot_anomaly']})
+            # Justification enregistrée avec le début de chaque alerte
+            reason = {'video': video_intrusion, 'iot_proba': round(iot_state['proba'], 3),
+                      'iot_anomaly': packet.info['iot_anomaly'], 'fusion': packet.info.get('fusion')}
+            store.record_frame(origin + now, camera_id, packet.index, zones.names, hits,
+                               packet.detections.conf.cpu().numpy(), FINAL_ALERT,
+                               alert_zones if engine is not None else None, reason)
+        return packet
 
-        # Infos techniques (Petites et sur une ligne si possible)
-        iot_msg = "ALERTE" if current_iot_pred == 1 else "OK"
-        noise_val = current_iot_data[1] if current_iot_data else 0
-        
-        # Ligne 2 : Détails
-        detail_text = f"[IoT: {iot_msg} (Bruit: {noise_val}dB)]  |  [Video: {'INTRUSION' if video_intrusion else 'OK'}]"
-        cv2.putText(frame, detail_text, (10, 60), cv2.FONT_HERSHEY_SIMPLEX, 0.5, (200, 200, 200), 1)
+    # --- ENCODAGE & AFFICHAGE (thread principal) ---
+    def encode(packet):
+        sink.emit(packet.frame, packet.info, packet.info['alert'])
+        if metrics is not None:
+            metrics.metrics.frame()
 
-        cv2.imshow("FUSION SYSTEM", frame)
-        out.write(frame)
+    print(f"▶️ Système ACTIF. Zones interdites : {', '.join(zones.names)}")
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    stages = [("infer", gated_stage(infer, motion_gate)), ("fuse", fuse), ("encode", encode)]
+    pool = FramePool.for_capture(cap, pool_size(len(stages), threaded=pipelined)) if frame_pool else None
+    pipeline = Pipeline(video_source(cap, pool), stages, drop_policy=drop_policy, threaded=pipelined,
+                        started_at=launched, recycle=pool.recycle if pool is not None else None)
+    if metrics is not None:
+        pipeline.attach_metrics(metrics.metrics)
+        metrics.start()
+    try:
+        stats = pipeline.run()
+    finally:
+        cap.release()
+        sink.close()
+        if metrics is not None:
+            metrics.stop()
+        if ingestion is not None:
+            ingestion.stop()
+        model_server.stop()
+        if store is not None:
+            store.close()
 
-    cap.release()
-    out.release()
-    cv2.destroyAllWindows()
-    print(f"\n✅ Terminé ! Vidéo sauvegardée : {OUTPUT_PATH}")
+    print_stats(stats)
+    print_timings()
+    profiling.print_report()
+    if profiling.dump():
+        print(f"💾 Profil : {profiling.PROFILE_PATH}")
+    if ingestion is not None:
+        print(ingestion.summary())
+    print(model_server.summary())
+    if roi is not None:
+        print(roi.summary())
+    if pool is not None:
+        print(pool.summary())
+    if motion_gate is not None:
+        print(motion_gate.summary())
+    if store is not None:
+        print(f"🗄️ Journal : {store.written} événements dans {store.path}")
+    if sink.clips is not None:
+        print(sink.clips.summary())
+    print(f"\n✅ Terminé ! Sorties : {sink.summary()}")
+    return stats
 
 if __name__ == "__main__":
-    start_fusion_system()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Système de fusion IoT + vidéo")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--pipelined", action="store_true", help="Étapes décodage/inférence/dessin/encodage en parallèle")
+    parser.add_argument("--drop-policy", choices=[BLOCK, DROP_OLDEST], default=BLOCK)
+    add_output_arguments(parser, EVENTS_PATH)
+    add_clip_arguments(parser)
+    add_detector_arguments(parser)
+    add_gate_arguments(parser)
+    add_roi_arguments(parser)
+    add_pool_arguments(parser)
+    parser.add_argument("--zones", default=ZONES_PATH, help="Fichier JSON des zones interdites")
+    parser.add_argument("--anomaly", action="store_true", help="Ajoute le détecteur d'anomalies IoT en ligne")
+    parser.add_argument("--anomaly-threshold", type=float, default=None, help="Seuil en écarts-types")
+    add_ingestion_arguments(parser)
+    add_server_arguments(parser)
+    parser.add_argument("--fusion", choices=[FUSION_ENGINE, FUSION_OR], default=FUSION_ENGINE,
+                        help="engine : fusion temporelle (lissage, hystérésis) ; or : vidéo OU IoT par frame")
+    add_store_arguments(parser)
+    add_metrics_arguments(parser)
+    parser.add_argument("--profile", action="store_true", help="Percentiles par étape (équivaut à IAIS_PROFILE=1)")
+    args = parser.parse_args()
+    if args.profile:
+        profiling.enable()
+    render, events_path = resolve_output_arguments(args, EVENTS_PATH)
+    model_server = server_from_arguments(args)
+    start_fusion_system(args.pipelined, args.drop_policy, args.headless, render, events_path, video_path=args.video,
+                        motion_gate=gate_from_arguments(args), zones_path=args.zones,
+                        roi=args.roi, roi_margin=args.roi_margin, imgsz=args.imgsz,
+                        detector=detector_from_arguments(args), anomaly=args.anomaly,
+                        anomaly_threshold=args.anomaly_threshold,
+                        ingestion=ingestion_from_arguments(args, model_server),
+                        iot_sensor=args.iot_sensor, fusion=args.fusion,
+                        store=store_from_arguments(args), camera_id=args.camera_id,
+                        pre_roll=args.pre_roll, post_roll=args.post_roll, metrics=metrics_from_arguments(args),
+                        frame_pool=args.frame_pool, model_server=model_server, site=args.site)
@@ -0,0 +1,288 @@
+import argparse
+import datetime
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+
+# Configuration
+STORE_PATH = "results/logs/events.db"
+BATCH_SIZE = 1000          # Événements regroupés par transaction
+FLUSH_INTERVAL = 1.0       # s : un lot incomplet est écrit au plus tard après ce délai
+KEEP_DAYS = {'detection': 7, 'iot': 30, 'alert': 365}  # Rétention par type d'événement
+NIGHT_START, NIGHT_END = 22, 6  # "La nuit" : même définition que generate_data.py (22h - 6h)
+
+# Types d'événements (stockés en entier : index plus compacts)
+KINDS = {'detection': 0, 'iot': 1, 'alert': 2}
+KIND_NAMES = {v: k for k, v in KINDS.items()}
+
+# Journal d'événements persistant (SQLite en mode WAL) : détections par zone, lectures IoT et
+# alertes (début / fin, avec leur justification). Ajout uniquement ; les insertions sont
+# regroupées en transactions par un thread d'écriture, la boucle vidéo ne fait qu'empiler.
+# Index (zone, kind, ts) et (camera, kind, ts) : "toutes les alertes de la zone X cette nuit"
+# est une simple plage d'index, en millisecondes même sur des millions de lignes.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    camera TEXT NOT NULL,
+    zone TEXT,
+    kind INTEGER NOT NULL,
+    frame INTEGER,
+    score REAL,
+    data TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_events_zone ON events(zone, kind, ts);
+CREATE INDEX IF NOT EXISTS idx_events_camera ON events(camera, kind, ts);
+CREATE INDEX IF NOT EXISTS idx_events_kind ON events(kind, ts);
+"""
+
+def connect(path=STORE_PATH):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    conn = sqlite3.connect(path, check_same_thread=False)
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] == 0 and not os.path.getsize(path):
+        conn.execute("PRAGMA auto_vacuum = INCREMENTAL")  # Avant la création des tables uniquement
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.execute("PRAGMA synchronous = NORMAL")  # WAL : durable au checkpoint, sans fsync par transaction
+    conn.executescript(SCHEMA)
+    return conn
+
+class EventStore:
+
+    def __init__(self, path=STORE_PATH, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.conn = connect(path)
+        self.buffer = []
+        self.written = 0
+        self.alerts = {}  # (caméra, zone) -> début de l'alerte en cours
+        self.last_seen = {}  # caméra -> (ts, frame) de la dernière frame vue (fin des alertes à la fermeture)
+        self._queue = queue.Queue()
+        self._last_flush = time.monotonic()
+        self._writer = threading.Thread(target=self._write_loop, name="event-store", daemon=True)
+        self._writer.start()
+
+    # --- Écriture ---
+
+    def add(self, kind, ts, camera, zone=None, frame=None, score=None, data=None):
+        self.buffer.append((ts, camera, zone, KINDS[kind], frame, score,
+                            None if data is None else json.dumps(data, separators=(",", ":"))))
+        if len(self.buffer) >= self.batch_size or time.monotonic() - self._last_flush >= self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        # Le lot part vers le thread d'écriture : aucun accès disque dans l'appelant
+        if self.buffer:
+            self._queue.put(self.buffer)
+            self.buffer = []
+        self._last_flush = time.monotonic()
+
+    def _write_loop(self):
+        while True:
+            rows = self._queue.get()
+            if rows is None:
+                break
+            with self.conn:
+                self.conn.executemany("INSERT INTO events (ts, camera, zone, kind, frame, score, data) "
+                                      "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            self.written += len(rows)
+
+    def add_detections(self, ts, camera, frame, zone_names, hits, scores):
+        # Une ligne par zone occupée : nombre de personnes et meilleure confiance
+        for j in hits.any(axis=0).nonzero()[0]:
+            inside = hits[:, j]
+            self.add('detection', ts, camera, zone_names[j], frame, float(scores[inside].max()),
+                     {'count': int(inside.sum())})
+
+    def update_alerts(self, ts, camera, alerting, frame=None, reason=None):
+        # alerting : zones actuellement en alerte. On n'enregistre que les transitions :
+        # début (avec la justification) et fin (avec la durée).
+        current = set(alerting)
+        self.last_seen[camera] = (ts, frame)
+        for zone in current:
+            if (camera, zone) not in self.alerts:
+                self.alerts[(camera, zone)] = ts
+                self.add('alert', ts, camera, zone, frame, 1.0, {'state': "start", **(reason or {})})
+        for (cam, zone), started in list(self.alerts.items()):
+            if cam == camera and zone not in current:
+                del self.alerts[(cam, zone)]
+                self.add('alert', ts, camera, zone, frame, 0.0, {'state': "end", 'duration_s': round(ts - started, 3)})
+
+    def record_frame(self, ts, camera, frame, zone_names, hits, scores, alert, alert_zones=None, reason=None):
+        # Appelé une fois par frame par la fusion. alert_zones=None (règle OU, sans zones) :
+        # les zones occupées, ou "site" quand l'alerte vient du seul IoT
+        self.add_detections(ts, camera, frame, zone_names, hits, scores)
+        if alert_zones is None:
+            occupied = hits.any(axis=0)
+            alert_zones = ([name for name, hit in zip(zone_names, occupied) if hit] or ["site"]) if alert else []
+        self.update_alerts(ts, camera, alert_zones, frame, reason)
+
+    def close_alerts(self):
+        # Alertes encore ouvertes (arrêt du système, fin de la vidéo) : fin à la dernière frame vue
+        for (camera, zone), started in list(self.alerts.items()):
+            ts, frame = self.last_seen.get(camera, (started, None))
+            self.add('alert', ts, camera, zone, frame, 0.0,
+                     {'state': "end", 'duration_s': round(ts - started, 3), 'closed_by': "shutdown"})
+        self.alerts.clear()
+
+    def close(self):
+        self.close_alerts()
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        self.conn.close()
+
+    # --- Lecture ---
+
+    def query(self, kind=None, camera=None, zone=None, start=None, end=None, limit=None, state=None):
+        return query(self.conn, kind, camera, zone, start, end, limit, state)
+
+def query(conn, kind=None, camera=None, zone=None, start=None, end=None, limit=None, state=None):
+    # Filtres combinables ; start / end en secondes epoch. state : "start" / "end" (alertes)
+    clauses, params = [], []
+    for column, value in (("zone", zone), ("camera", camera)):
+        if value is not None:
+            clauses.append(f"{column} = ?")
+            params.append(value)
+    if kind is not None:
+        clauses.append("kind = ?")
+        params.append(KINDS[kind])
+    if start is not None:
+        clauses.append("ts >= ?")
+        params.append(start)
+    if end is not None:
+        clauses.append("ts < ?")
+        params.append(end)
+    if state is not None:
+        # Début d'alerte : score 1.0, fin : 0.0 (évite de parser le JSON dans la requête)
+        clauses.append("score = ?")
+        params.append(1.0 if state == "start" else 0.0)
+    sql = "SELECT ts, camera, zone, kind, frame, score, data FROM events"
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY ts"
+    if limit:
+        sql += f" LIMIT {int(limit)}"
+    return [{'ts': ts, 'time': datetime.datetime.fromtimestamp(ts).isoformat(sep=" ", timespec="seconds"),
+             'camera': cam, 'zone': z, 'kind': KIND_NAMES[k], 'frame': frame, 'score': score,
+             'data': json.loads(data) if data else None}
+            for ts, cam, z, k, frame, score, data in conn.execute(sql, params)]
+
+def last_night(now=None):
+    # Fenêtre [hier 22h, aujourd'hui 6h[ ; si on est déjà dans la nuit, la nuit en cours
+    now = now or datetime.datetime.now()
+    today_end = now.replace(hour=NIGHT_END, minute=0, second=0, microsecond=0)
+    if now.hour >= NIGHT_START:
+        today_end += datetime.timedelta(days=1)
+    start = today_end - datetime.timedelta(hours=24 - NIGHT_START + NIGHT_END)
+    return start.timestamp(), today_end.timestamp()
+
+def apply_retention(conn, keep_days=KEEP_DAYS, now=None):
+    # Purge par type (les alertes vivent bien plus longtemps que les détections), puis compaction :
+    # pages libérées rendues au système (auto_vacuum incrémental) et WAL tronqué
+    now = now or time.time()
+    deleted = {}
+    with conn:
+        for kind, days in keep_days.items():
+            deleted[kind] = conn.execute("DELETE FROM events WHERE kind = ? AND ts < ?",
+                                         (KINDS[kind], now - days * 86400)).rowcount
+    conn.executescript("PRAGMA incremental_vacuum;")  # executescript : exécuté jusqu'au bout, toutes les pages
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return deleted
+
+def summary(conn):
+    rows = conn.execute("SELECT kind, COUNT(*), MIN(ts), MAX(ts) FROM events GROUP BY kind").fetchall()
+    return {KIND_NAMES[k]: {'count': n, 'first': first, 'last': last} for k, n, first, last in rows}
+
+def import_jsonl(store, path, camera, origin=None):
+    # Reprise d'un journal .jsonl de la fusion : ts vidéo + origine (epoch du début de la vidéo)
+    origin = time.time() if origin is None else origin
+    count = 0
+    last_iot_ts = None
+    with open(path) as f:
+        for line in f:
+            event = json.loads(line)
+            ts = origin + (event.get('ts') or 0.0)
+            for zone, n in (event.get('zones') or {}).items():
+                boxes = event.get('boxes') or []
+                store.add('detection', ts, camera, zone, event['frame'],
+                          max((b[4] for b in boxes if len(b) > 4), default=None), {'count': n})
+            # Nouvelle lecture = iot_ts qui change (le service d'ingestion la date de sa mesure, avant la frame)
+            if event.get('iot_ts') is not None and event['iot_ts'] != last_iot_ts:
+                last_iot_ts = event['iot_ts']
+                store.add('iot', origin + last_iot_ts, camera, None, event['frame'], event.get('iot_proba'),
+                          {'data': event['iot_data'], 'anomaly': event.get('iot_anomaly')})
+            alerting = event.get('alert_zones', ["site"] if event.get('alert') else [])
+            store.update_alerts(ts, camera, alerting, event['frame'], {'fusion': event.get('fusion')})
+            count += 1
+    return count
+
+def add_store_arguments(parser, camera=True):
+    parser.add_argument("--store", nargs="?", const=STORE_PATH, default=None,
+                        help=f"Journal SQLite des détections / lectures IoT / alertes (défaut {STORE_PATH})")
+    if camera:
+        parser.add_argument("--camera-id", default="cam0", help="Identifiant de la caméra dans le journal")
+
+def store_from_arguments(args):
+    return EventStore(args.store) if args.store else None
+
+def _parse_time(value):
+    return datetime.datetime.fromisoformat(value).timestamp() if value else None
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Journal d'événements et d'alertes (SQLite)")
+    parser.add_argument("--db", default=STORE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    q = sub.add_parser("query", help="Recherche d'événements")
+    q.add_argument("--kind", choices=list(KINDS), default="alert")
+    q.add_argument("--camera", default=None)
+    q.add_argument("--zone", default=None)
+    q.add_argument("--since", default=None, help="Début (ISO, ex : 2026-10-17T22:00)")
+    q.add_argument("--until", default=None, help="Fin (ISO)")
+    q.add_argument("--last-night", action="store_true", help="Hier 22h -> aujourd'hui 6h")
+    q.add_argument("--state", choices=["start", "end"], default=None, help="Alertes : débuts ou fins seulement")
+    q.add_argument("--limit", type=int, default=100)
+    q.add_argument("--json", action="store_true", help="Sortie JSON (une ligne par événement)")
+
+    sub.add_parser("stats", help="Nombre d'événements par type")
+
+    r = sub.add_parser("retention", help="Purge selon la rétention puis compaction")
+    for kind, days in KEEP_DAYS.items():
+        r.add_argument(f"--keep-{kind}", type=float, default=days, help=f"Jours gardés (défaut {days})")
+
+    i = sub.add_parser("import", help="Importe un journal .jsonl de la fusion")
+    i.add_argument("path")
+    i.add_argument("--camera", default="cam0")
+    i.add_argument("--origin", default=None, help="Début de la vidéo (ISO), défaut : maintenant")
+    args = parser.parse_args()
+
+    if args.command == "import":
+        store = EventStore(args.db)
+        n = import_jsonl(store, args.path, args.camera, _parse_time(args.origin))
+        store.close()
+        print(f"✅ {n} frames importées dans {args.db}")
+    elif args.command == "stats":
+        for kind, s in summary(connect(args.db)).items():
+            print(f"   {kind:<10} {s['count']:>10,} | {datetime.datetime.fromtimestamp(s['first']):%Y-%m-%d %H:%M} "
+                  f"-> {datetime.datetime.fromtimestamp(s['last']):%Y-%m-%d %H:%M}")
+    elif args.command == "retention":
+        keep = {kind: getattr(args, f"keep_{kind}") for kind in KEEP_DAYS}
+        deleted = apply_retention(connect(args.db), keep)
+        print(f"🧹 Supprimés : {deleted}")
+    else:
+        start, end = last_night() if args.last_night else (_parse_time(args.since), _parse_time(args.until))
+        t0 = time.perf_counter()
+        rows = query(connect(args.db), args.kind, args.camera, args.zone, start, end, args.limit, args.state)
+        elapsed = (time.perf_counter() - t0) * 1000
+        for row in rows:
+            if args.json:
+                print(json.dumps(row))
+            else:
+                print(f"   {row['time']} | {row['camera']:<8} | {row['zone'] or '-':<12} | {row['kind']:<9} | "
+                      f"{json.dumps(row['data'], ensure_ascii=False)}")
+        print(f"🔎 {len(rows)} événements en {elapsed:.1f} ms")
@@ -0,0 +1,328 @@
+import argparse
+import json
+import math
+import os
+import sys
+import time
+import numpy as np
+
+# Configuration
+RING_SIZE = 256          # Preuves gardées par zone et par source (historique borné)
+VIDEO_WEIGHT = 1.0
+IOT_WEIGHT = 0.6         # Une prédiction IoT fraîche suffit à déclencher (0.6 >= ON_THRESHOLD)
+ANOMALY_WEIGHT = 0.4
+VIDEO_TAU = 0.25         # s : lissage de la vidéo, une rafale de 1 à 5 frames ne suffit pas
+IOT_TAU = 1.5            # s : une prédiction IoT qui n'est pas renouvelée s'efface (lecture périmée)
+ANOMALY_TAU = 1.5
+ANOMALY_SCALE = 8.0      # Score d'anomalie (écarts-types) ramené dans [0, 1] : min(score / 8, 1)
+ON_THRESHOLD = 0.5       # Hystérésis : on déclenche au-dessus de 0.5...
+OFF_THRESHOLD = 0.3      # ... et on ne lève l'alerte que sous 0.3
+DEBOUNCE_ON = 0.1        # s au-dessus du seuil haut avant de déclencher
+DEBOUNCE_OFF = 0.5       # s sous le seuil bas avant de lever l'alerte
+DEFAULT_DT = 1 / 30      # Pas supposé pour la toute première frame
+GRACE = 1.0              # s de tolérance autour des intrusions réelles (rejeu)
+REPLAY_PATH = "results/logs/fusion_replay.json"
+FUSION_ENGINE = "engine"
+FUSION_OR = "or"         # Ancien comportement : vidéo OU IoT, frame par frame
+
+# Moteur de fusion temporel : chaque zone garde ses preuves horodatées (vidéo, IoT, anomalie)
+# dans des tampons circulaires de taille fixe, et un score pondéré qui décroît avec le temps :
+#   - vidéo : moyenne exponentielle en temps continu (un faux positif isolé pèse peu),
+#   - IoT / anomalie : dernière valeur, atténuée selon son âge (une lecture périmée s'efface).
+# L'alerte suit un automate à hystérésis + anti-rebond. Chaque événement coûte O(1) par zone :
+# aucun parcours de l'historique, les tampons ne servent qu'à l'explication / l'inspection.
+
+class EvidenceRing:
+    # Tampon circulaire (horodatage, valeur) : ajout O(1), mémoire fixe
+
+    def __init__(self, capacity=RING_SIZE):
+        self.ts = np.zeros(capacity)
+        self.value = np.zeros(capacity, dtype=np.float32)
+        self.capacity = capacity
+        self.head = 0
+        self.size = 0
+
+    def push(self, ts, value):
+        self.ts[self.head] = ts
+        self.value[self.head] = value
+        self.head = (self.head + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def window(self, since=-math.inf):
+        # Preuves depuis `since`, dans l'ordre chronologique
+        order = np.arange(self.head - self.size, self.head) % self.capacity
+        ts, value = self.ts[order], self.value[order]
+        keep = ts >= since
+        return ts[keep], value[keep]
+
+class ZoneState:
+    def __init__(self, name, ring_size=RING_SIZE):
+        self.name = name
+        self.video = 0.0           # Niveau lissé de la vidéo à video_ts
+        self.video_ts = None
+        self.iot = 0.0             # Dernière probabilité IoT, lue à iot_ts
+        self.iot_ts = -math.inf
+        self.anomaly = 0.0
+        self.anomaly_ts = -math.inf
+        self.alert = False
+        self.pending_since = None  # Début de la condition de bascule en cours (anti-rebond)
+        self.alert_since = None
+        self.rings = {'video': EvidenceRing(ring_size), 'iot': EvidenceRing(ring_size),
+                      'anomaly': EvidenceRing(ring_size)}
+
+class FusionEngine:
+
+    def __init__(self, zone_names, video_weight=VIDEO_WEIGHT, iot_weight=IOT_WEIGHT, anomaly_weight=ANOMALY_WEIGHT,
+                 video_tau=VIDEO_TAU, iot_tau=IOT_TAU, anomaly_tau=ANOMALY_TAU, on_threshold=ON_THRESHOLD,
+                 off_threshold=OFF_THRESHOLD, debounce_on=DEBOUNCE_ON, debounce_off=DEBOUNCE_OFF,
+                 ring_size=RING_SIZE):
+        if off_threshold > on_threshold:
+            raise ValueError("❌ Le seuil bas doit être inférieur au seuil haut (hystérésis)")
+        self.zones = [ZoneState(name, ring_size) for name in zone_names]
+        self.index = {name: i for i, name in enumerate(zone_names)}
+        self.weights = (video_weight, iot_weight, anomaly_weight)
+        self.taus = (video_tau, iot_tau, anomaly_tau)
+        self.on_threshold = on_threshold
+        self.off_threshold = off_threshold
+        self.debounce_on = debounce_on
+        self.debounce_off = debounce_off
+
+    def _targets(self, zone):
+        # zone=None : preuve "site" (capteur IoT commun), appliquée à toutes les zones
+        return self.zones if zone is None else [self.zones[self.index[zone]]]
+
+    def add_video(self, ts, hits):
+        # hits : une valeur par zone (booléen ou confiance dans [0, 1]), dans l'ordre des zones
+        tau = self.taus[0]
+        for state, hit in zip(self.zones, hits):
+            hit = float(hit)
+            dt = DEFAULT_DT if state.video_ts is None else max(ts - state.video_ts, 0.0)
+            alpha = 1.0 - math.exp(-dt / tau)
+            state.video += alpha * (hit - state.video)
+            state.video_ts = ts
+            state.rings['video'].push(ts, hit)
+
+    def add_iot(self, ts, proba, zone=None):
+        # ts : instant de la MESURE (pas de sa réception) ; une lecture plus ancienne que la
+        # dernière connue est ignorée (arrivées dans le désordre)
+        for state in self._targets(zone):
+            if ts >= state.iot_ts:
+                state.iot, state.iot_ts = float(proba), ts
+                state.rings['iot'].push(ts, proba)
+
+    def add_anomaly(self, ts, score, zone=None):
+        level = min(float(score) / ANOMALY_SCALE, 1.0)
+        for state in self._targets(zone):
+            if ts >= state.anomaly_ts:
+                state.anomaly, state.anomaly_ts = level, ts
+                state.rings['anomaly'].push(ts, level)
+
+    def score(self, state, ts):
+        w_video, w_iot, w_anomaly = self.weights
+        tau_video, tau_iot, tau_anomaly = self.taus
+        video = 0.0
+        if state.video_ts is not None:
+            video = state.video * math.exp(-max(ts - state.video_ts, 0.0) / tau_video)
+        iot = state.iot * math.exp(-max(ts - state.iot_ts, 0.0) / tau_iot) if state.iot else 0.0
+        anomaly = state.anomaly * math.exp(-max(ts - state.anomaly_ts, 0.0) / tau_anomaly) if state.anomaly else 0.0
+        return w_video * video + w_iot * iot + w_anomaly * anomaly
+
+    def _step(self, state, ts, score):
+        # Hystérésis + anti-rebond : la condition de bascule doit tenir debounce_on / debounce_off
+        if not state.alert:
+            switching = score >= self.on_threshold
+            delay = self.debounce_on
+        else:
+            switching = score < self.off_threshold
+            delay = self.debounce_off
+        if not switching:
+            state.pending_since = None
+            return
+        if state.pending_since is None:
+            state.pending_since = ts
+        if ts - state.pending_since >= delay:
+            state.alert = not state.alert
+            state.alert_since = ts if state.alert else None
+            state.pending_since = None
+
+    def decide(self, ts):
+        # Met à jour chaque zone à l'instant ts ; renvoie (alerte globale, {zone: score}, zones en alerte)
+        scores = {}
+        for state in self.zones:
+            score = self.score(state, ts)
+            self._step(state, ts, score)
+            scores[state.name] = score
+        alerting = [state.name for state in self.zones if state.alert]
+        return bool(alerting), scores, alerting
+
+    def explain(self, zone, seconds=5.0, now=None):
+        # Preuves récentes d'une zone (pour un rapport d'alerte)
+        state = self.zones[self.index[zone]]
+        now = state.video_ts if now is None else now
+        since = -math.inf if now is None else now - seconds
+        return {source: {'ts': ts.tolist(), 'value': value.round(3).tolist()}
+                for source, (ts, value) in ((s, ring.window(since)) for s, ring in state.rings.items())}
+
+# --- Rejeu : latence d'alerte et fausses alertes sur des flux d'événements enregistrés ---
+
+def load_events(path):
+    # Journal écrit par vision.events.EventWriter (.jsonl ou .parquet)
+    if path.endswith(".parquet"):
+        import pandas as pd
+        events = pd.read_parquet(path).to_dict("records")
+        for event in events:
+            for key, value in event.items():
+                if isinstance(value, str) and value[:1] in "[{":
+                    event[key] = json.loads(value)
+        return events
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+def load_truth(path):
+    # Intrusions réelles : [[début_s, fin_s], ...] ou {"intrusions": [...]}
+    with open(path) as f:
+        truth = json.load(f)
+    return [tuple(interval) for interval in (truth['intrusions'] if isinstance(truth, dict) else truth)]
+
+def event_zones(events):
+    names = []
+    for event in events:
+        for name in event.get('zones') or {}:
+            if name not in names:
+                names.append(name)
+    return names or ["zone"]
+
+def replay(events, zone_names, engine=None):
+    # engine=None : ancienne règle (vidéo OU prédiction IoT courante), frame par frame.
+    # Renvoie les instants et l'état d'alerte à chaque frame.
+    ts_out, alerts = np.empty(len(events)), np.zeros(len(events), dtype=bool)
+    last_iot = None
+    for i, event in enumerate(events):
+        ts = event['ts']
+        zones = event.get('zones') or {}
+        if engine is None:
+            alerts[i] = bool(zones) or event.get('iot_pred') == 1
+        else:
+            engine.add_video(ts, [zones.get(name, 0) > 0 for name in zone_names])
+            # Nouvelle lecture IoT : horodatage de mesure s'il a été enregistré, sinon 1ère frame où elle apparaît
+            reading = (event.get('iot_ts'), tuple(event.get('iot_data') or ()))
+            if reading[1] and reading != last_iot:
+                iot_ts = event.get('iot_ts', ts)
+                engine.add_iot(iot_ts, event.get('iot_proba', event.get('iot_pred', 0)))
+                if event.get('iot_anomaly') is not None:
+                    engine.add_anomaly(iot_ts, event['iot_anomaly'])
+                last_iot = reading
+            alerts[i] = engine.decide(ts)[0]
+        ts_out[i] = ts
+    return ts_out, alerts
+
+def evaluate(ts, alerts, truth, grace=GRACE):
+    # Latence : délai entre le début d'une intrusion réelle et la première frame en alerte.
+    # Fausse alerte : déclenchement (front montant) hors de toute intrusion (+/- grace).
+    onsets = ts[np.flatnonzero(alerts & ~np.concatenate([[False], alerts[:-1]]))]
+    latencies, missed = [], 0
+    for start, end in truth:
+        on = ts[(ts >= start) & (ts <= end + grace) & alerts]
+        if len(on):
+            latencies.append(float(max(on[0] - start, 0.0)))
+        else:
+            missed += 1
+    near = np.zeros(len(onsets), dtype=bool)
+    for start, end in truth:
+        near |= (onsets >= start - grace) & (onsets <= end + grace)
+    inside = np.zeros(len(ts), dtype=bool)
+    for start, end in truth:
+        inside |= (ts >= start - grace) & (ts <= end + grace)
+    dt = np.diff(ts, append=ts[-1] + (ts[-1] - ts[-2] if len(ts) > 1 else DEFAULT_DT)) if len(ts) else ts
+    latencies = np.array(latencies) if latencies else np.zeros(0)
+    return {
+        'intrusions': len(truth),
+        'detected': len(truth) - missed,
+        'missed': missed,
+        'latency_s_mean': float(latencies.mean()) if len(latencies) else None,
+        'latency_s_p95': float(np.percentile(latencies, 95)) if len(latencies) else None,
+        'alerts': int(len(onsets)),
+        'false_alerts': int((~near).sum()),
+        'false_alert_seconds': float(dt[alerts & ~inside].sum()),
+    }
+
+def synthetic_events(duration=600.0, fps=30, seed=0, n_intrusions=20, zone="zone_bas", video_recall=0.9,
+                     flicker_rate=0.01, iot_period=1.0, iot_recall=0.8, iot_false_rate=0.05):
+    # Flux "enregistré" réaliste avec vérité terrain connue : détecteur qui rate des frames et
+    # clignote hors intrusion (rafales de 1 à 3 frames), capteur IoT toutes les secondes avec
+    # faux positifs. Même format que les événements de start_fusion_system.
+    rng = np.random.default_rng(seed)
+    n = int(duration * fps)
+    ts = np.arange(n) / fps
+    starts = np.sort(rng.uniform(5, duration - 20, n_intrusions))
+    truth = []
+    for start in starts:
+        if truth and start < truth[-1][1] + 5:
+            continue
+        truth.append((float(start), float(start + rng.uniform(3, 12))))
+    inside = np.zeros(n, dtype=bool)
+    for start, end in truth:
+        inside |= (ts >= start) & (ts <= end)
+    video = inside & (rng.random(n) < video_recall)
+    for i in np.flatnonzero(~inside & (rng.random(n) < flicker_rate)):
+        video[i:i + rng.integers(1, 4)] = True
+
+    events, pred, data, iot_ts = [], 0, [], None
+    next_reading = 0.0
+    for i in range(n):
+        if ts[i] >= next_reading:
+            intrusion = bool(inside[i])
+            pred = int(rng.random() < (iot_recall if intrusion else iot_false_rate))
+            data = [pred, int(rng.integers(60, 100) if pred else rng.integers(20, 50)), pred, 20.5, 23]
+            iot_ts = round(float(ts[i]), 3)
+            next_reading += iot_period
+        events.append({'frame': i, 'ts': round(float(ts[i]), 3), 'zones': {zone: 1} if video[i] else {},
+                       'iot_pred': pred, 'iot_data': data, 'iot_ts': iot_ts})
+    return events, truth
+
+def compare(events, truth, zone_names=None, grace=GRACE, **engine_kwargs):
+    # Ancienne règle OU vs moteur temporel sur le même flux
+    zone_names = zone_names or event_zones(events)
+    report = {'frames': len(events), 'zones': zone_names, 'policies': {}}
+    for policy in (FUSION_OR, FUSION_ENGINE):
+        engine = FusionEngine(zone_names, **engine_kwargs) if policy == FUSION_ENGINE else None
+        start = time.perf_counter()
+        ts, alerts = replay(events, zone_names, engine)
+        elapsed = time.perf_counter() - start
+        report['policies'][policy] = {**evaluate(ts, alerts, truth, grace),
+                                      'us_per_event': elapsed / max(len(events), 1) * 1e6}
+    return report
+
+def print_report(report):
+    for policy, r in report['policies'].items():
+        latency = f"{r['latency_s_mean']:.2f} s (p95 {r['latency_s_p95']:.2f} s)" if r['latency_s_mean'] is not None else "-"
+        print(f"   {policy:<7} détectées {r['detected']}/{r['intrusions']} | latence {latency} | "
+              f"fausses alertes {r['false_alerts']} ({r['false_alert_seconds']:.1f} s) | "
+              f"{r['us_per_event']:.1f} µs/événement")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejeu : latence d'alerte et fausses alertes, règle OU vs moteur temporel")
+    parser.add_argument("--events", default=None, help="Journal d'événements enregistré (.jsonl / .parquet)")
+    parser.add_argument("--truth", default=None, help="Intrusions réelles (JSON [[début, fin], ...])")
+    parser.add_argument("--synthetic", type=float, default=600.0, help="Durée du flux synthétique (sans --events)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--grace", type=float, default=GRACE)
+    parser.add_argument("--output", default=REPLAY_PATH)
+    args = parser.parse_args()
+
+    if args.events:
+        if not args.truth:
+            sys.exit("❌ --truth est nécessaire pour évaluer un journal enregistré")
+        events, truth, source = load_events(args.events), load_truth(args.truth), args.events
+    else:
+        events, truth = synthetic_events(args.synthetic, seed=args.seed)
+        source = f"synthétique ({args.synthetic:g} s, graine {args.seed})"
+    print(f"🔁 Rejeu de {len(events):,} événements, {len(truth)} intrusions réelles : {source}")
+    report = compare(events, truth, grace=args.grace)
+    report['source'] = source
+    print_report(report)
+
+    os.makedirs(os.path.dirname(args.output), exist_ok=True)
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {args.output}")
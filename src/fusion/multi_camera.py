@@ -0,0 +1,262 @@
+import argparse
+import collections
+import os
+import queue
+import sys
+import threading
+import time
+import cv2
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core.registry import get_detector
+from fusion.decision_system import VIDEO_PATH, draw_fusion_overlay, fuse_decision, simulate_iot_reading
+from fusion.event_store import add_store_arguments, store_from_arguments
+from fusion.fusion_engine import FUSION_ENGINE, FUSION_OR, FusionEngine
+from iot.model_server import ModelServer, add_server_arguments, parse_sites, server_from_arguments, site_label
+from vision.detectors import add_detector_arguments, detector_from_arguments
+from vision.frame_pool import POOL_SLACK, FramePool
+from vision.zones import ZONES_PATH, ZoneSet
+
+# Configuration
+OUTPUT_DIR = "results/videos/multi"
+QUEUE_SIZE = 4          # Frames décodées en avance par caméra
+GATHER_TIMEOUT = 0.005  # Attente max (s) d'une frame par flux avant de lancer le batch sans lui
+REPORT_EVERY = 5.0      # Secondes entre deux rapports console
+LATENCY_SAMPLES = 1024  # Dernières latences gardées par flux pour les percentiles (mémoire bornée)
+
+class StreamReader(threading.Thread):
+    # Un thread de décodage par caméra : cap.read() ne bloque plus jamais la boucle YOLO.
+    # drop_frames=True (caméras live) : on jette la plus vieille frame si la file est pleine,
+    # drop_frames=False (fichiers) : le lecteur attend, aucune frame n'est perdue.
+    # Décodage dans une réserve de tampons (file + frame en lecture + frame dans le batch YOLO) :
+    # la boucle principale rend chaque tampon après l'écriture de sa frame.
+
+    def __init__(self, index, source, queue_size=QUEUE_SIZE, drop_frames=False):
+        super().__init__(daemon=True)
+        self.index = index
+        self.source = source
+        self.drop_frames = drop_frames
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.stopped = threading.Event()
+        self.dropped = 0
+
+        self.cap = cv2.VideoCapture(source)
+        if not self.cap.isOpened():
+            raise FileNotFoundError(f"❌ Flux vidéo introuvable : {source}")
+        self.width = int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        self.height = int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        self.fps = self.cap.get(cv2.CAP_PROP_FPS) or 25.0  # Flottant (29.97) : horloge vidéo exacte
+        self.pool = FramePool.for_capture(self.cap, queue_size + POOL_SLACK)
+
+    def _put(self, item):
+        while not self.stopped.is_set():
+            try:
+                self.frames.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if self.drop_frames:
+                    try:
+                        self.pool.release(self.frames.get_nowait()[3])
+                        self.dropped += 1
+                    except queue.Empty:
+                        pass
+
+    def run(self):
+        frame_index = 0
+        while not self.stopped.is_set():
+            success, frame, slot = self.pool.read(self.cap)
+            if not success:
+                break
+            # Horodatage à la capture : sert à mesurer la latence bout en bout
+            self._put((frame_index, time.perf_counter(), frame, slot))
+            frame_index += 1
+        self._put(None)  # Fin du flux
+        self.cap.release()
+
+    def stop(self):
+        self.stopped.set()
+
+class StreamContext:
+    # État propre à une caméra : zone, IoT simulé, moteur de fusion, writer et statistiques
+    def __init__(self, reader, output_dir, model_server, zones_path=ZONES_PATH, fusion=FUSION_ENGINE, store=None,
+                 site=None):
+        self.reader = reader
+        self.store = store  # Journal partagé par les flux, une caméra = "cam<index>"
+        self.camera_id = f"cam{reader.index}"
+        # Masques de zones rastérisés à la résolution de CE flux
+        self.zones = ZoneSet.from_config(reader.width, reader.height, zones_path)
+        self.engine = FusionEngine(self.zones.names) if fusion == FUSION_ENGINE else None
+        self.model_server = model_server
+        self.site = site  # Chaque lecture est scorée par le modèle du site de la caméra
+        self.iot_pred = 0
+        self.iot_proba = 0.0
+        self.iot_data = []
+        self.frame_count = 0
+        self.alert_frames = 0
+        self.latencies = collections.deque(maxlen=LATENCY_SAMPLES)
+        self.finished = False
+        self.started_at = None
+        self.started_wall = time.time()
+
+        self.output_path = os.path.join(output_dir, f"stream_{reader.index}.mp4")
+        self.out = cv2.VideoWriter(self.output_path, cv2.VideoWriter_fourcc(*'mp4v'), reader.fps,
+                                   (reader.width, reader.height))
+
+    def process(self, frame, captured_at, boxes, scores=None):
+        self.frame_count += 1
+        hits = self.zones.hits(boxes)
+        video_intrusion = bool(hits.any())
+
+        # IoT simulé indépendant par caméra (un capteur par site)
+        now = self.frame_count / self.reader.fps  # Horloge vidéo du flux
+        new_reading = self.frame_count % 30 == 0
+        if new_reading:
+            self.iot_data = simulate_iot_reading()
+            # Probabilité recalée sur le seuil du modèle du site (> 0.5 = alerte), comme decision_system
+            self.iot_proba = float(self.model_server.alarm_scores([self.iot_data],
+                                                                  None if self.site is None else [self.site])[0])
+            self.iot_pred = int(self.iot_proba > 0.5)
+
+        alert_zones = None
+        if self.engine is None:
+            alert = fuse_decision(video_intrusion, self.iot_pred)
+        else:
+            self.engine.add_video(now, hits.any(axis=0))
+            if new_reading:
+                self.engine.add_iot(now, self.iot_proba)
+            alert, _, alert_zones = self.engine.decide(now)
+        draw_fusion_overlay(frame, self.zones, boxes, hits, alert, video_intrusion, self.iot_pred, self.iot_data)
+        if alert:
+            self.alert_frames += 1
+        if self.store is not None:
+            ts = self.started_wall + now
+            if new_reading:
+                self.store.add('iot', ts, self.camera_id, None, self.frame_count, self.iot_proba,
+                               {'data': list(self.iot_data)})
+            self.store.record_frame(ts, self.camera_id, self.frame_count, self.zones.names, hits, scores, alert,
+                                    alert_zones, {'video': video_intrusion, 'iot_pred': int(self.iot_pred)})
+        self.out.write(frame)
+        self.latencies.append(time.perf_counter() - captured_at)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        latencies = np.array(self.latencies) if self.latencies else np.zeros(1)
+        return {
+            'source': self.reader.source,
+            'frames': self.frame_count,
+            'fps': self.frame_count / elapsed if elapsed > 0 else 0.0,
+            'latency_ms_p50': float(np.percentile(latencies, 50) * 1000),
+            'latency_ms_p95': float(np.percentile(latencies, 95) * 1000),
+            'alert_frames': self.alert_frames,
+            'dropped': self.reader.dropped,
+        }
+
+    def close(self):
+        self.out.release()
+
+def _print_stats(contexts):
+    for ctx in contexts:
+        st = ctx.stats()
+        print(f"   📹 Flux {ctx.reader.index} : {st['frames']:5d} frames | {st['fps']:5.1f} FPS | "
+              f"latence p50 {st['latency_ms_p50']:6.1f} ms, p95 {st['latency_ms_p95']:6.1f} ms | "
+              f"alertes {st['alert_frames']} | perdues {st['dropped']}")
+
+def start_multi_camera_system(sources, output_dir=OUTPUT_DIR, drop_frames=False, show=False, zones_path=ZONES_PATH,
+                              detector=None, fusion=FUSION_ENGINE, store=None, model_server=None, sites=None):
+    # sites : site de chaque caméra (caméra i -> sites[i % len(sites)]) ; None = modèle global pour toutes
+    print(f"🧠 Démarrage du SYSTÈME MULTI-CAMÉRAS ({len(sources)} flux)...")
+
+    # 1. Modèles partagés par tous les flux (un seul YOLO, appelé en batch) ; modèles IoT par site,
+    #    rechargés à chaud sans interrompre la boucle
+    camera_sites = [sites[i % len(sites)] if sites else None for i in range(len(sources))]
+    model_server = (model_server or ModelServer()).preload(camera_sites).start()
+    print(f"🗂️ Modèles IoT : {', '.join(f'cam{i} -> {site_label(s)}' for i, s in enumerate(camera_sites))}")
+    vision_model = detector or get_detector()
+
+    # 2. Un lecteur (thread) + un contexte par caméra
+    os.makedirs(output_dir, exist_ok=True)
+    readers = [StreamReader(i, src, drop_frames=drop_frames) for i, src in enumerate(sources)]
+    contexts = [StreamContext(r, output_dir, model_server, zones_path, fusion, store, camera_sites[r.index])
+                for r in readers]
+    for reader, ctx in zip(readers, contexts):
+        ctx.started_at = time.perf_counter()
+        reader.start()
+
+    print("▶️ Système ACTIF. (Ctrl+C pour arrêter)")
+    last_report = time.perf_counter()
+    try:
+        while not all(ctx.finished for ctx in contexts):
+            # 3. On rassemble au plus une frame par flux actif
+            batch = []
+            for ctx in contexts:
+                if ctx.finished:
+                    continue
+                try:
+                    item = ctx.reader.frames.get(timeout=GATHER_TIMEOUT)
+                except queue.Empty:
+                    continue
+                if item is None:
+                    ctx.finished = True
+                    continue
+                batch.append((ctx, item))
+
+            if not batch:
+                continue
+
+            # 4. Un seul appel YOLO pour toutes les caméras
+            frames = [frame for _, (_, _, frame, _) in batch]
+            results = vision_model(frames, conf=0.5, classes=0, verbose=False)
+
+            # 5. Retour des résultats vers la logique zone / fusion / writer de chaque flux
+            for (ctx, (_, captured_at, frame, slot)), result in zip(batch, results):
+                ctx.process(frame, captured_at, result.boxes.xyxy.cpu().numpy(), result.boxes.conf.cpu().numpy())
+                if show:
+                    cv2.imshow(f"FUSION SYSTEM - Flux {ctx.reader.index}", frame)
+                ctx.reader.pool.release(slot)  # Frame écrite (et affichée) : le tampon peut resservir
+
+            if show and cv2.waitKey(1) & 0xFF == ord('q'):
+                break
+
+            if time.perf_counter() - last_report >= REPORT_EVERY:
+                _print_stats(contexts)
+                last_report = time.perf_counter()
+    except KeyboardInterrupt:
+        print("\n⏹️ Arrêt demandé.")
+    finally:
+        for reader in readers:
+            reader.stop()
+        for ctx in contexts:
+            ctx.close()
+        model_server.stop()
+        if show:
+            cv2.destroyAllWindows()
+        if store is not None:
+            store.close()
+
+    print("\n📊 Bilan par flux :")
+    _print_stats(contexts)
+    print(model_server.summary())
+    print(f"✅ Terminé ! Vidéos sauvegardées dans : {output_dir}")
+    return [ctx.stats() for ctx in contexts]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fusion IoT + vidéo sur plusieurs caméras")
+    parser.add_argument("sources", nargs="*", default=[VIDEO_PATH, VIDEO_PATH],
+                        help="Fichiers vidéo, URL RTSP ou index de webcam")
+    parser.add_argument("--output-dir", default=OUTPUT_DIR)
+    parser.add_argument("--drop-frames", action="store_true", help="Caméras live : jeter les frames en retard")
+    parser.add_argument("--show", action="store_true", help="Afficher une fenêtre par flux")
+    parser.add_argument("--zones", default=ZONES_PATH, help="Fichier JSON des zones interdites")
+    parser.add_argument("--fusion", choices=[FUSION_ENGINE, FUSION_OR], default=FUSION_ENGINE)
+    add_detector_arguments(parser)
+    add_store_arguments(parser, camera=False)  # Identifiants cam0, cam1... dans l'ordre des sources
+    add_server_arguments(parser, site=False)
+    parser.add_argument("--camera-sites", default=None,
+                        help="Site de chaque caméra, séparés par des virgules (caméra i -> site i modulo leur nombre)")
+    args = parser.parse_args()
+
+    sources = [int(s) if s.isdigit() else s for s in args.sources]
+    start_multi_camera_system(sources, args.output_dir, args.drop_frames, args.show, args.zones,
+                              detector_from_arguments(args), args.fusion, store_from_arguments(args),
+                              server_from_arguments(args), parse_sites(args.camera_sites))
@@ -1,24 +1,25 @@
-import pandas as pd
+import sys
 import matplotlib.pyplot as plt
 import os
 from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.storage import DATASET_PATH, FEATURES, load_iot_data
+
 # Configuration
-INPUT_PATH = "data/iot/iot_data.csv"
+INPUT_PATH = DATASET_PATH  # Jeu columnar (repli automatique sur iot_data.csv)
 FIGURE_PATH = "results/figures/anomalies_detected.png"
 
 def detect_anomalies():
     print("🕵️ Démarrage de la détection d'anomalies (Non supervisé)...")
     
     # 1. Chargement des données brutes
-    if not os.path.exists(INPUT_PATH):
-        raise FileNotFoundError(f"❌ {INPUT_PATH} introuvable.")
-    
-    df = pd.read_csv(INPUT_PATH)
+    # Projection : on ne lit que les colonnes utiles (+ le label, pour l'analyse)
+    df = load_iot_data(INPUT_PATH, columns=FEATURES + ['label'])
     
     # On garde les données utiles (on enlève le label car l'algo ne doit pas tricher !)
-    X = df[['motion', 'sound_level', 'vibration', 'temperature', 'hour']]
+    X = df[FEATURES]
     
     # 2. Normalisation (Important pour que la température ne pèse pas moins que le bruit)
     scaler = StandardScaler()
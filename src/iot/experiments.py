@@ -0,0 +1,200 @@
+import argparse
+import json
+import os
+import sys
+import time
+import joblib
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.ensemble import GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.metrics import roc_auc_score
+from sklearn.model_selection import StratifiedKFold, train_test_split
+from sklearn.preprocessing import StandardScaler
+
+# Même hack que train_classifier.py : src/ dans le path, imports par le paquet iot
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.fast_inference import compile_model
+from iot.generate_data import DEFAULT_SEED, generate_iot_data
+from iot.preprocess import SCALER_PATH
+from iot.storage import FEATURES, load_iot_data
+from iot.train_classifier import MODEL_PATH, export_for_inference
+
+# Configuration
+EXPERIMENT_ROWS = 200_000   # Données générées à la volée (bien plus que les 2000 lignes de la Partie A)
+CV_FOLDS = 5
+TEST_RATIO = 0.2            # Jeu de test final, jamais vu pendant la recherche
+TARGET_FPR = 0.01           # Taux de fausses alarmes toléré : 1% des situations normales
+RECALL_TOLERANCE = 0.002    # Écart de rappel jugé négligeable : on départage alors par la latence
+LATENCY_CALLS = 2000        # Appels predict_one chronométrés par modèle
+N_JOBS = -1                 # Tous les coeurs
+REPORT_PATH = "results/logs/iot_experiments.json"
+
+# Espace de recherche : tailles/profondeurs de forêts, gradient boosting, baseline logistique.
+# Chaque modèle est entraîné avec n_jobs=1 : le parallélisme se fait au niveau (modèle, pli).
+CANDIDATES = {}
+for n_estimators in (50, 100, 200):
+    for max_depth in (8, 16, None):
+        CANDIDATES[f"forest_{n_estimators}_d{max_depth or 'max'}"] = (
+            RandomForestClassifier, {'n_estimators': n_estimators, 'max_depth': max_depth})
+for n_estimators in (100, 200):
+    CANDIDATES[f"boosting_{n_estimators}"] = (
+        GradientBoostingClassifier, {'n_estimators': n_estimators, 'max_depth': 3, 'learning_rate': 0.1})
+CANDIDATES["logistic"] = (LogisticRegression, {'max_iter': 1000})
+
+def build(name, seed=DEFAULT_SEED):
+    cls, params = CANDIDATES[name]
+    params = dict(params, random_state=seed)
+    if cls is RandomForestClassifier:
+        params['n_jobs'] = 1
+    return cls(**params)
+
+def recall_at_fpr(y_true, scores, target_fpr=TARGET_FPR):
+    # Seuil le plus bas qui garde les fausses alarmes sous target_fpr, puis rappel obtenu à ce seuil
+    y_true = np.asarray(y_true)
+    negatives = np.sort(scores[y_true == 0])[::-1]
+    allowed = int(np.floor(target_fpr * len(negatives)))
+    threshold = negatives[allowed] if allowed < len(negatives) else -np.inf
+    # Les ex-aequo au seuil comptent comme alarmes : on reste strictement au-dessus
+    recall = float((scores[y_true == 1] > threshold).mean())
+    fpr = float((negatives > threshold).mean())
+    return recall, fpr, float(threshold)
+
+def evaluate_fold(name, X, y, train_idx, val_idx, target_fpr):
+    # Un pli : normalisation apprise sur le pli d'entraînement seulement (pas de fuite)
+    scaler = StandardScaler().fit(X[train_idx])
+    model = build(name)
+    start = time.perf_counter()
+    model.fit(scaler.transform(X[train_idx]), y[train_idx])
+    fit_s = time.perf_counter() - start
+    scores = model.predict_proba(scaler.transform(X[val_idx]))[:, 1]
+    recall, fpr, threshold = recall_at_fpr(y[val_idx], scores, target_fpr)
+    return {'model': name, 'fit_s': fit_s, 'recall_at_fpr': recall, 'fpr': fpr, 'threshold': threshold,
+            'auc': float(roc_auc_score(y[val_idx], scores))}
+
+def fit_full(name, X, y):
+    scaler = StandardScaler().fit(X)
+    return name, build(name).fit(scaler.transform(X), y), scaler
+
+def single_sample_latency(model, scaler, rows, calls=LATENCY_CALLS):
+    # Latence du chemin réellement utilisé par la fusion : moteur compilé, un vecteur brut à la fois
+    compiled = compile_model(model, scaler)
+    rows = [list(row) for row in rows[:calls]]
+    for row in rows[:50]:
+        compiled.predict_one(row)
+    latencies = np.empty(len(rows))
+    for i, row in enumerate(rows):
+        start = time.perf_counter()
+        compiled.predict_one(row)
+        latencies[i] = time.perf_counter() - start
+    return {'p50_us': float(np.percentile(latencies, 50) * 1e6), 'p99_us': float(np.percentile(latencies, 99) * 1e6)}
+
+def load_data(rows, data_path=None, seed=DEFAULT_SEED):
+    df = load_iot_data(data_path) if data_path else generate_iot_data(rows, seed=seed)
+    return df[FEATURES].to_numpy(dtype=np.float64), df['label'].to_numpy()
+
+def rank(summary, tolerance=RECALL_TOLERANCE):
+    # 1. rappel à FPR fixé (décroissant) ; 2. parmi les modèles à moins de `tolerance` du meilleur,
+    # le plus rapide gagne (la fusion appelle le modèle à chaque frame)
+    best_recall = max(s['recall_at_fpr'] for s in summary.values())
+    contenders = [n for n, s in summary.items() if s['recall_at_fpr'] >= best_recall - tolerance]
+    by_recall = sorted(summary, key=lambda n: (-summary[n]['recall_at_fpr'], summary[n]['latency']['p50_us']))
+    by_latency = sorted(summary, key=lambda n: summary[n]['latency']['p50_us'])
+    winner = min(contenders, key=lambda n: summary[n]['latency']['p50_us'])
+    return winner, by_recall, by_latency
+
+def run_experiments(rows=EXPERIMENT_ROWS, folds=CV_FOLDS, target_fpr=TARGET_FPR, n_jobs=N_JOBS, models=None,
+                    data_path=None, save=True, report_path=REPORT_PATH):
+    models = models or list(CANDIDATES)
+    print(f"🧪 Recherche d'hyperparamètres : {len(models)} modèles x {folds} plis (n_jobs={n_jobs})")
+    X, y = load_data(rows, data_path)
+    X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=TEST_RATIO, random_state=42, stratify=y)
+    print(f"📊 {len(X_train):,} lignes de recherche | {len(X_test):,} lignes de test final")
+
+    # 1. Validation croisée : toutes les paires (modèle, pli) en parallèle
+    # (joblib memory-mappe X_train une fois pour tous les workers)
+    splits = list(StratifiedKFold(folds, shuffle=True, random_state=42).split(X_train, y_train))
+    start = time.perf_counter()
+    folds_out = Parallel(n_jobs=n_jobs)(
+        delayed(evaluate_fold)(name, X_train, y_train, tr, va, target_fpr) for name in models for tr, va in splits)
+    cv_s = time.perf_counter() - start
+
+    # 2. Réentraînement de chaque modèle sur toute la partie recherche (en parallèle aussi)
+    fitted = {name: (model, scaler) for name, model, scaler in
+              Parallel(n_jobs=n_jobs)(delayed(fit_full)(name, X_train, y_train) for name in models)}
+
+    # 3. Latence un échantillon, mesurée dans ce processus (séquentiel : chronos non perturbés)
+    summary = {}
+    for name in models:
+        per_fold = [f for f in folds_out if f['model'] == name]
+        recalls = np.array([f['recall_at_fpr'] for f in per_fold])
+        model, scaler = fitted[name]
+        summary[name] = {
+            'params': {k: v for k, v in CANDIDATES[name][1].items()},
+            'recall_at_fpr': float(recalls.mean()),
+            'recall_at_fpr_std': float(recalls.std()),
+            'auc': float(np.mean([f['auc'] for f in per_fold])),
+            'fit_s': float(np.mean([f['fit_s'] for f in per_fold])),
+            'latency': single_sample_latency(model, scaler, X_test),
+        }
+
+    winner, by_recall, by_latency = rank(summary)
+    print(f"\n{'Modèle':<20} {'rappel@FPR':>11} {'± std':>7} {'AUC':>7} {'fit (s)':>8} {'p50 (µs)':>9} {'p99 (µs)':>9}")
+    for name in by_recall:
+        s = summary[name]
+        mark = " 🏆" if name == winner else ""
+        print(f"{name:<20} {s['recall_at_fpr']:11.4f} {s['recall_at_fpr_std']:7.4f} {s['auc']:7.4f} "
+              f"{s['fit_s']:8.2f} {s['latency']['p50_us']:9.1f} {s['latency']['p99_us']:9.1f}{mark}")
+
+    # 4. Seuil déployé : médiane des seuils des plis de validation du gagnant (le test n'y participe
+    #    pas), enregistré avec le modèle et appliqué par predict_one, la fusion et le rejeu.
+    #    Évaluation finale sur le jeu de test jamais vu, À CE SEUIL (règle réellement déployée).
+    model, scaler = fitted[winner]
+    threshold = float(np.median([f['threshold'] for f in folds_out if f['model'] == winner]))
+    scores = model.predict_proba(scaler.transform(X_test))[:, 1]
+    alarms = scores > threshold
+    test = {'threshold': threshold, 'recall': float(alarms[y_test == 1].mean()),
+            'fpr': float(alarms[y_test == 0].mean()), 'auc': float(roc_auc_score(y_test, scores)),
+            'accuracy': float((alarms.astype(y_test.dtype) == y_test).mean()),
+            'accuracy_at_0_5': float((model.predict(scaler.transform(X_test)) == y_test).mean())}
+    print(f"\n🏆 Gagnant : {winner} | seuil {threshold:.4f} | test : rappel {test['recall']:.4f} "
+          f"à FPR {test['fpr']:.4f} | AUC {test['auc']:.4f}")
+
+    report = {
+        'rows': len(X), 'folds': folds, 'target_fpr': target_fpr, 'recall_tolerance': RECALL_TOLERANCE,
+        'n_jobs': n_jobs, 'cpu_count': os.cpu_count(), 'cv_seconds': cv_s,
+        'winner': winner, 'test': test, 'ranking': {'recall': by_recall, 'latency': by_latency},
+        'models': summary, 'folds_detail': folds_out,
+    }
+    if save:
+        # Mêmes fichiers que train_classifier.py : la fusion charge le gagnant sans changement
+        joblib.dump(scaler, SCALER_PATH)
+        joblib.dump(model, MODEL_PATH)
+        print(f"💾 Modèle gagnant sauvegardé dans : {MODEL_PATH}")
+        export_for_inference(model, scaler, threshold, model=winner, target_fpr=target_fpr)
+        report['saved'] = {'model': MODEL_PATH, 'scaler': SCALER_PATH, 'threshold': threshold}
+
+    os.makedirs(os.path.dirname(report_path), exist_ok=True)
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"💾 Rapport sauvegardé : {report_path} (recherche {cv_s:.1f} s)")
+    return winner, report
+
+def add_experiment_arguments(parser):
+    parser.add_argument("--rows", type=int, default=EXPERIMENT_ROWS, help="Lignes générées pour la recherche")
+    parser.add_argument("--data", default=None, help="Jeu existant à utiliser au lieu de générer (--rows ignoré)")
+    parser.add_argument("--folds", type=int, default=CV_FOLDS)
+    parser.add_argument("--target-fpr", type=float, default=TARGET_FPR, help="Taux de fausses alarmes visé")
+    parser.add_argument("--n-jobs", type=int, default=N_JOBS, help="Processus parallèles (-1 : tous les coeurs)")
+    parser.add_argument("--models", nargs="+", choices=list(CANDIDATES), default=None)
+    parser.add_argument("--no-save", action="store_true", help="Rapport seulement, sans remplacer le modèle")
+    parser.add_argument("--report", default=REPORT_PATH)
+
+def experiments_from_arguments(args):
+    return run_experiments(args.rows, args.folds, args.target_fpr, args.n_jobs, args.models, args.data,
+                           not args.no_save, args.report)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Comparaison parallèle de modèles IoT (validation croisée)")
+    add_experiment_arguments(parser)
+    experiments_from_arguments(parser.parse_args())
@@ -0,0 +1,509 @@
+import json
+import math
+import os
+import shutil
+import joblib
+import numpy as np
+
+# Configuration
+MODEL_PATH = "data/iot/model_iot.pkl"
+SCALER_PATH = "data/iot/scaler.pkl"
+FOREST_PATH = "data/iot/model_iot_forest"  # Export à plat de la forêt (lu en mmap par la fusion)
+BATCH_BLOCK = 65_536  # Lignes traitées à la fois en mode batch (borne la mémoire des indices de noeuds)
+TABLE_MAX_CELLS = 4_000_000  # Taille max de la table d'une forêt tabulée (ForestTable), ~16 Mo en float32
+DECISION_THRESHOLD = 0.5  # Seuil par défaut : intrusion si proba > seuil (remplacé par le point de fonctionnement choisi)
+THRESHOLD_SUFFIX = "_threshold.json"  # À côté du pickle : model_iot.pkl -> model_iot_threshold.json
+
+# Format d'export de la forêt : un .npy par tableau, types compacts, en-tête versionné
+FOREST_FORMAT = "iais-forest"
+FOREST_VERSION = 1
+FOREST_HEADER = "_header.json"
+FOREST_ARRAYS = ["feature", "threshold", "left", "right", "value", "roots"]
+
+# Moteur d'inférence "compilé" : les arbres sklearn sont aplatis dans quelques tableaux NumPy,
+# et la normalisation (StandardScaler) est repliée directement dans les seuils (ou les poids).
+# On score donc des vecteurs bruts [motion, sound_level, vibration, temperature, hour]
+# sans DataFrame, sans validation sklearn et sans transform().
+#
+# Seuil de décision : un modèle choisi pour un taux de fausses alarmes donné (experiments.py)
+# est déployé avec le seuil qui donne ce taux, enregistré à côté du pickle. predict_one /
+# predict l'appliquent, et alarm_scores() recale la proba pour que ce seuil tombe à 0.5 :
+# la règle "> 0.5" et le moteur de fusion (hystérésis autour de 0.5) travaillent alors au
+# point de fonctionnement choisi, sans connaître le seuil.
+
+def threshold_path(model_path=MODEL_PATH):
+    return os.path.splitext(model_path)[0] + THRESHOLD_SUFFIX
+
+def save_decision_threshold(model_path, threshold, **info):
+    # Écrit APRÈS le pickle (load_decision_threshold ignore un seuil plus ancien que le modèle)
+    path = threshold_path(model_path)
+    with open(path + ".tmp", "w") as f:
+        json.dump(dict(info, threshold=float(threshold), rule="proba > threshold"), f, indent=2)
+    os.replace(path + ".tmp", path)
+    return path
+
+def clear_decision_threshold(model_path=MODEL_PATH):
+    # Nouveau modèle entraîné sans point de fonctionnement : retour au seuil par défaut
+    path = threshold_path(model_path)
+    if os.path.exists(path):
+        os.remove(path)
+
+def load_decision_threshold(model_path=MODEL_PATH):
+    path = threshold_path(model_path)
+    if not os.path.exists(path):
+        return DECISION_THRESHOLD
+    if os.path.exists(model_path) and os.path.getmtime(path) < os.path.getmtime(model_path):
+        print(f"⚠️ Seuil {path} plus ancien que {model_path} : ignoré (seuil {DECISION_THRESHOLD})")
+        return DECISION_THRESHOLD
+    with open(path) as f:
+        return float(json.load(f)['threshold'])
+
+def _logit(p):
+    if p <= 0.0:
+        return -math.inf
+    if p >= 1.0:
+        return math.inf
+    return math.log(p / (1.0 - p))
+
+def set_decision_threshold(model, threshold):
+    # decision_score : même seuil exprimé sur le score avant sigmoïde (boosting, linéaire)
+    model.decision_threshold = float(threshold)
+    model.decision_score = _logit(float(threshold))
+    return model
+
+def operating_score(proba, threshold=DECISION_THRESHOLD):
+    # Recalage affine par morceaux, croissant : 0 -> 0, seuil -> 0.5, 1 -> 1
+    proba = np.asarray(proba)
+    if threshold == DECISION_THRESHOLD:
+        return proba.astype(np.float64)
+    # Seuil ramené à la précision des probas (float32 pour les modèles compilés) : une proba égale
+    # au seuil reste dessous, comme la comparaison "proba > seuil" faite dans cette précision
+    if proba.dtype.kind == 'f':
+        threshold = float(proba.dtype.type(threshold))
+    proba = proba.astype(np.float64)
+    if threshold <= 0.0 or threshold >= 1.0:
+        return np.where(proba > threshold, 1.0, 0.0)
+    return np.where(proba <= threshold, 0.5 * proba / threshold, 0.5 + 0.5 * (proba - threshold) / (1.0 - threshold))
+
+def alarm_scores(model, X):
+    # Score d'intrusion de chaque ligne, > 0.5 = alerte au seuil du modèle
+    proba = np.asarray(model.predict_proba(X))[:, -1]
+    return operating_score(proba, getattr(model, 'decision_threshold', DECISION_THRESHOLD))
+
+def _scaler_params(scaler, n_features):
+    if scaler is None:
+        return np.zeros(n_features), np.ones(n_features)
+    mean = scaler.mean_ if getattr(scaler, 'mean_', None) is not None else np.zeros(n_features)
+    scale = scaler.scale_ if getattr(scaler, 'scale_', None) is not None else np.ones(n_features)
+    return np.asarray(mean, dtype=np.float64), np.asarray(scale, dtype=np.float64)
+
+def _fold_thresholds(threshold, mean, scale):
+    # sklearn teste float32((x - mean) / scale) <= t. Le seuil brut naïf t * scale + mean
+    # peut tomber d'un cheveu à côté (égalités exactes sur les features entières),
+    # on cherche donc par dichotomie le plus grand x (float64) qui vérifie encore le test.
+    def passes(x):
+        return ((x - mean) / scale).astype(np.float32) <= threshold
+
+    raw = threshold * scale + mean
+    delta = (np.abs(threshold) + 1.0) * scale * 1e-5
+    lo, hi = raw - delta, raw + delta
+    for _ in range(60):
+        bad_lo, bad_hi = ~passes(lo), passes(hi)
+        if not (bad_lo.any() or bad_hi.any()):
+            break
+        delta = delta * 2
+        lo = np.where(bad_lo, lo - delta, lo)
+        hi = np.where(bad_hi, hi + delta, hi)
+
+    # Invariant : passes(lo) et non passes(hi)
+    for _ in range(200):
+        mid = lo + (hi - lo) / 2
+        if not ((mid > lo) & (mid < hi)).any():
+            break
+        ok = passes(mid)
+        lo = np.where(ok, mid, lo)
+        hi = np.where(ok, hi, mid)
+    return lo
+
+def _scaler_export(scaler, n_features):
+    if scaler is None:
+        return None, None
+    return _scaler_params(scaler, n_features)
+
+def _flatten_trees(trees, n_features, scaler, leaf_values):
+    # Concatène les arbres sklearn en tableaux plats (seuils repliés dans l'espace brut).
+    # leaf_values(tree) -> valeurs stockées par noeud, (node_count, k)
+    mean, scale = _scaler_params(scaler, n_features)
+    features, thresholds, lefts, rights, values, roots = [], [], [], [], [], []
+    offset = 0
+    for estimator in trees:
+        tree = estimator.tree_
+        n = tree.node_count
+        is_leaf = tree.children_left == -1
+        idx = np.arange(n)
+
+        feature = np.where(is_leaf, 0, tree.feature)
+        # Repli du scaler : (x - mean) / scale <= t  <=>  x <= t * scale + mean
+        threshold = np.where(is_leaf, np.inf, _fold_thresholds(tree.threshold, mean[feature], scale[feature]))
+
+        features.append(feature)
+        thresholds.append(threshold)
+        lefts.append(np.where(is_leaf, idx, tree.children_left) + offset)
+        rights.append(np.where(is_leaf, idx, tree.children_right) + offset)
+        values.append(leaf_values(tree))
+        roots.append(offset)
+        offset += n
+
+    return (
+        np.concatenate(features).astype(np.intp),
+        np.concatenate(thresholds).astype(np.float64),
+        np.concatenate(lefts).astype(np.intp),
+        np.concatenate(rights).astype(np.intp),
+        np.concatenate(values),
+        np.asarray(roots, dtype=np.intp),
+    )
+
+class CompiledForest:
+    # Tous les arbres sont concaténés : les indices gauche/droite sont absolus,
+    # et chaque feuille boucle sur elle-même (is_leaf sert à arrêter le parcours).
+    # mean / scale : paramètres du scaler déjà replié dans les seuils (conservés pour l'export).
+    decision_threshold = DECISION_THRESHOLD
+    decision_score = 0.0
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, n_features=None,
+                 mean=None, scale=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.value = value
+        self.roots = roots
+        self.classes = np.asarray(classes)
+        self.n_trees = len(roots)
+        self.n_features = int(n_features) if n_features is not None else int(feature.max()) + 1
+        self.mean = mean
+        self.scale = scale
+        self.is_leaf = left == np.arange(len(left))
+        self._lists = None
+
+    def _as_lists(self):
+        # Copies en listes Python pour le chemin "un seul échantillon" :
+        # sur ~100 arbres peu profonds, une boucle Python bat NumPy (pas de coût par appel ufunc).
+        # Construites au premier predict_one seulement : un processus qui ne fait que du batch
+        # garde les tableaux mmap partagés, sans copie privée.
+        if self._lists is None:
+            self._lists = (self.feature.tolist(), self.threshold.tolist(), self.left.tolist(),
+                           self.right.tolist(), self.is_leaf.tolist(), self.roots.tolist(),
+                           self.value[:, 0].tolist(), self.value[:, -1].tolist())
+        return self._lists
+
+    @classmethod
+    def from_estimators(cls, model, scaler=None):
+        trees = list(model.estimators_) if hasattr(model, "estimators_") else [model]
+
+        def class_distribution(tree):
+            value = tree.value[:, 0, :]
+            return (value / np.maximum(value.sum(axis=1, keepdims=True), 1e-12)).astype(np.float32)
+
+        return cls(*_flatten_trees(trees, model.n_features_in_, scaler, class_distribution), model.classes_,
+                   model.n_features_in_, *_scaler_export(scaler, model.n_features_in_))
+
+    def _leaves(self, X):
+        # X : (n, n_features) -> indices des feuilles atteintes, (n, n_trees).
+        # Arbre par arbre, on ne fait avancer que les lignes pas encore arrivées à une feuille.
+        XT = np.ascontiguousarray(X.T)
+        out = np.empty((len(X), self.n_trees), dtype=np.intp)
+        all_rows = np.arange(len(X))
+        for k, root in enumerate(self.roots):
+            node = np.full(len(X), root, dtype=np.intp)
+            active = all_rows
+            while len(active):
+                current = node[active]
+                leaf = self.is_leaf[current]
+                if leaf.any():
+                    active, current = active[~leaf], current[~leaf]
+                    if not len(active):
+                        break
+                go_left = XT[self.feature[current], active] <= self.threshold[current]
+                node[active] = np.where(go_left, self.left[current], self.right[current])
+            out[:, k] = node
+        return out
+
+    def predict_proba(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        out = np.empty((len(X), len(self.classes)), dtype=np.float32)
+        for start in range(0, len(X), BATCH_BLOCK):
+            block = X[start:start + BATCH_BLOCK]
+            out[start:start + BATCH_BLOCK] = self.value[self._leaves(block)].mean(axis=1)
+        return out
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        if len(self.classes) != 2 or self.decision_threshold == DECISION_THRESHOLD:
+            return self.classes[np.argmax(proba, axis=1)]
+        return self.classes[(proba[:, 1] > self.decision_threshold).astype(np.intp)]
+
+    def predict_one(self, x):
+        # Chemin "un seul échantillon" (classification binaire) : listes Python, aucun tableau créé
+        if len(self.classes) != 2:
+            return self.predict([x])[0]
+        f, t, l, r, leaf, roots, v0, v1 = self._as_lists()
+        s0 = s1 = 0.0
+        for node in roots:
+            while not leaf[node]:
+                node = l[node] if x[f[node]] <= t[node] else r[node]
+            s0 += v0[node]
+            s1 += v1[node]
+        if self.decision_threshold == DECISION_THRESHOLD:
+            return self.classes[1 if s1 > s0 else 0]
+        return self.classes[1 if s1 > self.decision_threshold * (s0 + s1) else 0]  # s1 / (s0 + s1) > seuil
+
+class CompiledBoosting(CompiledForest):
+    # Gradient boosting binaire : même parcours que la forêt, mais les feuilles (déjà multipliées
+    # par le learning rate) sont SOMMÉES au score initial, puis passées dans une sigmoïde.
+
+    def __init__(self, feature, threshold, left, right, value, roots, classes, bias, n_features=None):
+        super().__init__(feature, threshold, left, right, value, roots, classes, n_features)
+        self.bias = float(bias)
+
+    @classmethod
+    def from_estimators(cls, model, scaler=None):
+        trees = list(model.estimators_[:, 0])
+        rate = model.learning_rate
+        # Score initial (prior) : ce qui reste de decision_function une fois les arbres retirés
+        origin = np.zeros((1, model.n_features_in_), dtype=np.float32)
+        bias = model.decision_function(origin)[0] - rate * sum(tree.predict(origin)[0] for tree in trees)
+        arrays = _flatten_trees(trees, model.n_features_in_, scaler,
+                                lambda tree: tree.value[:, 0, :1].astype(np.float64) * rate)
+        return cls(*arrays, model.classes_, bias, model.n_features_in_)
+
+    def decision_function(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        out = np.empty(len(X), dtype=np.float64)
+        for start in range(0, len(X), BATCH_BLOCK):
+            block = X[start:start + BATCH_BLOCK]
+            out[start:start + BATCH_BLOCK] = self.bias + self.value[self._leaves(block), 0].sum(axis=1)
+        return out
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p]).astype(np.float32)
+
+    def predict(self, X):
+        return self.classes[(self.decision_function(X) > self.decision_score).astype(np.intp)]
+
+    def predict_one(self, x):
+        f, t, l, r, leaf, roots, _, v = self._as_lists()
+        score = self.bias
+        for node in roots:
+            while not leaf[node]:
+                node = l[node] if x[f[node]] <= t[node] else r[node]
+            score += v[node]
+        return self.classes[1 if score > self.decision_score else 0]
+
+class CompiledLinear:
+    # Modèle linéaire (SGD / logistique) : le scaler est replié dans les poids et le biais
+    decision_threshold = DECISION_THRESHOLD
+    decision_score = 0.0
+
+    def __init__(self, coef, intercept, classes):
+        self.coef = coef
+        self.intercept = float(intercept)
+        self.classes = np.asarray(classes)
+
+    @classmethod
+    def from_estimators(cls, model, scaler=None):
+        mean, scale = _scaler_params(scaler, model.n_features_in_)
+        coef = model.coef_[0] / scale
+        intercept = model.intercept_[0] - np.dot(coef, mean)
+        return cls(coef.astype(np.float64), intercept, model.classes_)
+
+    def decision_function(self, X):
+        return np.asarray(X, dtype=np.float64) @ self.coef + self.intercept
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.decision_function(X)))
+        return np.column_stack([1.0 - p, p]).astype(np.float32)
+
+    def predict(self, X):
+        return self.classes[(self.decision_function(X) > self.decision_score).astype(np.intp)]
+
+    def predict_one(self, x):
+        score = self.intercept
+        for w, v in zip(self.coef, x):
+            score += w * v
+        return self.classes[1 if score > self.decision_score else 0]
+
+class ForestTable:
+    # Forêt (ou boosting) TABULÉE, pour scorer des millions de lignes d'un coup.
+    # Tous les seuils d'une feature découpent son axe en intervalles : deux valeurs qui tombent
+    # dans le même intervalle prennent les mêmes branches dans TOUS les arbres. Avec des
+    # features à peu de seuils distincts (capteurs binaires, heure, bruit en dB), le produit des
+    # intervalles est petit : on évalue la forêt une fois par case, puis une ligne coûte une
+    # recherche dichotomique par feature + une lecture de table. Résultat identique au parcours.
+
+    decision_threshold = DECISION_THRESHOLD
+
+    def __init__(self, edges, table, classes):
+        self.edges = edges          # Seuils triés par feature (espace brut, scaler déjà replié)
+        self.shape = tuple(len(e) + 1 for e in edges)
+        self.table = table          # (cases, n_classes) float32, index "C" sur self.shape
+        self.classes = np.asarray(classes)
+
+    @classmethod
+    def from_compiled(cls, compiled, max_cells=TABLE_MAX_CELLS):
+        # None si le modèle n'est pas arborescent ou si la table serait trop grande
+        if not isinstance(compiled, CompiledForest):
+            return None
+        split = ~compiled.is_leaf
+        edges = [np.unique(compiled.threshold[split & (compiled.feature == f)]) for f in range(compiled.n_features)]
+        if np.prod([len(e) + 1 for e in edges], dtype=np.float64) > max_cells:
+            return None
+        # Représentant de chaque intervalle ]e[k-1], e[k]] : e[k] ; au-delà du dernier seuil : e[-1] + 1
+        points = [np.append(e, e[-1] + 1.0) if len(e) else np.zeros(1) for e in edges]
+        grid = np.stack(np.meshgrid(*points, indexing="ij"), axis=-1).reshape(-1, len(edges))
+        table = cls(edges, compiled.predict_proba(grid).astype(np.float32), compiled.classes)
+        table.decision_threshold = compiled.decision_threshold
+        return table
+
+    @property
+    def cells(self):
+        return len(self.table)
+
+    def index(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float64))
+        index = np.zeros(len(X), dtype=np.intp)
+        for f, (edges, size) in enumerate(zip(self.edges, self.shape)):
+            index *= size
+            # Nombre de seuils < x : x <= t pour exactement les seuils suivants (même test que le parcours)
+            index += np.searchsorted(edges, X[:, f], side="left")
+        return index
+
+    def predict_proba(self, X):
+        return self.table[self.index(X)]
+
+    def predict(self, X):
+        proba = self.predict_proba(X)
+        if len(self.classes) != 2 or self.decision_threshold == DECISION_THRESHOLD:
+            return self.classes[np.argmax(proba, axis=1)]
+        return self.classes[(proba[:, 1] > self.decision_threshold).astype(np.intp)]
+
+def compile_model(model, scaler=None):
+    # sklearn importé ici seulement : load_forest() n'en a pas besoin (démarrage plus léger)
+    from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+    from sklearn.linear_model import LogisticRegression, SGDClassifier
+    from sklearn.tree import DecisionTreeClassifier
+
+    if isinstance(model, (RandomForestClassifier, ExtraTreesClassifier, DecisionTreeClassifier)):
+        return CompiledForest.from_estimators(model, scaler)
+    if isinstance(model, GradientBoostingClassifier) and len(model.classes_) == 2:
+        return CompiledBoosting.from_estimators(model, scaler)
+    if isinstance(model, (SGDClassifier, LogisticRegression)) and len(model.classes_) == 2:
+        return CompiledLinear.from_estimators(model, scaler)
+    raise TypeError(f"❌ Modèle non supporté par le moteur compilé : {type(model).__name__}")
+
+def save_forest(forest, path=FOREST_PATH, source=None):
+    # Export à plat : un .npy par tableau, en types compacts (uint8/int32/float32 au lieu
+    # d'entiers 64 bits). L'en-tête est écrit en dernier (comme _meta.json du jeu de données) :
+    # un dossier incomplet n'est jamais pris pour un modèle valide.
+    if os.path.isdir(path):
+        shutil.rmtree(path)
+    os.makedirs(path)
+    arrays = {
+        'feature': forest.feature.astype(np.uint8 if forest.n_features <= 255 else np.uint16),
+        'threshold': forest.threshold.astype(np.float64),  # float64 : seuils repliés exacts
+        'left': forest.left.astype(np.int32),
+        'right': forest.right.astype(np.int32),
+        'value': forest.value.astype(np.float32),
+        'roots': forest.roots.astype(np.int32),
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(path, f"{name}.npy"), np.ascontiguousarray(array))
+
+    header = {
+        'format': FOREST_FORMAT,
+        'version': FOREST_VERSION,
+        'source': source,
+        'n_trees': int(forest.n_trees),
+        'n_nodes': int(len(forest.feature)),
+        'n_features': forest.n_features,
+        'classes': forest.classes.tolist(),
+        'thresholds': "raw",  # Seuils dans l'espace brut : scaler déjà replié
+        'scaler': None if forest.mean is None else {'mean': np.asarray(forest.mean).tolist(),
+                                                    'scale': np.asarray(forest.scale).tolist()},
+        'dtypes': {name: array.dtype.name for name, array in arrays.items()},
+    }
+    tmp_path = os.path.join(path, FOREST_HEADER + ".tmp")
+    with open(tmp_path, "w") as f:
+        json.dump(header, f, indent=2)
+    os.replace(tmp_path, os.path.join(path, FOREST_HEADER))
+    return header
+
+def export_forest(model, scaler=None, path=FOREST_PATH):
+    # Forêt sklearn (+ scaler) -> export à plat. Renvoie None pour les modèles non arborescents.
+    compiled = compile_model(model, scaler)
+    if type(compiled) is not CompiledForest:  # Le format ne décrit que la moyenne des arbres
+        return None
+    return save_forest(compiled, path, source=type(model).__name__)
+
+def read_forest_header(path=FOREST_PATH):
+    with open(os.path.join(path, FOREST_HEADER)) as f:
+        header = json.load(f)
+    if header.get('format') != FOREST_FORMAT or header.get('version') != FOREST_VERSION:
+        raise ValueError(f"❌ Format de forêt non supporté : {header.get('format')} v{header.get('version')}")
+    return header
+
+def load_forest(path=FOREST_PATH, mmap=True):
+    # mmap=True : les tableaux restent dans le cache de pages du système, partagés par tous
+    # les processus qui chargent le même export (aucun désérialisation d'objets Python)
+    header = read_forest_header(path)
+    mode = 'r' if mmap else None
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode) for name in FOREST_ARRAYS}
+    scaler = header.get('scaler') or {}
+    mean = np.asarray(scaler['mean']) if 'mean' in scaler else None
+    scale = np.asarray(scaler['scale']) if 'scale' in scaler else None
+    return CompiledForest(arrays['feature'], arrays['threshold'], arrays['left'], arrays['right'], arrays['value'],
+                          arrays['roots'], header['classes'], header['n_features'], mean, scale)
+
+def _forest_is_current(forest_path, model_path, scaler_path=None):
+    # L'export n'est utilisé que s'il est au moins aussi récent que les pickles qu'il remplace :
+    # le modèle ET le scaler (replié dans les seuils ; preprocess.py peut le réécrire seul)
+    header_path = os.path.join(forest_path, FOREST_HEADER)
+    if not os.path.exists(header_path):
+        return False
+    sources = [os.path.getmtime(path) for path in (model_path, scaler_path) if path and os.path.exists(path)]
+    return not sources or os.path.getmtime(header_path) >= max(sources)
+
+def load_compiled_model(model_path=MODEL_PATH, scaler_path=SCALER_PATH, forest_path=FOREST_PATH):
+    # Chemin rapide : export à plat memory-mapped ; sinon pickle joblib + compilation.
+    # Le seuil de décision enregistré avec le modèle (s'il y en a un) est appliqué dans les deux cas.
+    if forest_path and _forest_is_current(forest_path, model_path, scaler_path):
+        compiled = load_forest(forest_path)
+    elif not os.path.exists(model_path) or not os.path.exists(scaler_path):
+        raise FileNotFoundError("❌ Modèles IoT manquants. Lancez d'abord la Partie A.")
+    else:
+        compiled = compile_model(joblib.load(model_path), joblib.load(scaler_path))
+    return set_decision_threshold(compiled, load_decision_threshold(model_path))
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    parser = argparse.ArgumentParser(description="Export de la forêt IoT en tableaux plats memory-mappés")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--output", default=FOREST_PATH)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    model, scaler = joblib.load(args.model), joblib.load(args.scaler)
+    pickle_ms = (time.perf_counter() - start) * 1000
+    header = export_forest(model, scaler, args.output)
+    if header is None:
+        raise SystemExit(f"❌ {type(model).__name__} n'est pas une forêt, rien à exporter.")
+    start = time.perf_counter()
+    load_forest(args.output)
+    mmap_ms = (time.perf_counter() - start) * 1000
+    size_mb = sum(os.path.getsize(os.path.join(args.output, f)) for f in os.listdir(args.output)) / 1e6
+    print(f"💾 Forêt exportée : {args.output} ({header['n_trees']} arbres, {header['n_nodes']} noeuds, {size_mb:.1f} Mo)")
+    print(f"⏱️  Chargement pickle {pickle_ms:.0f} ms | mmap {mmap_ms:.1f} ms")
@@ -1,79 +1,131 @@
+import argparse
+import sys
 import pandas as pd
 import numpy as np
-import random
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.storage import DATASET_PATH, DatasetWriter
+
 # Configuration
 NUM_SAMPLES = 2000  # Nombre de lignes de données
-OUTPUT_PATH = "data/iot/iot_data.csv"
+OUTPUT_PATH = "data/iot/iot_data.csv"  # Sortie CSV (--format csv)
+DEFAULT_SEED = 42  # Même graine => mêmes données (reproductibilité des tests de charge)
+CHUNK_SIZE = 1_000_000  # Taille des blocs renvoyés / écrits (borne la mémoire)
+BLOCK_ROWS = 65_536     # Bloc interne tiré d'un coup, avec son propre flux aléatoire (graine, numéro de bloc)
+
+COLUMNS = ['motion', 'sound_level', 'vibration', 'temperature', 'hour', 'label']
+
+def _generate_block(rng, n):
+    # Chaque colonne est tirée d'un seul coup sous forme de tableau NumPy
+    # (mêmes règles que l'ancienne boucle ligne par ligne)
+
+    # 1. Simulation de l'heure (0-23)
+    hour = rng.integers(0, 24, size=n)
+
+    # Est-ce qu'il fait nuit ? (22h - 6h)
+    is_night = (hour >= 22) | (hour <= 6)
+
+    # On force environ 30% d'intrusions pour que le modèle ait de quoi apprendre
+    is_intrusion = rng.random(n) < 0.3
+
+    # 2. Mouvement : toujours en cas d'intrusion, jamais la nuit sinon, 30% le jour
+    day_motion = rng.random(n) < 0.3
+    motion = np.where(is_intrusion | (~is_night & day_motion), 1, 0)
+
+    # 3. Bruit : [60, 100[ si intrusion, [20, 50[ sinon
+    sound_level = rng.integers(np.where(is_intrusion, 60, 20), np.where(is_intrusion, 100, 50))
+
+    # 4. Vibration probable (80%) en cas d'intrusion, aucune sinon
+    vibration = np.where(is_intrusion & (rng.random(n) > 0.2), 1, 0)
+
+    # 5. Température normale dans les deux scénarios
+    temperature = np.round(rng.normal(20, 2, size=n), 1)
 
-def generate_iot_data(n=1000):
+    label = is_intrusion.astype(np.int64)
+
+    return pd.DataFrame({
+        'motion': motion,
+        'sound_level': sound_level,
+        'vibration': vibration,
+        'temperature': temperature,
+        'hour': hour,
+        'label': label,
+    }, columns=COLUMNS)
+
+def _iter_blocks(n, seed):
+    # Blocs internes de taille fixe, chacun tiré de son propre flux (seed, numéro de bloc) :
+    # la ligne i ne dépend que de la graine et de sa position, jamais du découpage demandé
+    for block, start in enumerate(range(0, n, BLOCK_ROWS)):
+        yield _generate_block(np.random.default_rng([seed, block]), min(BLOCK_ROWS, n - start))
+
+def _join(pieces):
+    if len(pieces) == 1:
+        return pieces[0].reset_index(drop=True)
+    return pd.concat(pieces, ignore_index=True)
+
+def iter_generated_chunks(n, chunk_size=CHUNK_SIZE, seed=DEFAULT_SEED):
+    # Générateur de blocs de chunk_size lignes : les très gros volumes ne sont jamais
+    # entièrement en mémoire. Pour une graine donnée, les lignes sont les mêmes quel
+    # que soit chunk_size (seul le découpage change).
+    if chunk_size < 1:
+        raise ValueError(f"❌ chunk_size doit être positif : {chunk_size}")
+    pieces, filled = [], 0
+    for block in _iter_blocks(n, seed):
+        start = 0
+        while start < len(block):
+            take = min(chunk_size - filled, len(block) - start)
+            pieces.append(block.iloc[start:start + take])
+            filled += take
+            start += take
+            if filled == chunk_size:
+                yield _join(pieces)
+                pieces, filled = [], 0
+    if pieces:
+        yield _join(pieces)
+
+def generate_iot_data(n=1000, seed=DEFAULT_SEED):
+    # Un seul DataFrame (identique à la concaténation des blocs de iter_generated_chunks, quel que soit leur taille)
     print(f"🔄 Génération de {n} lignes de données simulées...")
-    
-    data = []
-    
-    for _ in range(n):
-        # 1. Simulation de l'heure (0-23)
-        hour = random.randint(0, 23)
-        
-        # Est-ce qu'il fait nuit ? (22h - 6h)
-        is_night = (hour >= 22) or (hour <= 6)
-        
-        # Probabilité d'intrusion (plus faible en général, mais on veut assez d'exemples)
-        # On force environ 30% d'intrusions pour que le modèle ait de quoi apprendre
-        is_intrusion = random.random() < 0.3 
-        
-        if is_intrusion:
-            # SCÉNARIO INTRUSION 🚨
-            label = 1
-            motion = 1  # Presque toujours du mouvement
-            # Bruit élevé (ex: bris de glace, pas lourds) : entre 60 et 100
-            sound_level = np.random.randint(60, 100) 
-            # Vibration probable (bris de vitre/porte)
-            vibration = 1 if random.random() > 0.2 else 0 
-            # Température normale
-            temperature = round(np.random.normal(20, 2), 1) 
-            
-        else:
-            # SCÉNARIO NORMAL ✅
-            label = 0
-            
-            # Mouvement : Rare la nuit, possible le jour
-            if is_night:
-                motion = 0 # Tout le monde dort
-            else:
-                motion = 1 if random.random() < 0.3 else 0 # Vie normale
-            
-            # Bruit : Faible en général
-            sound_level = np.random.randint(20, 50)
-            
-            # Vibration : Aucune
-            vibration = 0
-            
-            # Température normale
-            temperature = round(np.random.normal(20, 2), 1)
-
-        # Ajout à la liste
-        data.append([motion, sound_level, vibration, temperature, hour, label])
-
-    # Création du DataFrame
-    columns = ['motion', 'sound_level', 'vibration', 'temperature', 'hour', 'label']
-    df = pd.DataFrame(data, columns=columns)
-    
-    return df
+    chunks = list(iter_generated_chunks(n, CHUNK_SIZE, seed))
+    if not chunks:
+        return _generate_block(np.random.default_rng(seed), 0)  # Aucune ligne : colonnes et types quand même
+    if len(chunks) == 1:
+        return chunks[0]
+    return pd.concat(chunks, ignore_index=True)
 
 if __name__ == "__main__":
-    # Génération
-    df_iot = generate_iot_data(NUM_SAMPLES)
-    
+    parser = argparse.ArgumentParser(description="Génération de données IoT simulées")
+    parser.add_argument("--rows", type=int, default=NUM_SAMPLES, help="Nombre de lignes à générer")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SEED, help="Graine aléatoire")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="Taille des blocs écrits")
+    parser.add_argument("--format", choices=["npy", "csv"], default="npy",
+                        help="npy = stockage columnar typé (défaut), csv = ancien fichier texte")
+    args = parser.parse_args()
+
     # Vérification dossier
     os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    
-    # Sauvegarde
-    df_iot.to_csv(OUTPUT_PATH, index=False)
-    
-    print(f"✅ Fichier généré avec succès : {OUTPUT_PATH}")
+
+    # Génération + sauvegarde bloc par bloc (mémoire constante)
+    writer = DatasetWriter(DATASET_PATH) if args.format == "npy" else None
+    label_counts = pd.Series(dtype=np.int64)
+    preview = None
+    print(f"🔄 Génération de {args.rows} lignes de données simulées...")
+    for i, chunk in enumerate(iter_generated_chunks(args.rows, args.chunk_size, args.seed)):
+        if writer is not None:
+            writer.append(chunk)
+        else:
+            chunk.to_csv(OUTPUT_PATH, mode='w' if i == 0 else 'a', header=(i == 0), index=False)
+        label_counts = label_counts.add(chunk['label'].value_counts(), fill_value=0)
+        if preview is None:
+            preview = chunk.head()
+    if writer is not None:
+        writer.close()
+    elif os.path.isdir(DATASET_PATH):
+        print(f"⚠️ Un jeu columnar existe déjà dans {DATASET_PATH} : il reste prioritaire sur le CSV au chargement.")
+
+    print(f"✅ Données générées avec succès : {DATASET_PATH if writer is not None else OUTPUT_PATH}")
     print("--- Aperçu des données ---")
-    print(df_iot.head())
+    print(preview)
     print("\n--- Distribution des labels (0=Normal, 1=Intrusion) ---")
-    print(df_iot['label'].value_counts())
\ No newline at end of file
+    print(label_counts.astype(np.int64))
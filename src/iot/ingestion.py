@@ -0,0 +1,352 @@
+import argparse
+import asyncio
+import collections
+import os
+import socket
+import sys
+import threading
+import time
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import profiling
+from iot.fast_inference import alarm_scores
+from iot.generate_data import DEFAULT_SEED, generate_iot_data
+from iot.storage import FEATURES
+
+# Configuration
+UDP_HOST = "127.0.0.1"
+UDP_PORT = 47100
+N_SENSORS = 1000          # Capteurs simulés par le rejoueur / le publieur
+RATE_HZ = 10.0            # Lectures par seconde et par capteur
+BATCH_SIZE = 4096         # Lectures scorées d'un coup (moteur compilé en mode batch)
+FLUSH_INTERVAL = 0.05     # Au plus 50 ms entre la réception d'une lecture et son score
+RECEIVE_BUFFER = 8 << 20   # Tampon de réception UDP (octets) : absorbe les rafales pendant un score
+RECORDS_PER_DATAGRAM = 40  # 40 x 32 octets : tient dans un datagramme sans fragmentation
+POOL_TICKS = 50           # Lectures pré-générées par capteur, rejouées en boucle
+LAG_SAMPLES = 256         # Derniers lots gardés pour les percentiles de latence
+
+# Format binaire d'une lecture (little-endian, 32 octets) : identifiant du capteur,
+# horodatage d'émission (epoch), puis les 5 features dans l'ordre de FEATURES.
+# Un lot de lectures se décode d'un bloc avec np.frombuffer, sans boucle Python.
+READING_DTYPE = np.dtype([('sensor', '<u4'), ('ts', '<f8')] + [(name, '<f4') for name in FEATURES])
+
+# Ingestion asynchrone : un transport (UDP, rejeu...) pousse des lots de lectures,
+# le service les regroupe, les score en une passe vectorisée et publie le dernier état
+# de chaque capteur. Il tourne dans son propre thread (boucle asyncio) : la boucle vidéo
+# ne fait que lire l'état publié, sans jamais attendre un capteur.
+
+def encode_readings(readings):
+    return np.ascontiguousarray(readings, dtype=READING_DTYPE).tobytes()
+
+def decode_readings(data):
+    return np.frombuffer(data, dtype=READING_DTYPE)
+
+class ReadingPool:
+    # Lectures générées par generate_iot_data (mêmes règles que l'entraînement),
+    # réutilisées tick après tick : le rejeu ne coûte presque rien à produire
+
+    def __init__(self, n_sensors, seed=DEFAULT_SEED, ticks=POOL_TICKS):
+        data = generate_iot_data(n_sensors * ticks, seed=seed)
+        self.n_sensors = n_sensors
+        self.ticks = ticks
+        self.records = np.zeros(n_sensors * ticks, dtype=READING_DTYPE)
+        self.records['sensor'] = np.tile(np.arange(n_sensors, dtype=np.uint32), ticks)
+        for name in FEATURES:
+            self.records[name] = data[name].to_numpy()
+        self.index = 0
+
+    def next_tick(self):
+        start = (self.index % self.ticks) * self.n_sensors
+        self.index += 1
+        tick = self.records[start:start + self.n_sensors].copy()
+        tick['ts'] = time.time()
+        return tick
+
+class ReplayTransport:
+    # Stand-in local sans réseau : chaque capteur émet rate_hz lectures par seconde
+
+    def __init__(self, n_sensors=N_SENSORS, rate_hz=RATE_HZ, seed=DEFAULT_SEED):
+        self.name = f"replay ({n_sensors} capteurs @ {rate_hz:g} Hz)"
+        self.pool = ReadingPool(n_sensors, seed)
+        self.period = 1.0 / rate_hz
+
+    async def run(self, emit, stopped):
+        next_tick = time.perf_counter()
+        while not stopped.is_set():
+            emit(self.pool.next_tick())
+            next_tick += self.period
+            delay = next_tick - time.perf_counter()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                next_tick = time.perf_counter()  # En retard : on ne rattrape pas les ticks manqués
+                await asyncio.sleep(0)
+
+class _UdpProtocol(asyncio.DatagramProtocol):
+    def __init__(self, owner, emit):
+        self.owner = owner
+        self.emit = emit
+
+    def datagram_received(self, data, addr):
+        # Décodage direct dans la boucle : un datagramme = un lot, aucune copie intermédiaire
+        if len(data) % READING_DTYPE.itemsize:
+            self.owner.bad += 1  # Datagramme tronqué ou étranger : ignoré
+            return
+        self.emit(decode_readings(data))
+
+class UdpTransport:
+    # Réception UDP (passerelle type MQTT simplifiée) : chaque datagramme = un lot de lectures.
+    # Pendant un score en lot, les datagrammes attendent dans le tampon noyau : on l'agrandit.
+
+    def __init__(self, host=UDP_HOST, port=UDP_PORT, receive_buffer=RECEIVE_BUFFER):
+        self.name = f"udp://{host}:{port}"
+        self.host = host
+        self.port = port
+        self.receive_buffer = receive_buffer
+        self.bad = 0
+
+    async def run(self, emit, stopped):
+        loop = asyncio.get_running_loop()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, self.receive_buffer)
+        sock.bind((self.host, self.port))
+        endpoint, _ = await loop.create_datagram_endpoint(lambda: _UdpProtocol(self, emit), sock=sock)
+        try:
+            await stopped.wait()
+        finally:
+            endpoint.close()
+
+async def publish_udp(host=UDP_HOST, port=UDP_PORT, n_sensors=N_SENSORS, rate_hz=RATE_HZ, duration=None,
+                      seed=DEFAULT_SEED):
+    # Publieur de test : simule n_sensors capteurs derrière une passerelle UDP
+    pool = ReadingPool(n_sensors, seed)
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+    sock.setblocking(False)
+    period = 1.0 / rate_hz
+    started = next_tick = time.perf_counter()
+    sent = 0
+    try:
+        while duration is None or time.perf_counter() - started < duration:
+            tick = pool.next_tick()
+            for start in range(0, len(tick), RECORDS_PER_DATAGRAM):
+                try:
+                    sock.sendto(encode_readings(tick[start:start + RECORDS_PER_DATAGRAM]), (host, port))
+                except BlockingIOError:
+                    pass  # Tampon d'émission plein : perdu, comme en UDP réel
+            sent += len(tick)
+            next_tick += period
+            await asyncio.sleep(max(next_tick - time.perf_counter(), 0))
+    finally:
+        sock.close()
+    return sent
+
+class SensorState:
+    # Dernier état connu de chaque capteur, en tableaux indexés par identifiant
+    # (mises à jour vectorisées ; agrandis à la demande)
+
+    def __init__(self, capacity=N_SENSORS):
+        self.lock = threading.Lock()
+        self.ts = np.zeros(capacity)
+        self.values = np.zeros((capacity, len(FEATURES)), dtype=np.float32)
+        self.proba = np.zeros(capacity, dtype=np.float32)  # Score d'intrusion au seuil du modèle (> 0.5 = alerte)
+
+    def _grow(self, size):
+        capacity = max(size, 2 * len(self.ts))
+        for name in ("ts", "values", "proba"):
+            old = getattr(self, name)
+            new = np.zeros((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    def update(self, sensors, ts, values, proba):
+        # Lectures dans l'ordre d'arrivée : en cas de doublon, la plus récente gagne (tri stable)
+        order = np.argsort(ts, kind="stable")
+        sensors, ts, values, proba = sensors[order], ts[order], values[order], proba[order]
+        with self.lock:
+            if sensors.max() >= len(self.ts):
+                self._grow(int(sensors.max()) + 1)
+            newer = ts >= self.ts[sensors]
+            sensors = sensors[newer]
+            self.ts[sensors] = ts[newer]
+            self.values[sensors] = values[newer]
+            self.proba[sensors] = proba[newer]
+
+    def latest(self, sensor):
+        # (lecture, probabilité d'intrusion, horodatage) ou None si le capteur n'a rien envoyé
+        with self.lock:
+            if sensor >= len(self.ts) or self.ts[sensor] == 0:
+                return None
+            # Arrondi au millième : les capteurs n'ont pas plus de précision (évite le bruit du float32)
+            values = [round(v, 3) for v in self.values[sensor].tolist()]
+            return values, float(self.proba[sensor]), float(self.ts[sensor])
+
+    def alerting(self, threshold=0.5):
+        with self.lock:
+            return np.flatnonzero((self.proba > threshold) & (self.ts > 0))
+
+class IngestionService:
+
+    def __init__(self, model, transport, batch_size=BATCH_SIZE, flush_interval=FLUSH_INTERVAL, sites=None):
+        # sites : site de chaque capteur (capteur i -> sites[i % len(sites)]) ; model est alors
+        # un iot.model_server.ModelServer qui route chaque lecture vers le modèle de son site
+        self.model = model
+        self.sites = None if not sites else np.asarray(sites)
+        self.transport = transport
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.state = SensorState()
+        self.pending = []
+        self.pending_count = 0
+        self.received = 0
+        self.scored = 0
+        self.batches = 0
+        self.score_seconds = 0.0
+        self.lags = collections.deque(maxlen=LAG_SAMPLES)
+        self.started_at = None
+        self._stopped = None
+        self._loop = None
+        self._thread = None
+        self.ready = threading.Event()
+
+    def emit(self, readings):
+        # Appelé par le transport (même boucle asyncio) : on accumule, on score par gros lots
+        self.pending.append(readings)
+        self.pending_count += len(readings)
+        self.received += len(readings)
+        if self.pending_count >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.pending:
+            return
+        readings = np.concatenate(self.pending) if len(self.pending) > 1 else self.pending[0]
+        self.pending, self.pending_count = [], 0
+        start = time.perf_counter()
+        values = np.column_stack([readings[name] for name in FEATURES]).astype(np.float64)
+        # Proba recalée sur le seuil de décision du modèle (fast_inference.alarm_scores) : "> 0.5"
+        # et le moteur de fusion appliquent le point de fonctionnement choisi à l'entraînement
+        if self.sites is None:
+            proba = alarm_scores(self.model, values)
+        else:
+            sites = self.sites[readings['sensor'].astype(np.intp) % len(self.sites)]
+            proba = self.model.alarm_scores(values, sites)
+        self.state.update(readings['sensor'].astype(np.intp), readings['ts'], values.astype(np.float32), proba)
+        elapsed = time.perf_counter() - start
+        self.score_seconds += elapsed
+        profiling.record("iot.flush", elapsed)
+        self.lags.append(time.time() - readings['ts'])
+        self.scored += len(readings)
+        self.batches += 1
+
+    async def _flusher(self):
+        while not self._stopped.is_set():
+            await asyncio.sleep(self.flush_interval)
+            self.flush()
+
+    async def run(self):
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self.started_at = time.perf_counter()
+        self.ready.set()
+        flusher = asyncio.create_task(self._flusher())
+        try:
+            await self.transport.run(self.emit, self._stopped)
+        finally:
+            self._stopped.set()
+            await flusher
+            self.flush()
+
+    def start(self):
+        # Boucle asyncio dans un thread dédié (démon) : n'interfère pas avec la boucle vidéo
+        self._thread = threading.Thread(target=lambda: asyncio.run(self.run()), name="iot-ingestion", daemon=True)
+        self._thread.start()
+        self.ready.wait(timeout=5)
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._stopped is not None:
+            self._loop.call_soon_threadsafe(self._stopped.set)
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+
+    def latest(self, sensor):
+        return self.state.latest(sensor)
+
+    def stats(self):
+        elapsed = time.perf_counter() - self.started_at if self.started_at else 0.0
+        lags = np.concatenate(self.lags) if self.lags else np.zeros(1)
+        return {
+            'transport': self.transport.name,
+            'received': self.received,
+            'scored': self.scored,
+            'bad_datagrams': getattr(self.transport, 'bad', 0),
+            'readings_per_s': self.scored / elapsed if elapsed > 0 else 0.0,
+            'batches': self.batches,
+            'score_us_per_reading': self.score_seconds / max(self.scored, 1) * 1e6,
+            'lag_ms_p50': float(np.percentile(lags, 50) * 1000),
+            'lag_ms_p95': float(np.percentile(lags, 95) * 1000),
+            'sensors_seen': int((self.state.ts > 0).sum()),
+        }
+
+    def summary(self):
+        s = self.stats()
+        return (f"📡 Ingestion IoT {s['transport']} : {s['scored']:,} lectures ({s['readings_per_s']:,.0f}/s) | "
+                f"score {s['score_us_per_reading']:.2f} µs/lecture | retard p50 {s['lag_ms_p50']:.1f} ms, "
+                f"p95 {s['lag_ms_p95']:.1f} ms | datagrammes invalides {s['bad_datagrams']}")
+
+def make_transport(source, n_sensors=N_SENSORS, rate_hz=RATE_HZ, host=UDP_HOST, port=UDP_PORT):
+    if source == "replay":
+        return ReplayTransport(n_sensors, rate_hz)
+    if source == "udp":
+        return UdpTransport(host, port)
+    raise ValueError(f"❌ Source IoT inconnue : {source}")
+
+def add_ingestion_arguments(parser):
+    parser.add_argument("--iot-source", choices=["simulated", "replay", "udp"], default="simulated",
+                        help="simulated : tirage toutes les 30 frames (historique) ; replay/udp : service asynchrone")
+    parser.add_argument("--iot-sensors", type=int, default=N_SENSORS, help="Capteurs rejoués (--iot-source replay)")
+    parser.add_argument("--iot-rate", type=float, default=RATE_HZ, help="Lectures/s par capteur (replay)")
+    parser.add_argument("--iot-port", type=int, default=UDP_PORT, help="Port UDP écouté (--iot-source udp)")
+    parser.add_argument("--iot-sensor", type=int, default=0, help="Capteur associé à la caméra")
+    parser.add_argument("--iot-sites", default=None,
+                        help="Sites des capteurs, séparés par des virgules (capteur i -> site i modulo leur nombre)")
+
+def ingestion_from_arguments(args, model):
+    # --iot-sites : model doit être un ModelServer (routage des lectures par site)
+    if args.iot_source == "simulated":
+        return None
+    transport = make_transport(args.iot_source, args.iot_sensors, args.iot_rate, port=args.iot_port)
+    sites = [site.strip() for site in (args.iot_sites or "").split(",") if site.strip()]
+    if sites:
+        model.preload(sites)  # Chargés avant le démarrage ; refusés au-delà de --max-sites
+    return IngestionService(model, transport, sites=sites or None)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Ingestion IoT asynchrone (service ou publieur UDP de test)")
+    parser.add_argument("mode", choices=["serve", "publish"])
+    parser.add_argument("--source", choices=["replay", "udp"], default="udp")
+    parser.add_argument("--host", default=UDP_HOST)
+    parser.add_argument("--port", type=int, default=UDP_PORT)
+    parser.add_argument("--sensors", type=int, default=N_SENSORS)
+    parser.add_argument("--rate", type=float, default=RATE_HZ)
+    parser.add_argument("--duration", type=float, default=10.0)
+    args = parser.parse_args()
+
+    if args.mode == "publish":
+        print(f"📤 Publication UDP vers {args.host}:{args.port} : {args.sensors} capteurs @ {args.rate:g} Hz")
+        sent = asyncio.run(publish_udp(args.host, args.port, args.sensors, args.rate, args.duration))
+        print(f"✅ {sent:,} lectures envoyées")
+    else:
+        sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+        from core.registry import get_iot_model
+        service = IngestionService(get_iot_model(),
+                                   make_transport(args.source, args.sensors, args.rate, args.host, args.port)).start()
+        try:
+            end = time.perf_counter() + args.duration
+            while time.perf_counter() < end:
+                time.sleep(2)
+                print(service.summary())
+        finally:
+            service.stop()
+        print(f"🚨 Capteurs en alerte : {len(service.state.alerting())}")
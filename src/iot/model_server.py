@@ -0,0 +1,355 @@
+import argparse
+import collections
+import os
+import shutil
+import sys
+import threading
+import time
+import joblib
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.fast_inference import (FOREST_HEADER, FOREST_PATH, MODEL_PATH, SCALER_PATH, alarm_scores,
+                                clear_decision_threshold, export_forest, load_compiled_model, threshold_path)
+from iot.storage import FEATURES
+
+# Configuration
+SITES_DIR = "data/iot/sites"   # Un dossier par site : model_iot.pkl, scaler.pkl, model_iot_forest/
+MAX_SITES = 8                  # Modèles de site gardés en mémoire (LRU)
+RELOAD_INTERVAL = 2.0          # s entre deux inspections des artefacts (0 : pas de rechargement à chaud)
+WARMUP_RUNS = 2                # Inférences "à vide" après chargement (comme core.registry)
+WARMUP_READING = [0, 40, 0, 20.5, 14]
+GLOBAL_SITE = "global"         # Libellé du modèle global (site None ou sans artefacts propres)
+
+# Service des modèles IoT par site :
+# - chaque site peut avoir son propre couple modèle + scaler (data/iot/sites/<site>/, mêmes noms
+#   de fichiers que le modèle global) ; un site sans artefacts est servi par le modèle global ;
+# - les modèles chargés sont gardés dans un LRU borné (max_sites) : le site le moins récemment
+#   utilisé est oublié au-delà. Des sites servis par les mêmes artefacts partagent le même modèle ;
+# - un thread de surveillance relève les dates de modification des artefacts (pickles, seuil de
+#   décision, en-tête de l'export mmap). Un changement n'est pris en compte qu'une fois stable sur deux relevés
+#   (fichiers en cours d'écriture), le nouveau modèle est chargé et réchauffé dans ce thread,
+#   puis publié en remplaçant la référence du site dans le LRU. La boucle vidéo ne fait qu'une
+#   lecture de dictionnaire : elle voit l'ancienne version ou la nouvelle, jamais d'attente.
+#   Un chargement qui échoue (pickle incomplet...) garde la version en service ;
+# - un site demandé hors du LRU est chargé par ce même thread : en attendant, ses lectures sont
+#   servies par le modèle global (jamais de chargement dans la boucle vidéo). Les sites connus au
+#   démarrage (preload) sont chargés tout de suite, et refusés s'ils dépassent max_sites : le LRU
+#   passerait son temps à évincer et recharger ;
+# - predict_proba(X, sites) / alarm_scores(X, sites) routent chaque lecture vers le modèle de
+#   son site (un appel vectorisé par site présent dans le lot), au seuil de décision du site.
+
+def site_files(site, root=SITES_DIR):
+    folder = os.path.join(root, str(site))
+    return (os.path.join(folder, os.path.basename(MODEL_PATH)), os.path.join(folder, os.path.basename(SCALER_PATH)),
+            os.path.join(folder, os.path.basename(FOREST_PATH)))
+
+def site_paths(site, root=SITES_DIR):
+    # Artefacts servis pour un site : les siens s'ils existent, sinon ceux du modèle global
+    if site is not None:
+        paths = site_files(site, root)
+        if os.path.exists(paths[0]):
+            return paths
+    return MODEL_PATH, SCALER_PATH, FOREST_PATH
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def artefact_signature(paths):
+    # Chemins + dates de modification : un site qui reçoit ses propres artefacts change aussi de signature
+    model_path, scaler_path, forest_path = paths
+    return (paths, _mtime(model_path), _mtime(scaler_path), _mtime(os.path.join(forest_path, FOREST_HEADER)),
+            _mtime(threshold_path(model_path)))
+
+def site_label(site):
+    return GLOBAL_SITE if site is None else str(site)
+
+class ServedModel:
+    # Version en service pour un site ; jamais modifiée, remplacée d'un bloc au rechargement
+
+    def __init__(self, site, model, signature, version, load_ms):
+        self.site = site
+        self.model = model
+        self.signature = signature
+        self.version = version
+        self.load_ms = load_ms
+        self.loaded_at = time.time()
+
+class ModelServer:
+
+    def __init__(self, root=SITES_DIR, max_sites=MAX_SITES, reload_interval=RELOAD_INTERVAL, warmup_runs=WARMUP_RUNS):
+        self.root = root
+        self.max_sites = max(1, max_sites)
+        self.reload_interval = reload_interval
+        self.warmup_runs = warmup_runs
+        self._entries = collections.OrderedDict()  # site -> ServedModel, du moins au plus récemment utilisé
+        self._lock = threading.Lock()        # Protège le LRU (tenu le temps d'une lecture ou d'un remplacement)
+        self._load_lock = threading.Lock()   # Un seul chargement "à la demande" à la fois
+        self._pending = {}   # site -> signature vue au relevé précédent, pas encore chargée
+        self._failed = {}    # site -> signature dont le chargement a échoué (pas de nouvel essai)
+        self._requested = {}  # site -> None : sites demandés hors du LRU, chargés par le thread de surveillance
+        self._declared = set()  # Sites annoncés par preload
+        self._stopped = threading.Event()
+        self._wakeup = threading.Event()
+        self._thread = None
+        self.hits = 0
+        self.misses = 0
+        self.fallbacks = 0
+        self.evictions = 0
+        self.reloads = 0
+        self.reload_errors = 0
+
+    def _shared(self, signature):
+        with self._lock:
+            for entry in self._entries.values():
+                if entry.signature == signature:
+                    return entry.model
+        return None
+
+    def _load(self, site, signature, version):
+        start = time.perf_counter()
+        model = self._shared(signature)
+        if model is None:
+            model = load_compiled_model(*signature[0])
+            for _ in range(self.warmup_runs):
+                model.predict_one(WARMUP_READING)
+        return ServedModel(site, model, signature, version, (time.perf_counter() - start) * 1000)
+
+    def _install(self, entry, replace=False):
+        # replace=True : rechargement, le site doit encore être en mémoire (il a pu être évincé entre-temps)
+        with self._lock:
+            if replace and entry.site not in self._entries:
+                return False
+            self._entries[entry.site] = entry
+            if not replace:
+                self._entries.move_to_end(entry.site)
+            while len(self._entries) > self.max_sites:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def get(self, site=None):
+        with self._lock:
+            entry = self._entries.get(site)
+            if entry is not None:
+                self._entries.move_to_end(site)
+                self.hits += 1
+                return entry.model
+            background = site is not None and self._thread is not None
+            if background:
+                # Chargement par le thread de surveillance ; le modèle global sert en attendant
+                self._requested[site] = None
+                self.fallbacks += 1
+        if background:
+            self._wakeup.set()
+            return self.get(None)
+        return self._load_now(site)
+
+    def _load_now(self, site):
+        with self._load_lock:
+            with self._lock:
+                entry = self._entries.get(site)  # Un autre thread a pu charger entre-temps
+            if entry is None:
+                entry = self._load(site, artefact_signature(site_paths(site, self.root)), 1)
+                self._install(entry)
+                self.misses += 1
+        return entry.model
+
+    def preload(self, sites):
+        # Sites servis connus au démarrage : chargés tout de suite, au plus max_sites au total
+        # (modèle global compris : il sert de repli pendant un chargement)
+        declared = self._declared | set(sites) | {None}
+        if len(declared) > self.max_sites:
+            raise ValueError(f"❌ {len(declared)} modèles IoT servis (global compris) pour {self.max_sites} en "
+                             f"mémoire (--max-sites) : le LRU rechargerait un modèle à chaque lecture")
+        self._declared = declared
+        for site in sites:
+            self._load_now(site)
+        return self
+
+    def predict_one(self, site, x):
+        return self.get(site).predict_one(x)
+
+    def _route(self, X, sites, score):
+        # score(model, X) appliqué par site ; sites : site de chaque ligne (None = modèle global)
+        X = np.asarray(X, dtype=np.float64)
+        if sites is None:
+            return score(self.get(None), X)
+        keys, inverse = np.unique(np.asarray(sites), return_inverse=True)
+        if len(keys) == 1:
+            return score(self.get(keys[0].item()), X)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(keys) + 1))
+        out = None
+        for i, key in enumerate(keys):
+            rows = order[bounds[i]:bounds[i + 1]]
+            part = np.asarray(score(self.get(key.item()), X[rows]))
+            if out is None:
+                out = np.empty((len(X),) + part.shape[1:], dtype=np.float64)
+            out[rows] = part
+        return out
+
+    def predict_proba(self, X, sites=None):
+        return self._route(X, sites, lambda model, rows: model.predict_proba(rows))
+
+    def alarm_scores(self, X, sites=None):
+        # Score d'intrusion recalé sur le seuil de décision de chaque site (> 0.5 = alerte)
+        return self._route(X, sites, alarm_scores)
+
+    def _load_requested(self):
+        with self._lock:
+            requested, self._requested = list(self._requested), {}
+        for site in requested:
+            try:
+                self._load_now(site)
+            except Exception as e:
+                print(f"⚠️ Chargement du modèle IoT {site_label(site)} impossible ({e}) : modèle global en attendant")
+
+    def check(self):
+        # Un relevé : charge les sites demandés, recharge les sites en mémoire dont les artefacts
+        # ont changé et sont stables
+        self._load_requested()
+        with self._lock:
+            entries = list(self._entries.values())
+        reloaded = 0
+        for entry in entries:
+            signature = artefact_signature(site_paths(entry.site, self.root))
+            if signature == entry.signature:
+                self._pending.pop(entry.site, None)
+                continue
+            if (self._pending.get(entry.site) != signature or signature[1] is None or signature[2] is None
+                    or self._failed.get(entry.site) == signature):
+                self._pending[entry.site] = signature  # Écriture peut-être en cours : on attend le relevé suivant
+                continue
+            try:
+                new = self._load(entry.site, signature, entry.version + 1)
+            except Exception as e:
+                self._failed[entry.site] = signature
+                self.reload_errors += 1
+                print(f"⚠️ Rechargement du modèle IoT {site_label(entry.site)} impossible ({e}) : "
+                      f"v{entry.version} conservée")
+                continue
+            self._pending.pop(entry.site, None)
+            self._failed.pop(entry.site, None)
+            if self._install(new, replace=True):
+                self.reloads += 1
+                reloaded += 1
+                print(f"🔄 Modèle IoT {site_label(entry.site)} rechargé à chaud : v{new.version} "
+                      f"({os.path.dirname(signature[0][0]) or '.'}, {new.load_ms:.0f} ms)")
+        return reloaded
+
+    def _watch(self):
+        # Réveillé par un site demandé hors du LRU, sinon un relevé toutes les reload_interval s
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.reload_interval)
+            self._wakeup.clear()
+            if not self._stopped.is_set():
+                self.check()
+
+    def start(self):
+        if self.reload_interval > 0 and self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="iot-model-watch", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stopped.set()
+        self._wakeup.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def stats(self):
+        with self._lock:
+            sites = {site_label(site): {'version': entry.version, 'artefacts': os.path.dirname(entry.signature[0][0]),
+                                        'load_ms': round(entry.load_ms, 1)}
+                     for site, entry in self._entries.items()}
+        return {'sites': sites, 'max_sites': self.max_sites, 'hits': self.hits, 'misses': self.misses,
+                'fallbacks': self.fallbacks,
+                'evictions': self.evictions, 'reloads': self.reloads, 'reload_errors': self.reload_errors}
+
+    def summary(self):
+        s = self.stats()
+        served = ", ".join(f"{name} v{site['version']}" for name, site in s['sites'].items()) or "aucun"
+        return (f"🗂️ Modèles IoT par site : {len(s['sites'])}/{s['max_sites']} en mémoire ({served}) | "
+                f"{s['hits']} appels servis du cache, {s['misses']} chargements, {s['evictions']} évictions, "
+                f"{s['fallbacks']} appels servis par le modèle global pendant un chargement | "
+                f"{s['reloads']} rechargements à chaud ({s['reload_errors']} échecs)")
+
+def publish_site_model(site, model, scaler, root=SITES_DIR):
+    # Publication sans fichier à moitié écrit : chaque pickle est écrit à côté puis renommé
+    # (os.replace), l'export mmap suit (son en-tête est écrit en dernier, voir save_forest)
+    model_path, scaler_path, forest_path = site_files(site, root)
+    os.makedirs(os.path.dirname(model_path), exist_ok=True)
+    for obj, path in ((scaler, scaler_path), (model, model_path)):
+        joblib.dump(obj, path + ".tmp")
+        os.replace(path + ".tmp", path)
+    clear_decision_threshold(model_path)  # Seuil d'un ancien modèle : ne s'applique pas au nouveau
+    if export_forest(model, scaler, forest_path) is None and os.path.isdir(forest_path):
+        shutil.rmtree(forest_path)  # Ancien export d'une forêt : ne doit plus masquer le nouveau modèle
+    return model_path
+
+def train_site_model(data_path, n_estimators=100):
+    # Même recette que train_and_evaluate (split 80/20, scaler sur le train, forêt), sur les données d'un site
+    from sklearn.ensemble import RandomForestClassifier
+    from sklearn.metrics import accuracy_score
+    from sklearn.model_selection import train_test_split
+    from sklearn.preprocessing import StandardScaler
+    from iot.storage import load_iot_data
+
+    df = load_iot_data(data_path, FEATURES + ['label']).dropna()
+    X_train, X_test, y_train, y_test = train_test_split(df[FEATURES], df['label'], test_size=0.2, random_state=42)
+    scaler = StandardScaler().fit(X_train)
+    clf = RandomForestClassifier(n_estimators=n_estimators, random_state=42, n_jobs=-1)
+    clf.fit(scaler.transform(X_train), y_train)
+    return clf, scaler, accuracy_score(y_test, clf.predict(scaler.transform(X_test)))
+
+def parse_sites(value):
+    return [site.strip() for site in value.split(",") if site.strip()] if value else None
+
+def add_server_arguments(parser, site=True):
+    # site=False : le script associe lui-même un site à chaque flux (multi-caméras)
+    if site:
+        parser.add_argument("--site", default=None,
+                            help=f"Site de la caméra : modèle {SITES_DIR}/<site>/ (repli sur le modèle global)")
+    parser.add_argument("--sites-dir", default=SITES_DIR, help="Dossier des artefacts par site")
+    parser.add_argument("--max-sites", type=int, default=MAX_SITES, help="Modèles de site gardés en mémoire (LRU)")
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL,
+                        help="s entre deux inspections des artefacts (0 : pas de rechargement à chaud)")
+
+def server_from_arguments(args):
+    return ModelServer(args.sites_dir, args.max_sites, args.reload_interval)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Modèles IoT par site : publication et surveillance")
+    parser.add_argument("mode", choices=["publish", "watch"])
+    parser.add_argument("--site", default=None, help="Site publié (publish)")
+    parser.add_argument("--data", default=None, help="Jeu de données du site (columnar ou CSV, voir iot.storage)")
+    parser.add_argument("--sites", default=None, help="Sites servis, séparés par des virgules (watch)")
+    parser.add_argument("--duration", type=float, default=30.0, help="Durée de surveillance en s (watch)")
+    parser.add_argument("--root", default=SITES_DIR)
+    parser.add_argument("--max-sites", type=int, default=MAX_SITES)
+    parser.add_argument("--reload-interval", type=float, default=RELOAD_INTERVAL)
+    args = parser.parse_args()
+
+    if args.mode == "publish":
+        if not args.site or not args.data:
+            parser.error("publish nécessite --site et --data")
+        print(f"🧠 Entraînement du modèle du site {args.site} sur {args.data}...")
+        model, scaler, acc = train_site_model(args.data)
+        print(f"🏆 Accuracy : {acc * 100:.2f}%")
+        print(f"💾 Modèle du site publié : {publish_site_model(args.site, model, scaler, args.root)}")
+    else:
+        # Sert les sites demandés et affiche les rechargements (publier depuis un autre terminal)
+        server = ModelServer(args.root, args.max_sites, args.reload_interval)
+        server.preload(parse_sites(args.sites) or [None]).start()
+        print(server.summary())
+        try:
+            time.sleep(args.duration)
+        except KeyboardInterrupt:
+            pass
+        server.stop()
+        print(server.summary())
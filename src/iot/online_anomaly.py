@@ -0,0 +1,145 @@
+import argparse
+import json
+import math
+import os
+import sys
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.storage import DATASET_PATH, FEATURES
+
+# Configuration
+STATE_PATH = "data/iot/online_anomaly.json"  # Statistiques apprises (quelques Ko)
+SENSORS = ['motion', 'sound_level', 'vibration', 'temperature']  # Colonnes scorées (l'heure sert de contexte)
+HOUR_INDEX = FEATURES.index('hour')
+Z_THRESHOLD = 4.0      # Anomalie si un capteur s'écarte de plus de 4 écarts-types de son profil horaire
+MIN_SAMPLES = 30       # En dessous, le profil de l'heure est trop pauvre : on utilise le profil global
+MAX_COUNT = 10_000     # Au-delà, le poids des nouvelles lectures reste fixe (moyenne mobile exponentielle)
+VAR_FLOOR = {'motion': 0.01, 'sound_level': 1.0, 'vibration': 0.01, 'temperature': 0.01}
+
+# Détecteur d'anomalies EN LIGNE (pendant de anomaly_detection.py, qui est un batch) :
+# pour chaque capteur et chaque heure de la journée, moyenne et variance glissantes (Welford).
+# Mémoire constante (24 x 4 x 3 nombres), score et mise à jour en quelques microsecondes,
+# en Python pur : pas de tableau NumPy créé par lecture.
+
+class OnlineAnomalyScorer:
+
+    def __init__(self, z_threshold=Z_THRESHOLD, min_samples=MIN_SAMPLES, max_count=MAX_COUNT):
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.max_count = max_count
+        self._columns = [FEATURES.index(name) for name in SENSORS]
+        self._floor = [VAR_FLOOR[name] for name in SENSORS]
+        # Index 0-23 : profils horaires ; index 24 : profil global (toutes heures confondues)
+        self.count = [0] * 25
+        self.mean = [[0.0] * len(SENSORS) for _ in range(25)]
+        self.var = [[0.0] * len(SENSORS) for _ in range(25)]
+
+    def _profile(self, x):
+        hour = int(x[HOUR_INDEX]) % 24
+        return hour if self.count[hour] >= self.min_samples else 24
+
+    def zscores(self, x):
+        p = self._profile(x)
+        mean, var = self.mean[p], self.var[p]
+        return [abs(x[c] - m) / math.sqrt(v if v > f else f)
+                for c, m, v, f in zip(self._columns, mean, var, self._floor)]
+
+    def score(self, x):
+        # Plus grand écart (en écarts-types) parmi les capteurs ; 0.0 tant que le profil global est trop pauvre
+        if self.count[24] < self.min_samples:
+            return 0.0
+        return max(self.zscores(x))
+
+    def _update_profile(self, p, x):
+        n = min(self.count[p] + 1, self.max_count)
+        self.count[p] = n
+        mean, var = self.mean[p], self.var[p]
+        for j, c in enumerate(self._columns):
+            # Welford (variance de population) : au plafond max_count, devient une moyenne exponentielle
+            delta = x[c] - mean[j]
+            mean[j] += delta / n
+            var[j] += (delta * (x[c] - mean[j]) - var[j]) / n
+
+    def update(self, x):
+        self._update_profile(int(x[HOUR_INDEX]) % 24, x)
+        self._update_profile(24, x)
+
+    def observe(self, x):
+        # Score puis apprentissage, sauf si la lecture est anormale : une intrusion en cours
+        # ne doit pas devenir "normale" pour le profil de cette heure
+        score = self.score(x)
+        anomaly = score > self.z_threshold
+        if not anomaly:
+            self.update(x)
+        return score, anomaly
+
+    def fit(self, X, y=None):
+        # Démarrage à chaud depuis l'historique (vectorisé) ; avec y, uniquement les lectures normales
+        X = np.asarray(X, dtype=np.float64)
+        if y is not None:
+            X = X[np.asarray(y) == 0]
+        values = X[:, self._columns]
+        hours = X[:, HOUR_INDEX].astype(int) % 24
+        for p in range(25):
+            rows = values if p == 24 else values[hours == p]
+            if len(rows):
+                self.count[p] = min(len(rows), self.max_count)
+                self.mean[p] = rows.mean(axis=0).tolist()
+                self.var[p] = rows.var(axis=0).tolist()
+        return self
+
+    def to_dict(self):
+        return {'sensors': SENSORS, 'z_threshold': self.z_threshold, 'min_samples': self.min_samples,
+                'max_count': self.max_count, 'count': self.count, 'mean': self.mean, 'var': self.var}
+
+    @classmethod
+    def from_dict(cls, state):
+        if state['sensors'] != SENSORS:
+            raise ValueError(f"❌ Capteurs incompatibles : {state['sensors']}")
+        scorer = cls(state['z_threshold'], state['min_samples'], state['max_count'])
+        scorer.count, scorer.mean, scorer.var = state['count'], state['mean'], state['var']
+        return scorer
+
+    def save(self, path=STATE_PATH):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.to_dict(), f)
+        os.replace(tmp_path, path)
+
+def load_scorer(path=STATE_PATH, z_threshold=None, data_path=DATASET_PATH):
+    # Profils sauvegardés s'ils existent, sinon appris sur l'historique IoT (lectures normales),
+    # sinon détecteur vierge qui apprend en direct
+    if os.path.exists(path):
+        with open(path) as f:
+            scorer = OnlineAnomalyScorer.from_dict(json.load(f))
+    else:
+        scorer = OnlineAnomalyScorer()
+        try:
+            from iot.storage import load_iot_data
+            df = load_iot_data(data_path, columns=FEATURES + ['label'])
+            scorer.fit(df[FEATURES].to_numpy(), df['label'].to_numpy())
+        except FileNotFoundError:
+            print("⚠️ Pas d'historique IoT : le détecteur d'anomalies apprend en direct")
+    if z_threshold is not None:
+        scorer.z_threshold = z_threshold
+    return scorer
+
+if __name__ == "__main__":
+    from iot.storage import load_iot_data
+
+    parser = argparse.ArgumentParser(description="Apprentissage des profils horaires du détecteur d'anomalies en ligne")
+    parser.add_argument("--data", default=DATASET_PATH)
+    parser.add_argument("--output", default=STATE_PATH)
+    parser.add_argument("--z-threshold", type=float, default=Z_THRESHOLD)
+    args = parser.parse_args()
+
+    df = load_iot_data(args.data, columns=FEATURES + ['label'])
+    scorer = OnlineAnomalyScorer(args.z_threshold).fit(df[FEATURES].to_numpy(), df['label'].to_numpy())
+    scorer.save(args.output)
+    flagged = np.array([scorer.score(row) > scorer.z_threshold for row in df[FEATURES].to_numpy()])
+    labels = df['label'].to_numpy() == 1
+    print(f"💾 Profils sauvegardés : {args.output} ({scorer.count[24]:,} lectures normales apprises)")
+    print(f"🔎 Sur l'historique : {flagged.sum()} anomalies | intrusions signalées {flagged[labels].mean():.1%} | "
+          f"fausses alertes {flagged[~labels].mean():.2%}")
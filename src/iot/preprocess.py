@@ -1,21 +1,22 @@
-import pandas as pd
+import sys
 import os
 import joblib  # Pour sauvegarder le scaler
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler
 
+# Même hack que train_classifier.py : src/ dans le path, imports par le paquet iot
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.storage import DATASET_PATH, load_iot_data
+
 # Configuration
-INPUT_PATH = "data/iot/iot_data.csv"
+INPUT_PATH = DATASET_PATH  # Jeu columnar (repli automatique sur iot_data.csv)
 SCALER_PATH = "data/iot/scaler.pkl"  # On sauvegarde l'outil de normalisation ici
 
 def load_and_preprocess_data():
     print("🧹 Démarrage du prétraitement...")
     
-    # 1. Chargement
-    if not os.path.exists(INPUT_PATH):
-        raise FileNotFoundError(f"❌ Le fichier {INPUT_PATH} n'existe pas. Lance generate_data.py d'abord.")
-    
-    df = pd.read_csv(INPUT_PATH)
+    # 1. Chargement (types compacts, lève FileNotFoundError si rien n'existe)
+    df = load_iot_data(INPUT_PATH)
     
     # 2. Vérification rapide
     if df.isnull().values.any():
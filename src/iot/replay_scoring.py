@@ -0,0 +1,323 @@
+import argparse
+import json
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.fast_inference import (DECISION_THRESHOLD, MODEL_PATH, SCALER_PATH, ForestTable, load_compiled_model,
+                                operating_score)
+from fusion.fusion_engine import (DEBOUNCE_OFF, DEBOUNCE_ON, FUSION_ENGINE, FUSION_OR, IOT_TAU, IOT_WEIGHT,
+                                  OFF_THRESHOLD, ON_THRESHOLD)
+from iot.storage import DATASET_PATH, FEATURES, DatasetWriter, iter_iot_chunks, read_meta
+
+# Configuration
+CHUNK_SIZE = 1_000_000     # Lectures chargées et scorées à la fois (borne la mémoire)
+PERIOD = 1.0               # s entre deux lectures quand le journal n'a pas de colonne "ts"
+N_JOBS = 1                 # Threads de scoring par bloc (-1 : tous les coeurs)
+PREDICTIONS_PATH = "results/iot/replay_predictions"   # Jeu columnar (iot.storage) : ts, proba, pred, alert
+ALERTS_PATH = "results/logs/iot_replay_alerts.csv"   # Un intervalle d'alerte par ligne
+REPORT_PATH = "results/logs/iot_replay.json"
+
+# Rejeu d'un historique IoT stocké à travers le modèle entraîné et la règle d'alerte :
+# - le journal est lu par blocs (iot.storage, columnar memory-mappé ou CSV en flux) ;
+# - chaque bloc est scoré en UN predict_proba vectorisé, découpé en n_jobs tranches scorées
+#   par des threads (comme predict_proba de sklearn pour ses forêts) : mêmes tableaux du
+#   modèle en mémoire, aucune copie vers des processus. La forêt est tabulée (ForestTable)
+#   quand c'est possible : même résultat que le parcours des arbres, ~50x plus rapide ;
+# - la décision reprend la règle du système de fusion pour le capteur seul :
+#   "or"     : alerte = prédiction IoT à 1 (fuse_decision sans vidéo) ;
+#   "engine" : FusionEngine pour le capteur seul, en temps continu comme le moteur évalué à chaque
+#              frame : score = IOT_WEIGHT x proba qui décroît (IOT_TAU) jusqu'à la lecture suivante,
+#              hystérésis ON/OFF_THRESHOLD et anti-rebond DEBOUNCE_ON/OFF. Les passages de seuil
+#              sont en forme close (décroissance exponentielle), les bascules tombent donc entre
+#              deux lectures : une seule lecture haute déclenche puis s'efface. Sans boucle Python :
+#              une bascule ne dépend que de la série en cours au-dessus / en dessous des seuils ;
+# - le seuil de décision enregistré avec le modèle s'applique comme en direct : pred = proba > seuil,
+#   et la règle reçoit la proba recalée pour que ce seuil tombe à 0.5 (fast_inference.operating_score) ;
+# - sorties : une ligne par lecture (ts, proba, pred, alert) et les intervalles d'alerte.
+
+class AlertState:
+    # Règle d'alerte et état reporté d'un bloc au suivant : alerte en cours, séries en cours,
+    # dernière lecture (son effet dure jusqu'à la suivante), intervalle ouvert
+
+    def __init__(self, fusion=FUSION_ENGINE, on_threshold=ON_THRESHOLD, off_threshold=OFF_THRESHOLD,
+                 debounce_on=DEBOUNCE_ON, debounce_off=DEBOUNCE_OFF, iot_weight=IOT_WEIGHT, iot_tau=IOT_TAU):
+        self.fusion = fusion
+        self.on_threshold, self.off_threshold = on_threshold, off_threshold
+        self.debounce_on, self.debounce_off = debounce_on, debounce_off
+        self.iot_weight, self.iot_tau = iot_weight, iot_tau
+        self.alert = False
+        self.high_since = None      # Début de la période au-dessus du seuil haut qui dure encore à la dernière lecture
+        self.low_since = None       # Idem sous le seuil bas
+        self.last = None            # Dernière lecture, pas encore suivie : (ts, niveau, proba, ligne)
+        self.rows = 0
+        self.interval = None        # Intervalle d'alerte ouvert : [début, lectures, pic, ligne]
+        self.intervals = []
+
+def _series_starts(new, start, carried):
+    # Pour chaque segment : début de la série en cours (dernier segment qui en ouvre une ;
+    # carried : série commencée avant le bloc, None sinon)
+    last = np.where(new, np.arange(len(new)), -1)
+    np.maximum.accumulate(last, out=last)
+    return np.where(last >= 0, start[np.maximum(last, 0)], np.nan if carried is None else carried)
+
+def _within(t, start, end):
+    return (t >= start) & ((t < end) | (t == start))
+
+def _engine_marks(start, end, level, state, committed):
+    # Segment i : score(t) = level[i] x exp(-(t - start[i]) / tau) de sa lecture à la suivante (end[i]),
+    # comme FusionEngine.score. La décroissance est monotone : au-dessus du seuil haut en début de
+    # segment, sous le seuil bas en fin de segment, instants de passage en forme close. Une bascule
+    # a lieu quand une série (au-dessus / en dessous, prolongée d'un segment à l'autre) dure depuis
+    # l'anti-rebond ; au plus une bascule ON puis une OFF par segment.
+    tau = state.iot_tau
+    with np.errstate(divide="ignore", invalid="ignore"):
+        above = tau * np.log(level / state.on_threshold)     # Durée au-dessus du seuil haut (< 0 : jamais)
+        below = tau * np.log(level / state.off_threshold)    # Délai avant de passer sous le seuil bas
+    length = end - start
+    high = above >= 0
+    high_end = start + np.minimum(above, length)
+    high_through = high & (above >= length)                  # Encore au-dessus à la lecture suivante
+    low_start = start + np.maximum(below, 0.0)
+    low = low_start <= end                                   # Une fois dessous, jusqu'à la lecture suivante
+
+    previous = np.empty(len(start), dtype=bool)
+    previous[0] = state.high_since is not None
+    previous[1:] = high_through[:-1]
+    high_cont = high & previous
+    high_since = _series_starts(high & ~high_cont, start, state.high_since)
+    previous[0] = state.low_since is not None
+    previous[1:] = low[:-1]
+    low_cont = low & (below <= 0) & previous
+    low_since = _series_starts(low & ~low_cont, low_start, state.low_since)
+
+    switch_on = high_since + state.debounce_on
+    switch_off = low_since + state.debounce_off
+    # Segment [start, end) : une bascule pile à la lecture suivante dépend de cette lecture (segment
+    # suivant) ; un segment de durée nulle (dernière lecture du bloc) ne bascule qu'à son instant
+    on_ok = high & (switch_on <= high_end) & _within(switch_on, start, end)
+    off_ok = low & _within(switch_off, start, end)
+    if committed:
+        last = committed - 1
+        state.high_since = float(high_since[last]) if high_through[last] else None
+        state.low_since = float(low_since[last]) if low[last] else None
+    times = np.column_stack([switch_on, switch_off]).ravel()
+    values = np.tile(np.array([True, False]), len(start))
+    valid = np.column_stack([on_ok, off_ok]).ravel()
+    return times[valid], values[valid], np.repeat(np.arange(len(start)), 2)[valid]
+
+def _marks(start, end, level, state, committed):
+    # Bascules (instant, nouvelle valeur, segment), dans l'ordre chronologique
+    if state.fusion == FUSION_OR:
+        return start, level > 0.5, np.arange(len(start))  # L'alerte suit chaque lecture
+    return _engine_marks(start, end, level, state, committed)
+
+def decide(score, ts, state, proba=None):
+    # Alerte à chaque lecture du bloc (dernière bascule à son instant ou avant). Les intervalles
+    # d'alerte, aux instants exacts des bascules (entre deux lectures au besoin), s'accumulent dans
+    # state ; l'état est reporté au bloc suivant. score : proba recalée au seuil (operating_score),
+    # proba : proba brute (pic des intervalles), score par défaut.
+    proba = score if proba is None else proba
+    n = len(score)
+    if not n:
+        return np.zeros(0, dtype=bool)
+    level = score if state.fusion == FUSION_OR else state.iot_weight * np.asarray(score, np.float64)
+    start = np.asarray(ts, np.float64)
+    rows = state.rows + np.arange(n)
+    proba = np.asarray(proba)
+    if state.last is not None:
+        last_ts, last_level, last_proba, last_row = state.last
+        start, level = np.concatenate([[last_ts], start]), np.concatenate([[last_level], level])
+        proba, rows = np.concatenate([[last_proba], proba]), np.concatenate([[last_row], rows])
+    # Chaque lecture agit jusqu'à la suivante ; la dernière du bloc n'a pas encore de suivante :
+    # évaluée à son seul instant (alerte de la lecture) puis reportée, ses bascules ne comptent pas encore
+    end = np.append(start[1:], start[-1])
+    committed = len(start) - 1
+    before = state.alert
+    times, values, segment = _marks(start, end, level, state, committed)
+    keep = segment < committed
+    _collect(times[keep], values[keep], segment[keep], start, proba, rows, state, committed)
+    state.last = (float(start[-1]), float(level[-1]), float(proba[-1]), int(rows[-1]))
+    state.rows += n
+    if not len(times):
+        return np.full(n, before)
+    last = np.searchsorted(times, ts, side="right") - 1
+    return np.where(last >= 0, values[np.maximum(last, 0)], before)
+
+def _collect(times, values, segment, start, proba, rows, state, committed):
+    # Intervalles [bascule ON, bascule OFF] ; lectures (nombre, pic, première ligne) : de celle en
+    # vigueur au déclenchement à la dernière en vigueur avant la levée. Vectorisé : un historique
+    # bruité peut en compter des millions.
+    previous = np.empty(len(values), dtype=bool)
+    previous[:1] = state.alert
+    previous[1:] = values[:-1]
+    starts, ends = np.flatnonzero(values & ~previous), np.flatnonzero(~values & previous)
+    # Segment de la dernière lecture en alerte : une levée pile à une lecture exclut celle-ci
+    last_in = segment[ends] - (times[ends] <= start[segment[ends]])
+    if state.interval is not None and len(ends):
+        # La première levée ferme l'intervalle ouvert au bloc précédent
+        begin, readings, peak, row = state.interval
+        stop = int(last_in[0]) + 1
+        peak = max(peak, float(proba[:stop].max())) if stop else peak
+        _append(state, [begin], [times[ends[0]]], [readings + stop], [peak], [row])
+        state.interval = None
+        ends, last_in = ends[1:], last_in[1:]
+    elif state.interval is not None and committed:
+        state.interval[1] += committed
+        state.interval[2] = max(state.interval[2], float(proba[:committed].max()))
+    closed = starts[:len(ends)]
+    if len(closed):
+        first = segment[closed]
+        bounds = np.column_stack([first, last_in + 1]).ravel()
+        peaks = np.maximum.reduceat(np.append(proba, proba[-1]), bounds)[::2]
+        _append(state, times[closed], times[ends], last_in - first + 1, peaks, rows[first])
+    if len(starts) > len(ends):
+        first = int(segment[starts[-1]])
+        state.interval = [float(times[starts[-1]]), committed - first, float(proba[first:committed].max()),
+                          int(rows[first])]
+    if len(values):
+        state.alert = bool(values[-1])
+
+def _append(state, start, end, readings, peak, row):
+    state.intervals.append({'start': np.asarray(start, np.float64), 'end': np.asarray(end, np.float64),
+                            'readings': np.asarray(readings, np.int64),
+                            'peak_proba': np.asarray(peak, np.float32), 'first_row': np.asarray(row, np.int64)})
+
+def finish(state):
+    # Fin du journal : plus rien ne renouvelle la dernière lecture, elle s'efface comme en direct
+    # (règle "or" : une alerte encore active se termine à la dernière lecture)
+    if state.last is not None:
+        ts, level, proba, row = state.last
+        start, proba, rows = np.array([ts]), np.array([proba]), np.array([row])
+        times, values, segment = _marks(start, np.array([np.inf]), np.array([level]), state, 1)
+        _collect(times, values, segment, start, proba, rows, state, 1)
+        state.last = None
+        if state.interval is not None:
+            begin, readings, peak, row = state.interval
+            _append(state, [begin], [ts], [readings], [peak], [row])
+            state.interval = None
+    columns = ['start', 'end', 'readings', 'peak_proba', 'first_row']
+    if not state.intervals:
+        return pd.DataFrame(columns=columns + ['duration_s'])
+    intervals = pd.DataFrame({c: np.concatenate([part[c] for part in state.intervals]) for c in columns})
+    intervals['duration_s'] = intervals['end'] - intervals['start']
+    return intervals
+
+def score_chunk(model, X, n_jobs, parallel=None):
+    # Proba de la classe "intrusion" ; n_jobs > 1 : tranches contiguës scorées en parallèle
+    if parallel is None or n_jobs == 1 or len(X) < 2 * n_jobs:
+        return model.predict_proba(X)[:, -1]
+    parts = parallel(delayed(model.predict_proba)(part) for part in np.array_split(X, n_jobs))  # Vues, sans copie
+    return np.concatenate([p[:, -1] for p in parts])
+
+def load_scoring_model(model_path=MODEL_PATH, scaler_path=SCALER_PATH, table=True):
+    compiled = load_compiled_model(model_path, scaler_path)
+    if table:
+        start = time.perf_counter()
+        tabulated = ForestTable.from_compiled(compiled)
+        if tabulated is not None:
+            print(f"🧮 Forêt tabulée : {tabulated.cells:,} cases en {time.perf_counter() - start:.1f} s")
+            return tabulated
+    return compiled
+
+def replay_log(path=DATASET_PATH, model=None, chunk_size=CHUNK_SIZE, n_jobs=N_JOBS, period=PERIOD, origin=0.0,
+               fusion=FUSION_ENGINE, predictions_path=PREDICTIONS_PATH, alerts_path=ALERTS_PATH,
+               report_path=REPORT_PATH):
+    model = model if model is not None else load_scoring_model()
+    threshold = getattr(model, 'decision_threshold', DECISION_THRESHOLD)
+    n_jobs = (os.cpu_count() or 1) if n_jobs == -1 else max(n_jobs, 1)
+    try:
+        has_ts = 'ts' in read_meta(path)['columns']
+    except (OSError, ValueError):
+        has_ts = False  # CSV ou dossier sans métadonnées : horodatage reconstruit
+    columns = FEATURES + (['ts'] if has_ts else [])
+    writer = DatasetWriter(predictions_path) if predictions_path else None
+    state = AlertState(fusion)
+    rows, alert_readings = 0, 0
+    timings = {'read_s': 0.0, 'score_s': 0.0, 'decide_s': 0.0, 'write_s': 0.0}
+
+    start = time.perf_counter()
+    with Parallel(n_jobs=n_jobs, prefer="threads") as parallel:
+        chunks = iter_iot_chunks(path, columns, chunk_size)
+        while True:
+            t0 = time.perf_counter()
+            chunk = next(chunks, None)
+            if chunk is None:
+                break
+            X = chunk[FEATURES].to_numpy(np.float64)
+            ts = (chunk['ts'].to_numpy(np.float64) if has_ts
+                  else origin + (rows + np.arange(len(chunk))) * period)
+            t1 = time.perf_counter()
+            proba = score_chunk(model, X, n_jobs, parallel)
+            t2 = time.perf_counter()
+            alert = decide(operating_score(proba, threshold), ts, state, proba)
+            t3 = time.perf_counter()
+            if writer is not None:
+                writer.append(pd.DataFrame({'ts': ts, 'proba': proba.astype(np.float32),
+                                            'pred': (proba > threshold).astype(np.uint8), 'alert': alert}))
+            t4 = time.perf_counter()
+            for key, seconds in zip(timings, (t1 - t0, t2 - t1, t3 - t2, t4 - t3)):
+                timings[key] += seconds
+            rows += len(chunk)
+            alert_readings += int(alert.sum())
+    intervals = finish(state)
+    if writer is not None:
+        writer.close()
+    wall = time.perf_counter() - start
+
+    report = {
+        'source': path, 'rows': rows, 'fusion': fusion, 'n_jobs': n_jobs, 'chunk_size': chunk_size,
+        'model': type(model).__name__, 'threshold': threshold, 'wall_s': wall, 'readings_per_s': rows / wall if wall > 0 else 0.0,
+        'score_readings_per_s': rows / timings['score_s'] if timings['score_s'] > 0 else 0.0,
+        'timings': timings, 'alert_readings': alert_readings, 'alerts': len(intervals),
+        'alert_seconds': float(intervals['duration_s'].sum()),
+        'longest_alert_s': float(intervals['duration_s'].max()) if len(intervals) else 0.0,
+        'predictions': predictions_path, 'alerts_path': alerts_path,
+    }
+    if alerts_path:
+        os.makedirs(os.path.dirname(alerts_path) or ".", exist_ok=True)
+        intervals.to_csv(alerts_path, index=False, float_format="%.6g")
+    if report_path:
+        os.makedirs(os.path.dirname(report_path) or ".", exist_ok=True)
+        with open(report_path, "w") as f:
+            json.dump(report, f, indent=2)
+    return report, intervals
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rejeu d'un historique IoT : scoring vectorisé + intervalles d'alerte")
+    parser.add_argument("data", nargs="?", default=DATASET_PATH, help="Jeu IoT (dossier columnar ou .csv)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--n-jobs", type=int, default=N_JOBS, help="Threads de scoring (-1 : tous les coeurs)")
+    parser.add_argument("--period", type=float, default=PERIOD, help="s entre deux lectures (sans colonne ts)")
+    parser.add_argument("--origin", type=float, default=0.0, help="ts de la première lecture (sans colonne ts)")
+    parser.add_argument("--fusion", choices=[FUSION_ENGINE, FUSION_OR], default=FUSION_ENGINE,
+                        help="engine : hystérésis + anti-rebond du moteur de fusion ; or : prédiction brute")
+    parser.add_argument("--model", default=MODEL_PATH)
+    parser.add_argument("--scaler", default=SCALER_PATH)
+    parser.add_argument("--no-table", dest="table", action="store_false",
+                        help="Parcours des arbres au lieu de la forêt tabulée (comparaison)")
+    parser.add_argument("--predictions", default=PREDICTIONS_PATH, help="Sortie par lecture ('' : aucune)")
+    parser.add_argument("--alerts", default=ALERTS_PATH, help="Intervalles d'alerte, CSV ('' : aucun)")
+    parser.add_argument("--report", default=REPORT_PATH, help="Résumé JSON du rejeu")
+    args = parser.parse_args()
+
+    model = load_scoring_model(args.model, args.scaler, args.table)
+    report, _ = replay_log(args.data, model, args.chunk_size, args.n_jobs, args.period, args.origin, args.fusion,
+                           args.predictions or None, args.alerts or None, args.report or None)
+    t = report['timings']
+    print(f"🔁 {report['rows']:,} lectures rejouées en {report['wall_s']:.2f} s "
+          f"({report['readings_per_s']:,.0f} lectures/s, scoring seul {report['score_readings_per_s']:,.0f}/s)")
+    print(f"   ⏱️  lecture {t['read_s']:.2f} s | score {t['score_s']:.2f} s | décision {t['decide_s']:.2f} s | "
+          f"écriture {t['write_s']:.2f} s")
+    print(f"🚨 {report['alerts']:,} alertes ({report['alert_readings']:,} lectures en alerte, "
+          f"{report['alert_seconds']:,.0f} s) — règle {report['fusion']}")
+    if report['predictions']:
+        print(f"💾 Prédictions : {report['predictions']}")
+    if args.alerts:
+        print(f"💾 Intervalles : {args.alerts}")
+    if args.report:
+        print(f"💾 Résumé : {args.report}")
@@ -0,0 +1,182 @@
+import json
+import os
+import shutil
+import numpy as np
+import pandas as pd
+
+# Configuration
+DATASET_PATH = "data/iot/iot_data"   # Dossier columnar (un sous-dossier .npy par bloc)
+CSV_PATH = "data/iot/iot_data.csv"   # Ancien format texte (repli / export lisible)
+META_FILE = "_meta.json"
+FORMAT_VERSION = 1
+CSV_CHUNK_SIZE = 500_000  # Lignes lues à la fois quand on parcourt un CSV en flux
+
+# Schéma compact explicite : plus besoin de deviner les types à chaque lecture
+SCHEMA = {
+    'motion': np.uint8,
+    'sound_level': np.uint8,
+    'vibration': np.uint8,
+    'temperature': np.float32,
+    'hour': np.uint8,
+    'label': np.uint8,
+}
+FEATURES = ['motion', 'sound_level', 'vibration', 'temperature', 'hour']
+
+def apply_schema(df):
+    # Conversion vers les types compacts (les colonnes inconnues sont laissées telles quelles)
+    return df.astype({c: SCHEMA[c] for c in df.columns if c in SCHEMA})
+
+class DatasetWriter:
+    # Écrit un jeu de données bloc par bloc : part-00000/motion.npy, part-00000/hour.npy, ...
+    # Les métadonnées (_meta.json) ne sont écrites qu'à la fermeture, un dossier
+    # incomplet n'est donc jamais pris pour un jeu de données valide.
+
+    def __init__(self, path=DATASET_PATH):
+        self.path = path
+        self.parts = []
+        self.columns = None
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        os.makedirs(path)
+
+    def append(self, df):
+        df = apply_schema(df)
+        if self.columns is None:
+            self.columns = list(df.columns)
+        elif list(df.columns) != self.columns:
+            raise ValueError(f"❌ Colonnes incohérentes : {list(df.columns)} au lieu de {self.columns}")
+
+        name = f"part-{len(self.parts):05d}"
+        os.makedirs(os.path.join(self.path, name))
+        for col in self.columns:
+            np.save(os.path.join(self.path, name, f"{col}.npy"), np.ascontiguousarray(df[col].to_numpy()))
+        self.parts.append({'name': name, 'rows': len(df)})
+
+    def close(self):
+        meta = {
+            'version': FORMAT_VERSION,
+            'columns': self.columns or [],
+            'dtypes': {c: np.dtype(SCHEMA[c]).name for c in (self.columns or []) if c in SCHEMA},
+            'rows': sum(p['rows'] for p in self.parts),
+            'parts': self.parts,
+        }
+        tmp_path = os.path.join(self.path, META_FILE + ".tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(meta, f, indent=2)
+        os.replace(tmp_path, os.path.join(self.path, META_FILE))
+        return meta['rows']
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+
+def save_iot_data(data, path=DATASET_PATH):
+    # data : un DataFrame ou un itérable de DataFrames (ex : generate_data.iter_generated_chunks(...))
+    if isinstance(data, pd.DataFrame):
+        data = [data]
+    writer = DatasetWriter(path)
+    for chunk in data:
+        writer.append(chunk)
+    return writer.close()
+
+def read_meta(path=DATASET_PATH):
+    with open(os.path.join(path, META_FILE)) as f:
+        meta = json.load(f)
+    if meta.get('version') != FORMAT_VERSION:
+        raise ValueError(f"❌ Version de format non supportée : {meta.get('version')}")
+    return meta
+
+def _resolve(path):
+    # Renvoie ("npy", dossier) ou ("csv", fichier) selon ce qui existe sur le disque
+    if path.endswith(".csv"):
+        if os.path.exists(path):
+            return "csv", path
+    elif os.path.exists(os.path.join(path, META_FILE)):
+        return "npy", path
+    elif os.path.exists(path + ".csv"):
+        return "csv", path + ".csv"
+    raise FileNotFoundError(f"❌ Le jeu de données {path} n'existe pas. Lance generate_data.py d'abord.")
+
+def _check_columns(columns, available):
+    missing = [c for c in columns if c not in available]
+    if missing:
+        raise KeyError(f"❌ Colonnes inconnues : {missing}")
+
+def _read_csv(path, columns=None, chunksize=None):
+    dtype = {c: t for c, t in SCHEMA.items() if columns is None or c in columns}
+    try:
+        return pd.read_csv(path, usecols=columns, dtype=dtype, chunksize=chunksize)
+    except ValueError:
+        # Valeurs manquantes : impossible de typer directement en entiers,
+        # on lit sans schéma et on laisse l'appelant gérer les NaN
+        return pd.read_csv(path, usecols=columns, chunksize=chunksize)
+
+def load_columns(path=DATASET_PATH, columns=None, mmap=True):
+    # Chargement "brut" : dictionnaire colonne -> tableau NumPy.
+    # Avec mmap=True et un seul bloc, les tableaux sont des vues memory-mapped (aucune copie).
+    # Plusieurs blocs : chaque colonne est concaténée en RAM (copie complète) ; pour rester
+    # hors mémoire sur un jeu en plusieurs blocs, parcourir iter_iot_chunks à la place.
+    kind, resolved = _resolve(path)
+    if kind == "csv":
+        df = _read_csv(resolved, columns)
+        return {c: df[c].to_numpy() for c in df.columns}
+
+    meta = read_meta(resolved)
+    columns = columns or meta['columns']
+    _check_columns(columns, meta['columns'])
+
+    mmap_mode = 'r' if mmap else None
+    arrays = {}
+    for col in columns:
+        pieces = [np.load(os.path.join(resolved, p['name'], f"{col}.npy"), mmap_mode=mmap_mode) for p in meta['parts']]
+        if len(pieces) == 1:
+            arrays[col] = pieces[0]
+        elif pieces:
+            arrays[col] = np.concatenate(pieces)
+        else:
+            arrays[col] = np.empty(0, dtype=SCHEMA.get(col, np.float64))
+    return arrays
+
+def load_iot_data(path=DATASET_PATH, columns=None):
+    # Chargement complet sous forme de DataFrame (avec projection de colonnes).
+    # Repli automatique sur le CSV si aucun jeu columnar n'existe.
+    kind, resolved = _resolve(path)
+    if kind == "csv":
+        return _read_csv(resolved, columns)
+    arrays = load_columns(resolved, columns, mmap=True)
+    return pd.DataFrame({c: np.asarray(a) for c, a in arrays.items()})
+
+def iter_iot_chunks(path=DATASET_PATH, columns=None, chunk_size=None):
+    # Parcours en flux : jamais plus d'un bloc en mémoire.
+    # chunk_size=None -> un DataFrame par bloc stocké.
+    kind, resolved = _resolve(path)
+    if kind == "csv":
+        yield from _read_csv(resolved, columns, chunksize=chunk_size or CSV_CHUNK_SIZE)
+        return
+
+    meta = read_meta(resolved)
+    columns = columns or meta['columns']
+    _check_columns(columns, meta['columns'])
+
+    for part in meta['parts']:
+        arrays = {c: np.load(os.path.join(resolved, part['name'], f"{c}.npy"), mmap_mode='r') for c in columns}
+        step = chunk_size or part['rows'] or 1
+        for start in range(0, part['rows'], step):
+            yield pd.DataFrame({c: np.array(a[start:start + step]) for c, a in arrays.items()})
+
+def count_rows(path=DATASET_PATH):
+    kind, resolved = _resolve(path)
+    if kind == "npy":
+        return read_meta(resolved)['rows']
+    return sum(len(chunk) for chunk in _read_csv(resolved, columns=['label'], chunksize=CSV_CHUNK_SIZE))
+
+def count_chunks(path=DATASET_PATH, chunk_size=None):
+    # Nombre exact de blocs produits par iter_iot_chunks(path, chunk_size=chunk_size) :
+    # le découpage repart de zéro à chaque bloc stocké, ce n'est pas lignes / chunk_size
+    kind, resolved = _resolve(path)
+    if kind == "csv":
+        return -(-count_rows(resolved) // (chunk_size or CSV_CHUNK_SIZE))
+    return sum(-(-p['rows'] // (chunk_size or p['rows'] or 1)) for p in read_meta(resolved)['parts'])
@@ -1,18 +1,42 @@
+import argparse
 import sys
 import os
+import shutil
 import joblib
-import matplotlib.pyplot as plt
-import seaborn as sns
+import numpy as np
 from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import SGDClassifier
 from sklearn.metrics import accuracy_score, classification_report, confusion_matrix
+from sklearn.preprocessing import StandardScaler
 
-# Hack pour importer preprocess.py qui est dans le même dossier
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-from preprocess import load_and_preprocess_data
+# Hack pour importer le paquet iot (dossier parent src/ dans le path) : un seul chemin
+# d'import par module, sinon fast_inference serait chargé deux fois sous deux noms
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from iot.preprocess import INPUT_PATH, SCALER_PATH, load_and_preprocess_data
+from iot.storage import FEATURES, count_chunks, iter_iot_chunks
+from iot.fast_inference import FOREST_PATH, clear_decision_threshold, export_forest, save_decision_threshold
 
 # Configuration
 MODEL_PATH = "data/iot/model_iot.pkl"
 
+# Mode streaming (hors mémoire)
+STREAM_CHUNK_SIZE = 200_000   # Lignes lues à la fois
+TEST_RATIO = 0.2              # Même proportion que le split 80/20 classique
+MAX_STREAM_TREES = 100        # Taille finale de la forêt construite bloc par bloc
+
+def export_for_inference(clf, scaler, threshold=None, **threshold_info):
+    # Export à plat memory-mapped (chargé en priorité par la fusion, voir fast_inference.py).
+    # threshold : point de fonctionnement choisi (experiments.py) ; None = seuil par défaut 0.5
+    if threshold is None:
+        clear_decision_threshold(MODEL_PATH)
+    else:
+        print(f"🎚️ Seuil de décision enregistré : {save_decision_threshold(MODEL_PATH, threshold, **threshold_info)}")
+    header = export_forest(clf, scaler, FOREST_PATH)
+    if header is not None:
+        print(f"💾 Forêt exportée pour l'inférence (mmap) : {FOREST_PATH}")
+    elif os.path.isdir(FOREST_PATH):
+        shutil.rmtree(FOREST_PATH)  # Ancien export d'une forêt : ne doit plus masquer le nouveau modèle
+
 def train_and_evaluate():
     print("🧠 Démarrage de l'entraînement du modèle IA...")
 
@@ -44,14 +68,127 @@ def train_and_evaluate():
     # 7. Sauvegarde du modèle entraîné
     joblib.dump(clf, MODEL_PATH)
     print(f"\n💾 Modèle entraîné sauvegardé dans : {MODEL_PATH}")
+    export_for_inference(clf, joblib.load(SCALER_PATH))
     
     return clf, cm
 
+def _holdout_mask(chunk_index, n, test_ratio, seed=42):
+    # Tirage déterministe par bloc : les 3 passes voient exactement le même split
+    rng = np.random.default_rng([seed, chunk_index])
+    return rng.random(n) < test_ratio
+
+def _iter_split_chunks(path, chunk_size, test_ratio):
+    for i, chunk in enumerate(iter_iot_chunks(path, columns=FEATURES + ['label'], chunk_size=chunk_size)):
+        chunk = chunk.dropna()
+        is_test = _holdout_mask(i, len(chunk), test_ratio)
+        yield chunk[FEATURES], chunk['label'].to_numpy(), is_test
+
+def _tree_budget(chunk_index, n_chunks, max_trees):
+    # Répartition exacte de max_trees arbres sur n_chunks blocs (somme = max_trees).
+    # Plus de blocs que d'arbres : certains blocs reçoivent 0 arbre et sont regroupés avec les suivants.
+    return (chunk_index + 1) * max_trees // n_chunks - chunk_index * max_trees // n_chunks
+
+def _sample_mask(chunk_index, n, fraction, seed=42):
+    # Sous-échantillon déterministe d'un bloc regroupé (la mémoire reste ~ un bloc par groupe)
+    if fraction >= 1:
+        return np.ones(n, dtype=bool)
+    return np.random.default_rng([seed, chunk_index, 1]).random(n) < fraction
+
+def train_streaming(estimator="sgd", chunk_size=STREAM_CHUNK_SIZE, test_ratio=TEST_RATIO, path=INPUT_PATH):
+    # Entraînement "out-of-core" : le jeu de données n'est jamais chargé en entier.
+    # estimator="sgd"    -> régression logistique mise à jour par partial_fit
+    # estimator="forest" -> forêt warm-start, quelques arbres ajoutés par bloc (MAX_STREAM_TREES au total)
+    print(f"🧠 Entraînement en flux ({estimator}, blocs de {chunk_size} lignes)...")
+
+    # 1. Passe 1 : normalisation incrémentale sur la partie TRAIN uniquement
+    scaler = StandardScaler()
+    for X, y, is_test in _iter_split_chunks(path, chunk_size, test_ratio):
+        if (~is_test).any():
+            scaler.partial_fit(X[~is_test])
+    print(f"   -> Scaler ajusté sur {int(scaler.n_samples_seen_)} lignes.")
+
+    # 2. Passe 2 : apprentissage bloc par bloc
+    if estimator == "sgd":
+        clf = SGDClassifier(loss="log_loss", random_state=42)
+    elif estimator == "forest":
+        # Compté comme _iter_split_chunks les produit (le découpage repart à chaque bloc stocké)
+        n_chunks = max(1, count_chunks(path, chunk_size))
+        group_size = -(-n_chunks // MAX_STREAM_TREES)  # Blocs partageant un même lot d'arbres
+        clf = RandomForestClassifier(n_estimators=0, warm_start=True, random_state=42, n_jobs=-1)
+        pending, buffer_X, buffer_y = 0, [], []
+    else:
+        raise ValueError(f"❌ Estimateur inconnu : {estimator} (sgd ou forest)")
+
+    for i, (X, y, is_test) in enumerate(_iter_split_chunks(path, chunk_size, test_ratio)):
+        train = ~is_test
+        if estimator == "sgd":
+            if train.any():
+                clf.partial_fit(scaler.transform(X[train]), y[train], classes=np.array([0, 1]))
+            continue
+
+        train &= _sample_mask(i, len(y), 1 / group_size)
+        pending += _tree_budget(i, n_chunks, MAX_STREAM_TREES)
+        if train.any():
+            buffer_X.append(scaler.transform(X[train]))
+            buffer_y.append(y[train])
+        y_group = np.concatenate(buffer_y) if buffer_y else y[:0]
+        # Un lot d'arbres entraîné sur une seule classe casserait predict_proba de la forêt
+        # (classes différentes d'un arbre à l'autre) : on attend un bloc qui apporte l'autre classe
+        if pending and len(np.unique(y_group)) == 2:
+            clf.n_estimators = min(clf.n_estimators + pending, MAX_STREAM_TREES)
+            clf.fit(np.concatenate(buffer_X), y_group)
+            pending, buffer_X, buffer_y = 0, [], []
+
+    if estimator == "forest":
+        if clf.n_estimators == 0:
+            raise ValueError("❌ Aucun bloc ne contient les deux classes : forêt impossible à entraîner")
+        if pending:
+            print(f"⚠️ {pending} arbre(s) non construit(s) : derniers blocs sans les deux classes")
+        print(f"   -> Forêt de {clf.n_estimators} arbres sur {n_chunks} blocs.")
+
+    # 3. Passe 3 : évaluation sur le test mis de côté (matrice de confusion cumulée)
+    cm = np.zeros((2, 2), dtype=np.int64)
+    for X, y, is_test in _iter_split_chunks(path, chunk_size, test_ratio):
+        if is_test.any():
+            cm += confusion_matrix(y[is_test], clf.predict(scaler.transform(X[is_test])), labels=[0, 1])
+
+    tn, fp, fn, tp = cm.ravel()
+    acc = (tn + tp) / max(cm.sum(), 1)
+    print(f"\n🏆 Accuracy (Précision globale) : {acc * 100:.2f}%")
+    print(f"   Precision (intrusion) : {tp / max(tp + fp, 1):.3f} | Recall (intrusion) : {tp / max(tp + fn, 1):.3f}")
+    print("Confusion Matrix (Vrai Négatif, Faux Positif, Faux Négatif, Vrai Positif):")
+    print(cm)
+
+    # 4. Sauvegarde (mêmes fichiers que le mode classique, la fusion n'y voit aucune différence)
+    joblib.dump(scaler, SCALER_PATH)
+    joblib.dump(clf, MODEL_PATH)
+    print(f"\n💾 Modèle entraîné sauvegardé dans : {MODEL_PATH}")
+    export_for_inference(clf, scaler)
+
+    return clf, cm
+
 if __name__ == "__main__":
-    model, cm = train_and_evaluate()
+    parser = argparse.ArgumentParser(description="Entraînement du classifieur IoT")
+    parser.add_argument("--streaming", action="store_true", help="Entraînement hors mémoire, bloc par bloc")
+    parser.add_argument("--estimator", choices=["sgd", "forest"], default="sgd", help="Modèle du mode streaming")
+    parser.add_argument("--chunk-size", type=int, default=STREAM_CHUNK_SIZE)
+    parser.add_argument("--experiments", action="store_true",
+                        help="Recherche parallèle multi-modèles (voir experiments.py), garde le meilleur")
+    args = parser.parse_args()
+
+    if args.experiments:
+        from iot.experiments import run_experiments
+        run_experiments()
+        sys.exit(0)
+    if args.streaming:
+        model, cm = train_streaming(args.estimator, args.chunk_size)
+    else:
+        model, cm = train_and_evaluate()
     
     # Bonus : Générer un graphique de la matrice de confusion si possible
     try:
+        import matplotlib.pyplot as plt
+        import seaborn as sns
         plt.figure(figsize=(6, 5))
         sns.heatmap(cm, annot=True, fmt='d', cmap='Blues', cbar=False)
         plt.xlabel('Prédit')
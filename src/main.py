@@ -1,15 +1,14 @@
+import time
+STARTED = time.perf_counter()  # Mesure du temps de démarrage du menu
+
 import sys
 import os
-import time
 
 # On ajoute le dossier src au path pour que les imports fonctionnent bien
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
-# Import des modules que nous avons créés
-from iot.generate_data import generate_iot_data
-from iot.preprocess import load_and_preprocess_data
-from iot.train_classifier import train_and_evaluate
-from fusion.decision_system import start_fusion_system
+# Les modules du projet (numpy, pandas, sklearn, torch, ultralytics...) ne sont importés
+# qu'au moment où une option en a besoin : le menu s'affiche immédiatement.
 
 def print_header():
     print("\n" + "="*50)
@@ -17,15 +16,20 @@ def print_header():
     print("="*50)
 
 def full_setup():
+    from core import registry
+    from iot.generate_data import generate_iot_data, DEFAULT_SEED
+    from iot.storage import DATASET_PATH, CSV_PATH, save_iot_data
+    from iot.train_classifier import train_and_evaluate
+
     print("\n🔄 [ETAPE 1] INITIALISATION DU SYSTÈME...")
     print("------------------------------------------")
     
     # 1. Génération IoT
     print("1.1 Génération des données capteurs simulées...")
-    df = generate_iot_data(2000)
-    # Sauvegarde gérée dans generate_data, mais on assure le coup ici si besoin
-    os.makedirs("data/iot", exist_ok=True)
-    df.to_csv("data/iot/iot_data.csv", index=False)
+    df = generate_iot_data(2000, seed=DEFAULT_SEED)
+    # Stockage columnar typé (lu par le prétraitement) + CSV lisible pour vérification manuelle
+    save_iot_data(df, DATASET_PATH)
+    df.to_csv(CSV_PATH, index=False)
     print("   -> Données sauvegardées.")
     time.sleep(1)
 
@@ -33,6 +37,7 @@ def full_setup():
     print("\n1.2 Entraînement du modèle de classification...")
     model, cm = train_and_evaluate()
     print("   -> Modèle Random Forest entraîné et sauvegardé.")
+    registry.clear("iot")  # La prochaine démo rechargera le nouveau modèle
     time.sleep(1)
 
     print("\n✅ INITIALISATION TERMINÉE AVEC SUCCÈS.")
@@ -51,13 +56,18 @@ def launch_demo():
         print("❌ Erreur : Vidéo 'surveillance.mp4' introuvable dans data/videos/")
         return
 
-    # Lancement du système de fusion
+    # Lancement du système de fusion (imports lourds au premier lancement seulement,
+    # les modèles restent en mémoire pour les lancements suivants)
+    start = time.perf_counter()
+    from fusion.decision_system import start_fusion_system
+    print(f"⏱️  Modules chargés en {(time.perf_counter() - start) * 1000:.0f} ms")
     try:
         start_fusion_system()
     except KeyboardInterrupt:
         print("\n⏹️ Arrêt du système.")
 
 def main():
+    print(f"⏱️  Démarrage du menu : {(time.perf_counter() - STARTED) * 1000:.0f} ms")
     while True:
         print_header()
         print("1. 🛠️  INSTALLATION COMPLÈTE (Générer Data + Entraîner IA)")
@@ -0,0 +1,139 @@
+import json
+import math
+import os
+import time
+import cv2
+import numpy as np
+
+# Configuration
+PRE_ROLL = 5.0    # Secondes conservées AVANT le déclenchement de l'alerte
+                  # (tampon en RAM : pre_roll x fps x h x w x 3 octets, ≈ 100 Mo pour 5 s en 640x360 à 30 FPS)
+POST_ROLL = 5.0   # Secondes enregistrées APRÈS la fin de l'alerte
+CLIP_CODEC = "mp4v"
+
+class FrameRing:
+    # Tampon circulaire des dernières frames : un seul bloc (n, h, w, 3) alloué au départ,
+    # chaque frame y est recopiée (np.copyto) ; aucune allocation dans la boucle vidéo.
+
+    def __init__(self, capacity, shape):
+        self.frames = np.empty((max(capacity, 1),) + tuple(shape), dtype=np.uint8)
+        self.indices = np.full(len(self.frames), -1, dtype=np.int64)
+        self.capacity = capacity
+        self.head = 0
+        self.count = 0
+
+    def push(self, frame, index):
+        if not self.capacity:
+            return
+        np.copyto(self.frames[self.head], frame)
+        self.indices[self.head] = index
+        self.head = (self.head + 1) % self.capacity
+        self.count = min(self.count + 1, self.capacity)
+
+    def drain(self):
+        # Frames de la plus ancienne à la plus récente, puis tampon vidé
+        start = (self.head - self.count) % max(self.capacity, 1)
+        for k in range(self.count):
+            slot = (start + k) % self.capacity
+            yield self.indices[slot], self.frames[slot]
+        self.count = 0
+
+class ClipRecorder:
+    # Enregistrement déclenché par alerte : hors alerte, les frames ne vont que dans le tampon
+    # de pré-roll ; au front montant, un clip est ouvert avec ce pré-roll, puis toutes les frames
+    # jusqu'à post_roll secondes après la fin de l'alerte (une nouvelle alerte prolonge le clip).
+
+    def __init__(self, output_dir, fps, size, pre_roll=PRE_ROLL, post_roll=POST_ROLL):
+        self.output_dir = output_dir
+        self.fps = fps or 25
+        self.size = size  # (largeur, hauteur), comme cv2.VideoWriter
+        self.ring = FrameRing(math.ceil(pre_roll * self.fps), (size[1], size[0], 3))
+        self.post_frames = math.ceil(post_roll * self.fps)
+        self.out = None
+        self.remaining = 0
+        self.clips = []
+        self.frames_seen = 0
+        self.frames_written = 0
+        self.encode_time = 0.0  # CPU passé dans VideoWriter.write (le coût évité hors clips)
+
+    def push(self, frame, alert, index=None):
+        index = self.frames_seen if index is None else index
+        self.frames_seen += 1
+        if self.out is None:
+            if not alert:
+                self.ring.push(frame, index)
+                return None
+            self._open(index)
+            for ring_index, ring_frame in self.ring.drain():
+                self._write(ring_frame, ring_index)
+        self._write(frame, index)
+        if alert:
+            self.remaining = self.post_frames
+        else:
+            self.remaining -= 1
+            if self.remaining <= 0:
+                self._close()
+        return self.clips[-1]['path'] if self.clips else None
+
+    def _open(self, index):
+        os.makedirs(self.output_dir, exist_ok=True)
+        first = index - self.ring.count
+        path = os.path.join(self.output_dir, f"clip_{len(self.clips) + 1:04d}_f{first:07d}.mp4")
+        self.out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*CLIP_CODEC), self.fps, self.size)
+        self.clips.append({'path': path, 'first_frame': int(first), 'alert_frame': int(index),
+                           'last_frame': int(index), 'frames': 0})
+
+    def _write(self, frame, index):
+        start = time.process_time()
+        self.out.write(frame)
+        self.encode_time += time.process_time() - start
+        clip = self.clips[-1]
+        clip['last_frame'] = int(index)
+        clip['frames'] += 1
+        self.frames_written += 1
+
+    def _close(self):
+        self.out.release()
+        self.out = None
+        clip = self.clips[-1]
+        clip['seconds'] = round(clip['frames'] / self.fps, 2)
+        clip['bytes'] = os.path.getsize(clip['path']) if os.path.exists(clip['path']) else 0
+
+    def close(self):
+        if self.out is not None:
+            self._close()
+        if self.clips:
+            with open(os.path.join(self.output_dir, "clips.json"), "w") as f:
+                json.dump(self.clips, f, indent=2)
+
+    def stats(self):
+        # Économies estimées par rapport à l'enregistrement complet : mêmes coûts par frame,
+        # appliqués aux frames jamais encodées
+        written = max(self.frames_written, 1)
+        disk = sum(clip.get('bytes', 0) for clip in self.clips)
+        return {
+            'clips': len(self.clips),
+            'frames_seen': self.frames_seen,
+            'frames_written': self.frames_written,
+            'written_ratio': self.frames_written / max(self.frames_seen, 1),
+            'disk_bytes': disk,
+            'encode_s': self.encode_time,
+            'disk_saved_bytes_est': disk / written * (self.frames_seen - self.frames_written),
+            'encode_saved_s_est': self.encode_time / written * (self.frames_seen - self.frames_written),
+            'ring_mb': self.ring.frames.nbytes / 1e6,
+        }
+
+    def summary(self):
+        st = self.stats()
+        return (f"🎞️ Clips : {st['clips']} ({st['frames_written']}/{st['frames_seen']} frames encodées, "
+                f"{st['written_ratio']:.0%}) | {st['disk_bytes'] / 1e6:.1f} Mo | "
+                f"économisé ≈ {st['disk_saved_bytes_est'] / 1e6:.1f} Mo, {st['encode_saved_s_est']:.1f} s CPU "
+                f"d'encodage | tampon {st['ring_mb']:.0f} Mo")
+
+def clips_dir(video_path):
+    # results/videos/output.mp4 -> results/videos/output_clips/
+    return os.path.splitext(video_path)[0] + "_clips"
+
+def add_clip_arguments(parser):
+    parser.add_argument("--pre-roll", type=float, default=PRE_ROLL, help="--render clips : secondes avant l'alerte")
+    parser.add_argument("--post-roll", type=float, default=POST_ROLL, help="--render clips : secondes après l'alerte")
@@ -0,0 +1,229 @@
+import os
+import cv2
+import numpy as np
+import torch
+from ultralytics import YOLO
+from ultralytics.engine.results import Results
+
+from core.registry import WARMUP_RUNS, get_detector
+
+# Configuration
+BACKENDS = ["torch", "onnx", "openvino"]
+DEFAULT_WEIGHTS = {
+    'torch': "yolov8n.pt",
+    'onnx': "models/yolov8n.onnx",
+    'openvino': "models/yolov8n_openvino_model",
+}
+IMGSZ = 640
+IOU_THRESHOLD = 0.7      # Seuil NMS (même valeur que ultralytics)
+MAX_DETECTIONS = 300
+PERSON = 0               # Classe COCO "person", la seule utile au système
+TRACKER_CONFIG = "bytetrack.yaml"
+
+# Interface commune : detector(frame, conf=..., classes=0, imgsz=...) -> [Results]
+# et detector.track(frame, persist=True, ...) -> [Results], exactement comme un objet YOLO.
+# Les scripts vision (et vision.roi.detect) fonctionnent donc avec n'importe quel backend :
+# .boxes, .plot() et les IDs de tracking restent disponibles.
+
+def _check_person_only(classes):
+    if classes is not None and list(np.atleast_1d(classes)) != [PERSON]:
+        raise ValueError("❌ Les backends exportés ne gèrent que la classe 0 (person)")
+
+def letterbox(frame, size):
+    # Redimensionnement en gardant le ratio + bandes grises (comme ultralytics)
+    height, width = frame.shape[:2]
+    target_h, target_w = size
+    gain = min(target_h / height, target_w / width)
+    new_w, new_h = int(round(width * gain)), int(round(height * gain))
+    pad_x, pad_y = (target_w - new_w) / 2, (target_h - new_h) / 2
+    if (new_w, new_h) != (width, height):
+        frame = cv2.resize(frame, (new_w, new_h), interpolation=cv2.INTER_LINEAR)
+    top, left = int(round(pad_y - 0.1)), int(round(pad_x - 0.1))
+    bottom, right = target_h - new_h - top, target_w - new_w - left
+    frame = cv2.copyMakeBorder(frame, top, bottom, left, right, cv2.BORDER_CONSTANT, value=(114, 114, 114))
+    return frame, gain, (left, top)
+
+def rect_size(shape, imgsz=IMGSZ, stride=32):
+    # Entrée minimale (comme ultralytics) : côté le plus long = imgsz, l'autre arrondi au multiple
+    # de 32 supérieur. Une frame 16:9 donne 640x384 au lieu de 640x640 : ~40% de pixels en moins.
+    height, width = shape[:2]
+    gain = imgsz / max(height, width)
+    return (int(np.ceil(height * gain / stride) * stride), int(np.ceil(width * gain / stride) * stride))
+
+def to_blob(image):
+    # BGR uint8 HWC -> RGB float32 NCHW normalisé 0-1
+    return cv2.dnn.blobFromImage(image, 1 / 255.0, swapRB=True)
+
+def nms(boxes, scores, iou_threshold=IOU_THRESHOLD, max_det=MAX_DETECTIONS):
+    # NMS glouton en NumPy : indices gardés, par score décroissant
+    x1, y1, x2, y2 = boxes.T
+    areas = (x2 - x1) * (y2 - y1)
+    order = scores.argsort()[::-1]
+    keep = []
+    while order.size and len(keep) < max_det:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        w = np.clip(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0, None)
+        h = np.clip(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0, None)
+        inter = w * h
+        iou = inter / (areas[i] + areas[rest] - inter + 1e-9)
+        order = rest[iou <= iou_threshold]
+    return np.array(keep, dtype=int)
+
+def decode_persons(output, conf):
+    # Sortie YOLOv8 (1, 4 + 80, N) : cx, cy, w, h puis un score par classe.
+    # Une boîte est une personne si son score "person" dépasse conf ET est son meilleur score
+    # (même règle que ultralytics avec classes=0).
+    preds = output[0]
+    person = preds[4]
+    candidates = np.flatnonzero(person > conf)
+    if candidates.size:
+        others = preds[5:, candidates].max(axis=0) if preds.shape[0] > 5 else np.zeros(candidates.size)
+        candidates = candidates[person[candidates] >= others]
+    cx, cy, w, h = preds[:4, candidates]
+    boxes = np.stack([cx - w / 2, cy - h / 2, cx + w / 2, cy + h / 2], axis=1)
+    return boxes, person[candidates]
+
+class UltralyticsDetector:
+    # Backend historique : PyTorch via ultralytics (YOLO + tracker intégré)
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['torch'], threads=None):
+        if threads:
+            torch.set_num_threads(threads)
+        self.name = "torch"
+        self.weights = weights
+        self.model = YOLO(weights)
+
+    def __call__(self, frame, conf=0.25, classes=None, imgsz=None, verbose=False):
+        kwargs = {'imgsz': imgsz} if imgsz else {}
+        return self.model(frame, conf=conf, classes=classes, verbose=verbose, **kwargs)
+
+    def track(self, frame, persist=True, conf=0.25, classes=None, imgsz=None, verbose=False):
+        kwargs = {'imgsz': imgsz} if imgsz else {}
+        return self.model.track(frame, persist=persist, conf=conf, classes=classes, verbose=verbose, **kwargs)
+
+class ExportedDetector:
+    # Base des backends exportés : prétraitement (letterbox), décodage "person" et NMS en NumPy.
+    # Les sous-classes n'implémentent que _run(blob) -> sortie brute du réseau.
+
+    def __init__(self, weights, input_shape, threads=None):
+        self.weights = weights
+        self.threads = threads
+        # Entrée fixe (ex : 640x640) ou dynamique (taille rectangulaire calculée depuis imgsz)
+        self.fixed_size = tuple(input_shape[2:]) if all(isinstance(d, int) for d in input_shape[2:]) else None
+        self.names = {PERSON: "person"}
+        self.tracker = None
+
+    def _size(self, shape, imgsz):
+        if self.fixed_size is not None:
+            return self.fixed_size
+        return rect_size(shape, imgsz or IMGSZ)
+
+    def _run(self, blob):
+        raise NotImplementedError
+
+    def detect_array(self, frame, conf=0.25, imgsz=None):
+        # Détection brute : (boîtes xyxy dans le repère de la frame, scores)
+        image, gain, (left, top) = letterbox(frame, self._size(frame.shape, imgsz))
+        boxes, scores = decode_persons(self._run(to_blob(image)), conf)
+        if len(boxes):
+            keep = nms(boxes, scores)
+            boxes, scores = boxes[keep], scores[keep]
+            boxes -= (left, top, left, top)
+            boxes /= gain
+            boxes[:, [0, 2]] = boxes[:, [0, 2]].clip(0, frame.shape[1])
+            boxes[:, [1, 3]] = boxes[:, [1, 3]].clip(0, frame.shape[0])
+        return boxes.astype(np.float32), scores.astype(np.float32)
+
+    def _results(self, frame, boxes, scores):
+        data = np.hstack([boxes, scores[:, None], np.full((len(boxes), 1), PERSON, dtype=np.float32)])
+        return Results(frame, path="", names=self.names, boxes=torch.from_numpy(data))
+
+    def __call__(self, frame, conf=0.25, classes=None, imgsz=None, verbose=False):
+        _check_person_only(classes)
+        frames = frame if isinstance(frame, list) else [frame]
+        return [self._results(f, *self.detect_array(f, conf, imgsz)) for f in frames]
+
+    def track(self, frame, persist=True, conf=0.25, classes=None, imgsz=None, verbose=False):
+        # Même tracker que ultralytics (ByteTrack), alimenté par nos détections
+        from ultralytics.trackers.byte_tracker import BYTETracker
+        from ultralytics.utils import YAML, IterableSimpleNamespace
+        from ultralytics.utils.checks import check_yaml
+
+        if self.tracker is None or not persist:
+            self.tracker = BYTETracker(IterableSimpleNamespace(**YAML.load(check_yaml(TRACKER_CONFIG))))
+        result = self(frame, conf, classes, imgsz)[0]
+        tracks = self.tracker.update(result.boxes.cpu().numpy(), frame)
+        if len(tracks) == 0:
+            return [result[:0]]
+        result = result[tracks[:, -1].astype(int)]
+        result.update(boxes=torch.as_tensor(tracks[:, :-1], dtype=torch.float32))
+        return [result]
+
+class OnnxDetector(ExportedDetector):
+    # ONNX Runtime sur CPU (modèle FP32 ou INT8 quantifié par export_detector.py)
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['onnx'], threads=None):
+        try:
+            import onnxruntime as ort
+        except ImportError:
+            raise ImportError("❌ Le backend onnx nécessite onnxruntime (pip install onnxruntime)")
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(weights, options, providers=["CPUExecutionProvider"])
+        self.input_name = self.session.get_inputs()[0].name
+        super().__init__(weights, self.session.get_inputs()[0].shape, threads)
+        self.name = "onnx"
+
+    def _run(self, blob):
+        return self.session.run(None, {self.input_name: blob})[0]
+
+class OpenVinoDetector(ExportedDetector):
+    # OpenVINO sur CPU (dossier exporté par ultralytics, contenant le .xml et le .bin)
+
+    def __init__(self, weights=DEFAULT_WEIGHTS['openvino'], threads=None):
+        try:
+            import openvino as ov
+        except ImportError:
+            raise ImportError("❌ Le backend openvino nécessite openvino (pip install openvino)")
+        if os.path.isdir(weights):
+            weights = next(os.path.join(weights, f) for f in sorted(os.listdir(weights)) if f.endswith(".xml"))
+        core = ov.Core()
+        model = core.read_model(weights)
+        config = {'PERFORMANCE_HINT': "LATENCY"}
+        if threads:
+            config['INFERENCE_NUM_THREADS'] = threads
+        self.compiled = core.compile_model(model, "CPU", config)
+        shape = model.inputs[0].get_partial_shape()
+        dims = [d.get_length() if d.is_static else None for d in shape]
+        super().__init__(weights, dims, threads)
+        self.request = self.compiled.create_infer_request()
+        self.name = "openvino"
+
+    def _run(self, blob):
+        return self.request.infer({0: blob})[self.compiled.outputs[0]]
+
+DETECTORS = {'torch': UltralyticsDetector, 'onnx': OnnxDetector, 'openvino': OpenVinoDetector}
+
+def load_detector(backend="torch", weights=None, threads=None):
+    if backend not in DETECTORS:
+        raise ValueError(f"❌ Backend inconnu : {backend} ({', '.join(BACKENDS)})")
+    weights = weights or DEFAULT_WEIGHTS[backend]
+    if backend != "torch" and not os.path.exists(weights):
+        raise FileNotFoundError(f"❌ Modèle exporté introuvable : {weights}. Lancez d'abord src/vision/export_detector.py")
+    print(f"🚀 Détecteur : {backend} ({weights}{f', {threads} threads' if threads else ''})")
+    return DETECTORS[backend](weights, threads)
+
+def add_detector_arguments(parser):
+    parser.add_argument("--backend", choices=BACKENDS, default="torch", help="Moteur d'inférence du détecteur")
+    parser.add_argument("--weights", default=None, help="Modèle (.pt, .onnx ou dossier OpenVINO)")
+    parser.add_argument("--threads", type=int, default=None, help="Threads CPU pour l'inférence")
+    parser.add_argument("--warmup", type=int, default=WARMUP_RUNS, help="Inférences de chauffe après chargement")
+
+def detector_from_arguments(args):
+    # Passe par le registre : un seul chargement par processus, suivi du warm-up
+    return get_detector(args.backend, args.weights, args.threads, warmup_runs=args.warmup)
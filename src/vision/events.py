@@ -0,0 +1,156 @@
+import json
+import os
+import cv2
+import numpy as np
+
+from vision.clip_recorder import POST_ROLL, PRE_ROLL, ClipRecorder, clips_dir
+from vision.pipeline import StopPipeline
+
+# Configuration
+RENDER_FULL = "full"      # Toutes les frames annotées sont encodées (comportement historique)
+RENDER_ALERTS = "alerts"  # Seules les frames en alerte sont encodées
+RENDER_NONE = "none"      # Aucune vidéo : uniquement les événements structurés
+RENDER_CLIPS = "clips"    # Un clip par alerte, avec pré-roll et post-roll (vision.clip_recorder)
+RENDER_MODES = [RENDER_FULL, RENDER_ALERTS, RENDER_NONE, RENDER_CLIPS]
+PARQUET_BATCH = 10_000    # Événements bufferisés avant chaque écriture Parquet
+
+def boxes_to_list(boxes, scores=None, ids=None):
+    # Tableau (n, 4) xyxy (+ scores, + IDs de tracking) -> liste JSON compacte
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+    out = []
+    for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+        item = [round(x1, 1), round(y1, 1), round(x2, 1), round(y2, 1)]
+        if scores is not None:
+            item.append(round(float(scores[i]), 3))
+        if ids is not None:
+            item.append(int(ids[i]))
+        out.append(item)
+    return out
+
+class EventWriter:
+    # Journal d'événements par frame : .jsonl (une ligne JSON par frame) ou .parquet (pyarrow requis)
+
+    def __init__(self, path):
+        self.path = path
+        self.count = 0
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.parquet = path.endswith(".parquet")
+        if self.parquet:
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError:
+                raise ImportError("❌ Le format Parquet nécessite pyarrow (pip install pyarrow), utilisez .jsonl sinon.")
+            self._buffer = []
+            self._writer = None
+        else:
+            self._file = open(path, "w")
+
+    def write(self, event):
+        self.count += 1
+        if not self.parquet:
+            self._file.write(json.dumps(event, separators=(",", ":")) + "\n")
+            return
+        # Les listes imbriquées sont sérialisées en JSON pour garder un schéma Parquet stable
+        self._buffer.append({k: json.dumps(v) if isinstance(v, (list, dict)) else v for k, v in event.items()})
+        if len(self._buffer) >= PARQUET_BATCH:
+            self._flush_parquet()
+
+    def _flush_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        if not self._buffer:
+            return
+        table = pa.Table.from_pylist(self._buffer)
+        if self._writer is None:
+            self._writer = pq.ParquetWriter(self.path, table.schema)
+        self._writer.write_table(table.cast(self._writer.schema))
+        self._buffer = []
+
+    def close(self):
+        if self.parquet:
+            self._flush_parquet()
+            if self._writer is not None:
+                self._writer.close()
+        else:
+            self._file.close()
+
+class OutputSink:
+    # Étape finale commune à tous les scripts vision :
+    # fenêtre (sauf headless) + vidéo (selon le mode de rendu) + journal d'événements.
+
+    def __init__(self, video_path, fps, size, window=None, headless=False, render=RENDER_FULL, events_path=None,
+                 pre_roll=PRE_ROLL, post_roll=POST_ROLL):
+        if render not in RENDER_MODES:
+            raise ValueError(f"❌ Mode de rendu inconnu : {render} ({', '.join(RENDER_MODES)})")
+        self.video_path = video_path
+        self.fps = fps
+        self.size = size
+        self.window = None if headless else window
+        self.render = render
+        self.out = None
+        self.frames_written = 0
+        self.events = EventWriter(events_path) if events_path else None
+        self.clips = (ClipRecorder(clips_dir(video_path), fps, size, pre_roll, post_roll)
+                      if render == RENDER_CLIPS else None)
+
+    def needs_drawing(self, alert):
+        # Inutile d'annoter une frame que personne ne verra (en mode clips, toute frame peut finir en pré-roll)
+        return (self.window is not None or self.render in (RENDER_FULL, RENDER_CLIPS)
+                or (self.render == RENDER_ALERTS and alert))
+
+    def _writer(self):
+        # Ouverture paresseuse : en mode "alerts", aucun fichier si aucune alerte
+        if self.out is None:
+            os.makedirs(os.path.dirname(self.video_path) or ".", exist_ok=True)
+            self.out = cv2.VideoWriter(self.video_path, cv2.VideoWriter_fourcc(*'mp4v'), self.fps, self.size)
+        return self.out
+
+    def emit(self, frame, event, alert):
+        if self.events is not None:
+            self.events.write(event)
+
+        if self.render == RENDER_FULL or (self.render == RENDER_ALERTS and alert):
+            self._writer().write(frame)
+            self.frames_written += 1
+        elif self.clips is not None:
+            self.clips.push(frame, alert, event.get('frame') if event else None)
+
+        if self.window is not None:
+            cv2.imshow(self.window, frame)
+            if cv2.waitKey(1) & 0xFF == ord('q'):
+                raise StopPipeline()
+
+    def close(self):
+        if self.out is not None:
+            self.out.release()
+        if self.clips is not None:
+            self.clips.close()
+        if self.events is not None:
+            self.events.close()
+        if self.window is not None:
+            cv2.destroyAllWindows()
+
+    def summary(self):
+        parts = []
+        if self.frames_written:
+            parts.append(f"vidéo ({self.frames_written} frames) : {self.video_path}")
+        if self.clips is not None and self.clips.clips:
+            parts.append(f"clips ({len(self.clips.clips)}) : {self.clips.output_dir}")
+        if self.events is not None:
+            parts.append(f"événements ({self.events.count}) : {self.events.path}")
+        return " | ".join(parts) if parts else "aucune sortie"
+
+def add_output_arguments(parser, default_events):
+    # Options CLI communes aux scripts vision et à la fusion
+    parser.add_argument("--headless", action="store_true",
+                        help="Aucune fenêtre (serveur sans écran). Par défaut : --render none + événements JSONL")
+    parser.add_argument("--render", choices=RENDER_MODES, default=None,
+                        help="Vidéo annotée : full (tout), alerts (segments d'alerte), clips (un fichier par alerte, "
+                             "avec pré/post-roll), none")
+    parser.add_argument("--events", default=None, help=f"Journal d'événements .jsonl ou .parquet (ex : {default_events})")
+
+def resolve_output_arguments(args, default_events):
+    # En headless, on veut balayer des heures d'archives à la vitesse du décodage
+    render = args.render or (RENDER_NONE if args.headless else RENDER_FULL)
+    events = args.events or (default_events if args.headless else None)
+    return render, events
@@ -0,0 +1,113 @@
+import argparse
+import os
+import shutil
+import sys
+import cv2
+from ultralytics import YOLO
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from vision.detectors import DEFAULT_WEIGHTS, IMGSZ, letterbox, rect_size, to_blob
+
+# Configuration
+MODELS_DIR = "models"
+CALIBRATION_VIDEO = "data/videos/surveillance.mp4"
+CALIBRATION_FRAMES = 100   # Frames de la vraie scène utilisées pour calibrer l'INT8
+
+def calibration_blobs(video_path, imgsz, dynamic, n_frames=CALIBRATION_FRAMES):
+    # Frames réparties sur toute la vidéo, prétraitées exactement comme à l'inférence
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise FileNotFoundError(f"❌ Vidéo de calibration introuvable : {video_path}")
+    total = int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) or n_frames
+    step = max(total // n_frames, 1)
+    blobs = []
+    index = 0
+    while len(blobs) < n_frames:
+        success, frame = cap.read()
+        if not success:
+            break
+        if index % step == 0:
+            size = rect_size(frame.shape, imgsz) if dynamic else (imgsz, imgsz)
+            blobs.append(to_blob(letterbox(frame, size)[0]))
+        index += 1
+    cap.release()
+    print(f"🎯 Calibration INT8 sur {len(blobs)} frames de {video_path}")
+    return blobs
+
+def quantize_onnx(fp32_path, int8_path, blobs):
+    # Quantification statique QDQ (poids ET activations en INT8), par canal pour les convolutions
+    from onnxruntime.quantization import CalibrationDataReader, QuantFormat, QuantType, quantize_static
+    from onnxruntime.quantization.shape_inference import quant_pre_process
+
+    class FrameReader(CalibrationDataReader):
+        def __init__(self, input_name):
+            self.items = iter([{input_name: blob} for blob in blobs])
+
+        def get_next(self):
+            return next(self.items, None)
+
+    import onnxruntime as ort
+    input_name = ort.InferenceSession(fp32_path, providers=["CPUExecutionProvider"]).get_inputs()[0].name
+
+    # Inférence de formes + fusions préalables, recommandées avant la quantification
+    prepared = int8_path.replace(".onnx", "_prep.onnx")
+    quant_pre_process(fp32_path, prepared, skip_symbolic_shape=True)
+    try:
+        quantize_static(prepared, int8_path, FrameReader(input_name), quant_format=QuantFormat.QDQ,
+                        per_channel=True, activation_type=QuantType.QUInt8, weight_type=QuantType.QInt8)
+    finally:
+        os.remove(prepared)
+
+def quantize_openvino(xml_path, int8_dir, blobs):
+    # Quantification post-entraînement NNCF (pip install nncf)
+    try:
+        import nncf
+    except ImportError:
+        raise ImportError("❌ L'INT8 OpenVINO nécessite nncf (pip install nncf)")
+    import openvino as ov
+    model = ov.Core().read_model(xml_path)
+    quantized = nncf.quantize(model, nncf.Dataset(blobs), subset_size=len(blobs))
+    os.makedirs(int8_dir, exist_ok=True)
+    ov.save_model(quantized, os.path.join(int8_dir, os.path.basename(xml_path)))
+    return int8_dir
+
+def export_detector(fmt="onnx", weights=DEFAULT_WEIGHTS['torch'], imgsz=IMGSZ, int8=False,
+                    calibration_video=CALIBRATION_VIDEO, output_dir=MODELS_DIR, dynamic=True):
+    print(f"📦 Export de {weights} -> {fmt} ({imgsz}x{imgsz}{', INT8' if int8 else ''})")
+    os.makedirs(output_dir, exist_ok=True)
+    stem = os.path.splitext(os.path.basename(weights))[0]
+
+    # Export FP32 par ultralytics. dynamic=True : hauteur/largeur libres, le détecteur envoie
+    # une entrée rectangulaire (moins de pixels) ; dynamic=False : entrée fixe imgsz x imgsz
+    exported = YOLO(weights).export(format=fmt, imgsz=imgsz, dynamic=dynamic, verbose=False)
+    target = os.path.join(output_dir, os.path.basename(exported.rstrip("/")))
+    if os.path.abspath(exported) != os.path.abspath(target):
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        shutil.move(exported, target)
+    print(f"✅ Modèle FP32 : {target}")
+    if not int8:
+        return target
+
+    blobs = calibration_blobs(calibration_video, imgsz, dynamic)
+    if fmt == "onnx":
+        int8_path = os.path.join(output_dir, f"{stem}_int8.onnx")
+        quantize_onnx(target, int8_path, blobs)
+    else:
+        xml = next(os.path.join(target, f) for f in os.listdir(target) if f.endswith(".xml"))
+        int8_path = quantize_openvino(xml, os.path.join(output_dir, f"{stem}_int8_openvino_model"), blobs)
+    print(f"✅ Modèle INT8 : {int8_path}")
+    return int8_path
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export du détecteur de personnes pour l'inférence CPU")
+    parser.add_argument("--format", choices=["onnx", "openvino"], default="onnx")
+    parser.add_argument("--weights", default=DEFAULT_WEIGHTS['torch'])
+    parser.add_argument("--imgsz", type=int, default=IMGSZ)
+    parser.add_argument("--int8", action="store_true", help="Quantification INT8 calibrée sur la vidéo")
+    parser.add_argument("--calibration-video", default=CALIBRATION_VIDEO)
+    parser.add_argument("--output-dir", default=MODELS_DIR)
+    parser.add_argument("--static", action="store_true", help="Entrée fixe imgsz x imgsz (certains accélérateurs)")
+    args = parser.parse_args()
+    export_detector(args.format, args.weights, args.imgsz, args.int8, args.calibration_video, args.output_dir,
+                    dynamic=not args.static)
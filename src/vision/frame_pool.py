@@ -0,0 +1,114 @@
+import threading
+import cv2
+import numpy as np
+
+from vision.pipeline import QUEUE_SIZE
+
+# Configuration
+POOL_SLACK = 2              # Tampons en plus de la capacité du pipeline (marge décodage / sortie)
+BOX_COLOR = (56, 56, 255)   # Cadres des personnes (BGR)
+LABEL_COLOR = (255, 255, 255)
+
+# Capture et annotation sans copie :
+# - FramePool : N tampons (h, w, 3) alloués d'un bloc au démarrage ; cap.read(image=tampon)
+#   décode directement dedans au lieu d'allouer une frame neuve à chaque lecture. Un tampon
+#   retourne dans la réserve quand sa frame sort du pipeline (encodée, filtrée ou jetée par
+#   une file pleine). Réserve vide (frames retenues plus longtemps que prévu) : on retombe sur
+#   une frame allouée normalement, comptée dans "misses" ; jamais d'attente, jamais de tampon
+#   réécrit pendant qu'une étape l'utilise encore.
+# - draw_detections : cadres et étiquettes dessinés DANS la frame, à la place de
+#   results[0].plot() qui copie l'image entière (deepcopy) avant de dessiner.
+
+class FramePool:
+
+    def __init__(self, shape, size):
+        self.shape = tuple(shape)
+        self.size = size
+        self.block = np.empty((size,) + self.shape, dtype=np.uint8)
+        self.buffers = list(self.block)  # Vues sur le bloc, aucune copie
+        self.free = list(range(size - 1, -1, -1))
+        self._lock = threading.Lock()  # acquire() dans le thread de décodage, release() dans celui d'encodage
+        self.reads = 0
+        self.misses = 0
+        self.reallocated = 0
+        self.in_use_max = 0
+
+    @classmethod
+    def for_capture(cls, cap, size):
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        return cls((height, width, 3), size)
+
+    def acquire(self):
+        with self._lock:
+            if not self.free:
+                self.misses += 1
+                return None
+            slot = self.free.pop()
+            self.in_use_max = max(self.in_use_max, self.size - len(self.free))
+            return slot
+
+    def release(self, slot):
+        if slot is not None:
+            with self._lock:
+                self.free.append(slot)
+
+    def read(self, cap):
+        # (ok, frame, slot) ; slot None = frame hors réserve (réserve vide ou taille inattendue)
+        slot = self.acquire()
+        if slot is None:
+            ok, frame = cap.read()
+        else:
+            ok, frame = cap.read(image=self.buffers[slot])
+        if not ok:
+            self.release(slot)
+            return False, None, None
+        self.reads += 1
+        if slot is not None and frame is not self.buffers[slot]:
+            # Résolution différente de celle annoncée : OpenCV a alloué sa propre frame
+            self.release(slot)
+            self.reallocated += 1
+            slot = None
+        return True, frame, slot
+
+    def recycle(self, packet):
+        # Appelé par le pipeline quand un FramePacket en sort, quelle qu'en soit la raison
+        slot, packet.slot = packet.slot, None  # Jamais rendu deux fois
+        self.release(slot)
+
+    def nbytes(self):
+        return self.block.nbytes
+
+    def summary(self):
+        hit = 1.0 - self.misses / self.reads if self.reads else 0.0
+        return (f"🧺 Réserve de frames : {self.size} tampons ({self.nbytes() / 1e6:.1f} Mo), {self.reads} lectures, "
+                f"{hit * 100:.1f}% sans allocation | max {self.in_use_max} en vol | hors réserve "
+                f"{self.misses + self.reallocated}")
+
+def pool_size(n_stages, queue_size=QUEUE_SIZE, threaded=True):
+    # Frames en vol au maximum : une file pleine par étape + une frame en cours par étape + le décodage.
+    # En séquentiel, une frame est rendue avant la lecture de la suivante.
+    if not threaded:
+        return POOL_SLACK
+    return n_stages * (queue_size + 1) + POOL_SLACK
+
+def draw_detections(frame, boxes, scores=None, ids=None, color=BOX_COLOR, label="person"):
+    # Équivalent de results[0].plot(img=frame) pour des personnes, dessiné en place
+    boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).astype(int)
+    for i, (x1, y1, x2, y2) in enumerate(boxes.tolist()):
+        cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+        text = label
+        if ids is not None:
+            text = f"id:{int(ids[i])} {text}"
+        if scores is not None:
+            text = f"{text} {float(scores[i]):.2f}"
+        (tw, th), _ = cv2.getTextSize(text, cv2.FONT_HERSHEY_SIMPLEX, 0.5, 1)
+        top = max(y1 - th - 6, 0)
+        cv2.rectangle(frame, (x1, top), (x1 + tw + 4, top + th + 6), color, -1)
+        cv2.putText(frame, text, (x1 + 2, top + th + 2), cv2.FONT_HERSHEY_SIMPLEX, 0.5, LABEL_COLOR, 1,
+                    cv2.LINE_AA)
+    return frame
+
+def add_pool_arguments(parser):
+    parser.add_argument("--no-frame-pool", dest="frame_pool", action="store_false",
+                        help="Une frame allouée par lecture (sans réserve de tampons), pour comparer")
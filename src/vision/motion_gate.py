@@ -0,0 +1,94 @@
+import cv2
+import numpy as np
+
+# Configuration
+GATE_WIDTH = 160          # Largeur de l'image réduite utilisée pour détecter le mouvement
+PIXEL_DELTA = 25          # Écart de niveau de gris (0-255) pour qu'un pixel soit "changé"
+CHANGE_RATIO = 0.005      # Part de pixels changés au-delà de laquelle on relance YOLO
+MAX_INTERVAL = 15         # Détection forcée au moins toutes les N frames
+METHODS = ["diff", "mog2"]
+
+class MotionGate:
+    # Ordonnanceur placé devant le détecteur : YOLO ne tourne que si la scène a changé.
+    # method="diff" : différence avec la frame précédente (très peu coûteux)
+    # method="mog2" : soustraction de fond (plus robuste au bruit, un peu plus cher)
+
+    def __init__(self, method="diff", width=GATE_WIDTH, pixel_delta=PIXEL_DELTA,
+                 change_ratio=CHANGE_RATIO, max_interval=MAX_INTERVAL):
+        if method not in METHODS:
+            raise ValueError(f"❌ Méthode inconnue : {method} ({', '.join(METHODS)})")
+        self.method = method
+        self.width = width
+        self.pixel_delta = pixel_delta
+        self.change_ratio = change_ratio
+        self.max_interval = max_interval
+        self.previous = None
+        self.since_detection = 0
+        self.frames = 0
+        self.inferences = 0
+        self.last_change = 0.0
+        self.subtractor = (cv2.createBackgroundSubtractorMOG2(history=200, varThreshold=32, detectShadows=False)
+                           if method == "mog2" else None)
+
+    def _small(self, frame):
+        height, width = frame.shape[:2]
+        size = (self.width, max(1, int(height * self.width / width)))
+        gray = cv2.cvtColor(cv2.resize(frame, size, interpolation=cv2.INTER_AREA), cv2.COLOR_BGR2GRAY)
+        return cv2.GaussianBlur(gray, (5, 5), 0)
+
+    def change(self, frame):
+        # Part de pixels qui ont changé (0.0 - 1.0)
+        small = self._small(frame)
+        if self.subtractor is not None:
+            mask = self.subtractor.apply(small)
+            ratio = np.count_nonzero(mask) / mask.size
+        elif self.previous is None:
+            ratio = 1.0
+        else:
+            ratio = np.count_nonzero(cv2.absdiff(small, self.previous) > self.pixel_delta) / small.size
+        self.previous = small
+        return ratio
+
+    def should_detect(self, frame):
+        # À appeler sur CHAQUE frame (la référence de mouvement est mise à jour à chaque fois)
+        self.frames += 1
+        self.last_change = self.change(frame)
+        self.since_detection += 1
+        if self.frames == 1 or self.last_change >= self.change_ratio or self.since_detection >= self.max_interval:
+            self.since_detection = 0
+            self.inferences += 1
+            return True
+        return False
+
+    def saved_ratio(self):
+        return 1.0 - self.inferences / self.frames if self.frames else 0.0
+
+    def summary(self):
+        return (f"🎯 Motion gate ({self.method}) : {self.inferences}/{self.frames} inférences, "
+                f"{self.saved_ratio() * 100:.1f}% économisées")
+
+def gated_stage(infer, gate):
+    # Enveloppe une étape "infer" : sur les frames sautées, on réutilise les dernières détections
+    if gate is None:
+        return infer
+    last = {'detections': None}
+
+    def stage(packet):
+        run = gate.should_detect(packet.frame)
+        if run or last['detections'] is None:
+            packet = infer(packet)
+            last['detections'] = packet.detections
+        else:
+            packet.detections = last['detections']
+        return packet
+
+    return stage
+
+def add_gate_arguments(parser):
+    parser.add_argument("--motion-gate", choices=METHODS, default=None,
+                        help="Ne lancer YOLO que si la scène change (diff ou mog2)")
+    parser.add_argument("--max-interval", type=int, default=MAX_INTERVAL,
+                        help="Détection forcée au moins toutes les N frames")
+
+def gate_from_arguments(args):
+    return MotionGate(args.motion_gate, max_interval=args.max_interval) if args.motion_gate else None
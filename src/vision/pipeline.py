@@ -0,0 +1,288 @@
+import queue
+import threading
+import time
+
+from core import profiling
+
+# Configuration
+QUEUE_SIZE = 8           # Frames en attente max entre deux étapes
+BLOCK = "block"          # File pleine : l'étape amont attend (aucune frame perdue)
+DROP_OLDEST = "drop_oldest"  # File pleine : on jette la plus vieille frame (temps réel)
+
+# Pipeline vidéo générique : décodage -> inférence -> post-traitement/dessin -> encodage.
+# Chaque étape tourne dans son propre thread, reliée à la suivante par une file bornée.
+# OpenCV et PyTorch relâchent le GIL pendant leurs calculs : pendant que YOLO travaille
+# sur la frame N, la frame N+1 est décodée et la frame N-1 encodée. Le débit tend ainsi
+# vers celui de l'étape la plus lente au lieu de la somme de toutes les étapes.
+
+_END = object()  # Marqueur de fin de flux, jamais jeté
+
+def _keep(item):
+    pass  # recycle par défaut : rien à rendre
+
+class StopPipeline(Exception):
+    # Une étape lève cette exception pour arrêter proprement tout le pipeline (ex : touche 'q')
+    pass
+
+class FramePacket:
+    # Ce qui circule d'une étape à l'autre
+    __slots__ = ("index", "captured_at", "frame", "detections", "info", "slot")
+
+    def __init__(self, index, frame, captured_at=None, slot=None):
+        self.index = index
+        self.frame = frame
+        self.slot = slot  # Tampon de vision.frame_pool.FramePool, rendu quand la frame sort du pipeline
+        self.captured_at = time.perf_counter() if captured_at is None else captured_at
+        self.detections = None
+        self.info = {}
+
+def video_source(cap, pool=None):
+    # Étape de décodage : transforme un cv2.VideoCapture en flux de FramePacket
+    # pool : vision.frame_pool.FramePool, décodage dans des tampons réutilisés (Pipeline(recycle=pool.recycle))
+    index = 0
+    while cap.isOpened():
+        if pool is None:
+            success, frame = cap.read()
+            slot = None
+        else:
+            success, frame, slot = pool.read(cap)
+        if not success:
+            break
+        yield FramePacket(index, frame, slot=slot)
+        index += 1
+
+class BoundedQueue:
+    def __init__(self, maxsize=QUEUE_SIZE, policy=BLOCK, on_drop=None):
+        if policy not in (BLOCK, DROP_OLDEST):
+            raise ValueError(f"❌ Politique inconnue : {policy} ({BLOCK} ou {DROP_OLDEST})")
+        self._queue = queue.Queue(maxsize=maxsize)
+        self.policy = policy
+        self.on_drop = on_drop  # Élément jeté : rendu à son propriétaire (ex : tampon de frame)
+        self.dropped = 0
+        self.max_depth = 0
+
+    def put(self, item):
+        if item is _END or self.policy == BLOCK:
+            self._queue.put(item)
+        else:
+            while True:
+                try:
+                    self._queue.put_nowait(item)
+                    break
+                except queue.Full:
+                    try:
+                        old = self._queue.get_nowait()
+                    except queue.Empty:
+                        continue
+                    if old is _END:  # Ne jamais perdre la fin de flux
+                        self._queue.put(old)
+                        return
+                    self.dropped += 1
+                    if self.on_drop is not None:
+                        self.on_drop(old)
+        self.max_depth = max(self.max_depth, self._queue.qsize())
+
+    def get(self):
+        return self._queue.get()
+
+    def depth(self):
+        return self._queue.qsize()
+
+class StageTimer:
+    # Chronométrage d'une étape : nombre d'éléments, temps actif total et pire cas
+    __slots__ = ("name", "items", "busy", "worst", "histogram")
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.busy = 0.0
+        self.worst = 0.0
+        self.histogram = None  # core.metrics.Histogram, branché par Pipeline.attach_metrics
+
+    def record(self, seconds):
+        profiling.record(self.name, seconds)  # Percentiles si IAIS_PROFILE=1 (sinon un simple test)
+        if self.histogram is not None:
+            self.histogram.observe(seconds)
+        self.items += 1
+        self.busy += seconds
+        if seconds > self.worst:
+            self.worst = seconds
+
+    def as_dict(self, wall):
+        return {
+            'items': self.items,
+            'mean_ms': self.busy / self.items * 1000 if self.items else 0.0,
+            'max_ms': self.worst * 1000,
+            'busy_ratio': self.busy / wall if wall > 0 else 0.0,
+        }
+
+class Pipeline:
+    # source : itérable (le décodage, exécuté dans son propre thread)
+    # stages : liste de (nom, fonction). Une fonction reçoit un élément et renvoie l'élément
+    #          pour l'étape suivante (None = élément filtré). La DERNIÈRE étape tourne dans
+    #          le thread appelant (cv2.imshow doit rester dans le thread principal).
+    # threaded=False : même code exécuté en séquentiel, utile pour comparer / déboguer.
+    # started_at : instant de lancement du script (avant chargement des modèles), pour mesurer
+    #              la latence jusqu'à la première frame sortie ; par défaut le début de run().
+    # recycle : appelé une fois pour chaque élément qui quitte le pipeline (sorti de la dernière
+    #           étape, filtré, en échec ou jeté par une file) ; ex : FramePool.recycle
+
+    def __init__(self, source, stages, queue_size=QUEUE_SIZE, drop_policy=BLOCK, threaded=True, started_at=None,
+                 recycle=None):
+        self.source = source
+        self.stages = list(stages)
+        self.threaded = threaded
+        self.recycle = recycle or _keep
+        self.timers = [StageTimer("decode")] + [StageTimer(name) for name, _ in self.stages]
+        self.queues = [BoundedQueue(queue_size, drop_policy, recycle) for _ in self.stages]
+        self._stop = threading.Event()
+        self._error = None
+        self.wall = 0.0
+        self.started_at = started_at
+        self.first_output = None
+
+    def stop(self):
+        self._stop.set()
+
+    def attach_metrics(self, metrics):
+        # Latence de chaque étape (decode, infer, ..., encode) + profondeur et pertes des files
+        for timer in self.timers:
+            timer.histogram = metrics.histogram("stage_seconds", "Durée de traitement par étape", {'stage': timer.name})
+        for timer, q in zip(self.timers, self.queues):
+            metrics.gauge("queue_depth", "Éléments en attente en sortie d'étape", {'stage': timer.name}, fn=q.depth)
+            metrics.counter("queue_dropped", "Éléments jetés, file pleine", {'stage': timer.name},
+                            fn=lambda q=q: q.dropped)
+
+    def _fail(self, exc):
+        if self._error is None:
+            self._error = exc
+        self._stop.set()
+
+    def _call(self, timer, fn, item):
+        start = time.perf_counter()
+        try:
+            result = fn(item)
+        except StopPipeline:
+            self._stop.set()
+            return None
+        except Exception as exc:
+            self._fail(exc)
+            return None
+        end = time.perf_counter()
+        timer.record(end - start)
+        if self.first_output is None and timer is self.timers[-1]:
+            self.first_output = end
+        return result
+
+    def _decode_worker(self):
+        timer, outbox = self.timers[0], self.queues[0]
+        iterator = iter(self.source)
+        try:
+            while not self._stop.is_set():
+                start = time.perf_counter()
+                try:
+                    item = next(iterator)
+                except StopIteration:
+                    break
+                timer.record(time.perf_counter() - start)
+                outbox.put(item)
+        except Exception as exc:
+            self._fail(exc)
+        finally:
+            outbox.put(_END)
+
+    def _stage_worker(self, position):
+        _, fn = self.stages[position]
+        timer, inbox, outbox = self.timers[position + 1], self.queues[position], self.queues[position + 1]
+        while True:
+            item = inbox.get()
+            if item is _END:
+                outbox.put(_END)
+                return
+            if self._stop.is_set():
+                self.recycle(item)
+                continue  # On vide la file pour débloquer l'amont
+            result = self._call(timer, fn, item)
+            if result is not None:
+                outbox.put(result)
+            else:
+                self.recycle(item)
+
+    def _run_sequential(self):
+        iterator = iter(self.source)
+        while not self._stop.is_set():
+            start = time.perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                break
+            self.timers[0].record(time.perf_counter() - start)
+            packet = item
+            for position, (_, fn) in enumerate(self.stages):
+                item = self._call(self.timers[position + 1], fn, item)
+                if item is None:
+                    break
+            self.recycle(packet)
+
+    def _run_threaded(self):
+        workers = [threading.Thread(target=self._decode_worker, daemon=True)]
+        workers += [threading.Thread(target=self._stage_worker, args=(i,), daemon=True)
+                    for i in range(len(self.stages) - 1)]
+        for worker in workers:
+            worker.start()
+
+        # Dernière étape dans le thread appelant
+        _, fn = self.stages[-1]
+        timer, inbox = self.timers[-1], self.queues[-1]
+        while True:
+            item = inbox.get()
+            if item is _END:
+                break
+            if not self._stop.is_set():
+                self._call(timer, fn, item)
+            self.recycle(item)
+
+        for worker in workers:
+            worker.join()
+
+    def run(self):
+        start = time.perf_counter()
+        if self.started_at is None:
+            self.started_at = start
+        try:
+            if self.threaded and len(self.stages) > 0:
+                self._run_threaded()
+            else:
+                self._run_sequential()
+        except KeyboardInterrupt:
+            self._stop.set()
+            raise
+        finally:
+            self.wall = time.perf_counter() - start
+        if self._error is not None:
+            raise self._error
+        return self.stats()
+
+    def stats(self):
+        report = {'wall_s': self.wall, 'fps': self.timers[-1].items / self.wall if self.wall > 0 else 0.0, 'stages': {}}
+        if self.first_output is not None:
+            report['first_frame_ms'] = (self.first_output - self.started_at) * 1000
+        for i, timer in enumerate(self.timers):
+            entry = timer.as_dict(self.wall)
+            if self.threaded and i < len(self.queues):
+                entry['queue_dropped'] = self.queues[i].dropped
+                entry['queue_max_depth'] = self.queues[i].max_depth
+                entry['queue_depth'] = self.queues[i].depth()
+            report['stages'][timer.name] = entry
+        return report
+
+def print_stats(stats):
+    print(f"📊 Pipeline : {stats['fps']:.1f} FPS sur {stats['wall_s']:.1f} s")
+    if 'first_frame_ms' in stats:
+        print(f"   🚦 Première frame traitée {stats['first_frame_ms']:.0f} ms après le lancement")
+    for name, st in stats['stages'].items():
+        queue_info = ""
+        if 'queue_dropped' in st:
+            queue_info = f" | file max {st['queue_max_depth']} | jetées {st['queue_dropped']}"
+        print(f"   ⏱️  {name:<8} {st['items']:6d} él. | moy {st['mean_ms']:7.2f} ms | max {st['max_ms']:7.2f} ms | "
+              f"occupation {st['busy_ratio'] * 100:5.1f}%{queue_info}")
@@ -0,0 +1,61 @@
+import numpy as np
+
+# Configuration
+ROI_MARGIN = 32   # Marge (pixels) autour des zones : une personne à cheval sur le bord reste entière
+IMGSZ = 640       # Taille d'entrée YOLO par défaut (côté le plus long après letterbox)
+
+class RoiCropper:
+    # Inférence limitée au rectangle englobant de toutes les zones (+ marge) :
+    # YOLO ne voit que la partie utile de l'image. Avec une zone "moitié basse", le crop
+    # est deux fois moins haut : à imgsz égal, chaque personne y est donc plus grande,
+    # ou bien on peut baisser imgsz pour le même niveau de détail.
+    # Les cadres sont ensuite recalés dans le repère de la frame complète.
+
+    def __init__(self, zones, margin=ROI_MARGIN):
+        x0 = min(cols.start for _, cols in zones.boxes)
+        y0 = min(rows.start for rows, _ in zones.boxes)
+        x1 = max(cols.stop for _, cols in zones.boxes)
+        y1 = max(rows.stop for rows, _ in zones.boxes)
+        self.x0, self.y0 = max(x0 - margin, 0), max(y0 - margin, 0)
+        self.x1, self.y1 = min(x1 + margin, zones.width), min(y1 + margin, zones.height)
+        self.area_ratio = (self.x1 - self.x0) * (self.y1 - self.y0) / (zones.width * zones.height)
+
+    def crop(self, frame):
+        # Simple vue NumPy, aucune copie
+        return frame[self.y0:self.y1, self.x0:self.x1]
+
+    def to_full(self, boxes):
+        # Cadres xyxy (numpy) du repère du crop -> repère de la frame complète
+        boxes = np.array(boxes, dtype=np.float32).reshape(-1, 4)
+        boxes[:, [0, 2]] += self.x0
+        boxes[:, [1, 3]] += self.y0
+        return boxes
+
+    def restore(self, results, frame):
+        # Résultats ultralytics calculés sur le crop -> résultats sur la frame complète.
+        # .boxes, .plot() et le tracking fonctionnent ensuite comme sans crop.
+        for result in results:
+            data = result.boxes.data.clone()
+            data[:, [0, 2]] += self.x0
+            data[:, [1, 3]] += self.y0
+            result.orig_img = frame
+            result.orig_shape = frame.shape[:2]
+            result.update(boxes=data)
+        return results
+
+    def summary(self):
+        return (f"✂️  Inférence sur ROI ({self.x0},{self.y0})-({self.x1},{self.y1}) : "
+                f"{self.area_ratio * 100:.0f}% de la frame")
+
+def detect(model, frame, roi=None, imgsz=None, **kwargs):
+    # Appel YOLO commun : frame complète ou crop ROI, imgsz configurable (letterbox)
+    if imgsz:
+        kwargs['imgsz'] = imgsz
+    if roi is None:
+        return model(frame, verbose=False, **kwargs)
+    return roi.restore(model(roi.crop(frame), verbose=False, **kwargs), frame)
+
+def add_roi_arguments(parser):
+    parser.add_argument("--roi", action="store_true", help="Inférence limitée au rectangle englobant des zones")
+    parser.add_argument("--roi-margin", type=int, default=ROI_MARGIN, help="Marge (pixels) autour des zones")
+    parser.add_argument("--imgsz", type=int, default=None, help=f"Taille d'entrée YOLO (défaut du modèle : {IMGSZ})")
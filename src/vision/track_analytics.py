@@ -0,0 +1,171 @@
+import numpy as np
+
+# Configuration
+MAX_TRACKS = 256      # Pistes suivies simultanément au maximum (mémoire bornée quoi qu'il arrive)
+TRAIL_LENGTH = 64     # Derniers points (pieds) gardés par piste
+STALE_AFTER = 2.0     # s sans détection avant d'évincer une piste (occlusion courte tolérée)
+MIN_DWELL = 0.5       # s passées dans une zone avant l'alerte (filtre les passages d'une frame)
+
+# Analyse d'intrusion au niveau de la PISTE (IDs de model.track(persist=True)) :
+# - entrée / sortie de zone horodatées, temps de présence cumulé par zone, trajectoire ;
+# - UNE alerte "intrusion" par (piste, zone), au lieu d'une alerte à chaque frame ;
+# - état en structure de tableaux (une ligne par emplacement, MAX_TRACKS emplacements alloués
+#   au départ) : la mémoire ne dépend ni de la durée du flux ni du nombre de personnes vues.
+#   Les pistes non revues depuis STALE_AFTER sont évincées ; si tout est plein, on recycle
+#   l'emplacement de la piste la plus anciennement vue.
+
+class TrackStore:
+
+    def __init__(self, zone_names, max_tracks=MAX_TRACKS, trail_length=TRAIL_LENGTH, stale_after=STALE_AFTER,
+                 min_dwell=MIN_DWELL):
+        self.zone_names = list(zone_names)
+        self.max_tracks = max_tracks
+        self.trail_length = trail_length
+        self.stale_after = stale_after
+        self.min_dwell = min_dwell
+        n_zones = len(self.zone_names)
+
+        self.ids = np.full(max_tracks, -1, dtype=np.int64)        # -1 = emplacement libre
+        self.first_seen = np.zeros(max_tracks, dtype=np.float64)
+        self.last_seen = np.zeros(max_tracks, dtype=np.float64)
+        self.trail = np.zeros((max_tracks, trail_length, 3), dtype=np.float32)  # (ts relatif, x, y)
+        self.trail_head = np.zeros(max_tracks, dtype=np.int32)
+        self.trail_count = np.zeros(max_tracks, dtype=np.int32)
+        self.inside = np.zeros((max_tracks, n_zones), dtype=bool)
+        self.entered = np.zeros((max_tracks, n_zones), dtype=np.float64)
+        self.dwell = np.zeros((max_tracks, n_zones), dtype=np.float64)  # Présence cumulée (visites terminées)
+        self.alerted = np.zeros((max_tracks, n_zones), dtype=bool)
+        self.slot_of = {}
+        self.free = list(range(max_tracks - 1, -1, -1))
+
+        self.tracks_seen = 0
+        self.evicted = 0
+        self.recycled = 0
+        self.intrusions = 0
+
+    # --- Emplacements ---
+
+    def _allocate(self, track_id, ts, events):
+        if self.free:
+            slot = self.free.pop()
+        else:
+            # Plein malgré l'éviction : on sacrifie la piste la plus anciennement vue
+            # (sortie "perdue" de ses zones, comme une éviction, avant de réutiliser l'emplacement)
+            active = np.flatnonzero(self.ids >= 0)
+            slot = int(active[np.argmin(self.last_seen[active])])
+            for z in np.flatnonzero(self.inside[slot]).tolist():
+                events.append(self._exit_event(slot, z, self.last_seen[slot], lost=True))
+            self.recycled += 1
+            del self.slot_of[int(self.ids[slot])]
+        self.ids[slot] = track_id
+        self.first_seen[slot] = self.last_seen[slot] = ts
+        self.trail_head[slot] = self.trail_count[slot] = 0
+        self.inside[slot] = self.alerted[slot] = False
+        self.dwell[slot] = 0.0
+        self.slot_of[track_id] = slot
+        self.tracks_seen += 1
+        return slot
+
+    def _evict(self, ts, events):
+        stale = np.flatnonzero((self.ids >= 0) & (self.last_seen < ts - self.stale_after))
+        for slot in stale.tolist():
+            # Une piste perdue dans une zone en sort à l'instant où on l'a vue pour la dernière fois
+            for z in np.flatnonzero(self.inside[slot]).tolist():
+                events.append(self._exit_event(slot, z, self.last_seen[slot], lost=True))
+            del self.slot_of[int(self.ids[slot])]
+            self.ids[slot] = -1
+            self.free.append(slot)
+            self.evicted += 1
+
+    # --- Mise à jour par frame ---
+
+    def update(self, ts, track_ids, feet, hits):
+        # track_ids : (n,) IDs du tracker ; feet : (n, 2) points bas-centre ; hits : (n, n_zones)
+        # Renvoie les événements de la frame : enter / exit / intrusion
+        events = []
+        self._evict(ts, events)
+        if len(track_ids) == 0:
+            return events
+        ids = track_ids.tolist()
+        slots = np.array([self.slot_of.get(i, -1) for i in ids], dtype=np.intp)
+        known = slots >= 0
+        # Pistes connues rafraîchies AVANT les allocations : un recyclage ne vise jamais une piste de cette frame
+        self.last_seen[slots[known]] = ts
+        for k in np.flatnonzero(~known).tolist():
+            slots[k] = self._allocate(ids[k], ts, events)
+
+        self.last_seen[slots] = ts
+        head = self.trail_head[slots]
+        self.trail[slots, head, 0] = ts - self.first_seen[slots]
+        self.trail[slots, head, 1:] = feet
+        self.trail_head[slots] = (head + 1) % self.trail_length
+        self.trail_count[slots] = np.minimum(self.trail_count[slots] + 1, self.trail_length)
+
+        was = self.inside[slots]
+        entering = hits & ~was
+        leaving = was & ~hits
+        if entering.any():
+            rows, zones = np.nonzero(entering)
+            self.entered[slots[rows], zones] = ts
+            events.extend({'type': "enter", 'track': int(self.ids[slots[r]]), 'zone': self.zone_names[z], 'ts': ts}
+                          for r, z in zip(rows.tolist(), zones.tolist()))
+        if leaving.any():
+            for r, z in zip(*np.nonzero(leaving)):
+                events.append(self._exit_event(int(slots[r]), int(z), ts))
+        self.inside[slots] = hits
+
+        # Alerte unique : dans la zone depuis au moins min_dwell et pas encore signalée
+        confirmed = hits & ~self.alerted[slots] & (ts - self.entered[slots] >= self.min_dwell)
+        if confirmed.any():
+            rows, zones = np.nonzero(confirmed)
+            self.alerted[slots[rows], zones] = True
+            self.intrusions += len(rows)
+            events.extend({'type': "intrusion", 'track': int(self.ids[slots[r]]), 'zone': self.zone_names[z],
+                           'ts': ts, 'entered': float(self.entered[slots[r], z])}
+                          for r, z in zip(rows.tolist(), zones.tolist()))
+        return events
+
+    def _exit_event(self, slot, zone, ts, lost=False):
+        stay = ts - self.entered[slot, zone]
+        self.dwell[slot, zone] += stay
+        self.inside[slot, zone] = False
+        event = {'type': "exit", 'track': int(self.ids[slot]), 'zone': self.zone_names[zone], 'ts': ts,
+                 'dwell_s': round(float(stay), 3)}
+        if lost:
+            event['lost'] = True
+        return event
+
+    # --- Lecture ---
+
+    def intruders(self):
+        # IDs des pistes actuellement dans une zone ET déjà signalées
+        slots = np.flatnonzero((self.inside & self.alerted).any(axis=1) & (self.ids >= 0))
+        return self.ids[slots].tolist()
+
+    def trajectory(self, track_id):
+        # Points (ts absolu, x, y) du plus ancien au plus récent
+        slot = self.slot_of[track_id]
+        count, head = int(self.trail_count[slot]), int(self.trail_head[slot])
+        order = (np.arange(head - count, head) % self.trail_length)
+        points = self.trail[slot, order].astype(np.float64)
+        points[:, 0] += self.first_seen[slot]
+        return points
+
+    def describe(self, track_id, now=None):
+        slot = self.slot_of[track_id]
+        dwell = self.dwell[slot].copy()
+        if now is not None:
+            dwell += np.where(self.inside[slot], now - self.entered[slot], 0.0)
+        return {'track': track_id, 'first_seen': float(self.first_seen[slot]), 'last_seen': float(self.last_seen[slot]),
+                'zones': {name: round(float(d), 3) for name, d in zip(self.zone_names, dwell) if d > 0},
+                'inside': [name for name, flag in zip(self.zone_names, self.inside[slot]) if flag],
+                'trail': self.trajectory(track_id).round(2).tolist()}
+
+    def nbytes(self):
+        arrays = (self.ids, self.first_seen, self.last_seen, self.trail, self.trail_head, self.trail_count,
+                  self.inside, self.entered, self.dwell, self.alerted)
+        return sum(a.nbytes for a in arrays)
+
+    def summary(self):
+        return (f"🧍 Pistes : {self.tracks_seen} vues, {len(self.slot_of)} actives, {self.evicted} évincées, "
+                f"{self.recycled} recyclées | intrusions {self.intrusions} | état {self.nbytes() / 1024:.0f} Ko")
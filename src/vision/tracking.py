@@ -1,57 +1,142 @@
+import argparse
 import cv2
-from ultralytics import YOLO
+import numpy as np
+import sys
+import time
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import profiling
+from core.registry import get_detector, print_timings
+from vision.detectors import add_detector_arguments, detector_from_arguments
+from vision.events import (RENDER_FULL, OutputSink, add_output_arguments, boxes_to_list,
+                           resolve_output_arguments)
+from vision.frame_pool import FramePool, add_pool_arguments, draw_detections, pool_size
+from vision.motion_gate import add_gate_arguments, gate_from_arguments, gated_stage
+from vision.pipeline import BLOCK, DROP_OLDEST, Pipeline, print_stats, video_source
+from vision.track_analytics import MIN_DWELL, STALE_AFTER, TrackStore
+from vision.zones import ZONES_PATH, ZoneSet
+
 # Configuration
 VIDEO_PATH = "data/videos/surveillance.mp4"
 OUTPUT_PATH = "results/videos/output_tracking.mp4"
+EVENTS_PATH = "results/logs/events_tracking.jsonl"
 
-def track_objects():
-    print(f"🕵️  Démarrage du Tracking sur : {VIDEO_PATH}")
+def track_objects(pipelined=False, drop_policy=BLOCK, headless=False, render=RENDER_FULL, events_path=None,
+                  video_path=VIDEO_PATH, output_path=OUTPUT_PATH, motion_gate=None, detector=None,
+                  zones_path=ZONES_PATH, min_dwell=MIN_DWELL, stale_after=STALE_AFTER, frame_pool=True):
+    launched = time.perf_counter()  # Référence de la latence "première frame" (chargements compris)
+    print(f"🕵️  Démarrage du Tracking sur : {video_path}")
     
-    if not os.path.exists(VIDEO_PATH):
+    if not os.path.exists(video_path):
         raise FileNotFoundError(f"❌ Vidéo introuvable.")
 
-    # Chargement du modèle
-    model = YOLO('yolov8n.pt')
+    # Chargement du modèle (PyTorch par défaut, ONNX Runtime / OpenVINO exportés)
+    model = detector or get_detector()
 
-    cap = cv2.VideoCapture(VIDEO_PATH)
+    cap = cv2.VideoCapture(video_path)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     
-    out = cv2.VideoWriter(OUTPUT_PATH, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    sink = OutputSink(output_path, fps, (width, height), window="Tracking - IDs Uniques",
+                      headless=headless, render=render, events_path=events_path)
 
-    print("▶️ Tracking en cours... (Regarde les numéros au-dessus des têtes)")
+    # Intrusions au niveau de la piste : une alerte par personne et par zone, pas par frame
+    zones = ZoneSet.from_config(width, height, zones_path)
+    tracks = TrackStore(zones.names, stale_after=stale_after, min_dwell=min_dwell)
 
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
+    print("▶️ Tracking en cours... (Regarde les numéros au-dessus des têtes)")
 
+    def infer(packet):
         # 🔧 C'EST ICI QUE LA MAGIE OPÈRE : persist=True
         # Cela active le tracking (l'IA se "souvient" des images précédentes)
-        results = model.track(frame, persist=True, conf=0.5, classes=0, verbose=False)
+        # (une seule étape "infer" => les frames arrivent toujours dans l'ordre au tracker)
+        packet.detections = model.track(packet.frame, persist=True, conf=0.5, classes=0)
+        return packet
+
+    def draw(packet):
+        results = packet.detections
+        boxes = results[0].boxes
+        xyxy = boxes.xyxy.cpu().numpy()
+        hits = zones.hits(xyxy)
+        now = round(packet.index / fps, 3) if fps else float(packet.index)
+
+        # IDs uniques du tracker (absents tant qu'aucune piste n'est confirmée)
+        track_ids = None
+        if boxes.id is not None:
+            track_ids = boxes.id.int().cpu().numpy()
+            feet_x, feet_y = zones.feet(xyxy)
+            with profiling.stage("tracks.update"):
+                events = tracks.update(now, track_ids, np.column_stack([feet_x, feet_y]), hits)
+        else:
+            events = tracks.update(now, np.empty(0, dtype=np.int64), None, None)  # Évictions seulement
+        # Alerte = au moins un intrus confirmé encore dans une zone
+        intruders = tracks.intruders()
+        alert = bool(intruders)
 
-        # Récupération de l'image annotée par YOLO
-        annotated_frame = results[0].plot()
+        packet.info = {
+            'frame': packet.index,
+            'ts': round(packet.index / fps, 3) if fps else None,
+            'boxes': boxes_to_list(xyxy, boxes.conf.cpu().numpy(), None if track_ids is None else track_ids.tolist()),
+            'zones': zones.counts(hits),
+            'intruders': intruders,
+            'alert': alert,
+        }
+        if events:
+            packet.info['track_events'] = events
+            for event in events:
+                if event['type'] == "intrusion":
+                    print(f"🚨 Intrusion : personne #{event['track']} dans {event['zone']} (t = {event['ts']:.1f} s)")
 
-        # Bonus : On peut récupérer les IDs manuellement si on veut faire des stats
-        if results[0].boxes.id is not None:
-            # Récupère les IDs uniques présents sur l'image
-            track_ids = results[0].boxes.id.int().cpu().tolist()
-            # On pourrait afficher ici : "Personnes détectées : ID 1, ID 2..."
+        # Cadres + IDs dessinés en place (seulement si quelqu'un verra l'image)
+        if sink.needs_drawing(alert):
+            draw_detections(packet.frame, xyxy, boxes.conf.cpu().numpy(), track_ids)
+            zones.draw(packet.frame, hits)
+        return packet
 
-        cv2.imshow("Tracking - IDs Uniques", annotated_frame)
-        out.write(annotated_frame)
+    def encode(packet):
+        sink.emit(packet.frame, packet.info, packet.info['alert'])
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    # pipelined=True : décodage, YOLO, dessin et encodage se chevauchent dans des threads séparés
+    stages = [("infer", gated_stage(infer, motion_gate)), ("draw", draw), ("encode", encode)]
+    # frame_pool=True : décodage dans des tampons alloués une fois, rendus à la sortie du pipeline
+    pool = FramePool.for_capture(cap, pool_size(len(stages), threaded=pipelined)) if frame_pool else None
+    pipeline = Pipeline(video_source(cap, pool), stages, drop_policy=drop_policy, threaded=pipelined,
+                        started_at=launched, recycle=pool.recycle if pool is not None else None)
+    try:
+        stats = pipeline.run()
+    finally:
+        cap.release()
+        sink.close()
 
-    cap.release()
-    out.release()
-    cv2.destroyAllWindows()
-    print(f"\n✅ Tracking terminé ! Vidéo sauvegardée dans : {OUTPUT_PATH}")
+    print_stats(stats)
+    print_timings()
+    print(tracks.summary())
+    profiling.print_report()
+    if pool is not None:
+        print(pool.summary())
+    if motion_gate is not None:
+        print(motion_gate.summary())
+    print(f"\n✅ Tracking terminé ! Sorties : {sink.summary()}")
+    return stats
 
 if __name__ == "__main__":
-    track_objects()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Tracking de personnes (IDs uniques)")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--pipelined", action="store_true", help="Étapes décodage/inférence/dessin/encodage en parallèle")
+    parser.add_argument("--drop-policy", choices=[BLOCK, DROP_OLDEST], default=BLOCK)
+    add_output_arguments(parser, EVENTS_PATH)
+    add_detector_arguments(parser)
+    add_gate_arguments(parser)
+    add_pool_arguments(parser)
+    parser.add_argument("--zones", default=ZONES_PATH, help="Fichier JSON des zones interdites")
+    parser.add_argument("--min-dwell", type=float, default=MIN_DWELL, help="Secondes dans une zone avant l'alerte")
+    parser.add_argument("--stale-after", type=float, default=STALE_AFTER,
+                        help="Secondes sans détection avant d'oublier une piste")
+    args = parser.parse_args()
+    render, events_path = resolve_output_arguments(args, EVENTS_PATH)
+    track_objects(args.pipelined, args.drop_policy, args.headless, render, events_path, video_path=args.video,
+                  motion_gate=gate_from_arguments(args), detector=detector_from_arguments(args),
+                  zones_path=args.zones, min_dwell=args.min_dwell, stale_after=args.stale_after,
+                  frame_pool=args.frame_pool)
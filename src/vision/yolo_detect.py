@@ -1,68 +1,117 @@
+import argparse
 import cv2
-from ultralytics import YOLO
+import sys
+import time
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import profiling
+from core.registry import get_detector, print_timings
+from vision.detectors import add_detector_arguments, detector_from_arguments
+from vision.events import (RENDER_FULL, OutputSink, add_output_arguments, boxes_to_list,
+                           resolve_output_arguments)
+from vision.frame_pool import FramePool, add_pool_arguments, draw_detections, pool_size
+from vision.motion_gate import add_gate_arguments, gate_from_arguments, gated_stage
+from vision.pipeline import BLOCK, DROP_OLDEST, Pipeline, print_stats, video_source
+
 # Configuration
 VIDEO_PATH = "data/videos/surveillance.mp4"
 OUTPUT_PATH = "results/videos/output_yolo.mp4"
+EVENTS_PATH = "results/logs/events_yolo.jsonl"
 
-def process_video():
-    print(f"🎥 Chargement de la vidéo : {VIDEO_PATH}")
+def process_video(pipelined=False, drop_policy=BLOCK, headless=False, render=RENDER_FULL, events_path=None,
+                  video_path=VIDEO_PATH, output_path=OUTPUT_PATH, motion_gate=None, detector=None, frame_pool=True):
+    launched = time.perf_counter()  # Référence de la latence "première frame" (chargements compris)
+    print(f"🎥 Chargement de la vidéo : {video_path}")
     
     # 1. Vérification du fichier
-    if not os.path.exists(VIDEO_PATH):
-        raise FileNotFoundError(f"❌ Fichier vidéo introuvable : {VIDEO_PATH}. Merci d'ajouter une vidéo 'surveillance.mp4' dans data/videos/")
+    if not os.path.exists(video_path):
+        raise FileNotFoundError(f"❌ Fichier vidéo introuvable : {video_path}. Merci d'ajouter une vidéo 'surveillance.mp4' dans data/videos/")
 
     # 2. Chargement du modèle YOLOv8 Nano (le plus léger et rapide)
     # Au premier lancement, il va le télécharger automatiquement depuis Internet.
-    print("🚀 Chargement du modèle YOLOv8n...")
-    model = YOLO('yolov8n.pt') 
+    # detector : backend choisi (PyTorch par défaut, ONNX Runtime / OpenVINO exportés)
+    model = detector or get_detector()
 
     # 3. Ouverture de la vidéo
-    cap = cv2.VideoCapture(VIDEO_PATH)
+    cap = cv2.VideoCapture(video_path)
     
     # Récupération des propriétés de la vidéo pour la sauvegarde
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     
-    # Préparation de l'écriture vidéo
-    os.makedirs(os.path.dirname(OUTPUT_PATH), exist_ok=True)
-    out = cv2.VideoWriter(OUTPUT_PATH, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    # Préparation des sorties (fenêtre, vidéo annotée, journal d'événements)
+    sink = OutputSink(output_path, fps, (width, height), window="YOLOv8 Detection - Système Anti-Intrusion",
+                      headless=headless, render=render, events_path=events_path)
 
     print("▶️ Début du traitement frame par frame... (Appuie sur 'q' pour quitter la fenêtre)")
 
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-
+    def infer(packet):
         # 4. Détection avec YOLO
         # classes=0 signifie qu'on ne garde que la classe "Personne"
         # conf=0.5 signifie qu'il faut être sûr à 50% minimum
-        results = model.predict(frame, conf=0.5, classes=0, verbose=False)
+        packet.detections = model(packet.frame, conf=0.5, classes=0)
+        return packet
 
-        # 5. Dessiner les résultats sur l'image
-        annotated_frame = results[0].plot()
+    def draw(packet):
+        result = packet.detections[0]
+        alert = len(result.boxes) > 0  # Alerte = au moins une personne détectée
+        boxes, scores = result.boxes.xyxy.cpu().numpy(), result.boxes.conf.cpu().numpy()
 
-        # Affichage en direct (optionnel, peut être lent sur certains PC)
-        cv2.imshow("YOLOv8 Detection - Système Anti-Intrusion", annotated_frame)
+        # 5. Dessiner les résultats sur l'image (seulement si quelqu'un la verra), en place
+        if sink.needs_drawing(alert):
+            draw_detections(packet.frame, boxes, scores)
 
-        # Sauvegarde de la frame
-        out.write(annotated_frame)
+        packet.info = {
+            'frame': packet.index,
+            'ts': round(packet.index / fps, 3) if fps else None,
+            'boxes': boxes_to_list(boxes, scores),
+            'alert': alert,
+        }
+        return packet
 
-        # Quitter si on appuie sur 'q'
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    def encode(packet):
+        # Affichage en direct (optionnel), sauvegarde de la frame, journal ; 'q' pour quitter
+        sink.emit(packet.frame, packet.info, packet.info['alert'])
+
+    # pipelined=True : décodage, YOLO, dessin et encodage se chevauchent dans des threads séparés
+    stages = [("infer", gated_stage(infer, motion_gate)), ("draw", draw), ("encode", encode)]
+    # frame_pool=True : décodage dans des tampons alloués une fois, rendus à la sortie du pipeline
+    pool = FramePool.for_capture(cap, pool_size(len(stages), threaded=pipelined)) if frame_pool else None
+    pipeline = Pipeline(video_source(cap, pool), stages, drop_policy=drop_policy, threaded=pipelined,
+                        started_at=launched, recycle=pool.recycle if pool is not None else None)
+    try:
+        stats = pipeline.run()
+    finally:
+        # Nettoyage
+        cap.release()
+        sink.close()
 
-    # Nettoyage
-    cap.release()
-    out.release()
-    cv2.destroyAllWindows()
-    print(f"\n✅ Traitement terminé ! Vidéo sauvegardée dans : {OUTPUT_PATH}")
+    print_stats(stats)
+    print_timings()
+    profiling.print_report()  # Percentiles par étape si IAIS_PROFILE=1
+    if pool is not None:
+        print(pool.summary())
+    if motion_gate is not None:
+        print(motion_gate.summary())
+    print(f"\n✅ Traitement terminé ! Sorties : {sink.summary()}")
+    return stats
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Détection de personnes YOLOv8")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--pipelined", action="store_true", help="Étapes décodage/inférence/dessin/encodage en parallèle")
+    parser.add_argument("--drop-policy", choices=[BLOCK, DROP_OLDEST], default=BLOCK)
+    add_output_arguments(parser, EVENTS_PATH)
+    add_detector_arguments(parser)
+    add_gate_arguments(parser)
+    add_pool_arguments(parser)
+    args = parser.parse_args()
+    render, events_path = resolve_output_arguments(args, EVENTS_PATH)
     try:
-        process_video()
+        process_video(args.pipelined, args.drop_policy, args.headless, render, events_path, video_path=args.video,
+                      motion_gate=gate_from_arguments(args), detector=detector_from_arguments(args),
+                      frame_pool=args.frame_pool)
     except Exception as e:
         print(f"❌ Erreur : {e}")
\ No newline at end of file
@@ -1,104 +1,142 @@
+import argparse
 import cv2
-import numpy as np
-from ultralytics import YOLO
+import sys
+import time
 import os
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from core import profiling
+from core.registry import get_detector, print_timings
+from vision.detectors import add_detector_arguments, detector_from_arguments
+from vision.events import (RENDER_FULL, OutputSink, add_output_arguments, boxes_to_list,
+                           resolve_output_arguments)
+from vision.frame_pool import FramePool, add_pool_arguments, pool_size
+from vision.motion_gate import add_gate_arguments, gate_from_arguments, gated_stage
+from vision.pipeline import BLOCK, DROP_OLDEST, Pipeline, print_stats, video_source
+from vision.roi import ROI_MARGIN, RoiCropper, add_roi_arguments, detect
+from vision.zones import ALERT_COLOR, SAFE_COLOR, ZONES_PATH, ZoneSet
+
 # Configuration
 VIDEO_PATH = "data/videos/surveillance.mp4"
 OUTPUT_PATH = "results/videos/output_zone.mp4"
+EVENTS_PATH = "results/logs/events_zone.jsonl"
 
-def monitor_zone():
-    print(f"🛡️  Surveillance de zone active sur : {VIDEO_PATH}")
+def monitor_zone(pipelined=False, drop_policy=BLOCK, headless=False, render=RENDER_FULL, events_path=None,
+                 video_path=VIDEO_PATH, output_path=OUTPUT_PATH, motion_gate=None, zones_path=ZONES_PATH,
+                 roi=False, roi_margin=ROI_MARGIN, imgsz=None, detector=None, frame_pool=True):
+    launched = time.perf_counter()  # Référence de la latence "première frame" (chargements compris)
+    print(f"🛡️  Surveillance de zone active sur : {video_path}")
     
-    if not os.path.exists(VIDEO_PATH):
+    if not os.path.exists(video_path):
         raise FileNotFoundError(f"❌ Vidéo introuvable.")
 
-    model = YOLO('yolov8n.pt')
+    model = detector or get_detector()
 
-    cap = cv2.VideoCapture(VIDEO_PATH)
+    cap = cv2.VideoCapture(video_path)
     width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
     fps = int(cap.get(cv2.CAP_PROP_FPS))
     
-    out = cv2.VideoWriter(OUTPUT_PATH, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
-
-    # --- DÉFINITION DE LA ZONE INTERDITE ---
-    # Ici, je définis un polygone (carré) au centre-droit de l'image
-    # Tu peux changer ces points selon ta vidéo !
-    # Format : [[x1, y1], [x2, y2], [x3, y3], [x4, y4]]
-    zone_points = np.array([
-    [0, height // 2],        # Haut gauche
-    [width, height // 2],    # Haut droit
-    [width, height],         # Bas droit
-    [0, height]              # Bas gauche
-], np.int32)
+    sink = OutputSink(output_path, fps, (width, height), window="Zone Logic",
+                      headless=headless, render=render, events_path=events_path)
 
-    
-    zone_points = zone_points.reshape((-1, 1, 2))
+    # --- DÉFINITION DES ZONES INTERDITES ---
+    # Les polygones sont lus dans config/zones.json (par défaut : toute la moitié basse)
+    # Tu peux ajouter / modifier des zones selon ta vidéo !
+    # Les masques sont rastérisés une seule fois à la résolution de la vidéo
+    zones = ZoneSet.from_config(width, height, zones_path)
+    # roi=True : YOLO ne reçoit que le rectangle englobant des zones (+ marge)
+    roi = RoiCropper(zones, roi_margin) if roi else None
 
     print("▶️ Analyse en cours... Une zone verte va s'afficher.")
 
-    while cap.isOpened():
-        success, frame = cap.read()
-        if not success:
-            break
-
+    def infer(packet):
         # 1. Détection
-        results = model(frame, conf=0.5, classes=0, verbose=False)
-        
-        # Copie de l'image pour dessiner dessus
-        overlay = frame.copy()
-        
-        # Par défaut, pas d'intrusion
-        intrusion_detected = False
-        
-        # 2. Vérifier chaque personne détectée
-        for box in results[0].boxes:
-            # Récupérer les coordonnées du cadre (bounding box)
-            x1, y1, x2, y2 = map(int, box.xyxy[0])
-            
-            # On calcule le point central bas (les pieds de la personne)
-            feet_x = int((x1 + x2) / 2)
-            feet_y = int(y2)
-            
-            # 3. Vérifier si les pieds sont DANS la zone
-            # pointPolygonTest renvoie > 0 si c'est dedans
-            result = cv2.pointPolygonTest(zone_points, (feet_x, feet_y), False)
-            
-            if result >= 0:
-                intrusion_detected = True
-                # Dessiner un cercle rouge aux pieds de l'intrus
-                cv2.circle(frame, (feet_x, feet_y), 10, (0, 0, 255), -1)
-
-        # 4. Gestion de l'affichage de la zone
-        if intrusion_detected:
-            color = (0, 0, 255) # ROUGE (Intrusion !)
-            text = "!!! INTRUSION !!!"
-        else:
-            color = (0, 255, 0) # VERT (Sécurisé)
-            text = "Zone Securisee"
+        packet.detections = detect(model, packet.frame, roi, imgsz, conf=0.5, classes=0)
+        return packet
 
-        # Dessiner la zone semi-transparente
-        cv2.fillPoly(overlay, [zone_points], color)
-        cv2.addWeighted(overlay, 0.4, frame, 0.6, 0, frame)
-        
-        # Dessiner les bords de la zone
-        cv2.polylines(frame, [zone_points], True, color, 3)
+    def draw(packet):
+        frame = packet.frame
+        boxes = packet.detections[0].boxes.xyxy.cpu().numpy()
         
+        # 2. Vérifier toutes les personnes contre toutes les zones en une seule opération
+        # hits[i, j] : les pieds de la personne i sont DANS la zone j
+        hits = zones.hits(boxes)
+        in_zone = hits.any(axis=1)
+        intrusion_detected = bool(in_zone.any())
+
+        packet.info = {
+            'frame': packet.index,
+            'ts': round(packet.index / fps, 3) if fps else None,
+            'boxes': boxes_to_list(boxes, packet.detections[0].boxes.conf.cpu().numpy()),
+            'zone_hits': in_zone.tolist(),
+            'zones': zones.counts(hits),
+            'alert': intrusion_detected,
+        }
+
+        # Rien à dessiner si la frame n'est ni affichée ni encodée
+        if not sink.needs_drawing(intrusion_detected):
+            return packet
+
+        # Dessiner un cercle rouge aux pieds de chaque intrus
+        feet_x, feet_y = zones.feet(boxes)
+        for x, y in zip(feet_x[in_zone], feet_y[in_zone]):
+            cv2.circle(frame, (int(x), int(y)), 10, (0, 0, 255), -1)
+
+        # 3. Gestion de l'affichage des zones
+        # Rouge (remplie) si occupée, verte sinon. Le mélange semi-transparent
+        # ne touche que le rectangle englobant de chaque zone.
+        zones.draw(frame, hits, fill_safe=True)
+
         # Afficher le texte
-        cv2.putText(frame, text, (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, color, 3)
+        if intrusion_detected:
+            cv2.putText(frame, "!!! INTRUSION !!!", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, ALERT_COLOR, 3)
+        else:
+            cv2.putText(frame, "Zone Securisee", (50, 50), cv2.FONT_HERSHEY_SIMPLEX, 1.5, SAFE_COLOR, 3)
+        return packet
 
+    def encode(packet):
         # Afficher et sauvegarder
-        cv2.imshow("Zone Logic", frame)
-        out.write(frame)
+        sink.emit(packet.frame, packet.info, packet.info['alert'])
 
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            break
+    # pipelined=True : décodage, YOLO, dessin et encodage se chevauchent dans des threads séparés
+    stages = [("infer", gated_stage(infer, motion_gate)), ("draw", draw), ("encode", encode)]
+    # frame_pool=True : décodage dans des tampons alloués une fois, rendus à la sortie du pipeline
+    pool = FramePool.for_capture(cap, pool_size(len(stages), threaded=pipelined)) if frame_pool else None
+    pipeline = Pipeline(video_source(cap, pool), stages, drop_policy=drop_policy, threaded=pipelined,
+                        started_at=launched, recycle=pool.recycle if pool is not None else None)
+    try:
+        stats = pipeline.run()
+    finally:
+        cap.release()
+        sink.close()
 
-    cap.release()
-    out.release()
-    cv2.destroyAllWindows()
-    print(f"\n✅ Analyse terminée ! Vidéo sauvegardée dans : {OUTPUT_PATH}")
+    print_stats(stats)
+    print_timings()
+    profiling.print_report()  # Percentiles par étape si IAIS_PROFILE=1
+    if roi is not None:
+        print(roi.summary())
+    if pool is not None:
+        print(pool.summary())
+    if motion_gate is not None:
+        print(motion_gate.summary())
+    print(f"\n✅ Analyse terminée ! Sorties : {sink.summary()}")
+    return stats
 
 if __name__ == "__main__":
-    monitor_zone()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Surveillance d'une zone interdite")
+    parser.add_argument("--video", default=VIDEO_PATH)
+    parser.add_argument("--pipelined", action="store_true", help="Étapes décodage/inférence/dessin/encodage en parallèle")
+    parser.add_argument("--drop-policy", choices=[BLOCK, DROP_OLDEST], default=BLOCK)
+    add_output_arguments(parser, EVENTS_PATH)
+    add_detector_arguments(parser)
+    add_gate_arguments(parser)
+    add_roi_arguments(parser)
+    add_pool_arguments(parser)
+    parser.add_argument("--zones", default=ZONES_PATH, help="Fichier JSON des zones interdites")
+    args = parser.parse_args()
+    render, events_path = resolve_output_arguments(args, EVENTS_PATH)
+    monitor_zone(args.pipelined, args.drop_policy, args.headless, render, events_path, video_path=args.video,
+                 motion_gate=gate_from_arguments(args), zones_path=args.zones,
+                 roi=args.roi, roi_margin=args.roi_margin, imgsz=args.imgsz,
+                 detector=detector_from_arguments(args), frame_pool=args.frame_pool)
@@ -0,0 +1,142 @@
+import json
+import os
+import cv2
+import numpy as np
+
+# Configuration
+ZONES_PATH = "config/zones.json"
+ZONE_ALPHA = 0.4          # Opacité du remplissage d'une zone en intrusion
+SAFE_COLOR = (0, 255, 0)   # VERT (Sécurisé)
+ALERT_COLOR = (0, 0, 255)  # ROUGE (Intrusion !)
+
+# Zone historique : toute la moitié basse de l'image (coordonnées normalisées 0-1)
+DEFAULT_ZONES = [{'name': "zone_bas", 'points': [[0, 0.5], [1, 0.5], [1, 1], [0, 1]], 'normalized': True}]
+
+# Format du fichier de configuration :
+# {"zones": [{"name": "porte", "points": [[x, y], ...], "normalized": true}, ...]}
+# normalized=true : x et y entre 0 et 1 (indépendant de la résolution du flux)
+# normalized=false : coordonnées en pixels
+
+def load_zones(path=ZONES_PATH):
+    # Pas de fichier : on garde la zone historique
+    if not path or not os.path.exists(path):
+        return DEFAULT_ZONES
+    with open(path) as f:
+        zones = json.load(f)['zones']
+    names = [zone['name'] for zone in zones]
+    if len(set(names)) != len(names):
+        raise ValueError(f"❌ Noms de zones dupliqués dans {path}")
+    return zones
+
+def _mask_dtype(n_zones):
+    # Un bit par zone : le plus petit entier qui les contient toutes
+    for dtype in (np.uint8, np.uint16, np.uint32, np.uint64):
+        if n_zones <= np.iinfo(dtype).bits:
+            return dtype
+    raise ValueError(f"❌ Trop de zones ({n_zones}), maximum 64")
+
+class ZoneSet:
+    # Toutes les zones d'un flux, rastérisées UNE fois à la résolution du flux :
+    # - self.mask[y, x] : bit i à 1 si le pixel appartient à la zone i
+    #   -> tester n détections contre toutes les zones = une lecture de tableau
+    # - self._layers : pour chaque (zone, couleur), le rectangle englobant, le masque du
+    #   polygone dans ce rectangle et un calque de couleur prêt à être mélangé
+    #   -> dessiner une zone ne touche que son rectangle, sans frame.copy()
+
+    def __init__(self, zones, width, height):
+        if not zones:
+            raise ValueError("❌ Aucune zone définie")
+        self.width = width
+        self.height = height
+        self.names = [zone['name'] for zone in zones]
+        self.polygons = []
+        self.boxes = []
+        self.mask = np.zeros((height, width), dtype=_mask_dtype(len(zones)))
+        self._bits = np.left_shift(np.ones(1, dtype=self.mask.dtype), np.arange(len(zones), dtype=self.mask.dtype))
+        self._layers = {}
+
+        scratch = np.zeros((height, width), dtype=np.uint8)
+        for i, zone in enumerate(zones):
+            points = np.asarray(zone['points'], dtype=np.float64).reshape(-1, 2)
+            if zone.get('normalized', False):
+                points = points * (width, height)
+            polygon = np.round(points).astype(np.int32).reshape((-1, 1, 2))
+            self.polygons.append(polygon)
+
+            scratch[:] = 0
+            cv2.fillPoly(scratch, [polygon], 1)
+            self.mask[scratch.astype(bool)] |= self._bits[i]
+
+            x, y, w, h = cv2.boundingRect(polygon)
+            x0, y0 = max(x, 0), max(y, 0)
+            x1, y1 = min(x + w, width), min(y + h, height)
+            self.boxes.append((slice(y0, y1), slice(x0, x1)))
+
+    @classmethod
+    def from_config(cls, width, height, path=ZONES_PATH):
+        return cls(load_zones(path), width, height)
+
+    def __len__(self):
+        return len(self.names)
+
+    def feet(self, boxes):
+        # Point central bas de chaque cadre (les pieds), ramené dans l'image
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4).astype(int)
+        feet_x = np.clip((boxes[:, 0] + boxes[:, 2]) // 2, 0, self.width - 1)
+        feet_y = np.clip(boxes[:, 3], 0, self.height - 1)
+        return feet_x, feet_y
+
+    def hits(self, boxes):
+        # Matrice (n_détections, n_zones) : pieds de la détection i dans la zone j ?
+        feet_x, feet_y = self.feet(boxes)
+        codes = self.mask[feet_y, feet_x]
+        return (codes[:, None] & self._bits[None, :]) != 0
+
+    def any_hits(self, boxes):
+        # Masque par détection : dans au moins une zone ?
+        feet_x, feet_y = self.feet(boxes)
+        return self.mask[feet_y, feet_x] != 0
+
+    def counts(self, hits):
+        # {nom de zone: nombre de détections dedans}, uniquement les zones occupées
+        per_zone = hits.sum(axis=0)
+        return {self.names[i]: int(per_zone[i]) for i in np.flatnonzero(per_zone)}
+
+    def _layer(self, index, color):
+        key = (index, color)
+        if key not in self._layers:
+            rows, cols = self.boxes[index]
+            local = np.zeros((rows.stop - rows.start, cols.stop - cols.start), dtype=np.uint8)
+            cv2.fillPoly(local, [self.polygons[index] - (cols.start, rows.start)], 1)
+            colored = np.empty(local.shape + (3,), dtype=np.uint8)
+            colored[:] = color
+            # Zone rectangulaire : le masque est inutile, on mélange tout le rectangle (sur place) ;
+            # sinon un tampon de mélange alloué ici, une fois, et réutilisé à chaque frame
+            inside = None if local.all() else local
+            blended = None if inside is None else np.empty_like(colored)
+            self._layers[key] = (inside, colored, blended)
+        return self._layers[key]
+
+    def fill(self, frame, index, color, alpha=ZONE_ALPHA):
+        # Remplissage semi-transparent, limité au rectangle englobant de la zone
+        rows, cols = self.boxes[index]
+        inside, colored, blended = self._layer(index, color)
+        roi = frame[rows, cols]
+        if inside is None:
+            cv2.addWeighted(colored, alpha, roi, 1 - alpha, 0, dst=roi)  # Écrit directement dans la vue
+        else:
+            cv2.addWeighted(colored, alpha, roi, 1 - alpha, 0, dst=blended)
+            cv2.copyTo(blended, inside, roi)
+
+    def outline(self, frame, index, color, thickness=3):
+        cv2.polylines(frame, [self.polygons[index]], True, color, thickness)
+
+    def draw(self, frame, hits, alpha=ZONE_ALPHA, thickness=3, fill_safe=False):
+        # Zones occupées : remplissage rouge + contour ; zones libres : contour vert
+        occupied = hits.any(axis=0)
+        for i in range(len(self)):
+            color = ALERT_COLOR if occupied[i] else SAFE_COLOR
+            if occupied[i] or fill_safe:
+                self.fill(frame, i, color, alpha)
+            self.outline(frame, i, color, thickness)
+        return occupied
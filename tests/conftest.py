@@ -0,0 +1,6 @@
+import os
+import sys
+
+# Mêmes imports que les scripts : src/ dans le path, modules importés par leur paquet (core, iot, vision, fusion)
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src"))
@@ -0,0 +1,51 @@
+import json
+import os
+
+from fusion import archive_processor
+from fusion.archive_processor import config_key, merge_shards, plan_shards
+
+def info(path, frames, fps=10.0, origin=0.0):
+    return {'path': path, 'frames': frames, 'fps': fps, 'size': 123, 'mtime': 1.0, 'origin': origin}
+
+def test_plan_covers_every_frame_once():
+    shards = plan_shards([info("/v/a.mp4", 250), info("/v/b.mp4", 90)], shard_seconds=10)
+    for path, frames in (("/v/a.mp4", 250), ("/v/b.mp4", 90)):
+        spans = sorted((s['start'], s['end']) for s in shards if s['path'] == path)
+        assert spans[0][0] == 0 and spans[-1][1] == frames
+        assert all(end == next_start for (_, end), (next_start, _) in zip(spans, spans[1:]))
+    # Les plus longs d'abord
+    sizes = [s['end'] - s['start'] for s in shards]
+    assert sizes == sorted(sizes, reverse=True)
+    assert len({s['id'] for s in shards}) == len(shards)
+
+def test_shard_ids_follow_config():
+    infos = [info("/v/a.mp4", 250)]
+    same = plan_shards(infos, 10, config="x")
+    assert [s['id'] for s in same] == [s['id'] for s in plan_shards(infos, 10, config="x")]
+    assert not {s['id'] for s in same} & {s['id'] for s in plan_shards(infos, 10, config="y")}
+
+def test_config_key_follows_iot_artefacts(tmp_path, monkeypatch):
+    model = tmp_path / "model.pkl"
+    model.write_bytes(b"v1")
+    monkeypatch.setattr(archive_processor, "MODEL_IOT_PATH", str(model))
+    before = config_key(zones_path=None)
+    os.utime(model, ns=(0, 10**9))  # Modèle réentraîné
+    assert config_key(zones_path=None) != before
+
+def test_merge_orders_by_absolute_time(tmp_path):
+    # Deux vidéos qui se chevauchent dans le temps, chacune découpée en deux morceaux
+    shards = []
+    for name, origin in (("a", 0.0), ("b", 0.25)):
+        for start in (0, 5):
+            shard = {'id': f"{name}_{start}", 'path': f"/v/{name}.mp4", 'start': start, 'origin': origin}
+            with open(tmp_path / f"{shard['id']}.jsonl", "w") as f:
+                for frame in range(start, start + 5):
+                    f.write(json.dumps({'video': shard['path'], 'frame': frame, 'time': origin + frame * 0.5}) + "\n")
+            shards.append(shard)
+    output = str(tmp_path / "events.jsonl")
+    assert merge_shards(shards, str(tmp_path), output) == 20
+    with open(output) as f:
+        events = [json.loads(line) for line in f]
+    times = [e['time'] for e in events]
+    assert times == sorted(times)
+    assert [e['frame'] for e in events if e['video'] == "/v/a.mp4"] == list(range(10))
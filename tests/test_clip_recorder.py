@@ -0,0 +1,51 @@
+import json
+import os
+
+import cv2
+import numpy as np
+
+from vision.clip_recorder import ClipRecorder, FrameRing
+
+SIZE = (32, 24)  # (largeur, hauteur)
+
+def frame(i):
+    return np.full((SIZE[1], SIZE[0], 3), i, dtype=np.uint8)
+
+def test_ring_drains_oldest_first():
+    ring = FrameRing(3, (SIZE[1], SIZE[0], 3))
+    for i in range(5):
+        ring.push(frame(i), i)
+    drained = [(int(index), int(f[0, 0, 0])) for index, f in ring.drain()]
+    assert drained == [(2, 2), (3, 3), (4, 4)]
+    assert ring.count == 0 and list(ring.drain()) == []
+    # Les frames sont copiées : modifier l'original ne touche pas le tampon
+    original = frame(7)
+    ring.push(original, 7)
+    original[:] = 0
+    assert int(next(ring.drain())[1][0, 0, 0]) == 7
+
+def test_clip_has_pre_roll_and_post_roll(tmp_path):
+    # 10 FPS : pré-roll 0.3 s = 3 frames, post-roll 0.2 s = 2 frames
+    recorder = ClipRecorder(str(tmp_path), 10, SIZE, pre_roll=0.3, post_roll=0.2)
+    alerts = [False] * 6 + [True] * 2 + [False] * 5 + [True] + [False] * 4
+    for i, alert in enumerate(alerts):
+        recorder.push(frame(i), alert)
+    recorder.close()
+    first, second = recorder.clips
+    # Clip 1 : frames 3-5 (pré-roll), 6-7 (alerte), 8-9 (post-roll)
+    assert (first['first_frame'], first['alert_frame'], first['last_frame'], first['frames']) == (3, 6, 9, 7)
+    # Clip 2 : le pré-roll ne reprend que les frames vues depuis la fin du clip 1
+    assert (second['first_frame'], second['alert_frame'], second['last_frame']) == (10, 13, 15)
+    assert recorder.frames_written == 7 + 6 and recorder.frames_seen == len(alerts)
+    cap = cv2.VideoCapture(first['path'])
+    assert int(cap.get(cv2.CAP_PROP_FRAME_COUNT)) == 7
+    cap.release()
+    with open(os.path.join(tmp_path, "clips.json")) as f:
+        assert [c['path'] for c in json.load(f)] == [first['path'], second['path']]
+
+def test_new_alert_extends_the_clip(tmp_path):
+    recorder = ClipRecorder(str(tmp_path), 10, SIZE, pre_roll=0.0, post_roll=0.3)
+    for i, alert in enumerate([True, False, False, True, False, False, False, False]):
+        recorder.push(frame(i), alert)
+    recorder.close()
+    assert len(recorder.clips) == 1 and recorder.clips[0]['last_frame'] == 6
@@ -0,0 +1,27 @@
+import numpy as np
+
+from vision.detectors import letterbox, nms, rect_size
+
+def test_nms_keeps_best_of_overlapping_boxes():
+    boxes = np.array([[0, 0, 10, 10], [1, 1, 11, 11], [50, 50, 60, 60], [0, 0, 10, 10.5]], dtype=np.float32)
+    scores = np.array([0.8, 0.9, 0.5, 0.3], dtype=np.float32)
+    np.testing.assert_array_equal(nms(boxes, scores, iou_threshold=0.5), [1, 2])
+    # Seuil IoU au-dessus du recouvrement : tout est gardé, par score décroissant
+    np.testing.assert_array_equal(nms(boxes, scores, iou_threshold=0.99), [1, 0, 2, 3])
+    assert len(nms(boxes, scores, max_det=1)) == 1
+    assert len(nms(np.empty((0, 4)), np.empty(0))) == 0
+
+def test_letterbox_keeps_ratio():
+    frame = np.full((360, 640, 3), 255, dtype=np.uint8)
+    image, gain, (left, top) = letterbox(frame, (640, 640))
+    assert image.shape == (640, 640, 3) and gain == 1.0 and (left, top) == (0, 140)
+    assert (image[:140] == 114).all() and (image[140:500] == 255).all() and (image[500:] == 114).all()
+    # Taille "rectangulaire" minimale : plus de bande inutile
+    size = rect_size(frame.shape, 640)
+    assert size == (384, 640)
+    image, gain, (left, top) = letterbox(frame, size)
+    assert image.shape == (384, 640, 3) and (left, top) == (0, 12)
+    # Une boîte du repère letterbox revient dans le repère de la frame
+    image, gain, (left, top) = letterbox(np.zeros((720, 1280, 3), dtype=np.uint8), (640, 640))
+    assert gain == 0.5 and (left, top) == (0, 140)
+    assert ((np.array([100, 140, 300, 500]) - [left, top, left, top]) / gain).tolist() == [200, 0, 600, 720]
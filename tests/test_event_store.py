@@ -0,0 +1,65 @@
+import datetime
+import json
+
+import numpy as np
+
+from fusion.event_store import EventStore, apply_retention, connect, import_jsonl, last_night, query
+
+T0 = 1_700_000_000.0
+
+def alerts(path, **filters):
+    return query(connect(path), kind="alert", **filters)
+
+def test_alert_start_and_end(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    store.update_alerts(T0, "cam0", ["porte"], frame=1, reason={'video': True})
+    store.update_alerts(T0 + 1, "cam0", ["porte"], frame=2)  # Toujours en alerte : rien de nouveau
+    store.update_alerts(T0 + 2.5, "cam0", [], frame=3)
+    store.close()
+    rows = alerts(path)
+    assert [r['data']['state'] for r in rows] == ["start", "end"]
+    assert rows[0]['data']['video'] is True and rows[1]['data']['duration_s'] == 2.5
+    assert [r['ts'] for r in alerts(path, state="end")] == [T0 + 2.5]
+
+def test_open_alerts_closed_at_last_frame_on_shutdown(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    hits = np.array([[True, False]])
+    store.record_frame(T0, "cam0", 0, ["zone_bas", "porte"], hits, np.array([0.9]), alert=True)
+    store.record_frame(T0 + 4, "cam0", 100, ["zone_bas", "porte"], hits, np.array([0.8]), alert=True)
+    store.close()  # Vidéo terminée en pleine alerte
+    end = alerts(path, state="end")
+    assert len(end) == 1 and end[0]['zone'] == "zone_bas" and end[0]['frame'] == 100
+    assert end[0]['data'] == {'state': "end", 'duration_s': 4.0, 'closed_by': "shutdown"}
+    detections = query(connect(path), kind="detection", zone="zone_bas")
+    assert [d['score'] for d in detections] == [0.9, 0.8]
+
+def test_import_jsonl_dates_iot_readings(tmp_path):
+    log = tmp_path / "events_fusion.jsonl"
+    frames = [{'frame': 0, 'ts': 0.0, 'alert': False},
+              {'frame': 30, 'ts': 1.0, 'iot_ts': 0.8, 'iot_proba': 0.7, 'iot_data': [1], 'alert': True},
+              {'frame': 31, 'ts': 1.04, 'iot_ts': 0.8, 'iot_proba': 0.7, 'iot_data': [1], 'alert': False}]
+    log.write_text("".join(json.dumps(f) + "\n" for f in frames))
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    assert import_jsonl(store, str(log), "cam0", origin=T0) == 3
+    store.close()
+    iot = query(connect(path), kind="iot")
+    assert len(iot) == 1 and iot[0]['ts'] == T0 + 0.8 and iot[0]['score'] == 0.7  # Une lecture, datée de sa mesure
+    assert [(r['zone'], r['data']['state']) for r in alerts(path)] == [("site", "start"), ("site", "end")]
+
+def test_retention_by_kind(tmp_path):
+    path = str(tmp_path / "events.db")
+    store = EventStore(path)
+    now = T0 + 10 * 86400
+    store.add('detection', T0, "cam0", "porte")
+    store.add('alert', T0, "cam0", "porte", score=1.0)
+    store.close()
+    assert apply_retention(connect(path), {'detection': 7, 'iot': 30, 'alert': 365}, now=now)['detection'] == 1
+    assert [r['kind'] for r in query(connect(path))] == ["alert"]
+
+def test_last_night_window():
+    start, end = last_night(datetime.datetime(2026, 10, 18, 9, 30))
+    assert datetime.datetime.fromtimestamp(start) == datetime.datetime(2026, 10, 17, 22)
+    assert datetime.datetime.fromtimestamp(end) == datetime.datetime(2026, 10, 18, 6)
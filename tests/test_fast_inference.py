@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+from sklearn.ensemble import ExtraTreesClassifier, GradientBoostingClassifier, RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.preprocessing import StandardScaler
+
+from iot.fast_inference import (ForestTable, alarm_scores, compile_model, load_forest, save_forest,
+                                set_decision_threshold)
+from iot.generate_data import generate_iot_data
+from iot.storage import FEATURES
+
+# Le moteur compilé doit rendre les mêmes probabilités que sklearn (scaler replié dans les seuils)
+
+@pytest.fixture(scope="module")
+def data():
+    df = generate_iot_data(3000, seed=7)
+    X = df[FEATURES].to_numpy(np.float64)
+    scaler = StandardScaler().fit(X)
+    return X, df['label'].to_numpy(), scaler
+
+@pytest.mark.parametrize("model", [
+    RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0),
+    ExtraTreesClassifier(n_estimators=20, max_depth=8, random_state=0),
+    GradientBoostingClassifier(n_estimators=20, random_state=0),
+    LogisticRegression(),
+], ids=lambda m: type(m).__name__)
+def test_compiled_matches_sklearn(data, model):
+    X, y, scaler = data
+    model.fit(scaler.transform(X), y)
+    compiled = compile_model(model, scaler)
+    expected = model.predict_proba(scaler.transform(X))
+    np.testing.assert_allclose(compiled.predict_proba(X), expected, atol=1e-5)
+    np.testing.assert_array_equal(compiled.predict(X), model.predict(scaler.transform(X)))
+    assert [compiled.predict_one(x) for x in X[:300].tolist()] == compiled.predict(X[:300]).tolist()
+
+def test_forest_table_matches_compiled(data):
+    X, y, scaler = data
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    compiled = compile_model(model, scaler)
+    table = ForestTable.from_compiled(compiled)
+    assert table is not None
+    np.testing.assert_array_equal(table.predict_proba(X), compiled.predict_proba(X))
+    # Valeurs hors de la grille d'entraînement (entre deux seuils, au-delà du dernier)
+    noisy = X + np.random.default_rng(0).normal(0, 3, X.shape)
+    np.testing.assert_array_equal(table.predict_proba(noisy), compiled.predict_proba(noisy))
+
+def test_forest_export_round_trip(data, tmp_path):
+    X, y, scaler = data
+    model = RandomForestClassifier(n_estimators=10, max_depth=6, random_state=0).fit(scaler.transform(X), y)
+    compiled = compile_model(model, scaler)
+    save_forest(compiled, str(tmp_path / "forest"))
+    loaded = load_forest(str(tmp_path / "forest"))
+    np.testing.assert_array_equal(loaded.predict_proba(X), compiled.predict_proba(X))
+
+def test_decision_threshold(data):
+    X, y, scaler = data
+    model = RandomForestClassifier(n_estimators=20, max_depth=8, random_state=0).fit(scaler.transform(X), y)
+    compiled = set_decision_threshold(compile_model(model, scaler), 0.3)
+    proba = compiled.predict_proba(X)[:, 1]
+    np.testing.assert_array_equal(compiled.predict(X), model.classes_[(proba > 0.3).astype(int)])
+    assert [compiled.predict_one(x) for x in X[:300].tolist()] == compiled.predict(X[:300]).tolist()
+    # Score recalé : le seuil du modèle tombe à 0.5
+    np.testing.assert_array_equal(alarm_scores(compiled, X) > 0.5, proba > 0.3)
+    table = ForestTable.from_compiled(compiled)
+    np.testing.assert_array_equal(table.predict(X), compiled.predict(X))
+
+def test_iot_modules_loaded_once(data):
+    # Un seul chemin d'import (iot.xxx) : un modèle compilé par le registre est reconnu par le rejeu
+    import sys
+    from iot import experiments, ingestion, model_server, replay_scoring, train_classifier  # noqa: F401
+    assert not {'fast_inference', 'storage', 'generate_data', 'preprocess'} & set(sys.modules)
+    X, y, scaler = data
+    model = RandomForestClassifier(n_estimators=5, max_depth=4, random_state=0).fit(scaler.transform(X), y)
+    assert replay_scoring.ForestTable.from_compiled(compile_model(model, scaler)) is not None
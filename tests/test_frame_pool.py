@@ -0,0 +1,57 @@
+import cv2
+import numpy as np
+import pytest
+
+from vision.frame_pool import BOX_COLOR, FramePool, draw_detections, pool_size
+from vision.pipeline import FramePacket, Pipeline, video_source
+
+WIDTH, HEIGHT, FRAMES = 64, 48, 12
+
+@pytest.fixture
+def video(tmp_path):
+    path = str(tmp_path / "cam.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (WIDTH, HEIGHT))
+    for i in range(FRAMES):
+        out.write(np.full((HEIGHT, WIDTH, 3), i * 20, dtype=np.uint8))
+    out.release()
+    return path
+
+def test_frames_decoded_into_pool_buffers(video):
+    cap = cv2.VideoCapture(video)
+    pool = FramePool.for_capture(cap, 2)
+    ok, first, slot = pool.read(cap)
+    assert ok and slot is not None and np.shares_memory(first, pool.block)
+    pool.read(cap)
+    # Réserve vide : frame allouée normalement, jamais un tampon encore utilisé
+    _, third, none = pool.read(cap)
+    assert none is None and not np.shares_memory(third, pool.block) and pool.misses == 1
+    packet = FramePacket(0, first, slot=slot)
+    pool.recycle(packet)
+    pool.recycle(packet)  # Rendu une seule fois
+    assert pool.free == [slot]
+    cap.release()
+
+def test_unexpected_size_falls_back_to_allocation(video):
+    cap = cv2.VideoCapture(video)
+    pool = FramePool((HEIGHT // 2, WIDTH, 3), 2)  # Taille annoncée fausse
+    ok, frame, slot = pool.read(cap)
+    assert ok and slot is None and frame.shape == (HEIGHT, WIDTH, 3)
+    assert pool.reallocated == 1 and len(pool.free) == 2
+    cap.release()
+
+def test_pipeline_returns_every_buffer(video):
+    cap = cv2.VideoCapture(video)
+    pool = FramePool.for_capture(cap, pool_size(2, queue_size=2))
+    seen = []
+    Pipeline(video_source(cap, pool), [("copy", lambda p: p), ("sink", lambda p: seen.append(int(p.frame[0, 0, 0])))],
+             queue_size=2, recycle=pool.recycle).run()
+    cap.release()
+    assert len(seen) == FRAMES and pool.misses == 0
+    assert sorted(pool.free) == list(range(pool.size))
+
+def test_draw_detections_in_place():
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    out = draw_detections(frame, [[10, 20, 40, 40]], scores=[0.9], ids=[3])
+    assert out is frame
+    assert (frame[40, 10:41] == BOX_COLOR).all()  # Bord bas du cadre
+    assert draw_detections(frame, np.empty((0, 4))) is frame
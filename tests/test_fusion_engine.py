@@ -0,0 +1,46 @@
+from fusion.fusion_engine import FusionEngine
+
+FPS = 30
+
+def run(engine, seconds, start=0.0, video=None, iot=None):
+    # Frames à 30 FPS ; renvoie l'état d'alerte de chaque frame
+    alerts = []
+    for i in range(int(round(seconds * FPS))):
+        ts = start + i / FPS
+        if video is not None:
+            engine.add_video(ts, [video])
+        if iot is not None and i == 0:
+            engine.add_iot(ts, iot)
+        alerts.append(engine.decide(ts)[0])
+    return alerts
+
+def test_short_burst_does_not_alert():
+    engine = FusionEngine(["zone"])
+    assert not any(run(engine, 2 / FPS, video=1.0) + run(engine, 2.0, start=2 / FPS, video=0.0))
+
+def test_hysteresis_and_debounce():
+    engine = FusionEngine(["zone"])
+    alerts = run(engine, 1.0, video=1.0)
+    assert not alerts[0] and alerts[-1]
+    # Entre les deux seuils : l'alerte tient
+    state = engine.zones[0]
+    state.video = 0.4
+    assert all(run(engine, 1.0, start=1.0, video=0.4))
+    # Sous le seuil bas : levée seulement après l'anti-rebond
+    alerts = run(engine, 1.0, start=2.0, video=0.0)
+    off = alerts.index(False)
+    assert all(alerts[:off]) and not any(alerts[off:])
+    assert off / FPS >= engine.debounce_off
+
+def test_single_iot_reading_alerts_then_fades():
+    engine = FusionEngine(["zone"])
+    alerts = run(engine, 5.0, iot=1.0)
+    start, end = alerts.index(True), len(alerts) - alerts[::-1].index(True)
+    assert abs(start / FPS - engine.debounce_on) <= 1 / FPS
+    assert not alerts[-1] and end / FPS < 5.0
+
+def test_out_of_order_reading_is_ignored():
+    engine = FusionEngine(["a", "b"])
+    engine.add_iot(2.0, 0.9)
+    engine.add_iot(1.0, 0.1)
+    assert all(state.iot == 0.9 and state.iot_ts == 2.0 for state in engine.zones)
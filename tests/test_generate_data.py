@@ -0,0 +1,15 @@
+import pandas as pd
+import pytest
+
+from iot.generate_data import generate_iot_data
+from iot.generate_data import iter_generated_chunks
+from iot.storage import SCHEMA
+
+@pytest.mark.parametrize("rows, chunk_size", [(3000, 1), (150_000, 999), (150_000, 65_536), (150_000, 200_000)])
+def test_generation_independent_of_chunk_size(rows, chunk_size):
+    expected = generate_iot_data(rows, seed=11)
+    pd.testing.assert_frame_equal(pd.concat(iter_generated_chunks(rows, chunk_size, seed=11), ignore_index=True), expected)
+
+def test_generate_empty():
+    df = generate_iot_data(0)
+    assert len(df) == 0 and list(df.columns) == list(SCHEMA)
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from iot.ingestion import READING_DTYPE, IngestionService, SensorState, decode_readings, encode_readings
+from iot.storage import FEATURES
+
+def values(n, fill):
+    return np.full((n, len(FEATURES)), fill, dtype=np.float32)
+
+def test_latest_reading_wins_whatever_the_arrival_order():
+    state = SensorState(capacity=4)
+    # Lot désordonné avec doublons : la lecture la plus récente de chaque capteur gagne
+    state.update(np.array([1, 1, 2, 1]), np.array([3.0, 1.0, 2.0, 2.0]), values(4, 0) + np.arange(4)[:, None],
+                 np.array([0.3, 0.1, 0.2, 0.2]))
+    reading, proba, ts = state.latest(1)
+    assert ts == 3.0 and proba == pytest.approx(0.3) and reading[0] == 0.0
+    # Lecture en retard d'un lot suivant : ignorée
+    state.update(np.array([1]), np.array([2.5]), values(1, 9), np.array([0.9]))
+    assert state.latest(1)[2] == 3.0
+    assert state.latest(0) is None and state.latest(99) is None
+
+def test_state_grows_and_keeps_known_sensors():
+    state = SensorState(capacity=2)
+    state.update(np.array([1]), np.array([1.0]), values(1, 5), np.array([0.8]))
+    state.update(np.array([10]), np.array([2.0]), values(1, 7), np.array([0.4]))
+    assert len(state.ts) >= 11
+    assert state.latest(1)[0] == [5.0] * len(FEATURES) and state.latest(10)[2] == 2.0
+    assert state.alerting().tolist() == [1]
+
+class FirstFeatureModel:
+    # Probabilité = première feature / 100 (alarm_scores lit predict_proba et le seuil du modèle)
+    def predict_proba(self, X):
+        p = np.asarray(X)[:, 0] / 100
+        return np.column_stack([1 - p, p])
+
+def test_service_scores_decoded_batches():
+    service = IngestionService(FirstFeatureModel(), transport=None)
+    readings = np.zeros(3, dtype=READING_DTYPE)
+    readings['sensor'] = [0, 1, 2]
+    readings['ts'] = [10.0, 10.0, 10.0]
+    readings[FEATURES[0]] = [10, 60, 90]
+    for record in readings:
+        service.emit(decode_readings(encode_readings(record[None])))  # Un datagramme par lecture
+    service.flush()
+    assert service.scored == 3 and service.batches == 1
+    assert [round(service.latest(i)[1], 2) for i in range(3)] == [0.1, 0.6, 0.9]
+    assert service.state.alerting().tolist() == [1, 2]
@@ -0,0 +1,50 @@
+import json
+import urllib.request
+
+from core.metrics import Metrics, MetricsServer
+
+def test_prometheus_text_format():
+    metrics = Metrics(prefix="t")
+    metrics.counter("alerts", "Alertes").inc(3)
+    metrics.gauge("queue_depth", "Profondeur", {'stage': "infer"}, fn=lambda: 2)
+    latency = metrics.histogram("stage_seconds", "Durée", {'stage': "infer"}, buckets=(0.01, 0.1))
+    for value in (0.005, 0.05, 0.05, 3.0):
+        latency.observe(value)
+    lines = metrics.prometheus().splitlines()
+
+    assert "# HELP t_alerts Alertes" in lines and "# TYPE t_alerts counter" in lines
+    assert "t_alerts_total 3" in lines
+    assert 't_queue_depth{stage="infer"} 2' in lines
+    assert "# TYPE t_stage_seconds histogram" in lines
+    # Buckets cumulés, +Inf = nombre total d'observations
+    assert [line for line in lines if line.startswith("t_stage_seconds_bucket")] == [
+        't_stage_seconds_bucket{stage="infer",le="0.01"} 1',
+        't_stage_seconds_bucket{stage="infer",le="0.1"} 3',
+        't_stage_seconds_bucket{stage="infer",le="+Inf"} 4']
+    assert 't_stage_seconds_count{stage="infer"} 4' in lines
+    assert 't_stage_seconds_sum{stage="infer"} 3.105' in lines
+    # Chaque famille n'est décrite qu'une fois, même avec plusieurs jeux de labels
+    metrics.gauge("queue_depth", "Profondeur", {'stage': "draw"}).set(1)
+    assert metrics.prometheus().count("# TYPE t_queue_depth gauge") == 1
+
+def test_same_metric_returned_for_same_labels():
+    metrics = Metrics()
+    assert metrics.counter("x", "", {'a': 1}) is metrics.counter("x", "", {'a': 1})
+    assert metrics.counter("x", "", {'a': 1}) is not metrics.counter("x", "", {'a': 2})
+
+def test_server_and_jsonl(tmp_path):
+    metrics = Metrics(prefix="t")
+    metrics.counter("alerts", "Alertes").inc()
+    path = str(tmp_path / "metrics.jsonl")
+    server = MetricsServer(metrics, port=0, jsonl_path=path, interval=60).start()
+    try:
+        url = f"http://127.0.0.1:{server.port}"
+        with urllib.request.urlopen(url + "/metrics") as response:
+            assert response.headers["Content-Type"].startswith("text/plain")
+            assert "t_alerts_total 1" in response.read().decode()
+        with urllib.request.urlopen(url + "/metrics.json") as response:
+            assert json.load(response)["t_alerts"] == 1
+    finally:
+        server.stop()
+    with open(path) as f:
+        assert json.loads(f.readline())["t_frames"] == 0  # Dernier état écrit à l'arrêt
@@ -0,0 +1,71 @@
+import time
+
+import numpy as np
+import pytest
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.preprocessing import StandardScaler
+
+from iot import model_server
+from iot.generate_data import generate_iot_data
+from iot.model_server import ModelServer, publish_site_model, site_files
+from iot.storage import FEATURES
+
+def publish(site, root, seed=0):
+    df = generate_iot_data(500, seed=seed)
+    X, y = df[FEATURES].to_numpy(np.float64), df['label'].to_numpy()
+    scaler = StandardScaler().fit(X)
+    model = RandomForestClassifier(n_estimators=3, max_depth=4, random_state=seed).fit(scaler.transform(X), y)
+    publish_site_model(site, model, scaler, root)
+
+@pytest.fixture
+def root(tmp_path, monkeypatch):
+    # Modèle global et modèles de site dans le dossier temporaire (jamais data/iot/)
+    root = str(tmp_path / "sites")
+    publish("_global", root)
+    monkeypatch.setattr(model_server, "MODEL_PATH", site_files("_global", root)[0])
+    monkeypatch.setattr(model_server, "SCALER_PATH", site_files("_global", root)[1])
+    monkeypatch.setattr(model_server, "FOREST_PATH", site_files("_global", root)[2])
+    for site in ("A", "B", "C"):
+        publish(site, root, seed=ord(site))
+    return root
+
+def test_lru_evicts_least_recently_used(root):
+    server = ModelServer(root, max_sites=2, reload_interval=0, warmup_runs=0)
+    a = server.get("A")
+    server.get("B")
+    assert server.get("A") is a  # A redevient le plus récent
+    server.get("C")             # Plein : B est oublié
+    assert set(server.stats()['sites']) == {"A", "C"} and server.evictions == 1
+    assert server.misses == 3 and server.hits == 1
+    # Site sans artefacts propres : servi par le modèle global
+    assert server.get("inconnu") is not a
+
+def test_preload_refuses_more_sites_than_memory(root):
+    with pytest.raises(ValueError):
+        ModelServer(root, max_sites=2, reload_interval=0).preload(["A", "B"])  # + le global = 3
+
+def test_miss_served_by_global_model_while_loading(root):
+    server = ModelServer(root, max_sites=4, reload_interval=60, warmup_runs=0).preload([]).start()
+    try:
+        fallback = server.get(None)
+        assert server.get("A") is fallback and server.fallbacks == 1  # Jamais de chargement dans l'appelant
+        deadline = time.time() + 10
+        while "A" not in server.stats()['sites'] and time.time() < deadline:
+            time.sleep(0.01)
+        assert server.get("A") is not fallback
+    finally:
+        server.stop()
+
+def test_hot_reload_after_two_stable_readings(root):
+    server = ModelServer(root, max_sites=4, reload_interval=0, warmup_runs=0).preload(["A"])
+    before = server.get("A")
+    publish("A", root, seed=99)
+    assert server.check() == 0  # Changement vu une fois : peut-être encore en cours d'écriture
+    assert server.check() == 1
+    after = server.get("A")
+    assert after is not before and server.stats()['sites']["A"]['version'] == 2
+    x = generate_iot_data(50, seed=5)[FEATURES].to_numpy(np.float64)
+    # Routage par site dans un même lot
+    sites = np.array(["A", "_global"] * 25)
+    proba = server.predict_proba(x, sites)
+    np.testing.assert_allclose(proba[::2], after.predict_proba(x[::2]))
@@ -0,0 +1,29 @@
+import numpy as np
+
+from vision.frame_pool import BOX_COLOR, draw_detections
+from vision.motion_gate import MotionGate, gated_stage
+from vision.pipeline import FramePacket
+
+def test_skipped_frame_reuses_detections_drawn_on_current_frame():
+    # Frame sautée par la porte de mouvement : les détections de la frame précédente sont
+    # reprises, mais dessinées sur la frame COURANTE (pas sur l'image gardée par le résultat)
+    calls = []
+
+    def infer(packet):
+        calls.append(packet.index)
+        packet.detections = np.array([[20, 20, 60, 60]], dtype=np.float32)
+        return packet
+
+    stage = gated_stage(infer, MotionGate("diff"))
+    first = np.full((120, 160, 3), 100, dtype=np.uint8)
+    second = first.copy()
+    second[100:104, 140:144] = 250  # Changement trop petit pour relancer la détection
+    packets = [stage(FramePacket(0, first)), stage(FramePacket(1, second))]
+    assert calls == [0] and packets[1].detections is packets[0].detections
+
+    before = first.copy()
+    out = draw_detections(packets[1].frame, packets[1].detections)
+    assert out is second
+    assert (second[100:104, 140:144] == 250).all()           # Contenu de la frame courante conservé
+    assert (second[60, 20:61] == BOX_COLOR).all()             # Cadre dessiné dessus
+    np.testing.assert_array_equal(first, before)              # La frame précédente n'est pas touchée
@@ -0,0 +1,67 @@
+import time
+
+import cv2
+import numpy as np
+import pytest
+
+from fusion import multi_camera
+from fusion.multi_camera import StreamContext, StreamReader
+
+WIDTH, HEIGHT, FRAMES = 64, 48, 20
+
+@pytest.fixture
+def video(tmp_path):
+    # Petite vidéo synthétique : la valeur des pixels donne l'indice de la frame
+    path = str(tmp_path / "cam.avi")
+    out = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), 25, (WIDTH, HEIGHT))
+    for i in range(FRAMES):
+        out.write(np.full((HEIGHT, WIDTH, 3), i * 10, dtype=np.uint8))
+    out.release()
+    return path
+
+class QuietServer:
+    # Serveur IoT minimal : aucune alerte capteur, pour isoler la partie vidéo
+    def alarm_scores(self, X, sites=None):
+        return np.zeros(len(X))
+
+def drain(reader):
+    items = []
+    while True:
+        item = reader.frames.get(timeout=5)
+        if item is None:
+            return items
+        items.append(item)
+        reader.pool.release(item[3])
+
+def test_file_reader_keeps_every_frame_in_order(video):
+    reader = StreamReader(0, video, queue_size=2)
+    reader.start()
+    items = drain(reader)
+    reader.join(timeout=5)
+    assert [index for index, _, _, _ in items] == list(range(FRAMES))
+    assert reader.dropped == 0
+    # Tous les tampons sont revenus dans la réserve
+    assert len(reader.pool.free) == reader.pool.size
+
+def test_live_reader_drops_oldest_frames(video):
+    reader = StreamReader(0, video, queue_size=2, drop_frames=True)
+    reader.start()
+    reader.join(timeout=5)  # Personne ne consomme : le lecteur ne doit jamais bloquer
+    assert not reader.is_alive()
+    # Restent la frame la plus récente et la fin de flux
+    assert reader.frames.get_nowait()[0] == FRAMES - 1 and reader.frames.get_nowait() is None
+    assert reader.dropped == FRAMES - 1
+
+def test_latency_window_is_bounded(video, tmp_path, monkeypatch):
+    monkeypatch.setattr(multi_camera, "LATENCY_SAMPLES", 8)
+    reader = StreamReader(0, video)
+    ctx = StreamContext(reader, str(tmp_path), QuietServer(), zones_path=None)
+    ctx.started_at = time.perf_counter()
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    for _ in range(40):  # Une lecture IoT à la 30e frame
+        ctx.process(frame, time.perf_counter(), np.empty((0, 4)))
+    ctx.close()
+    reader.cap.release()
+    assert len(ctx.latencies) == 8
+    stats = ctx.stats()
+    assert stats['frames'] == 40 and stats['alert_frames'] == 0
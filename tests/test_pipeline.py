@@ -0,0 +1,49 @@
+import time
+
+import pytest
+
+from vision.pipeline import DROP_OLDEST, BoundedQueue, Pipeline, _END
+
+def test_drop_oldest_recycles_dropped_items():
+    dropped = []
+    q = BoundedQueue(2, DROP_OLDEST, on_drop=dropped.append)
+    for item in range(5):
+        q.put(item)
+    assert dropped == [0, 1, 2] and q.dropped == 3
+    assert [q.get(), q.get()] == [3, 4]
+
+def test_end_of_stream_is_never_dropped():
+    q = BoundedQueue(1, DROP_OLDEST)
+    q.put(_END)
+    q.put("late")  # File pleine avec la fin de flux : c'est l'élément tardif qui est abandonné
+    assert q.get() is _END and q.depth() == 0 and q.dropped == 0
+
+def test_unknown_policy():
+    with pytest.raises(ValueError):
+        BoundedQueue(2, "drop_newest")
+
+@pytest.mark.parametrize("threaded", [True, False])
+def test_every_item_recycled_once(threaded):
+    recycled = []
+    out = []
+    stages = [("filter", lambda x: None if x % 3 == 0 else x),
+              ("double", lambda x: x * 2),
+              ("sink", out.append)]
+    Pipeline(range(30), stages, queue_size=2, threaded=threaded, recycle=recycled.append).run()
+    # BLOCK : aucune perte, ordre conservé
+    assert out == [2 * x for x in range(30) if x % 3]
+    # Chaque élément (filtré ou sorti de la dernière étape) rendu exactement une fois
+    assert len(recycled) == 30
+
+def test_drop_oldest_pipeline_recycles_everything():
+    recycled = []
+    out = []
+
+    def slow(x):
+        time.sleep(0.002)  # Étape plus lente que le décodage : les files débordent
+        return x
+
+    Pipeline(range(200), [("slow", slow), ("sink", out.append)], queue_size=1, drop_policy=DROP_OLDEST,
+             recycle=recycled.append).run()
+    # Frames jetées par les files pleines + frames sorties = frames décodées
+    assert len(recycled) == 200 and out == sorted(out)
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from fusion.fusion_engine import FUSION_OR, FusionEngine
+from iot.replay_scoring import AlertState, decide, finish
+
+FPS = 1000
+
+def live_intervals(proba, ts, tail=20.0):
+    # Moteur en direct, une frame toutes les 1/FPS ; chaque lecture est ajoutée (avec l'instant de sa
+    # mesure) à la première frame qui suit
+    engine = FusionEngine(["zone"])
+    alerts, k = [], 0
+    for i in range(int((ts[-1] + tail) * FPS)):
+        now = i / FPS
+        while k < len(ts) and ts[k] <= now:
+            engine.add_iot(ts[k], float(proba[k]))
+            k += 1
+        alerts.append(engine.decide(now)[0])
+    fronts = np.diff(np.asarray(alerts, dtype=np.int8), prepend=0, append=0)
+    return np.flatnonzero(fronts == 1) / FPS, np.flatnonzero(fronts == -1) / FPS
+
+def replay(proba, ts, chunk, fusion="engine"):
+    state = AlertState(fusion)
+    alert = np.concatenate([decide(proba[i:i + chunk], ts[i:i + chunk], state) for i in range(0, len(ts), chunk)])
+    return finish(state), alert
+
+def readings(n, period, seed=0):
+    rng = np.random.default_rng(seed)
+    burst = np.convolve(rng.random(n) < 0.03, np.ones(4), "same") > 0
+    proba = np.where(burst, rng.uniform(0.4, 1.0, n), rng.uniform(0.0, 0.6, n))
+    proba[rng.random(n) < 0.05] = 1.0
+    return proba, np.sort(np.arange(n) * period + rng.uniform(0, period / 2, n))
+
+def test_single_high_reading_alerts_like_live():
+    proba = np.zeros(20)
+    proba[10] = 1.0
+    intervals, alert = replay(proba, np.arange(20.0), 5)
+    assert len(intervals) == 1
+    assert intervals['start'][0] == pytest.approx(10.1) and intervals['end'][0] == pytest.approx(11.5)
+    assert alert.tolist() == [False] * 11 + [True] + [False] * 8  # Lectures à 11 s : alerte en cours
+
+@pytest.mark.parametrize("period", [1.0, 0.2])
+def test_matches_live_engine(period):
+    proba, ts = readings(300, period)
+    start, end = live_intervals(proba, ts)
+    intervals, _ = replay(proba, ts, 77)
+    assert len(intervals) == len(start) > 0
+    np.testing.assert_allclose(intervals['start'], start, atol=2 / FPS)
+    np.testing.assert_allclose(intervals['end'], end, atol=2 / FPS)
+
+@pytest.mark.parametrize("fusion", ["engine", FUSION_OR])
+def test_independent_of_chunk_size(fusion):
+    proba, ts = readings(2000, 0.1, seed=5)
+    expected, expected_alert = replay(proba, ts, len(ts), fusion)
+    for chunk in (1, 3, 128):
+        intervals, alert = replay(proba, ts, chunk, fusion)
+        pd.testing.assert_frame_equal(intervals, expected)
+        np.testing.assert_array_equal(alert, expected_alert)
+
+def test_or_rule_follows_each_reading():
+    proba, ts = readings(500, 1.0, seed=2)
+    intervals, alert = replay(proba, ts, 64, FUSION_OR)
+    np.testing.assert_array_equal(alert, proba > 0.5)
+    assert intervals['readings'].sum() == alert.sum()
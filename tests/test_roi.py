@@ -0,0 +1,18 @@
+import numpy as np
+
+from vision.roi import RoiCropper
+from vision.zones import DEFAULT_ZONES, ZoneSet
+
+WIDTH, HEIGHT = 200, 100
+
+def test_roi_cropper_shifts_boxes():
+    zone_set = ZoneSet(DEFAULT_ZONES, WIDTH, HEIGHT)
+    roi = RoiCropper(zone_set, margin=10)
+    assert (roi.x0, roi.y0, roi.x1, roi.y1) == (0, 40, WIDTH, HEIGHT)
+    frame = np.arange(HEIGHT * WIDTH * 3, dtype=np.uint32).reshape(HEIGHT, WIDTH, 3)
+    crop = roi.crop(frame)
+    assert crop.shape == (60, WIDTH, 3) and np.shares_memory(crop, frame)
+    boxes = roi.to_full([[5, 5, 20, 30]])
+    np.testing.assert_array_equal(boxes, [[5, 45, 20, 70]])
+    # Même pixel vu dans le crop et dans la frame complète
+    assert (crop[30, 20] == frame[int(boxes[0, 3]), int(boxes[0, 2])]).all()
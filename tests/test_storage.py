@@ -0,0 +1,31 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from iot.generate_data import generate_iot_data
+from iot.generate_data import iter_generated_chunks
+from iot.storage import DatasetWriter, SCHEMA, apply_schema, count_rows, iter_iot_chunks, load_iot_data, save_iot_data
+
+def test_round_trip(tmp_path):
+    df = apply_schema(generate_iot_data(5000, seed=3))  # Relu avec le schéma compact
+    path = str(tmp_path / "iot_data")
+    save_iot_data(iter_generated_chunks(5000, 1200, seed=3), path)
+    loaded = load_iot_data(path)
+    pd.testing.assert_frame_equal(loaded, df)
+    assert dict(loaded.dtypes) == {c: np.dtype(t) for c, t in SCHEMA.items()}
+    assert count_rows(path) == 5000
+    # Projection de colonnes et lecture en flux
+    assert list(load_iot_data(path, ['hour', 'label']).columns) == ['hour', 'label']
+    pd.testing.assert_frame_equal(pd.concat(iter_iot_chunks(path, chunk_size=700), ignore_index=True), df)
+
+def test_csv_fallback(tmp_path):
+    df = apply_schema(generate_iot_data(500, seed=4))
+    df.to_csv(tmp_path / "iot_data.csv", index=False)
+    pd.testing.assert_frame_equal(load_iot_data(str(tmp_path / "iot_data")), df)
+
+def test_unknown_columns(tmp_path):
+    path = str(tmp_path / "iot_data")
+    with DatasetWriter(path) as writer:
+        writer.append(generate_iot_data(10))
+    with pytest.raises(KeyError):
+        load_iot_data(path, ['pressure'])
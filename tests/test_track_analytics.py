@@ -0,0 +1,49 @@
+import numpy as np
+
+from vision.track_analytics import TrackStore
+
+def step(store, ts, ids, inside):
+    ids = np.asarray(ids, dtype=np.int64)
+    feet = np.zeros((len(ids), 2), dtype=np.float32)
+    hits = np.asarray(inside, dtype=bool).reshape(len(ids), 1)
+    return store.update(ts, ids, feet, hits)
+
+def test_enter_intrusion_exit():
+    store = TrackStore(["zone"], min_dwell=0.5)
+    assert [e['type'] for e in step(store, 0.0, [7], [True])] == ["enter"]
+    assert step(store, 0.4, [7], [True]) == []
+    events = step(store, 0.6, [7], [True])
+    assert [e['type'] for e in events] == ["intrusion"] and store.intruders() == [7]
+    assert step(store, 0.8, [7], [True]) == []  # Une seule alerte par (piste, zone)
+    events = step(store, 1.0, [7], [False])
+    assert events[0]['type'] == "exit" and events[0]['dwell_s'] == 1.0
+    assert store.describe(7)['zones'] == {'zone': 1.0}
+
+def test_stale_tracks_are_evicted():
+    store = TrackStore(["zone"], max_tracks=4, stale_after=2.0)
+    step(store, 0.0, [1, 2], [True, False])
+    step(store, 1.5, [2], [False])
+    events = step(store, 2.5, [2], [False])  # Piste 1 non revue depuis 2.5 s
+    assert events == [{'type': "exit", 'track': 1, 'zone': "zone", 'ts': 0.0, 'dwell_s': 0.0, 'lost': True}]
+    assert store.evicted == 1 and 1 not in store.slot_of and len(store.free) == 3
+
+def test_full_store_recycles_oldest_track():
+    store = TrackStore(["zone"], max_tracks=2, stale_after=10.0)
+    step(store, 0.0, [1], [False])
+    step(store, 1.0, [2], [False])
+    step(store, 2.0, [3, 2], [False, False])  # Plein : la piste 1 (vue il y a le plus longtemps) cède sa place
+    assert store.recycled == 1 and sorted(store.slot_of) == [2, 3]
+    assert len(store.trajectory(3)) == 1 and len(store.trajectory(2)) == 2
+    # La mémoire ne grandit pas avec le nombre de pistes vues
+    nbytes = store.nbytes()
+    for ts in range(3, 50):
+        step(store, float(ts), [ts + 10], [True])
+    assert store.nbytes() == nbytes and len(store.slot_of) <= 2
+
+def test_recycled_track_leaves_its_zones():
+    store = TrackStore(["zone"], max_tracks=1, stale_after=10.0)
+    step(store, 0.0, [1], [True])
+    events = step(store, 2.0, [2], [False])  # Plein : la piste 1, encore dans la zone, cède sa place
+    assert events == [{'type': "exit", 'track': 1, 'zone': "zone", 'ts': 0.0, 'dwell_s': 0.0, 'lost': True}]
+    assert store.recycled == 1 and store.slot_of == {2: 0}
+    assert store.describe(2)['inside'] == [] and store.describe(2)['zones'] == {}
@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from iot import train_classifier
+from iot.generate_data import generate_iot_data
+from iot.storage import DatasetWriter, count_chunks, iter_iot_chunks
+
+def write_parts(path, parts):
+    with DatasetWriter(path) as writer:
+        for df in parts:
+            writer.append(df)
+    return path
+
+@pytest.fixture
+def artefacts(tmp_path, monkeypatch):
+    # Jamais data/iot/ : modèle, scaler et export vont dans le dossier temporaire
+    monkeypatch.setattr(train_classifier, "MODEL_PATH", str(tmp_path / "model.pkl"))
+    monkeypatch.setattr(train_classifier, "SCALER_PATH", str(tmp_path / "scaler.pkl"))
+    monkeypatch.setattr(train_classifier, "FOREST_PATH", str(tmp_path / "forest"))
+    return tmp_path
+
+def test_count_chunks_restarts_at_each_part(tmp_path):
+    path = write_parts(str(tmp_path / "iot_data"), [generate_iot_data(1000, seed=s) for s in range(3)])
+    # 3 x 1000 lignes par blocs de 600 : 2 blocs par partie, pas 5
+    assert count_chunks(path, 600) == 6 == len(list(iter_iot_chunks(path, chunk_size=600)))
+    assert count_chunks(path) == 3
+
+@pytest.mark.parametrize("chunk_size, max_trees", [(600, 100), (600, 4), (50, 4)])
+def test_forest_never_exceeds_tree_cap(artefacts, monkeypatch, chunk_size, max_trees):
+    monkeypatch.setattr(train_classifier, "MAX_STREAM_TREES", max_trees)
+    path = write_parts(str(artefacts / "iot_data"), [generate_iot_data(1000, seed=s) for s in range(3)])
+    clf, cm = train_classifier.train_streaming("forest", chunk_size=chunk_size, path=path)
+    assert len(clf.estimators_) == max_trees
+    assert cm.sum() > 0
+
+def test_single_class_chunk_is_grouped(artefacts):
+    # Premier bloc entièrement "normal" : ses arbres attendent un bloc qui contient des intrusions
+    first = generate_iot_data(1000, seed=1)
+    first['label'] = 0
+    path = write_parts(str(artefacts / "iot_data"), [first, generate_iot_data(1000, seed=2)])
+    clf, _ = train_classifier.train_streaming("forest", chunk_size=1000, path=path)
+    assert all(len(tree.classes_) == 2 for tree in clf.estimators_)
+    assert clf.predict_proba(np.zeros((3, 5))).shape == (3, 2)
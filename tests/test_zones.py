@@ -0,0 +1,30 @@
+import numpy as np
+
+from vision.zones import DEFAULT_ZONES, ZoneSet
+
+WIDTH, HEIGHT = 200, 100
+TRIANGLE = {'name': "porte", 'points': [[100, 0], [199, 0], [199, 99]], 'normalized': False}
+
+def zones():
+    return ZoneSet(DEFAULT_ZONES + [TRIANGLE], WIDTH, HEIGHT)
+
+def test_hits_use_feet():
+    boxes = np.array([[10, 10, 30, 80],      # Pieds (20, 80) : moitié basse
+                      [10, 10, 30, 40],      # Pieds (20, 40) : nulle part
+                      [170, 0, 190, 20],     # Pieds (180, 20) : triangle en haut à droite
+                      [150, 0, 250, 300]])   # Pieds hors de l'image, ramenés dans le coin (199, 99)
+    hits = zones().hits(boxes)
+    np.testing.assert_array_equal(hits, [[True, False], [False, False], [False, True], [True, True]])
+    np.testing.assert_array_equal(zones().any_hits(boxes), hits.any(axis=1))
+    assert zones().counts(hits) == {'zone_bas': 2, 'porte': 2}
+    assert zones().hits(np.empty((0, 4))).shape == (0, 2)
+
+def test_fill_stays_inside_zone():
+    zone_set = zones()
+    frame = np.zeros((HEIGHT, WIDTH, 3), dtype=np.uint8)
+    zone_set.fill(frame, 0, (0, 0, 255), alpha=1.0)
+    assert (frame[:49] == 0).all() and (frame[51:, :, 2] == 255).all()
+    frame[:] = 0
+    zone_set.fill(frame, 1, (0, 0, 255), alpha=1.0)
+    inside = (zone_set.mask & 2) != 0
+    assert (frame[inside, 2] == 255).all() and (frame[~inside] == 0).all()